@@ -1,118 +1,321 @@
 # generate_test_data.py
+#
+# Synthetic trade journal generator. Trades are generated column-wise with NumPy from a seeded
+# Generator, so the same seed always gives the same journal, and a million trades take seconds.
+#
+#   python Test_data_generator.py --start 2024-01-01 --end 2025-06-22 --seed 7                 # JSON (importable)
+#   python Test_data_generator.py --start 2000-01-03 --end 2019-12-31 --avg-trades-per-day 200 \
+#       --format sqlite --output big.db --workers 4                                              # ~1M trades
+#
+# Output formats: json (list of trades, what the Historical Data page imports), jsonl, sqlite
+# (bulk insert into a trades_journal table) and parquet (needs pyarrow or fastparquet).
+# Large ranges are generated in chunks of trading days, optionally in several processes; every
+# chunk gets its own seed derived from --seed, so the result does not depend on --workers.
 
+import argparse
 import json
-from datetime import datetime, timedelta, date
-import random
-
-def generate_synthetic_trade_data(start_date_str, end_date_str, avg_trades_per_day=10):
-    start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
-    end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date()
-
-    all_trades = []
-    trade_id_counter = 1 # User-facing Trade #, sequential within this generated dataset
-
-    current_date = start_date
-    while current_date <= end_date:
-        # Skip weekends if desired for realistic trading days
-        if current_date.weekday() >= 5: # Saturday (5) or Sunday (6)
-            current_date += timedelta(days=1)
-            continue
-
-        num_trades_today = random.randint(avg_trades_per_day - 3, avg_trades_per_day + 5)
-        num_trades_today = max(0, num_trades_today) # Ensure no negative trades
-
-        for _ in range(num_trades_today):
-            # Generate random Entry and Exit Times within the current day
-            entry_hour = random.randint(9, 15) # Example: 9 AM to 3 PM
-            entry_minute = random.randint(0, 59)
-            entry_second = random.randint(0, 59)
-            entry_time_obj = datetime(current_date.year, current_date.month, current_date.day,
-                                      entry_hour, entry_minute, entry_second)
-
-            exit_duration_minutes = random.randint(5, 120) # Trade lasts 5 min to 2 hours
-            exit_time_obj = entry_time_obj + timedelta(minutes=exit_duration_minutes)
-            
-            # Ensure exit time is still on the same day if desired, or handle overnight trades
-            if exit_time_obj.date() > current_date:
-                exit_time_obj = datetime(current_date.year, current_date.month, current_date.day, 16, 0, 0) # Force close by 4 PM
-
-            # Randomize P&L and points
-            futures_type = random.choice(["MES", "ES"])
-            size = random.choice([1, 2, 5, 10]) # MES
-            if futures_type == "ES":
-                size = random.choice([1, 2, 5]) # ES, bigger size is fewer contracts
-            
-            mf = 50 if futures_type == "ES" else 5 # Multiplier factor
-
-            pnl_direction = random.choices(["win", "loss", "be"], weights=[0.45, 0.45, 0.10], k=1)[0]
-            
-            points_realized = 0
-            realized_pnl = 0
-
-            if pnl_direction == "win":
-                points_realized = random.choice([4, 5, 8, 10, 15, 20])
-                realized_pnl = points_realized * size * mf
-            elif pnl_direction == "loss":
-                points_realized = -random.choice([3, 4, 5, 8, 10])
-                realized_pnl = points_realized * size * mf
-            else: # break-even
-                points_realized = 0
-                realized_pnl = 0
-            
-            # Ensure Status matches P&L for consistency with dashboard logic
-            status = "Win" if realized_pnl > 0 else ("Lose" if realized_pnl < 0 else "BE")
-
-            # Randomize dropdown values
-            trade_came_to_me = random.choice(["Yes", "No", ""])
-            with_value = random.choice(["Yes", "No", ""])
-            score = random.choice(["A+", "B", "C", ""])
-            entry_quality = random.choice([
-                "Waited Patiently", "Calm / Standard", "Impulsive / FOMO", 
-                "Hesitant / Missed", "Forced / Overtraded", ""
-            ])
-            emotional_state = random.choice([
-                "Calm / Disciplined", "Get back losses", "FOMO", 
-                "Fear of giving away profit", "Overconfidence", 
-                "Frustration / Impatience", "Distracted", ""
-            ])
-            sizing = random.choice(["Base", "Increased", "Reduced"])
-            notes = random.choice(["", "Good trade", "Missed opportunity", "Overtraded", "Followed plan"])
-
-            trade_entry = {
-                "id": None, # Will be auto-generated by SQLite on import
-                "Trade #": float(trade_id_counter), # Ensure float type for consistency with DataTable
-                "Futures Type": futures_type,
-                "Size": float(size),
-                "Stop Loss (pts)": float(random.choice([3, 5, 8, 10, 15])),
-                "Risk ($)": float(random.choice([mf*5, mf*8, mf*10, mf*15])), # Example risk based on MF
-                "Status": status,
-                "Points Realized": float(points_realized),
-                "Realized P&L": float(realized_pnl),
-                "Entry Time": entry_time_obj.strftime("%Y-%m-%d %H:%M:%S"),
-                "Exit Time": exit_time_obj.strftime("%Y-%m-%d %H:%M:%S"),
-                "Trade came to me": trade_came_to_me,
-                "With Value": with_value,
-                "Score": score,
-                "Entry Quality": entry_quality,
-                "Emotional State": emotional_state,
-                "Sizing": sizing,
-                "Notes": notes,
-            }
-            all_trades.append(trade_entry)
-            trade_id_counter += 1
-
-        current_date += timedelta(days=1)
-
-    return all_trades
+import os
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'utils'))
+import database as db # Column list and table name of the journal
+
+# Distributions used when generating trades. Pass a dict with some of these keys to override them.
+# Categorical values are either a list (uniform choice) or a {value: weight} dict.
+DEFAULT_DISTRIBUTIONS = {
+    "trades_per_day_spread": (-3, 5), # Trades per day drawn uniformly from avg + spread (inclusive)
+    "entry_window": ("09:00", "16:00"), # Entry times drawn uniformly in [start, end)
+    "duration_minutes": (5, 120), # Trade length, uniform (inclusive)
+    "session_close": "16:00", # Exit time used when a trade would run past midnight
+    "futures_types": {
+        "MES": {"weight": 1, "mf": 5, "sizes": [1, 2, 5, 10]},
+        "ES": {"weight": 1, "mf": 50, "sizes": [1, 2, 5]}, # Bigger contract, fewer of them
+    },
+    "outcomes": {"win": 0.45, "loss": 0.45, "be": 0.10},
+    "win_points": [4, 5, 8, 10, 15, 20],
+    "loss_points": [3, 4, 5, 8, 10],
+    "stop_loss_points": [3, 5, 8, 10, 15],
+    "risk_multiples": [5, 8, 10, 15], # Risk ($) = multiplier factor * one of these
+    "categories": {
+        "Trade came to me": ["Yes", "No", ""],
+        "With Value": ["Yes", "No", ""],
+        "Score": ["A+", "B", "C", ""],
+        "Entry Quality": ["Waited Patiently", "Calm / Standard", "Impulsive / FOMO",
+                          "Hesitant / Missed", "Forced / Overtraded", ""],
+        "Emotional State": ["Calm / Disciplined", "Get back losses", "FOMO",
+                            "Fear of giving away profit", "Overconfidence",
+                            "Frustration / Impatience", "Distracted", ""],
+        "Sizing": ["Base", "Increased", "Reduced"],
+        "Notes": ["", "Good trade", "Missed opportunity", "Overtraded", "Followed plan"],
+    },
+}
+
+# Trading calendar defaults: weekdays only, no holidays (np.busday weekmask syntax)
+DEFAULT_WEEKMASK = "1111100"
+
+# Trading days per generation chunk (one chunk = one task for the worker processes)
+DEFAULT_CHUNK_DAYS = 250
+
+NUMERIC_COLUMNS = ["Trade #", "Size", "Stop Loss (pts)", "Risk ($)", "Points Realized", "Realized P&L"]
+
+
+############################################################################
+# Calendar and generation
+############################################################################
+def trading_days(start_date_str, end_date_str, weekmask=DEFAULT_WEEKMASK, holidays=()):
+    """Trading days from start to end (inclusive) as a datetime64[D] array."""
+    days = np.arange(np.datetime64(start_date_str, 'D'), np.datetime64(end_date_str, 'D') + 1)
+    return days[np.is_busday(days, weekmask=weekmask, holidays=list(holidays))]
+
+
+def generate_trade_columns(days, avg_trades_per_day=10, seed=None, distributions=None):
+    """
+    Generates trades for the given trading days (datetime64[D] array) and returns them as
+    {column: numpy array} in COLUMNS_TO_STORE order, sorted by day (Trade # starts at 1).
+    seed: anything numpy.random.default_rng accepts (int, SeedSequence, ...); None = unseeded.
+    """
+    dist = _merged_distributions(distributions)
+    rng = np.random.default_rng(seed)
+
+    low, high = dist["trades_per_day_spread"]
+    trades_per_day = np.maximum(rng.integers(avg_trades_per_day + low, avg_trades_per_day + high + 1, len(days)), 0)
+    n = int(trades_per_day.sum())
+    trade_days = np.repeat(days, trades_per_day)
+
+    # Entry / exit times, in seconds after midnight
+    window_start, window_end = (_seconds(t) for t in dist["entry_window"])
+    entry_seconds = rng.integers(window_start, window_end, n)
+    duration_low, duration_high = dist["duration_minutes"]
+    exit_seconds = entry_seconds + rng.integers(duration_low, duration_high + 1, n) * 60
+    exit_seconds = np.where(exit_seconds >= 24 * 3600, _seconds(dist["session_close"]), exit_seconds) # Same-day close
+    day_start = trade_days.astype('datetime64[s]')
+
+    # Contract, size and multiplier factor
+    futures = dist["futures_types"]
+    type_names = list(futures)
+    type_index = rng.choice(len(type_names), n, p=_normalized([futures[name]["weight"] for name in type_names]))
+    size = np.empty(n)
+    mf = np.empty(n)
+    for i, name in enumerate(type_names):
+        is_type = type_index == i
+        size[is_type] = rng.choice(futures[name]["sizes"], is_type.sum())
+        mf[is_type] = futures[name]["mf"]
+
+    # Outcome -> points -> P&L
+    outcome_names = list(dist["outcomes"])
+    outcome = rng.choice(outcome_names, n, p=_normalized(list(dist["outcomes"].values())))
+    points = np.zeros(n)
+    points = np.where(outcome == "win", rng.choice(dist["win_points"], n), points)
+    points = np.where(outcome == "loss", -rng.choice(dist["loss_points"], n), points)
+    pnl = points * size * mf
+
+    columns = {
+        "Trade #": np.arange(1, n + 1, dtype=float),
+        "Futures Type": np.asarray(type_names)[type_index],
+        "Size": size,
+        "Stop Loss (pts)": rng.choice(dist["stop_loss_points"], n).astype(float),
+        "Risk ($)": mf * rng.choice(dist["risk_multiples"], n),
+        "Status": np.where(pnl > 0, "Win", np.where(pnl < 0, "Lose", "BE")), # Matches the dashboard logic
+        "Points Realized": points,
+        "Realized P&L": pnl,
+        "Entry Time": _format_times(day_start + entry_seconds.astype('timedelta64[s]')),
+        "Exit Time": _format_times(day_start + exit_seconds.astype('timedelta64[s]')),
+    }
+    for column, values in dist["categories"].items():
+        columns[column] = _choose(rng, values, n)
+    for column in db.COLUMNS_TO_STORE: # Columns the generator has no values for (e.g. Market Conditions)
+        columns.setdefault(column, np.full(n, None, dtype=object))
+    return {column: columns[column] for column in db.COLUMNS_TO_STORE}
+
+
+def generate_synthetic_trade_data(start_date_str, end_date_str, avg_trades_per_day=10, seed=None, distributions=None):
+    """
+    Returns the trades from start to end (inclusive, weekdays) as a list of dicts, the format the
+    JSON import of the Historical Data page expects ("id" is None; SQLite assigns it on import).
+    """
+    columns = generate_trade_columns(
+        trading_days(start_date_str, end_date_str), avg_trades_per_day, seed=seed, distributions=distributions
+    )
+    return _columns_to_records(columns)
+
+
+def generate_chunks(start_date_str, end_date_str, avg_trades_per_day=10, seed=None, distributions=None,
+                    weekmask=DEFAULT_WEEKMASK, holidays=(), chunk_days=DEFAULT_CHUNK_DAYS, workers=1):
+    """
+    Yields {column: array} chunks covering start..end in day order, generated by `workers`
+    processes. Trade # continues across chunks. Each chunk's seed is spawned from `seed`, so the
+    output is the same for any number of workers.
+    """
+    days = trading_days(start_date_str, end_date_str, weekmask, holidays)
+    day_chunks = [days[i:i + chunk_days] for i in range(0, len(days), chunk_days)]
+    chunk_seeds = np.random.SeedSequence(seed).spawn(len(day_chunks))
+    tasks = [(chunk, avg_trades_per_day, chunk_seed, distributions) for chunk, chunk_seed in zip(day_chunks, chunk_seeds)]
+
+    next_trade_number = 1
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = pool.map(_generate_chunk, tasks) # Results come back in submission order
+            for columns in chunks:
+                next_trade_number = _renumber(columns, next_trade_number)
+                yield columns
+    else:
+        for task in tasks:
+            columns = _generate_chunk(task)
+            next_trade_number = _renumber(columns, next_trade_number)
+            yield columns
+
+
+############################################################################
+# Writers (each takes an iterable of column chunks and returns the number of trades written)
+############################################################################
+def write_json(chunks, path):
+    """Writes a JSON list of trades (the Historical Data page's import format)."""
+    count = 0
+    with open(path, 'w') as f:
+        f.write('[')
+        for columns in chunks:
+            for record in _columns_to_records(columns):
+                f.write((',\n' if count else '\n') + json.dumps(record))
+                count += 1
+        f.write('\n]\n')
+    return count
+
+
+def write_jsonl(chunks, path):
+    """Writes one JSON trade per line."""
+    import pandas as pd
+    count = 0
+    with open(path, 'w') as f:
+        for columns in chunks:
+            frame = pd.DataFrame(columns)
+            if len(frame):
+                f.write(frame.to_json(orient='records', lines=True).rstrip('\n') + '\n')
+            count += len(frame)
+    return count
+
+
+def write_sqlite(chunks, path):
+    """Bulk inserts the trades into the trades_journal table of the SQLite file at path."""
+    conn = sqlite3.connect(path)
+    column_definitions = ', '.join(
+        f'"{col}" REAL' if col in NUMERIC_COLUMNS else f'"{col}" TEXT' for col in db.COLUMNS_TO_STORE
+    ) # Same schema as database.initialize_db()
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {db.TABLE_NAME} (id INTEGER PRIMARY KEY AUTOINCREMENT, {column_definitions})")
+    column_names = ', '.join(f'"{col}"' for col in db.COLUMNS_TO_STORE)
+    placeholders = ', '.join('?' for _ in db.COLUMNS_TO_STORE)
+    insert_sql = f"INSERT INTO {db.TABLE_NAME} ({column_names}) VALUES ({placeholders})"
+    count = 0
+    try:
+        for columns in chunks:
+            conn.executemany(insert_sql, zip(*(columns[col].tolist() for col in db.COLUMNS_TO_STORE)))
+            conn.commit() # One transaction per chunk
+            count += len(columns["Trade #"])
+    finally:
+        conn.close()
+    return count
+
+
+def write_parquet(chunks, path):
+    """Writes a Parquet file (requires pyarrow or fastparquet)."""
+    import pandas as pd
+    frame = pd.concat([pd.DataFrame(columns) for columns in chunks], ignore_index=True)
+    frame.to_parquet(path, index=False)
+    return len(frame)
+
+
+WRITERS = {"json": write_json, "jsonl": write_jsonl, "sqlite": write_sqlite, "parquet": write_parquet}
+EXTENSIONS = {"json": "json", "jsonl": "jsonl", "sqlite": "db", "parquet": "parquet"}
+
+
+############################################################################
+# Helper Functions
+############################################################################
+def _generate_chunk(task):
+    days, avg_trades_per_day, seed, distributions = task
+    return generate_trade_columns(days, avg_trades_per_day, seed=seed, distributions=distributions)
+
+
+def _renumber(columns, first_trade_number):
+    """Shifts a chunk's Trade # to continue from first_trade_number; returns the next number."""
+    columns["Trade #"] += first_trade_number - 1
+    return first_trade_number + len(columns["Trade #"])
+
+
+def _merged_distributions(overrides):
+    dist = dict(DEFAULT_DISTRIBUTIONS)
+    if overrides:
+        dist.update(overrides)
+        if "categories" in overrides: # Categories are merged per column
+            dist["categories"] = {**DEFAULT_DISTRIBUTIONS["categories"], **overrides["categories"]}
+    return dist
+
+
+def _normalized(weights):
+    weights = np.asarray(weights, dtype=float)
+    return weights / weights.sum()
+
+
+def _choose(rng, values, n):
+    """n draws from a list (uniform) or a {value: weight} dict."""
+    if isinstance(values, dict):
+        return rng.choice(np.asarray(list(values), dtype=object), n, p=_normalized(list(values.values())))
+    return rng.choice(np.asarray(values, dtype=object), n)
+
+
+def _seconds(hh_mm):
+    hours, minutes = hh_mm.split(':')
+    return int(hours) * 3600 + int(minutes) * 60
+
+
+def _format_times(times):
+    """datetime64[s] array -> 'YYYY-MM-DD HH:MM:SS' strings (the format the app stores)."""
+    return np.char.replace(np.datetime_as_string(times, unit='s'), 'T', ' ').astype(object)
+
+
+def _columns_to_records(columns):
+    names = ["id", *columns]
+    rows = zip([None] * len(columns["Trade #"]), *(values.tolist() for values in columns.values()))
+    return [dict(zip(names, row)) for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic trade journal")
+    parser.add_argument("--start", default="2024-01-01", help="First day (YYYY-MM-DD)")
+    parser.add_argument("--end", default=datetime.now().strftime("%Y-%m-%d"), help="Last day (YYYY-MM-DD, inclusive)")
+    parser.add_argument("--avg-trades-per-day", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=None, help="Seed for a reproducible journal")
+    parser.add_argument("--format", choices=list(WRITERS), default="json")
+    parser.add_argument("--output", help="Output path (default: allData_synthetic_<start>_<end>.<ext>)")
+    parser.add_argument("--distributions", help="JSON file overriding DEFAULT_DISTRIBUTIONS keys")
+    parser.add_argument("--weekmask", default=DEFAULT_WEEKMASK, help="Trading weekdays, Monday first (e.g. 1111100)")
+    parser.add_argument("--holidays", default="", help="Comma-separated non-trading days (YYYY-MM-DD)")
+    parser.add_argument("--chunk-days", type=int, default=DEFAULT_CHUNK_DAYS, help="Trading days per chunk")
+    parser.add_argument("--workers", type=int, default=1, help="Processes generating chunks")
+    args = parser.parse_args()
+
+    distributions = None
+    if args.distributions:
+        with open(args.distributions) as f:
+            distributions = json.load(f)
+    output = args.output or f"allData_synthetic_{args.start.replace('-', '')}_{args.end.replace('-', '')}.{EXTENSIONS[args.format]}"
+
+    chunks = generate_chunks(
+        args.start, args.end, args.avg_trades_per_day, seed=args.seed, distributions=distributions,
+        weekmask=args.weekmask, holidays=[day for day in args.holidays.split(',') if day],
+        chunk_days=args.chunk_days, workers=args.workers,
+    )
+    try:
+        count = WRITERS[args.format](chunks, output)
+    except ImportError as e:
+        print(f"Error: the {args.format} format needs an extra package ({e}).")
+        sys.exit(1)
+    print(f"Generated {count} synthetic trades to {output}")
+
 
 if __name__ == "__main__":
-    start_date = "2024-01-01"
-    end_date = "2025-06-22" # Current date
-    
-    synthetic_data = generate_synthetic_trade_data(start_date, end_date)
-    
-    output_filename = f"allData_synthetic_{start_date.replace('-', '')}_{end_date.replace('-', '')}.json"
-    with open(output_filename, 'w') as f:
-        json.dump(synthetic_data, f, indent=2)
-    
-    print(f"Generated {len(synthetic_data)} synthetic trades to {output_filename}")
\ No newline at end of file
+    main()
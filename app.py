@@ -1,5 +1,31 @@
 import dash
 from dash import dcc, html
+from flask import request
+from dash.dependencies import Input, ClientsideFunction
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'utils')) # Add 'utils' to Python path
+import app_config
+import database as db
+from equity_series import get_equity_store
+from lazy_imports import import_in_background, wait_for_background_imports
+import app_logging # Structured, queued logging (configured by the startup hook)
+import instrumentation # Per-callback timings for /metrics and the Diagnostics page
+from compression import install_compression # Brotli/gzip for callback responses and JS bundles
+import background # Process that runs the background callbacks' jobs
+import change_events # /events stream telling open pages when trades change
+import journals # Per-tab journal selection, per-journal connection pools and caches
+import trade_archive # Opt-in monthly archive partitions, rolled by a background thread
+import backups # Opt-in scheduled snapshots of the journals, taken by a background thread
+
+log = app_logging.get_logger("app") # Also when run as __main__
+
+# Pages import pandas lazily and Dash imports plotly.io.json on its first response. Both load in
+# a background thread from here on, while the server binds and the browser fetches the page.
+import_in_background("pandas", "plotly.io.json")
 
 # Initialize the Dash app
 # use_pages=True enables the multi-page feature
@@ -68,8 +94,70 @@ app.layout = html.Div([
     dcc.Store(id='current-pressing-index', data=0), # Global state for pressing roadmap
     dcc.Download(id="download-dataframe-xlsx"),     # For triggering file downloads
     dcc.Download(id="download-saved-trades"),      # For triggering saved data download
+    dcc.Store(id='data-change-event'),              # Latest trade change event, set by assets/change_events.js
+    dcc.Store(id=journals.STORE_ID, storage_type='session'), # This tab's journal (None: the default one), set on Settings
 ])
 
-# Run the Dash app
+# The /events stream follows the tab's journal
+dash.clientside_callback(
+    ClientsideFunction(namespace='change_events', function_name='follow_journal'),
+    Input(journals.STORE_ID, 'data'),
+    prevent_initial_call=True
+)
+
+# --- App-level startup hook ---
+# Page modules no longer read config.json or touch the database when they are imported.
+# That one-time setup happens here instead, before the first request is served, so the
+# server (and every dev-reloader restart) binds without waiting on disk I/O.
+_startup_done = False
+_startup_lock = threading.Lock()
+
+def run_startup_tasks():
+    """Loads config.json and initializes the configured database. Safe to call more than once."""
+    global _startup_done
+    if _startup_done:
+        return
+    with _startup_lock:
+        if _startup_done:
+            return
+        start = time.perf_counter()
+        app_config.get_config()
+        app_logging.configure_logging() # config.json "log_level" / "log_format"
+        db.ensure_db_initialized()
+        get_equity_store().install() # Triggers on trades_journal start tracking changed days
+        change_events.get_change_feed().install() # ... and logging them for the /events stream
+        # Dash has copied the pages' callbacks into app.callback_map by now (its own before_request
+        # hooks run first), so every one of them gets wrapped
+        instrumentation.instrument_callbacks(app)
+        background.start_job_server() # So the first import/recompute job doesn't wait for it
+        trade_archive.start_scheduler(journals.available_journals) # Idle unless config.json "archive" enabled
+        backups.start_scheduler(journals.available_journals) # Idle unless config.json "backups" enabled
+        _startup_done = True
+        log.info("Startup tasks finished in %.1f ms", (time.perf_counter() - start) * 1000)
+
+app.server.before_request(run_startup_tasks)
+
+def wait_for_warm_imports():
+    """Holds Dash's JSON requests (layout, callbacks) until the background imports are done."""
+    # They serialize through plotly, which would pick up a half-imported pandas. Other requests
+    # (the index page, JS bundles, /events) don't touch either and never wait.
+    if request.path.endswith(('/_dash-layout', '/_dash-update-component')):
+        wait_for_background_imports()
+
+app.server.before_request(wait_for_warm_imports)
+
+# Every request runs against the journal its tab picked (X-Journal header / ?journal=)
+journals.install_journal_selection(app.server)
+
+# Callback latency histograms in Prometheus text format (served to local clients only)
+instrumentation.register_metrics_endpoint(app.server)
+
+# Live change notifications for the open pages (Server-Sent Events)
+change_events.register_events_endpoint(app.server)
+
+# Compress responses (table rows and figures are mostly repetitive JSON)
+install_compression(app.server)
+
+# Run the Dash app (development server with debug tooling; for production use serve.py / wsgi:server)
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
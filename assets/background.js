@@ -0,0 +1,13 @@
+// assets/background.js - Clientside side of utils/background.py's load_trigger()
+//
+// A page layout that had nothing cached to show renders placeholders and '<prefix>-load-pending'
+// = true. load_if_pending then sets '<prefix>-load' once, which starts the page's callback (a
+// background job for the analytics pages) without holding up the layout request.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    background: {
+        load_if_pending: function (pending) {
+            // A constant value, so cache_by_data callbacks keep hitting their job cache
+            return pending ? true : window.dash_clientside.no_update;
+        }
+    }
+});
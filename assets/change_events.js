@@ -0,0 +1,77 @@
+// assets/change_events.js - Live change notifications (see utils/change_events.py)
+//
+// Listens to the server's /events stream and puts every change event ({seq, db, days}) into the
+// 'data-change-event' store of app.layout; the pages' callbacks take that store as an input.
+// EventSource reconnects by itself after a dropped connection; when it gives up (server down, 503
+// because too many tabs are open, events disabled) a new one is opened with a growing delay.
+// The stream follows the tab's journal (?journal=, see assets/journals.js); when the Settings page
+// switches journals, follow_journal below reopens it for the new one.
+(function () {
+    if (!window.EventSource) {
+        return; // Very old browser: pages just don't update live
+    }
+    var MIN_DELAY_MS = 1000;
+    var MAX_DELAY_MS = 5 * 60 * 1000;
+    var delay = MIN_DELAY_MS;
+    var source = null;
+
+    function eventsUrl(journal) {
+        // Honour the app's url prefix (Dash writes its config into the page)
+        var config = document.getElementById('_dash-config');
+        var prefix = config ? JSON.parse(config.textContent).requests_pathname_prefix || '/' : '/';
+        if (journal === undefined && window.dashJournal) {
+            journal = window.dashJournal.current();
+        }
+        return prefix + 'events' + (journal ? '?journal=' + encodeURIComponent(journal) : '');
+    }
+
+    function connect(journal) {
+        source = new EventSource(eventsUrl(journal));
+        source.onopen = function () {
+            delay = MIN_DELAY_MS;
+        };
+        source.addEventListener('change', function (message) {
+            var clientside = window.dash_clientside;
+            if (clientside && clientside.set_props) { // Not before Dash has rendered the layout
+                clientside.set_props('data-change-event', {data: JSON.parse(message.data)});
+            }
+        });
+        var current = source;
+        source.onerror = function () {
+            if (current.readyState === EventSource.CLOSED && current === source) {
+                setTimeout(function () {
+                    if (current === source) { // Not replaced by a journal switch meanwhile
+                        connect();
+                    }
+                }, delay);
+                delay = Math.min(delay * 2, MAX_DELAY_MS);
+            }
+        };
+    }
+
+    // Called by the follow_journal clientside callback with the tab's new journal
+    window.addEventListener('dash-journal-change', function (e) {
+        if (source) {
+            source.close();
+        }
+        delay = MIN_DELAY_MS;
+        connect(e.detail);
+    });
+
+    // journals.js may load after this file (assets load in name order): connect once all are in
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', function () { connect(); });
+    } else {
+        connect();
+    }
+})();
+
+// Clientside callbacks
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    change_events: {
+        // app.layout: the tab switched journals (journal-id store), so follow the new one's changes
+        follow_journal: function (journal) {
+            window.dispatchEvent(new CustomEvent('dash-journal-change', {detail: journal}));
+        }
+    }
+});
@@ -0,0 +1,38 @@
+// assets/journals.js - Sends the tab's journal with every Dash request (see utils/journals.py)
+//
+// The journal is kept in app.layout's 'journal-id' dcc.Store, which keeps it in this tab's
+// sessionStorage (as JSON, under the store's id). dash-renderer has no hook for request headers,
+// so fetch is wrapped: requests to the app's /_dash-* endpoints get an X-Journal header and the
+// server runs them against that journal. A tab that hasn't picked one sends nothing and gets the
+// default journal.
+(function () {
+    var STORE_ID = 'journal-id';
+    var HEADER = 'X-Journal';
+
+    function currentJournal() {
+        try {
+            var journal = JSON.parse(window.sessionStorage.getItem(STORE_ID));
+            return typeof journal === 'string' ? journal : null;
+        } catch (e) {
+            return null; // Storage disabled or not JSON
+        }
+    }
+
+    window.dashJournal = {current: currentJournal}; // Also used by change_events.js
+
+    var originalFetch = window.fetch;
+    if (!originalFetch) {
+        return;
+    }
+    window.fetch = function (input, init) {
+        var journal = currentJournal();
+        var url = typeof input === 'string' ? input : (input && input.url) || String(input);
+        if (journal && url.indexOf('_dash-') !== -1) {
+            init = Object.assign({}, init);
+            var headers = new Headers(init.headers || (input instanceof Request ? input.headers : undefined));
+            headers.set(HEADER, journal);
+            init.headers = headers;
+        }
+        return originalFetch.call(this, input, init);
+    };
+})();
@@ -0,0 +1,81 @@
+# backup.py - Snapshots of a journal from the command line: take, list, restore
+#
+#   python backup.py snapshot [--journal trades.db]
+#   python backup.py list [--journal trades.db]
+#   python backup.py restore (SNAPSHOT | --at "YYYY-MM-DD HH:MM") [--journal trades.db] [--yes]
+#
+# The journal defaults to config.json "database_name"; snapshots live in config.json "backups"
+# directory (see utils/backups.py). All three work while the app is running. restore copies the
+# snapshot over the journal after snapshotting it as it is ('pre-restore'); --at picks the newest
+# snapshot taken at or before that time. Paths are relative to the project root, like the app's.
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(PROJECT_ROOT, 'utils'))
+import backups
+from app_config import get_config
+
+
+def _describe(snapshot):
+    label = f"  ({snapshot['label']})" if snapshot['label'] else ''
+    return f"{snapshot['taken_at']:%Y-%m-%d %H:%M:%S}  {snapshot['bytes'] / 1e6:8.1f} MB  {snapshot['path']}{label}"
+
+
+def cmd_snapshot(args):
+    snapshot = backups.create_snapshot(args.journal)
+    print(f"{_describe(snapshot)}  [{snapshot['steps']} steps, {snapshot['seconds']:.2f} s]")
+
+
+def cmd_list(args):
+    snapshots = backups.list_snapshots(args.journal)
+    if not snapshots:
+        print(f"No snapshots of {args.journal} in {backups.snapshot_dir(args.journal)}")
+    for snapshot in snapshots:
+        print(_describe(snapshot))
+
+
+def cmd_restore(args):
+    if args.at:
+        snapshot = backups.find_snapshot(args.journal, datetime.fromisoformat(args.at))
+        if snapshot is None:
+            sys.exit(f"No snapshot of {args.journal} taken at or before {args.at}")
+        path = snapshot['path']
+    elif args.snapshot:
+        path = args.snapshot
+    else:
+        sys.exit("Give a snapshot file or --at")
+    if not os.path.exists(path):
+        sys.exit(f"{path} does not exist")
+    if not args.yes:
+        answer = input(f"Replace the contents of {args.journal} with {path}? [y/N] ")
+        if answer.strip().lower() not in ('y', 'yes'):
+            sys.exit("Cancelled")
+    safety = backups.restore_snapshot(path, args.journal)
+    print(f"Restored {args.journal} from {path}")
+    if safety:
+        print(f"Its previous contents: {safety['path']}")
+
+
+def main():
+    os.chdir(PROJECT_ROOT) # Journal and snapshot paths are relative to the project root
+    journal = argparse.ArgumentParser(add_help=False)
+    journal.add_argument("--journal", default=get_config()['database_name'], help="Journal file")
+    parser = argparse.ArgumentParser(description="Take, list and restore journal snapshots")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("snapshot", parents=[journal], help="Take a snapshot now").set_defaults(run=cmd_snapshot)
+    commands.add_parser("list", parents=[journal], help="List the snapshots, newest first").set_defaults(run=cmd_list)
+    restore = commands.add_parser("restore", parents=[journal], help="Copy a snapshot back over the journal")
+    restore.add_argument("snapshot", nargs='?', help="Snapshot file (see list)")
+    restore.add_argument("--at", help="Newest snapshot taken at or before this local time ('YYYY-MM-DD HH:MM')")
+    restore.add_argument("--yes", action="store_true", help="Don't ask for confirmation")
+    restore.set_defaults(run=cmd_restore)
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+# benchmarks/archive_partitions.py - Range reads and aggregates before and after archiving months
+#
+# Copies suite.py's synthetic journal of --size trades, times the reads whose cost used to grow
+# with the whole history (a month for the calendar, a day for the Daily Helper, the progress
+# report's 6 months, every trade, a full equity-summary rebuild), rolls every month but the last
+# --hot-months into archive tables (utils/trade_archive.py) and times them again. The results of
+# every read are checked to be the same before and after.
+#
+# Usage (from the project root):
+#   python benchmarks/archive_partitions.py [--size 100000] [--hot-months 2] [--repeat 5]
+
+import argparse
+import shutil
+import statistics
+import time
+from datetime import timedelta
+
+import suite # Synthetic journals and helpers shared with the timing suite
+import database as db
+import trade_archive
+from app_config import get_config
+from equity_series import get_equity_store
+
+
+def reads(facts):
+    """name -> function, the reads timed before and after the roll."""
+    last_day = facts['last_day']
+    month_start = last_day.replace(day=1) - timedelta(days=200)
+    month_start = month_start.replace(day=1)
+    month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return {
+        'fetch_trades_between (1 month)': lambda: db.fetch_trades_between(month_start, month_end),
+        'fetch_trades_between (6 months)': lambda: db.fetch_trades_between(last_day - timedelta(days=180), last_day),
+        'fetch_trades_by_date': lambda: db.fetch_trades_by_date(facts['busiest_day']),
+        'fetch_all_trades_from_db': db.fetch_all_trades_from_db,
+        'equity rebuild': lambda: (get_equity_store().rebuild(), get_equity_store().get_equity_series())[1],
+    }
+
+
+def time_reads(facts, repeat):
+    results = {}
+    for name, read in reads(facts).items():
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            value = read()
+            timings.append((time.perf_counter() - started) * 1000)
+        results[name] = (statistics.median(timings), value)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time range reads before and after archiving closed months")
+    parser.add_argument("--size", type=int, default=100000, help="Journal size (trades)")
+    parser.add_argument("--hot-months", type=int, default=2, help="Months left in trades_journal")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per read (the median is reported)")
+    args = parser.parse_args()
+
+    path = suite.build_journal(args.size)
+    facts = suite.journal_facts(path)
+    scratch = path.replace('.db', '_archive.db')
+    shutil.copyfile(path, scratch)
+    suite.use_database(scratch)
+    get_equity_store().install()
+    get_config()['archive'] = {'hot_months': args.hot_months} # In-memory only; config.json is not written
+
+    before = time_reads(facts, args.repeat)
+    started = time.perf_counter()
+    # The journal's "today" is its last trading day, so the last hot_months months stay hot
+    moved = trade_archive.roll(today=facts['last_day'])
+    roll_s = time.perf_counter() - started
+    after = time_reads(facts, args.repeat)
+
+    print(f"{args.size:,} trades; archived {sum(moved.values()):,} trades in {len(moved)} months in {roll_s:.1f} s\n")
+    print(f"{'read':<34} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    for name, (before_ms, before_value) in before.items():
+        after_ms, after_value = after[name]
+        if after_value != before_value:
+            raise SystemExit(f"{name}: different result after archiving")
+        print(f"{name:<34} {before_ms:>10.1f} {after_ms:>10.1f} {before_ms / after_ms:>7.1f}x")
+    print("\nEvery read returned the same result before and after archiving")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+# benchmarks/backup_impact.py - Snapshot throughput and writer stalls under concurrent writes
+#
+# Copies suite.py's synthetic journal of --size trades and starts --writers processes that insert
+# trades through database.save_trade_to_db() as fast as they can for the whole run. Meanwhile
+# this process takes utils/backups.py snapshots back to back for --seconds per setting: none
+# (the baseline), the whole file in one step, then each --pages per step with --sleep-ms between
+# steps. For every setting it reports
+#
+#   - snapshot throughput (MB/s) and the longest snapshot
+#   - the writers' throughput and insert latency (p50/p95/max) while snapshots were running
+#   - the largest -wal file seen (checkpoints can't pass a snapshot's read transaction)
+#
+# Usage (from the project root):
+#   python benchmarks/backup_impact.py [--size 100000] [--writers 2] [--seconds 5]
+#                                      [--pages -1,1024,256,64] [--sleep-ms 5]
+
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import sys
+import threading
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'utils'))
+
+ARTIFACTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'artifacts')
+BACKUP_DB = os.path.join(ARTIFACTS_DIR, 'backup_impact.db')
+BACKUP_DIR = os.path.join(ARTIFACTS_DIR, 'backups')
+
+
+############################################################################
+# Writer process
+############################################################################
+def writer(worker_id, path, start_event, stop_event, results):
+    # Spawned, not forked: a child must not reuse the parent's pooled connections
+    from app_config import get_config
+    get_config()['database_name'] = path # In-memory only; config.json is not written
+    import database as db
+
+    rng = random.Random(worker_id)
+    writes = [] # (time.time() when the insert started, seconds it took)
+    errors = 0
+    start_event.wait()
+    i = 0
+    while not stop_event.is_set():
+        pnl = round(rng.uniform(-500, 700), 2)
+        trade = {
+            "Trade #": worker_id * 1_000_000 + i, "Futures Type": "MES", "Size": 3, "Realized P&L": pnl,
+            "Status": "Win" if pnl > 0 else "Loss", "Entry Time": f"2030-01-{rng.randrange(1, 29):02d} 10:00:00",
+            "Notes": "backup benchmark",
+        }
+        started = time.time()
+        try:
+            if db.save_trade_to_db(trade) is None:
+                errors += 1
+        except Exception:
+            errors += 1
+        writes.append((started, time.time() - started))
+        i += 1
+    results.put({"writes": writes, "errors": errors})
+
+
+############################################################################
+# Main
+############################################################################
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class _WalSampler:
+    """Largest size of the journal's -wal file while running."""
+
+    def __init__(self, path):
+        self.path = path + '-wal'
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(0.02):
+            try:
+                self.peak = max(self.peak, os.path.getsize(self.path))
+            except OSError:
+                pass
+
+
+def run_setting(backups, pages, sleep_ms, seconds):
+    """Snapshots back to back for seconds with the given setting (pages None: no snapshots)."""
+    from app_config import get_config
+    get_config()['backups'] = {'directory': BACKUP_DIR, 'keep': 2, 'pages_per_step': pages or -1, 'step_sleep_ms': sleep_ms}
+    snapshots = []
+    started = time.time()
+    with _WalSampler(BACKUP_DB) as wal:
+        while time.time() - started < seconds:
+            if pages is None:
+                time.sleep(0.05)
+                continue
+            snapshots.append(backups.create_snapshot(BACKUP_DB))
+    return {'window': (started, time.time()), 'snapshots': snapshots, 'wal_peak': wal.peak}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot throughput and writer latency under concurrent writes")
+    parser.add_argument("--size", type=int, default=100000, help="Journal size (trades)")
+    parser.add_argument("--writers", type=int, default=2, help="Writer processes")
+    parser.add_argument("--seconds", type=float, default=5, help="Run time per setting")
+    parser.add_argument("--pages", default="-1,1024,256,64", help="Pages per step to compare (-1: one step)")
+    parser.add_argument("--sleep-ms", type=float, default=5, help="Pause between steps")
+    args = parser.parse_args()
+
+    import suite # Synthetic journals and helpers shared with the timing suite
+    import backups
+    path = suite.build_journal(args.size)
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(BACKUP_DB + suffix):
+            os.remove(BACKUP_DB + suffix)
+    shutil.rmtree(BACKUP_DIR, ignore_errors=True)
+    shutil.copyfile(path, BACKUP_DB)
+    suite.use_database(BACKUP_DB)
+    size_mb = os.path.getsize(BACKUP_DB) / 1e6
+
+    context = multiprocessing.get_context('spawn')
+    start_event, stop_event, results = context.Event(), context.Event(), context.Queue()
+    workers = [context.Process(target=writer, args=(n, BACKUP_DB, start_event, stop_event, results))
+               for n in range(args.writers)]
+    for process in workers:
+        process.start()
+    time.sleep(2) # Let the writers import the app before the first window
+    start_event.set()
+
+    settings = [('no snapshot', None)]
+    for pages in (int(value) for value in args.pages.split(',')):
+        settings.append(('one step' if pages < 0 else f"{pages} pages/step", pages))
+    runs = [(name, run_setting(backups, pages, args.sleep_ms, args.seconds)) for name, pages in settings]
+
+    stop_event.set()
+    writes, errors = [], 0
+    for _ in workers:
+        result = results.get()
+        writes += result['writes']
+        errors += result['errors']
+    for process in workers:
+        process.join()
+
+    print(f"{args.size:,} trades ({size_mb:.1f} MB), {args.writers} writer process(es), "
+          f"{args.seconds:g} s per setting, {args.sleep_ms:g} ms between steps\n")
+    print(f"{'setting':<16} {'snaps':>5} {'MB/s':>7} {'max s':>6} {'writes/s':>9} "
+          f"{'p50 ms':>7} {'p95 ms':>7} {'max ms':>7} {'wal MB':>7}")
+    for name, run in runs:
+        start, end = run['window']
+        latencies = sorted(seconds * 1000 for started, seconds in writes if start <= started < end)
+        snapshots = run['snapshots']
+        if snapshots:
+            mb_per_s = sum(s['bytes'] for s in snapshots) / 1e6 / sum(s['seconds'] for s in snapshots)
+            snapshot_cols = f"{len(snapshots):>5} {mb_per_s:>7.1f} {max(s['seconds'] for s in snapshots):>6.2f}"
+        else:
+            snapshot_cols = f"{'-':>5} {'-':>7} {'-':>6}"
+        if latencies:
+            latency_cols = (f"{len(latencies) / (end - start):>9.0f} {statistics.median(latencies):>7.1f} "
+                            f"{_percentile(latencies, 0.95):>7.1f} {latencies[-1]:>7.1f}")
+        else:
+            latency_cols = f"{0:>9} {'-':>7} {'-':>7} {'-':>7}"
+        print(f"{name:<16} {snapshot_cols} {latency_cols} {run['wal_peak'] / 1e6:>7.1f}")
+    if errors:
+        raise SystemExit(f"\n{errors} insert(s) failed")
+    print("\nNo insert failed")
+
+
+if __name__ == '__main__':
+    main()
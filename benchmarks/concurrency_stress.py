@@ -0,0 +1,254 @@
+# benchmarks/concurrency_stress.py - Several processes writing and reading one journal at once
+#
+# Starts --processes worker processes (like gunicorn workers) against one fresh SQLite journal.
+# Each worker runs --ops operations through utils/database.py, as the Daily Helper and Historical
+# pages do: single inserts, multi-row updates and deletes of its own trades, day and month reads,
+# and equity-series refreshes (which write too). Then it checks that nothing was lost:
+#
+#   - no operation failed ('database is locked' or anything else)
+#   - trades in the journal == seed trades + acknowledged inserts - acknowledged deletes
+#
+# and reports per-operation latency (p50/p95/max), throughput and how often run_write() had to
+# retry after busy_timeout ran out.
+#
+# Usage (from the project root):
+#   python benchmarks/concurrency_stress.py [--processes 4] [--ops 300] [--seed-trades 2000]
+#                                           [--journal-mode wal] [--busy-timeout-ms 5000] [--retries 5]
+#
+# --journal-mode delete --busy-timeout-ms 0 --retries 0 reproduces the old defaults for comparison.
+# Exits with status 1 if any operation failed or the final count doesn't add up.
+
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'utils'))
+
+ARTIFACTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'artifacts')
+STRESS_DB = os.path.join(ARTIFACTS_DIR, 'concurrency_stress.db')
+
+JOURNAL_START = date(2024, 1, 1)
+JOURNAL_DAYS = 120 # Seed trades and new trades fall on these days
+
+# Operation mix (weights), roughly what a few users editing and browsing generate
+OPERATIONS = {
+    "insert": 35,
+    "update": 20,
+    "delete": 10,
+    "read_day": 20,
+    "read_month": 10,
+    "equity": 5,
+}
+
+
+def _configure(path, args):
+    """Points the app's shared config at the stress journal with the requested SQLite settings."""
+    from app_config import get_config
+    config = get_config()
+    config['database_name'] = path # In-memory only; config.json is not written
+    config['sqlite'] = {
+        "journal_mode": args["journal_mode"],
+        "busy_timeout_ms": args["busy_timeout_ms"],
+        "write_retries": args["retries"],
+    }
+
+
+def _random_trade(rng, trade_no):
+    day = JOURNAL_START + timedelta(days=rng.randrange(JOURNAL_DAYS))
+    pnl = round(rng.uniform(-500, 700), 2)
+    return {
+        "Trade #": trade_no, "Futures Type": "MES", "Size": 3, "Stop Loss (pts)": 10, "Risk ($)": 150,
+        "Status": "Win" if pnl > 0 else "Loss", "Points Realized": pnl / 15, "Realized P&L": pnl,
+        "Entry Time": f"{day.isoformat()} {rng.randrange(9, 16):02d}:{rng.randrange(60):02d}:00",
+        "Exit Time": None, "Notes": "stress",
+    }
+
+
+class _RetryCounter(logging.Handler):
+    """Counts the 'Database busy, retrying' warnings of utils/database.py."""
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.count = 0
+
+    def emit(self, record):
+        if record.getMessage().startswith("Database busy"):
+            self.count += 1
+
+
+############################################################################
+# Worker process
+############################################################################
+def worker(worker_id, path, args, start_event, results):
+    _configure(path, args)
+    import database as db
+    from equity_series import get_equity_store
+
+    retries = _RetryCounter()
+    db_logger = logging.getLogger("trades.database")
+    db_logger.addHandler(retries)
+    db_logger.propagate = False # Errors are counted and reported below, not printed per op
+
+    rng = random.Random(worker_id)
+    own_ids = [] # Trades this worker inserted and hasn't deleted
+    latencies = {name: [] for name in OPERATIONS}
+    failures = {name: 0 for name in OPERATIONS}
+    errors = []
+    inserted = deleted = 0
+    names, weights = list(OPERATIONS), list(OPERATIONS.values())
+
+    start_event.wait()
+    started = time.perf_counter()
+    for i in range(args["ops"]):
+        name = rng.choices(names, weights)[0]
+        if name in ("update", "delete") and not own_ids:
+            name = "insert"
+        start = time.perf_counter()
+        try:
+            if name == "insert":
+                new_id = db.save_trade_to_db(_random_trade(rng, worker_id * 1_000_000 + i))
+                ok = new_id is not None
+                if ok:
+                    own_ids.append(new_id)
+                    inserted += 1
+            elif name == "update":
+                ids = rng.sample(own_ids, min(len(own_ids), rng.randint(1, 5)))
+                outcomes = db.update_trades([(trade_id, {"Notes": f"edit {i}", "Score": str(rng.randint(1, 5))}) for trade_id in ids])
+                ok = all(outcomes.values())
+            elif name == "delete":
+                trade_id = own_ids.pop(rng.randrange(len(own_ids)))
+                ok = db.delete_trades([trade_id]).get(trade_id, False)
+                if ok:
+                    deleted += 1
+            elif name == "read_day":
+                db.fetch_trades_by_date(JOURNAL_START + timedelta(days=rng.randrange(JOURNAL_DAYS)))
+                ok = True
+            elif name == "read_month":
+                first = JOURNAL_START + timedelta(days=rng.randrange(JOURNAL_DAYS - 30))
+                db.fetch_trades_between(first, first + timedelta(days=30))
+                ok = True
+            else:
+                get_equity_store().get_equity_series()
+                ok = True
+        except Exception as e:
+            ok = False
+            errors.append(f"{name}: {type(e).__name__}: {e}")
+        latencies[name].append(time.perf_counter() - start)
+        if not ok:
+            failures[name] += 1
+    results.put({
+        "worker": worker_id,
+        "seconds": time.perf_counter() - started,
+        "latencies": latencies,
+        "failures": failures,
+        "errors": errors[:5],
+        "inserted": inserted,
+        "deleted": deleted,
+        "retries": retries.count,
+    })
+
+
+############################################################################
+# Main
+############################################################################
+def prepare_journal(path, args, seed_trades):
+    """Creates a fresh journal with seed_trades trades; returns the trade count."""
+    os.makedirs(ARTIFACTS_DIR, exist_ok=True)
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    _configure(path, args)
+    import database as db
+    db.ensure_db_initialized()
+    rng = random.Random(0)
+    trades = [_random_trade(rng, n) for n in range(seed_trades)]
+    columns = ', '.join(f'"{col}"' for col in db.COLUMNS_TO_STORE)
+    placeholders = ', '.join('?' for _ in db.COLUMNS_TO_STORE)
+    db.run_write(lambda cursor, touched_days: cursor.executemany(
+        f'INSERT INTO {db.TABLE_NAME} ({columns}) VALUES ({placeholders})',
+        [tuple(trade.get(col) for col in db.COLUMNS_TO_STORE) for trade in trades]
+    ))
+    return _count_trades(db)
+
+
+def _count_trades(db):
+    conn = db.get_db_connection()
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {db.TABLE_NAME}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-process SQLite write/read stress test")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--ops", type=int, default=300, help="Operations per process")
+    parser.add_argument("--seed-trades", type=int, default=2000)
+    parser.add_argument("--journal-mode", default="wal")
+    parser.add_argument("--busy-timeout-ms", type=int, default=5000)
+    parser.add_argument("--retries", type=int, default=5)
+    parsed = parser.parse_args()
+    args = {"ops": parsed.ops, "journal_mode": parsed.journal_mode,
+            "busy_timeout_ms": parsed.busy_timeout_ms, "retries": parsed.retries}
+
+    initial = prepare_journal(STRESS_DB, args, parsed.seed_trades)
+    print(f"{parsed.processes} processes x {parsed.ops} ops on {STRESS_DB} ({initial:,} seed trades, "
+          f"journal_mode={parsed.journal_mode}, busy_timeout={parsed.busy_timeout_ms} ms, retries={parsed.retries})")
+
+    context = multiprocessing.get_context("spawn") # Same behavior on every OS; no inherited connections
+    start_event = context.Event()
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(worker_id, STRESS_DB, args, start_event, results))
+        for worker_id in range(parsed.processes)
+    ]
+    for process in processes:
+        process.start()
+    time.sleep(1.0) # Let every worker finish importing before the start signal
+    started = time.perf_counter()
+    start_event.set()
+    reports = [results.get() for _ in processes]
+    elapsed = time.perf_counter() - started
+    for process in processes:
+        process.join()
+
+    print(f"\n{'operation':<12} {'ops':>6} {'failed':>7} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    total_ops = total_failed = 0
+    for name in OPERATIONS:
+        latencies = sorted(x for report in reports for x in report["latencies"][name])
+        failed = sum(report["failures"][name] for report in reports)
+        total_ops += len(latencies)
+        total_failed += failed
+        if latencies:
+            print(f"{name:<12} {len(latencies):>6} {failed:>7} {_percentile(latencies, 0.50) * 1000:>9.1f} "
+                  f"{_percentile(latencies, 0.95) * 1000:>9.1f} {latencies[-1] * 1000:>9.1f}")
+    retries = sum(report["retries"] for report in reports)
+    print(f"\n{total_ops} operations in {elapsed:.1f} s ({total_ops / elapsed:.0f} ops/s), "
+          f"{total_failed} failed, {retries} busy retries")
+    for report in reports:
+        for error in report["errors"]:
+            print(f"  worker {report['worker']}: {error}")
+
+    _configure(STRESS_DB, args)
+    import database as db
+    expected = initial + sum(r["inserted"] for r in reports) - sum(r["deleted"] for r in reports)
+    final = _count_trades(db)
+    consistent = final == expected
+    print(f"Trades: {final:,} in the journal, {expected:,} expected -> {'OK' if consistent else 'MISMATCH'}")
+    sys.exit(0 if consistent and not total_failed else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+# benchmarks/cross_journal_reports.py - Aggregate reports over several journals: ATTACH vs pandas
+#
+# Times utils/cross_journal.py's daily and weekly reports (one statement over the ATTACHed
+# journals, aggregates pushed into every UNION ALL branch) next to the obvious alternative: fetch
+# every journal's trades with fetch_all_trades_from_db() and group them with pandas. Both are
+# checked to give the same combined daily series. The figure cache is cleared before every run.
+#
+# Usage (from the project root):
+#   python benchmarks/cross_journal_reports.py [--size 100000] [--journals 3] [--repeat 5]
+#
+# The journals are copies of suite.py's synthetic journal of --size trades (benchmarks/artifacts/).
+
+import argparse
+import os
+import shutil
+import statistics
+import time
+
+import suite # Synthetic journals and helpers shared with the timing suite
+import database as db
+import cross_journal
+from app_config import get_config, get_journals_config
+from figure_cache import get_figure_cache
+from lazy_imports import lazy_module
+pd = lazy_module("pandas")
+
+
+def journal_copies(size, count):
+    """Paths of count copies of the synthetic journal of size trades (made once)."""
+    path = suite.build_journal(size)
+    paths = [path]
+    for index in range(1, count):
+        copy = path.replace('.db', f'_copy{index}.db')
+        if not os.path.exists(copy):
+            shutil.copyfile(path, copy)
+        paths.append(copy)
+    return paths
+
+
+def pandas_daily_report(paths):
+    """Combined daily (trade count, net P&L) the pandas way: every trade fetched into Python."""
+    frames = []
+    for path in paths:
+        with db.use_database(path):
+            frames.append(pd.DataFrame(db.fetch_all_trades_from_db(), columns=['id', *db.COLUMNS_TO_STORE]))
+    df = pd.concat(frames, ignore_index=True)
+    df = df[df['Entry Time'].fillna('') != '']
+    df['day'] = df['Entry Time'].str[:10]
+    df['pnl'] = pd.to_numeric(df['Realized P&L'], errors='coerce').fillna(0)
+    return df.groupby('day')['pnl'].agg(['count', 'sum'])
+
+
+def time_runs(run, repeat):
+    timings = []
+    for _ in range(repeat):
+        get_figure_cache().clear()
+        started = time.perf_counter()
+        result = run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time cross-journal aggregate reports")
+    parser.add_argument("--size", type=int, default=100000, help="Trades per journal")
+    parser.add_argument("--journals", type=int, default=3, help="Journals per report")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (the median is reported)")
+    args = parser.parse_args()
+
+    paths = journal_copies(args.size, args.journals)
+    suite.use_database(paths[0])
+    # In-memory only (config.json is not written): make the copies available journals
+    get_config()['journals'] = {**get_journals_config(), 'available': {path: os.path.basename(path) for path in paths}}
+
+    print(f"{args.journals} journals x {args.size:,} trades, median of {args.repeat} runs\n")
+    print(f"{'report':<32} {'ms':>10}")
+    daily_ms, daily = time_runs(lambda: cross_journal.aggregate_report(paths, period='day'), args.repeat)
+    print(f"{'cross_journal daily':<32} {daily_ms:>10.1f}")
+    weekly_ms, _ = time_runs(lambda: cross_journal.aggregate_report(paths, period='week'), args.repeat)
+    print(f"{'cross_journal weekly':<32} {weekly_ms:>10.1f}")
+    with suite.quiet():
+        pandas_ms, expected = time_runs(lambda: pandas_daily_report(paths), args.repeat)
+    print(f"{'fetch_all + pandas daily':<32} {pandas_ms:>10.1f}")
+
+    combined = {row['period']: (row['trade_count'], row['net_pnl']) for row in daily['combined']}
+    mismatched = [day for day, (count, pnl) in expected.iterrows()
+                  if day not in combined or combined[day][0] != count or abs(combined[day][1] - pnl) > 1e-6]
+    if mismatched or len(combined) != len(expected):
+        raise SystemExit(f"Combined daily series differs from pandas on {len(mismatched)} day(s), e.g. {mismatched[:3]}")
+    print(f"\nCombined daily series matches pandas ({len(combined):,} days); speedup {pandas_ms / daily_ms:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
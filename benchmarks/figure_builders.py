@@ -0,0 +1,131 @@
+# benchmarks/figure_builders.py - utils/figures.py (plain dicts) vs plotly.graph_objects
+#
+# Runs the real chart code of the Daily Helper (update_cumulative_pnl_chart) and the Progress
+# Report (_create_line_chart_trend, _create_bar_chart_distribution) twice: once with the plain-dict
+# builder the pages use, and once with a drop-in shim that builds the same charts through go.*.
+# Each timing includes JSON serialization, since Dash serializes every figure it returns.
+#
+# Usage (from the project root):
+#   python benchmarks/figure_builders.py [--repeat 20] [--sizes 50,500,5000]
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+import app # Registers the pages (no disk I/O at import time)
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.io.json import to_json_plotly
+
+import figures
+
+daily_helper = sys.modules['pages.daily_helper']
+progress_report = sys.modules['pages.progress_report']
+
+
+class _GoFigures:
+    """Same interface as utils/figures.py, backed by plotly.graph_objects (the previous code path)."""
+
+    @staticmethod
+    def figure(data=None, layout=None, **layout_props):
+        fig = go.Figure(data=data, layout=layout)
+        return fig.update_layout(**layout_props) if layout_props else fig
+
+    @staticmethod
+    def update_layout(fig, **layout_props):
+        return fig.update_layout(**layout_props)
+
+    @staticmethod
+    def add_trace(fig, trace):
+        return fig.add_trace(trace)
+
+    @staticmethod
+    def update_traces(fig, **trace_props):
+        return fig.update_traces(**trace_props)
+
+    scatter = staticmethod(go.Scatter)
+    scattergl = staticmethod(go.Scattergl)
+    bar = staticmethod(go.Bar)
+    pie = staticmethod(go.Pie)
+    indicator = staticmethod(go.Indicator)
+
+
+def make_rows(n, seed=42):
+    """n synthetic Daily Helper table rows."""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 2, 9, 30)
+    return [{
+        "Trade #": i + 1,
+        "Entry Time": (start + timedelta(minutes=7 * i)).strftime("%Y-%m-%d %H:%M:%S"),
+        "Realized P&L": round(rng.gauss(40, 250), 2),
+        "Entry Quality": rng.choice(["Waited Patiently", "Calm / Standard", "Impulsive / FOMO", ""]),
+    } for i in range(n)]
+
+
+def make_progress_frames(weeks=78, seed=42):
+    """Weekly trend and category distribution frames shaped like the Progress Report's."""
+    rng = random.Random(seed)
+    weekly = pd.DataFrame({
+        "Week_Start": pd.date_range("2024-01-01", periods=weeks, freq="W-MON"),
+        "%_Came_Yes": [rng.uniform(0, 100) for _ in range(weeks)],
+    })
+    distribution = pd.DataFrame({
+        "Category": ["Waited Patiently", "Calm / Standard", "Impulsive / FOMO", "Hesitant / Missed", "Blank"],
+        "Count": [120, 80, 40, 25, 10],
+    })
+    distribution["Percentage"] = distribution["Count"] / distribution["Count"].sum() * 100
+    return weekly, distribution
+
+
+def time_call(fn, repeat):
+    """Median/min milliseconds of fn() + JSON serialization of its result."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        to_json_plotly(fn())
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), min(samples)
+
+
+def run_case(name, fn, repeat):
+    results = {}
+    for label, builder in (("go.*", _GoFigures), ("figures", figures)):
+        daily_helper.figures = progress_report.figures = builder
+        with contextlib.redirect_stdout(io.StringIO()): # The chart helpers print debug output
+            fn() # Warm-up (imports, caches)
+            results[label] = time_call(fn, repeat)
+    daily_helper.figures = progress_report.figures = figures
+    go_median, dict_median = results["go.*"][0], results["figures"][0]
+    print(f"{name:<44} go.* {go_median:8.2f} ms   figures {dict_median:8.2f} ms   speedup {go_median / dict_median:5.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the plain-dict figure builder against go.*")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per case")
+    parser.add_argument("--sizes", default="50,500,5000", help="Comma-separated trade counts for the cumulative P&L chart")
+    args = parser.parse_args()
+
+    print(f"Median of {args.repeat} runs (build + JSON serialization):")
+    for n in [int(size) for size in args.sizes.split(",")]:
+        rows = make_rows(n)
+        run_case(f"update_cumulative_pnl_chart ({n} trades)", lambda: daily_helper.update_cumulative_pnl_chart(rows), args.repeat)
+
+    weekly, distribution = make_progress_frames()
+    color_map = {"Waited Patiently": "#2ecc71", "Impulsive / FOMO": "#e74c3c"}
+    run_case("progress _create_line_chart_trend",
+             lambda: progress_report._create_line_chart_trend(weekly, "%_Came_Yes", "Trend", "#3498db"), args.repeat)
+    run_case("progress _create_bar_chart_distribution",
+             lambda: progress_report._create_bar_chart_distribution(distribution, "Distribution", color_map), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
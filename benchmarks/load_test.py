@@ -0,0 +1,281 @@
+# benchmarks/load_test.py - Concurrent-user load test against a running server (local only)
+#
+# Simulates --users browser sessions against a server started with serve.py (or app.py). Each
+# simulated user loops over the page scenarios: it GETs the page and then POSTs the callbacks the
+# browser fires when that page opens (same request bodies as dash-renderer, built from
+# /_dash-dependencies). Outputs of earlier callbacks feed later ones, e.g. the daily helper's
+# table rows go into its KPI and chart callbacks, like in the browser.
+#
+# Background callbacks (utils/background.py) answer with a job id; the simulated user then polls
+# the job at the callback's interval like dash-renderer does, and the latency covers the whole job.
+#
+# With --journals, the users are spread over those journals (utils/journals.py): each one sends
+# its journal with every request like a browser tab that picked it on the Settings page, and the
+# endpoints are reported per journal.
+#
+# Reports per endpoint: requests, failures, p50/p95/p99 latency and requests per second.
+#
+# Usage (start the server first, e.g. `python serve.py --workers 2 --threads 8`):
+#   python benchmarks/load_test.py [--url http://127.0.0.1:8050] [--users 10] [--duration 60]
+#                                  [--pages overview,calendar] [--journals trades.db,sandbox_trades.db]
+#                                  [--json results.json]
+#
+# Only loopback URLs are accepted: this generates real load and must never be pointed at someone
+# else's server.
+
+import argparse
+import gzip
+import http.client
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import date
+from urllib.parse import urlencode, urlsplit
+
+LOCAL_HOSTS = {"127.0.0.1", "localhost", "::1"}
+JOB_TIMEOUT = 120 # Seconds a simulated user waits for a background callback's result
+
+# Page scenarios: the page path and the callbacks it fires on load, as
+# (an output id of the callback, {input/state "id.property": value}). Inputs not listed take the
+# latest value an earlier callback returned for them in this session, else None.
+# Every visit starts with Dash pages' routing callback, which returns the page's layout; most pages
+# render their data in the layout, so that is their only callback until the user does something.
+_today = date.today()
+
+
+def _page_layout(path):
+    return ("_pages_content", {"_pages_location.pathname": path, "_pages_location.search": ""})
+
+
+PAGES = {
+    "daily_helper": ("/", [
+        _page_layout("/"),
+        ("trades-table", {"date-picker-single.date": _today.isoformat()}),
+        ("kpis-content", {}),
+        ("cumulative-pnl-chart", {}),
+        ("available-risk-gauge", {"date-picker-single.date": _today.isoformat()}),
+        ("pnl-progress-bar-container", {"date-picker-single.date": _today.isoformat()}),
+    ]),
+    "overview": ("/overview", [_page_layout("/overview")]),
+    "calendar": ("/calendar", [_page_layout("/calendar")]),
+    "progress": ("/progress-report", [_page_layout("/progress-report")]),
+    "equity": ("/equity", [_page_layout("/equity")]),
+    "history": ("/history", [_page_layout("/history")]),
+    "settings": ("/settings", [_page_layout("/settings")]),
+}
+
+
+############################################################################
+# Request building
+############################################################################
+def _parse_outputs(output):
+    """'..a.b...c.d..' -> [{'id': 'a', 'property': 'b'}, ...]; 'a.b' -> {'id': 'a', 'property': 'b'}."""
+    def one(spec):
+        component_id, prop = spec.split("@")[0].rsplit(".", 1)
+        return {"id": component_id, "property": prop}
+    if output.startswith(".."):
+        return [one(spec) for spec in output[2:-2].split("...")]
+    return one(output)
+
+
+def _find_callback(dependencies, output_id, values):
+    """The server callback writing to output_id that reads every "id.property" in values."""
+    for dependency in dependencies:
+        if dependency.get("clientside_function"):
+            continue
+        outputs = _parse_outputs(dependency["output"])
+        reads = {f"{i['id']}.{i['property']}" for i in dependency["inputs"] + dependency["state"]}
+        if any(o["id"] == output_id for o in (outputs if isinstance(outputs, list) else [outputs])) \
+                and reads.issuperset(values):
+            return dependency
+    raise SystemExit(f"No server callback writes to '{output_id}' (is the server running this app?)")
+
+
+def _callback_body(dependency, values, known):
+    def fill(items):
+        filled = []
+        for item in items:
+            key = f"{item['id']}.{item['property']}"
+            filled.append({**item, "value": values[key] if key in values else known.get(key)})
+        return filled
+    inputs = fill(dependency["inputs"])
+    return {
+        "output": dependency["output"],
+        "outputs": _parse_outputs(dependency["output"]),
+        "inputs": inputs,
+        "state": fill(dependency["state"]),
+        "changedPropIds": [f"{i['id']}.{i['property']}" for i in inputs if i["value"] is not None],
+    }
+
+
+############################################################################
+# Simulated users
+############################################################################
+class Results:
+    """Latencies and failures per endpoint, shared by all user threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.failures = defaultdict(int)
+
+    def add(self, name, seconds, ok):
+        with self._lock:
+            self.latencies[name].append(seconds)
+            if not ok:
+                self.failures[name] += 1
+
+
+def _request(conn, method, path, body=None, journal=None):
+    headers = {"Accept-Encoding": "gzip"}
+    if journal:
+        headers["X-Journal"] = journal # What assets/journals.js adds for a tab that picked a journal
+    payload = None
+    if body is not None:
+        payload = json.dumps(body).encode()
+        headers["Content-Type"] = "application/json"
+    conn.request(method, path, body=payload, headers=headers)
+    response = conn.getresponse()
+    data = response.read()
+    return response.status, response.getheader("Content-Encoding"), data
+
+
+def _decode(encoding, data):
+    if encoding == "gzip":
+        data = gzip.decompress(data)
+    return json.loads(data)
+
+
+def _await_job(conn, dependency, body, job, journal=None):
+    """Polls a background callback's job until it answers with its result (or is gone)."""
+    path = "/_dash-update-component?" + urlencode({"cacheKey": job["cacheKey"], "job": job["job"]})
+    interval = dependency.get("background", {}).get("interval", 1000) / 1000
+    give_up = time.monotonic() + JOB_TIMEOUT
+    while time.monotonic() < give_up:
+        time.sleep(interval)
+        status, encoding, data = _request(conn, "POST", path, body, journal)
+        if status != 200 or "response" in _decode(encoding, data):
+            return status, encoding, data
+    return None, None, b""
+
+
+def run_user(host, port, scenarios, dependencies, deadline, results, journal=None):
+    conn = http.client.HTTPConnection(host, port, timeout=120)
+    rng = random.Random()
+    while time.monotonic() < deadline:
+        page, (path, steps) = rng.choice(scenarios)
+        known = {} # Latest value per "id.property" returned in this page visit
+        suffix = f" [{journal}]" if journal else ""
+        requests = [(f"GET {path}{suffix}", "GET", path, None)]
+        for output_id, values in steps:
+            requests.append((f"{page}: {output_id}{suffix}", "POST", "/_dash-update-component", (output_id, values)))
+        for name, method, url, step in requests:
+            if time.monotonic() >= deadline:
+                break
+            dependency = _find_callback(dependencies, *step) if step else None
+            body = _callback_body(dependency, step[1], known) if step else None
+            start = time.perf_counter()
+            try:
+                status, encoding, data = _request(conn, method, url, body, journal)
+                if step and status == 200 and dependency.get("background"):
+                    status, encoding, data = _await_job(conn, dependency, body, _decode(encoding, data), journal)
+                ok = status in (200, 204) # 204: the callback raised PreventUpdate
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=120)
+                status, ok = None, False
+            results.add(name, time.perf_counter() - start, ok)
+            if ok and status == 200 and step:
+                for component_id, props in _decode(encoding, data).get("response", {}).items():
+                    for prop, value in props.items():
+                        known[f"{component_id}.{prop}"] = value
+    conn.close()
+
+
+############################################################################
+# Main
+############################################################################
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def report(results, elapsed):
+    rows = []
+    for name in sorted(results.latencies):
+        latencies = sorted(results.latencies[name])
+        rows.append({
+            "endpoint": name,
+            "requests": len(latencies),
+            "failures": results.failures[name],
+            "p50_ms": _percentile(latencies, 0.50) * 1000,
+            "p95_ms": _percentile(latencies, 0.95) * 1000,
+            "p99_ms": _percentile(latencies, 0.99) * 1000,
+            "mean_ms": statistics.fmean(latencies) * 1000,
+            "rps": len(latencies) / elapsed,
+        })
+    print(f"\n{'endpoint':<50} {'reqs':>6} {'fail':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>7}")
+    for row in rows:
+        print(f"{row['endpoint'][:50]:<50} {row['requests']:>6} {row['failures']:>5} {row['p50_ms']:>9.1f} "
+              f"{row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['rps']:>7.2f}")
+    total = sum(row["requests"] for row in rows)
+    failed = sum(row["failures"] for row in rows)
+    print(f"\n{total} requests in {elapsed:.1f} s ({total / elapsed:.1f} req/s), {failed} failed")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the trading dashboard (local servers only)")
+    parser.add_argument("--url", default="http://127.0.0.1:8050")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent simulated users")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds to run")
+    parser.add_argument("--pages", default=",".join(PAGES), help=f"Comma-separated subset of: {', '.join(PAGES)}")
+    parser.add_argument("--journals", default="", help="Comma-separated journals to spread the users over (default: the server's default journal)")
+    parser.add_argument("--json", help="Also write the per-endpoint results to this file")
+    args = parser.parse_args()
+
+    url = urlsplit(args.url)
+    if url.hostname not in LOCAL_HOSTS:
+        raise SystemExit(f"Refusing to load test {url.hostname}: only local servers ({', '.join(sorted(LOCAL_HOSTS))}) are allowed")
+    host, port = url.hostname, url.port or 80
+    pages = [page.strip() for page in args.pages.split(",") if page.strip()]
+    unknown = [page for page in pages if page not in PAGES]
+    if unknown:
+        raise SystemExit(f"Unknown page(s): {', '.join(unknown)}")
+    scenarios = [(page, PAGES[page]) for page in pages]
+    user_journals = [journal.strip() for journal in args.journals.split(",") if journal.strip()] or [None]
+
+    conn = http.client.HTTPConnection(host, port, timeout=120)
+    status, encoding, data = _request(conn, "GET", "/_dash-dependencies")
+    conn.close()
+    if status != 200:
+        raise SystemExit(f"GET /_dash-dependencies returned {status}")
+    dependencies = _decode(encoding, data)
+
+    print(f"{args.users} users for {args.duration:.0f} s against {args.url} (pages: {', '.join(pages)}"
+          + (f"; journals: {', '.join(user_journals)})" if user_journals != [None] else ")"))
+    results = Results()
+    start = time.monotonic()
+    deadline = start + args.duration
+    threads = [
+        threading.Thread(target=run_user, daemon=True, args=(
+            host, port, scenarios, dependencies, deadline, results, user_journals[i % len(user_journals)]))
+        for i in range(args.users)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    rows = report(results, time.monotonic() - start)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"url": args.url, "users": args.users, "duration": args.duration, "results": rows}, f, indent=2)
+    sys.exit(1 if any(row["failures"] for row in rows) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+# benchmarks/page_load.py - Time from navigation to the page's data being on screen (local only)
+#
+# Replays what dash-renderer does when a page is opened, over HTTP against a running server:
+#
+#   1. GET the page, /_dash-layout and /_dash-dependencies
+#   2. POST Dash pages' routing callback, which returns the page's layout
+#   3. fire the page's initial callbacks (not prevent_initial_call, all outputs and inputs on the
+#      page), then every callback whose inputs they changed, a callback only once none of its
+#      inputs is still being computed; independent callbacks run in parallel like in the browser
+#   4. tick the page's dcc.Interval components at their interval (counted from step 2), firing the
+#      callbacks that listen to them
+#
+# The page is "ready" once its content property (e.g. the Overview's Total P&L, the History table's
+# rows) holds something: right in the layout, or as soon as the callback that fills it answers.
+# A layout that rendered placeholders (utils/background.py load_trigger) is ready once the callback
+# its trigger starts has answered. Background callbacks are polled like load_test.py does. Other
+# clientside callbacks, the JS bundles and rendering are not replayed: the numbers are the
+# server-side part of opening a page, comparable between two versions of the app on the same journal.
+#
+# Usage (start the server first, e.g. `python serve.py`):
+#   python benchmarks/page_load.py [--url http://127.0.0.1:8050] [--pages overview,history]
+#                                  [--repeat 5] [--json results.json]
+
+import argparse
+import http.client
+import json
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+import load_test # Request helpers (bodies, gzip, background job polling)
+
+PAGE_TIMEOUT = 60 # Seconds to wait for a page's content before calling it failed
+
+# Page: (path, the "id.property" that shows the page's data, items it has once filled)
+PAGES = {
+    "overview": ("/overview", "total-pnl-value.children", 1),
+    "calendar": ("/calendar", "calendar-grid-container.children", 8), # The 7 weekday headers are always there
+    "progress": ("/progress-report", "trade-origination-progress-chart.figure", 1),
+    "equity": ("/equity", "equity-net-pnl-value.children", 1),
+    "history": ("/history", "historical-trades-table.data", 1),
+    "settings": ("/settings", "config-db-name.value", 1),
+}
+ROUTING_OUTPUT = "_pages_content"
+
+
+def _has_content(value, min_items):
+    """True once a property shows something (a list: at least min_items)."""
+    if isinstance(value, (list, dict)):
+        return len(value) >= min_items
+    return value not in (None, "")
+
+
+def _collect_props(node, props, intervals):
+    """Adds the "id.property" values of every component with an id in a layout tree to props
+    (and "id." for the component itself: its unset properties can still be callback outputs)."""
+    if isinstance(node, list):
+        for child in node:
+            _collect_props(child, props, intervals)
+        return
+    if not isinstance(node, dict) or "props" not in node:
+        return
+    component_props = node["props"]
+    component_id = component_props.get("id")
+    if isinstance(component_id, str):
+        props[f"{component_id}."] = None
+        for prop, value in component_props.items():
+            props[f"{component_id}.{prop}"] = value
+        if node.get("type") == "Interval" and not component_props.get("disabled"):
+            props.setdefault(f"{component_id}.n_intervals", 0)
+            intervals[component_id] = (component_props.get("interval", 1000) / 1000,
+                                       component_props.get("max_intervals", -1))
+    for value in component_props.values():
+        if isinstance(value, (dict, list)):
+            _collect_props(value, props, intervals)
+
+
+def _ids(items):
+    return {f"{item['id']}.{item['property']}" for item in items}
+
+
+def _components(keys):
+    return {key.rsplit(".", 1)[0] for key in keys}
+
+
+def _outputs(dependency):
+    outputs = load_test._parse_outputs(dependency["output"])
+    return _ids(outputs if isinstance(outputs, list) else [outputs])
+
+
+class PageVisit:
+    """One simulated opening of a page (the state dash-renderer keeps for it)."""
+
+    def __init__(self, host, port, dependencies, path, content, min_items):
+        self.host, self.port = host, port
+        self.dependencies = [d for d in dependencies if not d.get("clientside_function")]
+        self.path, self.content, self.min_items = path, content, min_items
+        self.props = {} # "id.property" -> current value
+        self.intervals = {} # Interval id -> (seconds, max_intervals)
+        self.requests = 0
+        self.ready_at = None
+        self.loading = set() # Outputs of the callbacks a load trigger started that haven't answered yet
+        self._lock = threading.Lock()
+
+    def _post(self, dependency, changed):
+        """POSTs one callback (and polls its job); returns its response or None (PreventUpdate)."""
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=PAGE_TIMEOUT)
+        try:
+            values = {key: self.props.get(key) for key in _ids(dependency["inputs"] + dependency["state"])}
+            body = load_test._callback_body(dependency, values, {})
+            body["changedPropIds"] = sorted(changed)
+            status, encoding, data = load_test._request(conn, "POST", "/_dash-update-component", body)
+            if status == 200 and dependency.get("background"):
+                status, encoding, data = load_test._await_job(conn, dependency, body, load_test._decode(encoding, data))
+        finally:
+            conn.close()
+        with self._lock:
+            self.requests += 1
+        if status == 204:
+            return None
+        if status != 200:
+            raise RuntimeError(f"{dependency['output']}: HTTP {status}")
+        return load_test._decode(encoding, data).get("response", {})
+
+    def _apply(self, response, start):
+        """Stores a callback's outputs; returns the "id.property" keys that changed."""
+        changed = set()
+        for component_id, values in response.items():
+            for prop, value in values.items():
+                key = f"{component_id}.{prop}"
+                if component_id == ROUTING_OUTPUT and prop == "children":
+                    _collect_props(value, self.props, self.intervals)
+                self.props[key] = value
+                changed.add(key)
+        if self.ready_at is None and not self.loading and _has_content(self.props.get(self.content), self.min_items):
+            self.ready_at = time.perf_counter() - start
+        return changed
+
+    def _on_page(self, dependency):
+        """True if every output and input component of a callback is on the page."""
+        return _components(_outputs(dependency) | _ids(dependency["inputs"])) <= _components(self.props)
+
+    def _listeners(self, changed):
+        """Callbacks with one of the changed properties as an input (and all their components on the page)."""
+        return [d for d in self.dependencies if _ids(d["inputs"]) & changed and self._on_page(d)]
+
+    def run(self):
+        start = time.perf_counter()
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=PAGE_TIMEOUT)
+        try:
+            for url in (self.path, "/_dash-layout"):
+                status, encoding, data = load_test._request(conn, "GET", url)
+                self.requests += 1
+                if status != 200:
+                    raise RuntimeError(f"GET {url}: HTTP {status}")
+            _collect_props(load_test._decode(encoding, data), self.props, self.intervals)
+        finally:
+            conn.close()
+
+        routing = next(d for d in self.dependencies if ROUTING_OUTPUT in {o.split(".")[0] for o in _outputs(d)})
+        before = set(self.props)
+        self.props.update({"_pages_location.pathname": self.path, "_pages_location.search": ""})
+        self._apply(self._post(routing, {"_pages_location.pathname"}) or {}, start)
+        mounted = time.perf_counter()
+        page_components = _components(set(self.props) - before)
+
+        # Initial callbacks of the new components: (dependency, changedPropIds)
+        pending = [(d, set()) for d in self.dependencies
+                   if not d.get("prevent_initial_call") and self._on_page(d)
+                   and _components(_outputs(d) | _ids(d["inputs"])) & page_components]
+        # Placeholders in the layout: the browser's load_if_pending sets '<prefix>-load' at once
+        loads = {key[:-len("-pending.data")] + ".data" for key, value in self.props.items()
+                 if key.endswith("-load-pending.data") and value}
+        if loads:
+            self.ready_at = None
+            self.props.update(dict.fromkeys(loads, True))
+            triggered = self._listeners(loads)
+            self.loading = {d["output"] for d in triggered}
+            pending += [(d, loads & _ids(d["inputs"])) for d in triggered]
+        ticks = {interval_id: 0 for interval_id in self.intervals}
+        while self.ready_at is None:
+            if time.perf_counter() - start > PAGE_TIMEOUT:
+                raise RuntimeError(f"{self.path}: no content in {PAGE_TIMEOUT} s")
+            if pending:
+                pending = self._run_ready(pending, start)
+                continue
+            # Nothing left to fire: wait for the next Interval tick
+            due = [(mounted + seconds * (ticks[i] + 1), i) for i, (seconds, maximum) in self.intervals.items()
+                   if maximum < 0 or ticks[i] < maximum]
+            if not due:
+                raise RuntimeError(f"{self.path}: no content and nothing left to fire")
+            at, interval_id = min(due)
+            time.sleep(max(0.0, at - time.perf_counter()))
+            ticks[interval_id] += 1
+            key = f"{interval_id}.n_intervals"
+            self.props[key] = ticks[interval_id]
+            pending = [(d, {key}) for d in self._listeners({key})]
+        return self.ready_at, self.requests
+
+    def _run_ready(self, pending, start):
+        # Like dash-renderer: a callback waits while another pending one still computes its inputs
+        computing = set().union(*(_outputs(d) for d, _ in pending))
+        ready = [(d, changed) for d, changed in pending if not _ids(d["inputs"]) & (computing - _outputs(d))] \
+            or pending[:1]
+        responses = [None] * len(ready)
+        errors = []
+
+        def fire(index, dependency, changed):
+            try:
+                responses[index] = self._post(dependency, changed)
+            except Exception as e: # Reported below, in the page's thread
+                errors.append(e)
+
+        threads = [threading.Thread(target=fire, args=(i, d, c)) for i, (d, c) in enumerate(ready)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+        remaining = [item for item in pending if item not in ready]
+        for (dependency, _), response in zip(ready, responses):
+            self.loading.discard(dependency["output"])
+            changed = self._apply(response or {}, start)
+            queued = {d["output"] for d, _ in remaining}
+            remaining += [(d, changed & _ids(d["inputs"])) for d in self._listeners(changed) if d["output"] not in queued]
+        return remaining
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time opening the dashboard's pages (local servers only)")
+    parser.add_argument("--url", default="http://127.0.0.1:8050")
+    parser.add_argument("--pages", default=",".join(PAGES), help=f"Comma-separated subset of: {', '.join(PAGES)}")
+    parser.add_argument("--repeat", type=int, default=5, help="Visits per page (the median is reported)")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    url = urlsplit(args.url)
+    if url.hostname not in load_test.LOCAL_HOSTS:
+        raise SystemExit(f"Refusing to benchmark {url.hostname}: only local servers ({', '.join(sorted(load_test.LOCAL_HOSTS))}) are allowed")
+    host, port = url.hostname, url.port or 80
+    pages = [page.strip() for page in args.pages.split(",") if page.strip()]
+    unknown = [page for page in pages if page not in PAGES]
+    if unknown:
+        raise SystemExit(f"Unknown page(s): {', '.join(unknown)}")
+
+    conn = http.client.HTTPConnection(host, port, timeout=PAGE_TIMEOUT)
+    status, encoding, data = load_test._request(conn, "GET", "/_dash-dependencies")
+    conn.close()
+    if status != 200:
+        raise SystemExit(f"GET /_dash-dependencies returned {status}")
+    dependencies = load_test._decode(encoding, data)
+
+    print(f"Opening each page {args.repeat} times on {args.url}\n")
+    print(f"{'page':<10} {'median ms':>10} {'min ms':>9} {'max ms':>9} {'requests':>9}")
+    rows = []
+    for page in pages:
+        path, content, min_items = PAGES[page]
+        timings, requests = [], 0
+        for _ in range(args.repeat):
+            seconds, requests = PageVisit(host, port, dependencies, path, content, min_items).run()
+            timings.append(seconds * 1000)
+        row = {"page": page, "median_ms": statistics.median(timings), "min_ms": min(timings),
+               "max_ms": max(timings), "requests": requests}
+        rows.append(row)
+        print(f"{page:<10} {row['median_ms']:>10.1f} {row['min_ms']:>9.1f} {row['max_ms']:>9.1f} {requests:>9}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"url": args.url, "repeat": args.repeat, "results": rows}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+# benchmarks/payload_sizes.py - Transfer sizes of the history page's callback responses
+#
+# Opens the history page the way the browser does (through the Flask test client, so the real
+# compression hook runs) against a synthetic journal and measures, per callback response:
+#
+#   before: the payload as it was sent before trimming/rounding - every stored column, floats at
+#           full precision, 'Entry Time' as ISO timestamps - uncompressed and gzipped
+#   after:  the actual response now (displayed columns only, rounded), uncompressed, gzip and
+#           brotli (if the brotli package is installed)
+#
+# Usage (from the project root):
+#   python benchmarks/payload_sizes.py [--size 10000]
+
+import argparse
+import json
+
+import suite # Journals and helpers shared with the timing suite
+import load_test # Builds /_dash-update-component bodies from /_dash-dependencies
+import compression
+import database as db
+import pandas as pd
+from plotly.io.json import to_json_plotly # What Dash serializes responses with
+
+# (label, an output id of the callback, inputs): Refresh, then a filter change. Both are the table
+# callback; the rows only travel down to the table (the trades are filtered on the server).
+HISTORY_CALLBACKS = [
+    ("refresh -> table rows", "historical-filter-futures-type", {"load-all-trades-button.n_clicks": 1}),
+    ("filter -> table rows", "historical-filter-futures-type", {}),
+]
+
+
+def legacy_rows():
+    """The rows as the Refresh callback built them before trimming (all columns, unrounded)."""
+    df = pd.DataFrame(db.fetch_all_trades_from_db())
+    df['Entry Time'] = pd.to_datetime(df['Entry Time'], errors='coerce')
+    return json.loads(to_json_plotly(df.sort_values(by='Entry Time', ascending=False).to_dict('records')))
+
+
+def post(client, body, encoding):
+    response = client.post('/_dash-update-component', json=body, headers={'Accept-Encoding': encoding})
+    assert response.status_code == 200, f"{body['output']}: HTTP {response.status_code}"
+    return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the history page's callback transfer sizes")
+    parser.add_argument("--size", type=int, default=10000, help="Journal size (trades)")
+    args = parser.parse_args()
+
+    path = suite.build_journal(args.size)
+    suite.use_database(path)
+    client = suite.app.app.server.test_client()
+    with suite.quiet():
+        dependencies = client.get('/_dash-dependencies').get_json()
+    old_rows = legacy_rows()
+
+    encodings = ["gzip", "br"] if compression.brotli is not None else ["gzip"]
+    print(f"History page, {args.size:,} trades (sizes in KB; brotli {'on' if 'br' in encodings else 'not installed'})\n")
+    print(f"{'response':<26} {'before':>9} {'before gz':>10} {'after':>9} " + " ".join(f"{'after ' + e:>10}" for e in encodings))
+
+    known = {}
+    for label, output_id, values in HISTORY_CALLBACKS:
+        body = load_test._callback_body(load_test._find_callback(dependencies, output_id, values), values, known)
+        with suite.quiet():
+            raw = post(client, body, 'identity').get_data()
+            compressed = {e: post(client, body, e) for e in encodings}
+        for e, response in compressed.items():
+            assert response.headers.get('Content-Encoding') == e, f"{label}: not compressed with {e}"
+        response = json.loads(raw)
+        for component_id, props in response["response"].items():
+            for prop, value in props.items():
+                known[f"{component_id}.{prop}"] = value
+
+        # The same response with the rows as they used to be sent
+        old_response = json.loads(raw)
+        data_output = next(iter(old_response["response"]))
+        old_response["response"][data_output]["data"] = old_rows
+        old_raw = to_json_plotly(old_response).encode()
+
+        print(f"{label:<26} {len(old_raw) / 1024:>9.1f} {len(compression.compress(old_raw, 'gzip')) / 1024:>10.1f} "
+              f"{len(raw) / 1024:>9.1f} " + " ".join(f"{len(r.get_data()) / 1024:>10.1f}" for r in compressed.values()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+# benchmarks/rolling_windows.py - utils/rolling_stats.py at journal sizes far beyond today's
+#
+# Times the cumulative-sum rolling engine (N-trade and N-day windows) on synthetic journals, next
+# to the same statistics computed with pandas .rolling() and, for the smaller sizes, a plain
+# Python loop over every window. Also checks the engine's results against pandas.
+#
+# Usage (from the project root):
+#   python benchmarks/rolling_windows.py [--sizes 100000,1000000] [--repeat 5] [--loop-max 100000]
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'utils'))
+
+import numpy as np
+import pandas as pd
+
+import rolling_stats
+
+TRADE_WINDOW = rolling_stats.DEFAULT_TRADE_WINDOW
+DAY_WINDOW = rolling_stats.DEFAULT_DAY_WINDOW
+TRADES_PER_DAY = 20
+
+
+def make_trades(n, seed=42):
+    """n synthetic trades: entry times (TRADES_PER_DAY per trading day), P&L and Risk ($)."""
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range("2000-01-03", periods=n // TRADES_PER_DAY + 1).values
+    entry_times = np.sort(days[np.arange(n) // TRADES_PER_DAY] + rng.integers(9 * 3600, 16 * 3600, n).astype('timedelta64[s]'))
+    pnl = np.round(rng.normal(15, 220, n), 2)
+    risk = rng.choice([0.0, 50.0, 100.0, 250.0, 400.0], n) # 0 = risk not recorded
+    return entry_times, pnl, risk
+
+
+def pandas_trade_stats(pnl, risk, window):
+    """Same N-trade statistics with pandas .rolling() (the obvious alternative)."""
+    p = pd.Series(pnl)
+    r = pd.Series(np.where(risk > 0, pnl / np.where(risk > 0, risk, 1), np.nan))
+    gross_profit = p.clip(lower=0).rolling(window).sum()
+    gross_loss = (-p.clip(upper=0)).rolling(window).sum()
+    expectancy = p.rolling(window).mean()
+    pnl_std = p.rolling(window).std()
+    return {
+        "win_rate": (p > 0).rolling(window).mean() * 100,
+        "expectancy": expectancy,
+        "profit_factor": gross_profit / gross_loss.where(gross_loss > 0),
+        "avg_r": r.rolling(window, min_periods=1).mean().where(p.index >= window - 1),
+        "pnl_std": pnl_std,
+        "sharpe": expectancy / pnl_std,
+    }
+
+
+def loop_trade_stats(pnl, risk, window):
+    """Same N-trade statistics recomputed window by window in Python (what a naive port would do)."""
+    pnl, risk = pnl.tolist(), risk.tolist()
+    results = {name: [] for name in ("win_rate", "expectancy", "profit_factor", "avg_r", "pnl_std", "sharpe")}
+    for i in range(window - 1, len(pnl)):
+        trades = pnl[i - window + 1:i + 1]
+        risks = risk[i - window + 1:i + 1]
+        mean = sum(trades) / window
+        std = statistics.stdev(trades)
+        gross_loss = -sum(t for t in trades if t < 0)
+        r_values = [t / rk for t, rk in zip(trades, risks) if rk > 0]
+        results["win_rate"].append(sum(1 for t in trades if t > 0) / window * 100)
+        results["expectancy"].append(mean)
+        results["profit_factor"].append(sum(t for t in trades if t > 0) / gross_loss if gross_loss else float('nan'))
+        results["avg_r"].append(sum(r_values) / len(r_values) if r_values else float('nan'))
+        results["pnl_std"].append(std)
+        results["sharpe"].append(mean / std if std else float('nan'))
+    return results
+
+
+def time_ms(fn, repeat):
+    """Median milliseconds of fn() over repeat runs (after one warm-up run)."""
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def check_against_pandas(entry_times, pnl, risk):
+    """Raises AssertionError if the engine disagrees with pandas."""
+    engine = rolling_stats.rolling_trade_stats(pnl, risk, window=TRADE_WINDOW)
+    for name, expected in pandas_trade_stats(pnl, risk, TRADE_WINDOW).items():
+        assert np.allclose(engine[name], expected.values, rtol=1e-7, atol=1e-7, equal_nan=True), name
+
+    daily = rolling_stats.rolling_daily_stats(entry_times, pnl, risk, window_days=DAY_WINDOW)
+    net = pd.Series(pnl).groupby(pd.Series(entry_times).dt.normalize()).sum()
+    assert np.allclose(daily["net_pnl"], net.values)
+    assert np.allclose(daily["pnl_std"], net.rolling(DAY_WINDOW).std().values, rtol=1e-7, atol=1e-7, equal_nan=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the rolling statistics engine")
+    parser.add_argument("--sizes", default="100000,1000000", help="Comma-separated trade counts")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument("--loop-max", type=int, default=100000, help="Largest size to run the Python-loop baseline on")
+    args = parser.parse_args()
+
+    print(f"Windows: {TRADE_WINDOW} trades / {DAY_WINDOW} trading days; median of {args.repeat} runs")
+    for n in [int(size) for size in args.sizes.split(",")]:
+        entry_times, pnl, risk = make_trades(n)
+        check_against_pandas(entry_times, pnl, risk)
+
+        engine_trades = time_ms(lambda: rolling_stats.rolling_trade_stats(pnl, risk, window=TRADE_WINDOW), args.repeat)
+        engine_days = time_ms(lambda: rolling_stats.rolling_daily_stats(entry_times, pnl, risk, window_days=DAY_WINDOW), args.repeat)
+        pandas_trades = time_ms(lambda: pandas_trade_stats(pnl, risk, TRADE_WINDOW), args.repeat)
+
+        print(f"\n{n:,} trades ({n // TRADES_PER_DAY:,} trading days) - results match pandas")
+        print(f"  engine, {TRADE_WINDOW}-trade windows   {engine_trades:9.1f} ms")
+        print(f"  engine, {DAY_WINDOW}-day windows     {engine_days:9.1f} ms")
+        print(f"  pandas .rolling(), {TRADE_WINDOW}-trade {pandas_trades:9.1f} ms")
+        if n <= args.loop_max:
+            loop_trades = time_ms(lambda: loop_trade_stats(pnl, risk, TRADE_WINDOW), 1)
+            print(f"  Python loop, {TRADE_WINDOW}-trade       {loop_trades:9.1f} ms   ({loop_trades / engine_trades:.0f}x the engine)")
+
+
+if __name__ == '__main__':
+    main()
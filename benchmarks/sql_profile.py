@@ -0,0 +1,63 @@
+# benchmarks/sql_profile.py - Which SQL statements the hot paths spend their time in
+#
+# Runs each benchmarks/suite.py case once against a synthetic journal with utils/query_profiler.py
+# enabled, then prints the statements by total time (calls, rows returned, SQLite VM steps).
+# Every statement over --slow-ms is also written with its EXPLAIN QUERY PLAN to the slow-query log
+# (benchmarks/artifacts/slow_queries.log), e.g. to see the "Entry Time" LIKE filter and the
+# ORDER BY "Entry Time" sorts show up as full SCANs with a temp B-tree.
+#
+# Usage (from the project root):
+#   python benchmarks/sql_profile.py [--size 100000] [--cases overview,calendar] [--slow-ms 10] [--top 10]
+
+import argparse
+import os
+import sys
+
+import suite # Journals, cases and helpers shared with the timing suite
+import query_profiler
+
+LOG_PATH = os.path.join(suite.ARTIFACTS_DIR, 'slow_queries.log')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the SQL statements behind the benchmark cases")
+    parser.add_argument("--size", type=int, default=100000, help="Journal size (trades)")
+    parser.add_argument("--cases", default=",".join(suite.CASES), help="Comma-separated case names (default: all)")
+    parser.add_argument("--slow-ms", type=float, default=10, help="Statements at least this slow go to the slow-query log")
+    parser.add_argument("--top", type=int, default=10, help="Statements listed per case")
+    args = parser.parse_args()
+
+    case_names = [name.strip() for name in args.cases.split(",")]
+    unknown = [name for name in case_names if name not in suite.CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+
+    path = suite.build_journal(args.size)
+    facts = suite.journal_facts(path)
+    os.makedirs(suite.ARTIFACTS_DIR, exist_ok=True)
+    for name in case_names:
+        query_profiler.disable() # Case setup isn't profiled
+        suite.use_database(path)
+        with suite.quiet():
+            setup, run = suite.CASES[name](path, facts)
+            if setup:
+                setup()
+        query_profiler.reset_summary()
+        query_profiler.enable(slow_query_ms=args.slow_ms, log_path=LOG_PATH)
+        with suite.quiet():
+            run()
+        query_profiler.disable()
+
+        statements = query_profiler.summary()
+        total_ms = sum(row["total_ms"] for row in statements)
+        print(f"\n{name}@{args.size}: {len(statements)} distinct statements, {total_ms:,.1f} ms in SQL")
+        for row in statements[:args.top]:
+            sql = row["statement"]
+            print(f"  {row['total_ms']:9.1f} ms  {row['calls']:5d} calls  {row['rows']:9,d} rows  "
+                  f"{row['vm_steps']:12,d} steps  {sql[:110] + ('...' if len(sql) > 110 else '')}")
+
+    print(f"\nSlow statements (>= {args.slow_ms:g} ms) with query plans: {LOG_PATH}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
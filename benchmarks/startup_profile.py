@@ -0,0 +1,84 @@
+# benchmarks/startup_profile.py - Cold-start import profile of the Dash app
+#
+# Runs `python -X importtime -c "import app"` in a fresh interpreter, saves the raw log as an
+# artifact and prints the slowest imports. Also reports whether pandas / plotly.graph_objects
+# were imported during startup (pages only load them on first use).
+#
+# Usage (from the project root):
+#   python benchmarks/startup_profile.py [--runs 5] [--top 25] [--output benchmarks/artifacts/importtime.log]
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_OUTPUT = os.path.join(PROJECT_ROOT, 'benchmarks', 'artifacts', 'importtime.log')
+DEFERRED_MODULES = ("pandas", "plotly.graph_objects")
+
+
+def run_importtime():
+    """Imports app in a fresh interpreter with -X importtime. Returns (stderr log, wall seconds)."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    )
+    return result.stderr, time.perf_counter() - start
+
+
+def parse_importtime(log):
+    """Parses -X importtime output into a list of (self_us, cumulative_us, module_name)."""
+    entries = []
+    for line in log.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append((int(self_us), int(cumulative_us), name.strip()))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the app's cold-start imports.")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh-interpreter runs")
+    parser.add_argument("--top", type=int, default=25, help="Number of slowest imports to print")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the raw importtime log")
+    args = parser.parse_args()
+
+    wall_times = []
+    log = ""
+    for _ in range(args.runs):
+        log, wall = run_importtime()
+        wall_times.append(wall)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        f.write(log) # Log of the last run
+    print(f"Raw importtime log written to {args.output}")
+
+    entries = parse_importtime(log)
+    app_entry = next((e for e in entries if e[2] == "app"), None)
+    print(f"Wall time over {args.runs} runs: median {statistics.median(wall_times):.3f}s, "
+          f"min {min(wall_times):.3f}s, max {max(wall_times):.3f}s")
+    if app_entry:
+        print(f"'import app' cumulative: {app_entry[1] / 1000:.1f} ms")
+
+    print(f"\nTop {args.top} imports by cumulative time:")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for self_us, cumulative_us, name in sorted(entries, key=lambda e: e[1], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+    # Dash itself imports the (lazily populated) plotly.graph_objects package, so report its cost too
+    cumulative_by_name = {e[2]: e[1] for e in entries}
+    print()
+    for module_name in DEFERRED_MODULES:
+        if module_name in cumulative_by_name:
+            print(f"{module_name}: imported at startup ({cumulative_by_name[module_name] / 1000:.1f} ms)")
+        else:
+            print(f"{module_name}: deferred")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,366 @@
+# benchmarks/suite.py - Timings of the database, analytics and callback hot paths
+#
+# Builds synthetic journals (Test_data_generator.generate_synthetic_trade_data, bulk inserted)
+# of each requested size, then times the paths every page load or table edit goes through:
+#
+#   database:  fetch_all_trades_from_db, fetch_trades_by_date
+#   callbacks: export_all_trades_json, import_trades_json (1,000-trade file), update_overview_kpis,
+#              update_calendar_view, update_progress_report, filter_historical_data_table,
+#              handle_all_table_updates (edit one row of a day's table, write committed)
+#
+# Callbacks are called as plain functions (no HTTP/JSON round trip); caches are cleared before
+# every run, so the numbers are cold-path costs (the history filter runs after its page load). Results are compared with benchmarks/baseline.json
+# (the committed reference run) and every run is written to benchmarks/artifacts/.
+#
+# Usage (from the project root):
+#   python benchmarks/suite.py [--sizes 10000,100000,1000000] [--cases overview,calendar]
+#                              [--repeat 5] [--max-seconds 20] [--save-baseline] [--fail-on-regression]
+#
+# Journals are cached in benchmarks/artifacts/journals/ and reused by later runs.
+
+import argparse
+import base64
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+import app # Registers the pages (no disk I/O at import time)
+from dash._callback_context import context_value # Lets callbacks read callback_context outside a request
+from dash._utils import AttributeDict
+
+import Test_data_generator
+import database as db
+from app_config import get_config
+from figure_cache import get_figure_cache
+from trade_cache import get_trade_cache
+from write_queue import get_write_queue
+import background
+
+overview = sys.modules['pages.overview']
+calendar_view = sys.modules['pages.calendar_view']
+progress_report = sys.modules['pages.progress_report']
+historical_data = sys.modules['pages.historical_data']
+daily_helper = sys.modules['pages.daily_helper']
+
+ARTIFACTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'artifacts')
+JOURNALS_DIR = os.path.join(ARTIFACTS_DIR, 'journals')
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+JOURNAL_START = date(2000, 1, 3) # Synthetic journals start here and run for as many years as needed
+IMPORT_FILE_TRADES = 1000 # Size of the JSON file the import case uploads
+
+
+############################################################################
+# Journals
+############################################################################
+def journal_path(n_trades):
+    return os.path.join(JOURNALS_DIR, f"journal_{n_trades}.db")
+
+
+def build_journal(n_trades):
+    """Creates (once) a journal of exactly n_trades synthetic trades and returns its path."""
+    path = journal_path(n_trades)
+    if os.path.exists(path):
+        return path
+    os.makedirs(JOURNALS_DIR, exist_ok=True)
+    tmp_path = path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    # ~5000 trading days at most, however large the journal (keeps the calendar realistic)
+    avg_trades_per_day = max(10, n_trades // 5000)
+    use_database(tmp_path)
+    columns = ', '.join(f'"{col}"' for col in db.COLUMNS_TO_STORE)
+    placeholders = ', '.join('?' for _ in db.COLUMNS_TO_STORE)
+    conn = db.get_db_connection()
+    inserted = 0
+    year_start = JOURNAL_START
+    started = time.perf_counter()
+    while inserted < n_trades:
+        # One year per call keeps memory flat for the million-trade journal
+        year_end = year_start.replace(year=year_start.year + 1) - timedelta(days=1)
+        trades = Test_data_generator.generate_synthetic_trade_data(
+            year_start.isoformat(), year_end.isoformat(), avg_trades_per_day=avg_trades_per_day,
+            seed=[n_trades, year_start.year] # Same journal on every machine
+        )[:n_trades - inserted]
+        conn.executemany(
+            f'INSERT INTO {db.TABLE_NAME} ({columns}) VALUES ({placeholders})',
+            [tuple(trade.get(col) for col in db.COLUMNS_TO_STORE) for trade in trades]
+        )
+        conn.commit()
+        inserted += len(trades)
+        year_start = year_end + timedelta(days=1)
+    conn.close()
+    os.replace(tmp_path, path)
+    print(f"Built {path} ({n_trades:,} trades) in {time.perf_counter() - started:.1f} s")
+    return path
+
+
+def use_database(path):
+    """Points utils/database.py (via the shared config) at path and clears the app's caches."""
+    get_config()['database_name'] = path # In-memory only; config.json is not written
+    with quiet():
+        db.ensure_db_initialized()
+    clear_caches()
+
+
+def clear_caches():
+    get_figure_cache().clear()
+    get_trade_cache().clear()
+
+
+def journal_facts(path):
+    """Days used as inputs by the cases: the busiest trading day and the last trading day."""
+    conn = sqlite3.connect(path)
+    busiest_day = conn.execute(
+        f'SELECT substr("Entry Time", 1, 10) AS day FROM {db.TABLE_NAME} GROUP BY day ORDER BY COUNT(*) DESC LIMIT 1'
+    ).fetchone()[0]
+    last_day = conn.execute(f'SELECT MAX(substr("Entry Time", 1, 10)) FROM {db.TABLE_NAME}').fetchone()[0]
+    conn.close()
+    return {
+        'busiest_day': datetime.strptime(busiest_day, '%Y-%m-%d').date(),
+        'last_day': datetime.strptime(last_day, '%Y-%m-%d').date(),
+    }
+
+
+############################################################################
+# Cases: name -> prepare(path, facts) returning (setup, run)
+# setup() runs untimed before every run; run() is what gets timed.
+############################################################################
+def triggered_by(prop_id):
+    """Sets dash.callback_context as if prop_id had triggered the callback."""
+    context_value.set(AttributeDict(triggered_inputs=[{'prop_id': prop_id, 'value': None}]))
+
+
+def case_fetch_all(path, facts):
+    return None, db.fetch_all_trades_from_db
+
+
+def case_fetch_by_date(path, facts):
+    return None, lambda: db.fetch_trades_by_date(facts['busiest_day'])
+
+
+def case_export_json(path, facts):
+    return None, lambda: historical_data.export_all_trades_json(1)
+
+
+def case_import_json(path, facts):
+    trades = Test_data_generator.generate_synthetic_trade_data(
+        facts['last_day'].isoformat(), (facts['last_day'] + timedelta(days=180)).isoformat(), seed=IMPORT_FILE_TRADES
+    )[:IMPORT_FILE_TRADES]
+    contents = 'data:application/json;base64,' + base64.b64encode(json.dumps(trades).encode()).decode()
+    scratch = scratch_copy(path)
+
+    def setup():
+        copy_journal(path, scratch) # Every run imports into the same starting journal
+        use_database(scratch)
+
+    return setup, lambda: historical_data.import_trades_json(background.no_progress, contents, 'trades.json')
+
+
+def case_overview(path, facts):
+    return clear_caches, lambda: overview.update_overview_kpis(background.no_progress, None, None)
+
+
+def case_calendar(path, facts):
+    calendar_data = {'year': facts['last_day'].year, 'month': facts['last_day'].month}
+
+    def run():
+        triggered_by('data-change-event.data') # Full-month redraw (days unknown)
+        return calendar_view.update_calendar_view(None, None, None, None, None, [], calendar_data)
+
+    return clear_caches, run
+
+
+def case_progress_report(path, facts):
+    end_date = facts['last_day']
+    start_date = end_date - timedelta(days=6 * 30) # The page's default range
+    return clear_caches, lambda: progress_report.update_progress_report(background.no_progress, start_date.isoformat(), end_date.isoformat(), None, None)
+
+
+def case_filter_historical(path, facts):
+    end_date = facts['last_day']
+    start_date = end_date - timedelta(days=365)
+
+    def setup():
+        # A filter change follows the page load, which cached the rows for this data version
+        clear_caches()
+        historical_data._load_all_trades()
+
+    def run():
+        triggered_by('historical-filter-futures-type.value')
+        return historical_data.filter_historical_data_table(
+            None, None, None, start_date.isoformat(), end_date.isoformat(), 'ES', None, None, None, None, None, None, None
+        )
+
+    return setup, run
+
+
+def case_table_update(path, facts):
+    scratch = scratch_copy(path)
+    copy_journal(path, scratch)
+    use_database(scratch)
+    previous_rows = db.fetch_trades_by_date(facts['busiest_day']) # The Daily Helper table for that day
+    edit = {'value': 0}
+
+    def run():
+        # Change "Points Realized" of one row, as a user edit in the DataTable would
+        edit['value'] += 1
+        current_rows = [dict(row) for row in previous_rows]
+        current_rows[0]['Points Realized'] = float(edit['value'] % 20 + 1)
+        triggered_by('trades-table.data')
+        result = daily_helper.handle_all_table_updates(None, current_rows, previous_rows, 0, '', '', '', '', '', '', '')
+        get_write_queue().flush() # Include the commit of the queued update
+        return result
+
+    return lambda: use_database(scratch), run
+
+
+def scratch_copy(path):
+    return path.replace('.db', '_scratch.db')
+
+
+def copy_journal(source, target):
+    """Copies source over target, which an earlier run may still have open."""
+    # Pooled connections to the old file and its -wal would otherwise corrupt the new copy
+    db.close_pool(target)
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(target + suffix):
+            os.remove(target + suffix)
+    shutil.copyfile(source, target)
+
+
+CASES = {
+    'fetch_all_trades_from_db': case_fetch_all,
+    'fetch_trades_by_date': case_fetch_by_date,
+    'export_all_trades_json': case_export_json,
+    'import_trades_json': case_import_json,
+    'update_overview_kpis': case_overview,
+    'update_calendar_view': case_calendar,
+    'update_progress_report': case_progress_report,
+    'filter_historical_data_table': case_filter_historical,
+    'handle_all_table_updates': case_table_update,
+}
+
+
+############################################################################
+# Running and reporting
+############################################################################
+@contextlib.contextmanager
+def quiet():
+    """The pages print debug output on every call; keep it out of the report."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def time_case(setup, run, repeat, max_seconds):
+    """Median/min milliseconds of run() over up to `repeat` runs (fewer once max_seconds is spent)."""
+    samples = []
+    budget_end = time.perf_counter() + max_seconds
+    while len(samples) < repeat and (not samples or time.perf_counter() < budget_end):
+        if setup:
+            with quiet():
+                setup()
+        start = time.perf_counter()
+        with quiet():
+            run()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {'median_ms': round(statistics.median(samples), 3), 'min_ms': round(min(samples), 3), 'runs': len(samples)}
+
+
+def compare(results, baseline, threshold):
+    """Prints each timing next to the baseline; returns the list of regressions."""
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            verdict = "(no baseline)"
+        else:
+            ratio = result['median_ms'] / reference['median_ms']
+            verdict = f"{ratio:5.2f}x baseline"
+            if ratio > 1 + threshold:
+                verdict += "  REGRESSION"
+                regressions.append(key)
+            elif ratio < 1 - threshold:
+                verdict += "  faster"
+        print(f"  {key:<44} {result['median_ms']:11.1f} ms  (min {result['min_ms']:.1f}, {result['runs']} runs)  {verdict}")
+    return regressions
+
+
+def load_baseline():
+    try:
+        with open(BASELINE_PATH) as f:
+            return json.load(f)['results']
+    except FileNotFoundError:
+        return {}
+
+
+def write_report(path, results, args):
+    with open(path, 'w') as f:
+        json.dump({
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'machine': f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPU(s)",
+            'repeat': args.repeat,
+            'results': results,
+        }, f, indent=2, sort_keys=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the database, analytics and callback hot paths")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma-separated journal sizes (trades)")
+    parser.add_argument("--cases", default=",".join(CASES), help="Comma-separated case names (default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case and size")
+    parser.add_argument("--max-seconds", type=float, default=20, help="Stop repeating a case after this many seconds")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Relative slowdown reported as a regression")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results to benchmarks/baseline.json")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 if anything regressed")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    case_names = [name.strip() for name in args.cases.split(",")]
+    unknown = [name for name in case_names if name not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+
+    baseline = load_baseline()
+    results, regressions = {}, []
+    for n_trades in sizes:
+        path = build_journal(n_trades)
+        facts = journal_facts(path)
+        print(f"\n{n_trades:,} trades (median of up to {args.repeat} runs):")
+        size_results = {}
+        for name in case_names:
+            use_database(path)
+            with quiet():
+                setup, run = CASES[name](path, facts)
+            size_results[f"{name}@{n_trades}"] = time_case(setup, run, args.repeat, args.max_seconds)
+        regressions += compare(size_results, baseline, args.threshold)
+        results.update(size_results)
+
+    os.makedirs(ARTIFACTS_DIR, exist_ok=True)
+    report_path = os.path.join(ARTIFACTS_DIR, f"suite_{datetime.now():%Y%m%d_%H%M%S}.json")
+    write_report(report_path, results, args)
+    print(f"\nResults written to {report_path}")
+    if args.save_baseline:
+        write_report(BASELINE_PATH, {**baseline, **results}, args)
+        print(f"Baseline updated: {BASELINE_PATH}")
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+# gunicorn.conf.py - Settings for `gunicorn -c gunicorn.conf.py wsgi:server`
+#
+# Defaults come from config.json "server" (see app_config.DEFAULT_SERVER_CONFIG); command-line
+# flags such as --workers still override them.
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'utils'))
+from app_config import get_server_config
+
+_settings = get_server_config()
+
+bind = f"{_settings['host']}:{_settings['port']}"
+workers = _settings['workers']
+threads = _settings['threads']
+worker_class = 'gthread' # Threads per worker: callbacks mostly wait on SQLite and pandas releases the GIL often
+
+# Thread budget: every open browser tab keeps one /events stream (change_events.py) on a worker
+# thread for up to "events" max_stream_s. A worker serves callbacks with threads - max_streams
+# threads at worst, so raise "threads" together with "events" max_streams; streams beyond
+# max_streams get 503 and the tab retries later (it then only misses live refreshes).
+
+# Each worker imports the app itself. Preloading in the master would start the log writer thread
+# there, and threads don't survive the fork into the workers.
+preload_app = False
+
+timeout = 120 # Full-history callbacks on large journals can take a while
+graceful_timeout = 30 # Lets the write-behind queue flush on shutdown
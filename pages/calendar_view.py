@@ -1,9 +1,8 @@
 import dash
 from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
 from dash import dcc, html
 import json
-import pandas as pd
-import plotly.graph_objects as go
 from datetime import datetime, date, timedelta # Added timedelta for date calculations
 
 # Database access (assuming utils/database.py is in the project root)
@@ -11,24 +10,13 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
 import database as db
+from lazy_imports import lazy_module # pandas/plotly are imported on first use, not at app startup
+pd = lazy_module("pandas")
 
-# Load config (assuming config.json is in the project root)
-CONFIG_FILE = 'config.json'
-try:
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.join(script_dir, '..')
-    config_path = os.path.join(project_root, 'config.json')
-    with open(config_path, 'r') as f:
-        config = json.load(f)
-except FileNotFoundError:
-    print(f"Error: {CONFIG_FILE} not found for pages/calendar_view.py. Using default settings.")
-    config = { # Default minimal config
-        "daily_risk": 550, "profit_target": 600, "max_trades_per_day": 6,
-        "default_futures_type": "MES", "default_size": 5,
-        "futures_types": {"ES": { "mf": 50 }, "MES": { "mf": 5 }},
-        "pressing_sequence_multipliers": [1, 2, 1.5, 3],
-        "database_name": "trades.db"
-    }
+import journals
+import cross_journal # Daily aggregates over several journals (ATTACH + UNION ALL)
+import app_logging # Level-filtered, queued logging
+log = app_logging.get_logger(__name__)
 
 # Register this page with Dash
 dash.register_page(
@@ -40,47 +28,53 @@ dash.register_page(
 )
 
 # --- Layout for the Calendar View Page ---
-layout = html.Div([
-    html.H2("Daily Performance Calendar", style={'textAlign': 'center', 'marginBottom': '20px'}),
-
-    # Navigation Controls (Month/Year)
-    html.Div([
-        html.Button("<< Prev Year", id="prev-year-button", className="dash-button", style={'marginRight': '10px'}),
-        html.Button("< Prev Month", id="prev-month-button", className="dash-button", style={'marginRight': '20px'}),
-        html.H3(id="current-month-year-display", style={'margin': '0 20px', 'minWidth': '150px', 'textAlign': 'center'}),
-        html.Button("Next Month >", id="next-month-button", className="dash-button", style={'marginLeft': '20px'}),
-        html.Button("Next Year >>", id="next-year-button", className="dash-button", style={'marginLeft': '10px'}),
-    ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'marginBottom': '30px'}),
-
-    # Calendar Grid Container
-    html.Div(id='calendar-grid-container', style={
-        'display': 'grid',
-        'grid-template-columns': 'repeat(7, 1fr)', # 7 columns for days of week
-        'gap': '5px', # Gap between cells
-        'width': '95%',
-        'maxWidth': '1000px', # Max width for the whole calendar
-        'margin': '0 auto', # Center the calendar
-        'padding': '15px',
-        'backgroundColor': '#ffffff',
-        'borderRadius': '8px',
-        'boxShadow': '0 2px 10px rgba(0, 0, 0, 0.08)'
-    }, children=[
-        # Weekday Headers (Mon, Tue, etc.)
-        html.Div("Mon", style={'textAlign': 'center', 'fontWeight': 'bold', 'padding': '10px', 'backgroundColor': '#e9eef2', 'borderRadius': '4px'}),
-        html.Div("Tue", style={'textAlign': 'center', 'fontWeight': 'bold', 'padding': '10px', 'backgroundColor': '#e9eef2', 'borderRadius': '4px'}),
-        html.Div("Wed", style={'textAlign': 'center', 'fontWeight': 'bold', 'padding': '10px', 'backgroundColor': '#e9eef2', 'borderRadius': '4px'}),
-        html.Div("Thu", style={'textAlign': 'center', 'fontWeight': 'bold', 'padding': '10px', 'backgroundColor': '#e9eef2', 'borderRadius': '4px'}),
-        html.Div("Fri", style={'textAlign': 'center', 'fontWeight': 'bold', 'padding': '10px', 'backgroundColor': '#e9eef2', 'borderRadius': '4px'}),
-        html.Div("Sat", style={'textAlign': 'center', 'fontWeight': 'bold', 'padding': '10px', 'backgroundColor': '#e9eef2', 'borderRadius': '4px'}),
-        html.Div("Sun", style={'textAlign': 'center', 'fontWeight': 'bold', 'padding': '10px', 'backgroundColor': '#e9eef2', 'borderRadius': '4px'}),
-        # Day cells will be populated by callback
-    ]),
-
-    # Hidden Store to keep track of current displayed month/year
-    dcc.Store(id='current-calendar-date', data={'year': datetime.now().year, 'month': datetime.now().month}),
-    # Hidden interval for initial data load
-    dcc.Interval(id='calendar-interval', interval=1000, n_intervals=0, max_intervals=1), # Triggers once after 1 second
-])
+# Built on first navigation (Dash calls layout functions per page load) rather than at app startup,
+# with the current month's grid already filled in (no callback round trip).
+def layout(**kwargs):
+    today = datetime.now()
+    calendar_cells, month_title = _calendar_month(today.year, today.month)
+    return html.Div([
+        html.H2("Daily Performance Calendar", style={'textAlign': 'center', 'marginBottom': '20px'}),
+
+        # Navigation Controls (Month/Year)
+        html.Div([
+            html.Button("<< Prev Year", id="prev-year-button", className="dash-button", style={'marginRight': '10px'}),
+            html.Button("< Prev Month", id="prev-month-button", className="dash-button", style={'marginRight': '20px'}),
+            html.H3(month_title, id="current-month-year-display", style={'margin': '0 20px', 'minWidth': '150px', 'textAlign': 'center'}),
+            html.Button("Next Month >", id="next-month-button", className="dash-button", style={'marginLeft': '20px'}),
+            html.Button("Next Year >>", id="next-year-button", className="dash-button", style={'marginLeft': '10px'}),
+        ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'marginBottom': '15px'}),
+
+        # Aggregate reporting mode: each day shows the picked journals' combined P&L and their split
+        html.Div([
+            html.Label("Combine journals:", style={'fontWeight': 'bold'}),
+            dcc.Dropdown(
+                id='calendar-journals',
+                options=journals.journal_options(),
+                value=[],
+                multi=True,
+                placeholder="This journal only",
+                style={'minWidth': '350px'}
+            ),
+        ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'gap': '10px', 'marginBottom': '30px'}),
+
+        # Calendar Grid Container
+        html.Div(id='calendar-grid-container', style={
+            'display': 'grid',
+            'grid-template-columns': 'repeat(7, 1fr)', # 7 columns for days of week
+            'gap': '5px', # Gap between cells
+            'width': '95%',
+            'maxWidth': '1000px', # Max width for the whole calendar
+            'margin': '0 auto', # Center the calendar
+            'padding': '15px',
+            'backgroundColor': '#ffffff',
+            'borderRadius': '8px',
+            'boxShadow': '0 2px 10px rgba(0, 0, 0, 0.08)'
+        }, children=calendar_cells),
+
+        # Hidden Store to keep track of current displayed month/year
+        dcc.Store(id='current-calendar-date', data={'year': today.year, 'month': today.month}),
+    ])
 
 
 # --- Callbacks for the Calendar View Page ---
@@ -93,10 +87,12 @@ layout = html.Div([
     Input('next-month-button', 'n_clicks'),
     Input('prev-year-button', 'n_clicks'),
     Input('next-year-button', 'n_clicks'),
-    Input('calendar-interval', 'n_intervals'), # Initial load trigger
-    State('current-calendar-date', 'data')
+    Input('data-change-event', 'data'), # Trades changed: redraw if the displayed month is affected
+    Input('calendar-journals', 'value'), # Journals picked for the aggregate view (empty: this journal)
+    State('current-calendar-date', 'data'),
+    prevent_initial_call=True # The layout renders the current month
 )
-def update_calendar_view(prev_month_clicks, next_month_clicks, prev_year_clicks, next_year_clicks, n_intervals, current_calendar_data):
+def update_calendar_view(prev_month_clicks, next_month_clicks, prev_year_clicks, next_year_clicks, change_event, journal_names, current_calendar_data):
     ctx = dash.callback_context
     trigger_id = ctx.triggered[0]['prop_id'].split('.')[0] if ctx.triggered else 'initial_load'
 
@@ -119,9 +115,26 @@ def update_calendar_view(prev_month_clicks, next_month_clicks, prev_year_clicks,
         current_year -= 1
     elif trigger_id == 'next-year-button':
         current_year += 1
-    elif trigger_id == 'initial_load':
-        pass # Use default current_year, current_month from dcc.Store initialization
+    elif trigger_id == 'data-change-event':
+        # days is None when the changed days are unknown: redraw to be safe
+        month_prefix = f"{current_year:04d}-{current_month:02d}-"
+        if change_event and change_event.get('days') is not None and \
+                not any(day.startswith(month_prefix) for day in change_event['days']):
+            raise PreventUpdate # Nothing changed in the displayed month
 
+    calendar_cells, month_title = _calendar_month(current_year, current_month, journal_names)
+
+    # Store updated month/year for next callback run
+    updated_calendar_data = {'year': current_year, 'month': current_month}
+
+    return calendar_cells, month_title, updated_calendar_data
+
+
+def _calendar_month(current_year, current_month, journal_names=None):
+    """
+    The grid's cells (weekday headers + one cell per day) and the title for a month: this journal's
+    trades, or with journal_names the combined P&L of those journals and each one's share.
+    """
     # Get the first day of the current month
     first_day_of_month = date(current_year, current_month, 1)
     # Calculate which day of the week the first day is (Monday=0, Sunday=6)
@@ -133,30 +146,17 @@ def update_calendar_view(prev_month_clicks, next_month_clicks, prev_year_clicks,
     else:
         days_in_month = (date(current_year, current_month + 1, 1) - first_day_of_month).days
 
-    # Fetch all historical data for aggregation
+    last_day_of_month = first_day_of_month + timedelta(days=days_in_month - 1)
     try:
-        db.initialize_db()
-        all_trades = db.fetch_all_trades_from_db()
-    except Exception as e:
-        print(f"Error fetching all historical trades for calendar: {e}")
+        if journal_names:
+            day_totals, day_breakdown = _journals_daily_totals(journal_names, first_day_of_month, last_day_of_month)
+        else:
+            day_totals, day_breakdown = _daily_totals(first_day_of_month, last_day_of_month), {}
+    except Exception:
+        log.exception("Error fetching the trades for the calendar")
         # Ensure month/year display is still correct even on error
         return html.Div("Error loading trades for calendar.", style={'textAlign': 'center', 'color': 'red'}), \
-               f"{first_day_of_month.strftime('%B %Y')}", \
-               {'year': current_year, 'month': current_month} # Return updated store state
-
-    df = pd.DataFrame(all_trades)
-    df['Entry Time'] = pd.to_datetime(df['Entry Time'], errors='coerce')
-    df = df.dropna(subset=['Entry Time', 'Realized P&L'])
-    df['Date'] = df['Entry Time'].dt.date # Extract just the date
-    df['Realized P&L'] = pd.to_numeric(df['Realized P&L'], errors='coerce').fillna(0).astype(float)
-
-    # Filter trades for the current displayed month/year
-    df_current_month = df[(df['Entry Time'].dt.year == current_year) & (df['Entry Time'].dt.month == current_month)]
-
-    daily_summary = df_current_month.groupby('Date').agg(
-        Total_P_L=('Realized P&L', 'sum'),
-        Trade_Count=('Trade #', 'count')
-    ).reset_index()
+               f"{first_day_of_month.strftime('%B %Y')}"
 
     # Build calendar cells
     calendar_cells = []
@@ -172,15 +172,8 @@ def update_calendar_view(prev_month_clicks, next_month_clicks, prev_year_clicks,
     # Populate actual day cells
     for day_num in range(1, days_in_month + 1):
         current_date_obj = date(current_year, current_month, day_num)
-        day_summary = daily_summary[daily_summary['Date'] == current_date_obj]
-
-        total_p_l = 0
-        trade_count = 0
-        
-        if not day_summary.empty:
-            total_p_l = day_summary['Total_P_L'].iloc[0]
-            trade_count = day_summary['Trade_Count'].iloc[0]
-        
+        total_p_l, trade_count = day_totals.get(current_date_obj, (0, 0))
+
         # Determine cell background color based on P&L
         cell_bgcolor = '#ffffff' # Default for no trades or break-even
         cell_text_color = '#333333' # Default text color
@@ -203,6 +196,8 @@ def update_calendar_view(prev_month_clicks, next_month_clicks, prev_year_clicks,
             html.Div(p_l_display, style={'fontSize': '0.9em', 'textAlign': 'right', 'paddingRight': '5px', 'color': cell_text_color}),
             html.Div(trades_display, style={'fontSize': '0.7em', 'textAlign': 'right', 'paddingRight': '5px', 'color': cell_text_color})
         ]
+        for label, journal_p_l in day_breakdown.get(current_date_obj, []): # Aggregate mode: each journal's share
+            cell_children.append(html.Div(f"{label}: ${journal_p_l:,.2f}", style={'fontSize': '0.65em', 'textAlign': 'right', 'paddingRight': '5px', 'color': '#555555'}))
 
         calendar_cells.append(
             html.Div(
@@ -221,8 +216,38 @@ def update_calendar_view(prev_month_clicks, next_month_clicks, prev_year_clicks,
                 }
             )
         )
-    
-    # Store updated month/year for next callback run
-    updated_calendar_data = {'year': current_year, 'month': current_month}
 
-    return calendar_cells, f"{first_day_of_month.strftime('%B %Y')}", updated_calendar_data
\ No newline at end of file
+    return calendar_cells, f"{first_day_of_month.strftime('%B %Y')}"
+
+
+def _daily_totals(first_day, last_day):
+    """{date: (total P&L, trade count)} of this journal's trades from first_day to last_day."""
+    db.ensure_db_initialized() # No-op once the startup hook has run
+    all_trades = db.fetch_trades_between(first_day, last_day)
+
+    df = pd.DataFrame(all_trades, columns=['id', *db.COLUMNS_TO_STORE]) # Columns even for a month without trades
+    df['Entry Time'] = pd.to_datetime(df['Entry Time'], errors='coerce')
+    df = df.dropna(subset=['Entry Time', 'Realized P&L'])
+    df['Date'] = df['Entry Time'].dt.date # Extract just the date
+    df['Realized P&L'] = pd.to_numeric(df['Realized P&L'], errors='coerce').fillna(0).astype(float)
+
+    daily_summary = df.groupby('Date').agg(
+        Total_P_L=('Realized P&L', 'sum'),
+        Trade_Count=('Trade #', 'count')
+    ).reset_index()
+    return {row.Date: (row.Total_P_L, row.Trade_Count) for row in daily_summary.itertuples(index=False)}
+
+
+def _journals_daily_totals(journal_names, first_day, last_day):
+    """
+    ({date: (combined P&L, combined trade count)}, {date: [(journal label, P&L), ...]}) of the
+    given journals from first_day to last_day, aggregated in SQLite (cross_journal.py).
+    """
+    report = cross_journal.aggregate_report(journal_names, period='day', start_date=first_day, end_date=last_day)
+    labels = journals.available_journals()
+    totals = {date.fromisoformat(row['period']): (row['net_pnl'], row['trade_count']) for row in report['combined']}
+    breakdown = {}
+    for name in report['journals']:
+        for row in report['by_journal'][name]:
+            breakdown.setdefault(date.fromisoformat(row['period']), []).append((labels.get(name, name), row['net_pnl']))
+    return totals, breakdown
@@ -5,6 +5,12 @@ from dash.dependencies import Input, Output, State
 from dash import dcc, html
 import json
 import os # To get the absolute path for config.json
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils')) # Add 'utils' to Python path
+import app_config # Shared config.json loader
+import database as db
+import journals # Per-tab journal selection
 
 # --- Page Registration ---
 dash.register_page(
@@ -12,131 +18,135 @@ dash.register_page(
     path='/settings',  # URL path for the settings page
     name='Settings',   # Name for navigation link
     title='Trading Dashboard - Settings',
-    description='Configure dashboard settings and database name.'
+    description='Configure dashboard settings and pick the journal of this tab.'
 )
 
-# --- Function to load config (will be called in callbacks) ---
+# --- Function to load config (called by the layout) ---
 def load_config():
-    # Construct the path to config.json relative to the app's root
-    # assuming config.json is in the same directory as app.py
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.join(script_dir, '..') # Go up one level from 'pages'
-    config_path = os.path.join(project_root, 'config.json')
-
-    try:
-        with open(config_path, 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        print(f"Error: config.json not found at {config_path}. Using default settings.")
-        return {
-            "daily_risk": 550,
-            "profit_target": 600,
-            "max_trades_per_day": 6,
-            "default_futures_type": "MES",
-            "default_size": 5,
-            "futures_types": {"ES": { "mf": 50 }, "MES": { "mf": 5 }},
-            "pressing_sequence_multipliers": [1, 2, 1.5, 3],
-            "database_name": "trades.db" # Default database name
-        }
+    # Always read the file itself here: the Settings page should show what is on disk
+    return app_config.load_config()
 
 # --- Layout for the Config Page ---
-layout = html.Div([
-    html.H2("Dashboard Settings", style={'textAlign': 'center', 'marginBottom': '20px'}),
-    html.Div([
-        html.H3("General Settings", style={'marginBottom': '10px'}),
-        html.Div([
-            html.Label("Database Name (.db):", style={'fontWeight': 'bold', 'marginRight': '10px', 'minWidth': '150px'}),
-            dcc.Dropdown( # CHANGED TO DROPDOWN
-                id='config-db-name',
-                options=[
-                    {'label': 'trades.db (Live Data)', 'value': 'trades.db'},
-                    {'label': 'sandbox_trades.db (Test Data)', 'value': 'sandbox_trades.db'}
-                ],
-                value='trades.db', # Default to live data
-                clearable=False,
-                style={'flexGrow': 1, 'maxWidth': '300px'}
-            ),
-        ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '10px'}),
-
-        html.Div([
-            html.Label("Daily Risk ($):", style={'fontWeight': 'bold', 'marginRight': '10px', 'minWidth': '150px'}),
-            dcc.Input(id='config-daily-risk', type='number', min=0, step=1, style={'flexGrow': 1, 'maxWidth': '300px'}),
-        ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '10px'}),
-
+# A function, so the form is rendered with the settings on disk already filled in
+def layout(**kwargs):
+    config_data = load_config()
+    archive_settings = {**app_config.DEFAULT_ARCHIVE_CONFIG, **(config_data.get('archive') or {})}
+    backup_settings = {**app_config.DEFAULT_BACKUP_CONFIG, **(config_data.get('backups') or {})}
+    return html.Div([
+        html.H2("Dashboard Settings", style={'textAlign': 'center', 'marginBottom': '20px'}),
         html.Div([
-            html.Label("Profit Target ($):", style={'fontWeight': 'bold', 'marginRight': '10px', 'minWidth': '150px'}),
-            dcc.Input(id='config-profit-target', type='number', min=0, step=1, style={'flexGrow': 1, 'maxWidth': '300px'}),
-        ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '10px'}),
-
-        html.Div([
-            html.Label("Max Trades Per Day:", style={'fontWeight': 'bold', 'marginRight': '10px', 'minWidth': '150px'}),
-            dcc.Input(id='config-max-trades', type='number', min=1, step=1, style={'flexGrow': 1, 'maxWidth': '300px'}),
-        ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '10px'}),
+            html.H3("General Settings", style={'marginBottom': '10px'}),
+            html.Div([
+                html.Label("Journal (this tab):", style={'fontWeight': 'bold', 'marginRight': '10px', 'minWidth': '150px'}),
+                dcc.Dropdown( # Switches this browser tab only; other tabs and users keep their journal
+                    id='config-db-name',
+                    options=journals.journal_options(), # config.json "journals"
+                    value=db.get_database_info()[0], # The journal this request runs on
+                    clearable=False,
+                    style={'flexGrow': 1, 'maxWidth': '300px'}
+                ),
+            ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '10px'}),
+            html.Div(id='config-journal-output', style={'marginBottom': '10px', 'color': 'gray', 'fontSize': '12px'}),
+
+            html.Div([
+                html.Label("Daily Risk ($):", style={'fontWeight': 'bold', 'marginRight': '10px', 'minWidth': '150px'}),
+                dcc.Input(id='config-daily-risk', value=config_data.get('daily_risk', 550), type='number', min=0, step=1, style={'flexGrow': 1, 'maxWidth': '300px'}),
+            ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '10px'}),
+
+            html.Div([
+                html.Label("Profit Target ($):", style={'fontWeight': 'bold', 'marginRight': '10px', 'minWidth': '150px'}),
+                dcc.Input(id='config-profit-target', value=config_data.get('profit_target', 600), type='number', min=0, step=1, style={'flexGrow': 1, 'maxWidth': '300px'}),
+            ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '10px'}),
+
+            html.Div([
+                html.Label("Max Trades Per Day:", style={'fontWeight': 'bold', 'marginRight': '10px', 'minWidth': '150px'}),
+                dcc.Input(id='config-max-trades', value=config_data.get('max_trades_per_day', 6), type='number', min=1, step=1, style={'flexGrow': 1, 'maxWidth': '300px'}),
+            ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '10px'}),
         
-        # NEW: Default Futures Type Dropdown
-        html.Div([
-            html.Label("Default Futures Type:", style={'fontWeight': 'bold', 'marginRight': '10px', 'minWidth': '150px'}),
-            dcc.Dropdown(
-                id='config-default-futures-type',
-                options=[
-                    {'label': 'ES', 'value': 'ES'},
-                    {'label': 'MES', 'value': 'MES'},
-                    {'label': 'NQ', 'value': 'NQ'} # Example: Add NQ as an option
-                ],
-                value='MES', # Default value, will be loaded from config
-                clearable=False,
-                style={'flexGrow': 1, 'maxWidth': '300px'}
-            ),
-        ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '10px'}),
-
-        # NEW: Default Futures Size Input
-        html.Div([
-            html.Label("Default Futures Size:", style={'fontWeight': 'bold', 'marginRight': '10px', 'minWidth': '150px'}),
-            dcc.Input(id='config-default-size', type='number', min=1, step=1, style={'flexGrow': 1, 'maxWidth': '300px'}),
-        ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '10px'}),
-
-        html.Div([
-            html.Label("Pressing Multipliers (comma-separated):", style={'fontWeight': 'bold', 'marginRight': '10px', 'minWidth': '150px'}),
-            dcc.Input(id='config-pressing-multipliers', type='text', style={'flexGrow': 1, 'maxWidth': '300px'}),
-        ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '20px'}),
-
-        html.Button('Save Settings', id='save-settings-button', n_clicks=0,
-                    style={'padding': '10px 20px', 'fontSize': '16px', 'cursor': 'pointer', 'display': 'block', 'margin': '0 auto'}),
+            # NEW: Default Futures Type Dropdown
+            html.Div([
+                html.Label("Default Futures Type:", style={'fontWeight': 'bold', 'marginRight': '10px', 'minWidth': '150px'}),
+                dcc.Dropdown(
+                    id='config-default-futures-type',
+                    options=[
+                        {'label': 'ES', 'value': 'ES'},
+                        {'label': 'MES', 'value': 'MES'},
+                        {'label': 'NQ', 'value': 'NQ'} # Example: Add NQ as an option
+                    ],
+                    value=config_data.get('default_futures_type', 'MES'),
+                    clearable=False,
+                    style={'flexGrow': 1, 'maxWidth': '300px'}
+                ),
+            ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '10px'}),
+
+            # NEW: Default Futures Size Input
+            html.Div([
+                html.Label("Default Futures Size:", style={'fontWeight': 'bold', 'marginRight': '10px', 'minWidth': '150px'}),
+                dcc.Input(id='config-default-size', value=config_data.get('default_size', 5), type='number', min=1, step=1, style={'flexGrow': 1, 'maxWidth': '300px'}),
+            ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '10px'}),
+
+            html.Div([
+                html.Label("Pressing Multipliers (comma-separated):", style={'fontWeight': 'bold', 'marginRight': '10px', 'minWidth': '150px'}),
+                dcc.Input(id='config-pressing-multipliers', value=", ".join(map(str, config_data.get('pressing_sequence_multipliers', [1, 2, 1.5, 3]))), type='text', style={'flexGrow': 1, 'maxWidth': '300px'}),
+            ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '20px'}),
+
+            # Archiving is opt-in: it changes what other readers of the journal file see in trades_journal
+            html.Div([
+                dcc.Checklist(
+                    id='config-archive-enabled',
+                    options=[{'label': ' Archive closed months', 'value': 'enabled'}],
+                    value=['enabled'] if archive_settings['enabled'] else [],
+                    labelStyle={'fontWeight': 'bold'}
+                ),
+                html.Div(
+                    f"Moves trades older than the last {archive_settings['hot_months']} months out of the "
+                    "trades_journal table into monthly archive tables in the same file, in the background. "
+                    "The dashboard reads both; your own SQL or tools reading trades_journal will only see "
+                    "the recent months.",
+                    style={'color': 'gray', 'fontSize': '12px', 'marginTop': '4px'}
+                ),
+            ], style={'marginBottom': '20px'}),
+
+            # Snapshots are opt-in: they write copies of every journal file next to the app
+            html.Div([
+                dcc.Checklist(
+                    id='config-backups-enabled',
+                    options=[{'label': ' Snapshot journals', 'value': 'enabled'}],
+                    value=['enabled'] if backup_settings['enabled'] else [],
+                    labelStyle={'fontWeight': 'bold'}
+                ),
+                html.Div(
+                    f"Copies each journal into '{backup_settings['directory']}' in the background every "
+                    f"{backup_settings['interval_s'] / 3600:g} hours and keeps the newest {backup_settings['keep']}. "
+                    "Restore one with python backup.py restore.",
+                    style={'color': 'gray', 'fontSize': '12px', 'marginTop': '4px'}
+                ),
+            ], style={'marginBottom': '20px'}),
+
+            html.Button('Save Settings', id='save-settings-button', n_clicks=0,
+                        style={'padding': '10px 20px', 'fontSize': '16px', 'cursor': 'pointer', 'display': 'block', 'margin': '0 auto'}),
         
-        html.Div(id='config-save-output', style={'marginTop': '15px', 'textAlign': 'center', 'fontWeight': 'bold'}),
+            html.Div(id='config-save-output', style={'marginTop': '15px', 'textAlign': 'center', 'fontWeight': 'bold'}),
 
-    ], style={'border': '1px solid #ddd', 'borderRadius': '5px', 'padding': '20px', 'maxWidth': '600px', 'margin': '0 auto'}), # Centered container
-
-    # Hidden interval component to trigger initial load of settings
-    dcc.Interval(id='config-interval', interval=1000, n_intervals=0, max_intervals=1),
-])
+        ], style={'border': '1px solid #ddd', 'borderRadius': '5px', 'padding': '20px', 'maxWidth': '600px', 'margin': '0 auto'}), # Centered container
+    ])
 
 # --- Callbacks for the Config Page ---
 
-
+# Journal dropdown -> this tab's journal-id store (sent with every request by assets/journals.js)
 @dash.callback(
-    [Output('config-db-name', 'value'),
-     Output('config-daily-risk', 'value'),
-     Output('config-profit-target', 'value'),
-     Output('config-max-trades', 'value'),
-     Output('config-pressing-multipliers', 'value'),
-     Output('config-default-futures-type', 'value'), # NEW OUTPUT
-     Output('config-default-size', 'value')],        # NEW OUTPUT
-    Input('config-interval', 'n_intervals')
+    Output(journals.STORE_ID, 'data'),
+    Output('config-journal-output', 'children'),
+    Input('config-db-name', 'value'),
+    prevent_initial_call=True
 )
-def load_current_settings(n_intervals):
-    if n_intervals > 0:
-        config_data = load_config()        
-        return [
-            config_data.get('database_name', 'trades.db'),
-            config_data.get('daily_risk', 550),
-            config_data.get('profit_target', 600),
-            config_data.get('max_trades_per_day', 6),
-            ", ".join(map(str, config_data.get('pressing_sequence_multipliers', [1, 2, 1.5, 3]))),
-            config_data.get('default_futures_type', 'MES'), # NEW RETURN VALUE
-            config_data.get('default_size', 5)             # NEW RETURN VALUE
-        ]
-    return dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update
+def select_journal(journal_id):
+    journal = journals.resolve(journal_id)
+    with db.use_database(journal):
+        journals.get_registry().get(journal).ensure_initialized() # Create the table if the file is new
+    return journal, f"This tab now uses '{journal}'. Other tabs keep their journal."
+
+
 
 # Locate this section in config.py:
 # @dash.callback(
@@ -154,22 +164,22 @@ def load_current_settings(n_intervals):
 @dash.callback(
     Output('config-save-output', 'children'),
     Input('save-settings-button', 'n_clicks'),
-    State('config-db-name', 'value'),
     State('config-daily-risk', 'value'),
     State('config-profit-target', 'value'),
     State('config-max-trades', 'value'),
     State('config-pressing-multipliers', 'value'),
     State('config-default-futures-type', 'value'), # NEW STATE
     State('config-default-size', 'value'),        # NEW STATE
+    State('config-archive-enabled', 'value'),
+    State('config-backups-enabled', 'value'),
     prevent_initial_call=True
 )
-def save_settings(n_clicks, db_name, daily_risk, profit_target, max_trades, pressing_multipliers_str,
-                  default_futures_type_val, default_size_val): # NEW ARGUMENTS
+def save_settings(n_clicks, daily_risk, profit_target, max_trades, pressing_multipliers_str,
+                  default_futures_type_val, default_size_val, archive_enabled, backups_enabled): # NEW ARGUMENTS
     if n_clicks > 0:
         try:
-            new_config = load_config()
+            new_config = load_config() # Keeps "database_name" (the default journal): the dropdown only switches this tab
             
-            new_config['database_name'] = db_name if db_name else "trades.db"
             new_config['daily_risk'] = int(daily_risk) if daily_risk is not None else 550
             new_config['profit_target'] = int(profit_target) if profit_target is not None else 600
             new_config['max_trades_per_day'] = int(max_trades) if max_trades is not None else 6
@@ -182,15 +192,13 @@ def save_settings(n_clicks, db_name, daily_risk, profit_target, max_trades, pres
             # NEW: Save default futures type and size
             new_config['default_futures_type'] = default_futures_type_val if default_futures_type_val else "MES"
             new_config['default_size'] = int(default_size_val) if default_size_val is not None else 5
+            new_config['archive'] = {**(new_config.get('archive') or {}), 'enabled': 'enabled' in (archive_enabled or [])}
+            new_config['backups'] = {**(new_config.get('backups') or {}), 'enabled': 'enabled' in (backups_enabled or [])}
 
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            project_root = os.path.join(script_dir, '..')
-            config_path = os.path.join(project_root, 'config.json')
-
-            with open(config_path, 'w') as f:
-                json.dump(new_config, f, indent=2)
+            # Writes config.json and updates the shared config used by every page
+            app_config.save_config(new_config)
             
-            return html.Div("Settings saved successfully! Refresh page to apply database changes.", style={'color': 'green'})
+            return html.Div("Settings saved successfully!", style={'color': 'green'})
         except Exception as e:
             return html.Div(f"Error saving settings: {e}", style={'color': 'red'})
     return ""
\ No newline at end of file
@@ -3,8 +3,6 @@ from dash.dependencies import Input, Output, State
 from dash import dcc, html, dash_table, callback_context
 import json
 from datetime import datetime
-import pandas as pd
-import plotly.graph_objects as go
 import io # For dcc.send_data_frame
 import base64 # Needed for load_trades_json
 
@@ -13,32 +11,21 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils')) # Add 'utils' to Python path
 import database as db # Import your database utility functions
-
-
-# Load config (assuming config.json is in the project root)
-CONFIG_FILE = 'config.json'
-try:
-    with open(CONFIG_FILE, 'r') as f:
-        config = json.load(f)
-except FileNotFoundError:
-    print(f"Error: {CONFIG_FILE} not found. Please create it with the specified structure.")
-    # Provide a default minimal config to prevent app crash if file is missing during development
-    config = {
-        "daily_risk": 550,
-        "profit_target": 600,
-        "max_trades_per_day": 6,
-        "default_futures_type": "MES",
-        "default_size": 5,
-        "futures_types": {"ES": { "mf": 50 }, "MES": { "mf": 5 }}
-    }
-
-# Initialize the database when this page module is imported
-# This ensures the DB file and table are created/ready
-try:
-    db.initialize_db()
-except Exception as e:
-    print(f"Error initializing database from daily_helper.py: {e}")
-    # You might want a more visible error on the dashboard if DB init fails.
+from write_queue import get_write_queue # Write-behind queue so table edits don't wait on disk
+from trade_cache import get_trade_cache # Per-day cache of trade rows for the date picker
+from payload import table_rows # Rounds table rows before they are sent
+import figures # Plain-dict figure builder (skips plotly.graph_objects validation)
+from downsample import lttb_indices # Shape-preserving downsampling for long equity curves
+from lazy_imports import lazy_module # pandas is imported on first use, not at app startup
+pd = lazy_module("pandas")
+np = lazy_module("numpy")
+import app_logging # Level-filtered, queued logging instead of print()
+log = app_logging.get_logger(__name__)
+
+
+# Shared config (config.json is only read on first access, not at import time)
+# The database itself is initialized once by the startup hook in app.py.
+from app_config import config
 
 # Register this page with Dash
 dash.register_page(
@@ -49,373 +36,199 @@ dash.register_page(
     description='Daily trade entry and monitoring.'
 )
 
-
-# Load today's trades from the database for initial display
-initial_data = []
-try:
-    # Fetch trades for today's date from DB
-    today_date = datetime.now().date()
-    initial_data = db.fetch_trades_by_date(today_date)
-    db_name, table_name = db.get_database_info()
-    print(f"Loaded {len(initial_data)} trades for {today_date} from DB '{db_name}' table '{table_name}'.")
-except Exception as e:
-    print(f"Error loading today's data from DB for daily helper: {e}")
-    # Initial data remains empty if there's an error
-
 # --- Layout for the Daily Helper Page ---
-layout = html.Div(style={'width': '100%', 'boxSizing': 'border-box'}, children=[
-    html.Div([
-        html.H2("Daily Trade Log", className="page-title")
-    ], style={'display': 'flex', 'justifyContent': 'center', 'width': '100%'}),
-    #html.H2("Daily Logger", className="page-title"), #style={'textAlign': 'center', 'marginBottom': '0px'}),
+# A function (not a module-level value) so today's trades are fetched when the page is requested,
+# not when the module is imported at app startup.
+def layout(**kwargs):
+    # Load today's trades from the database for initial display
+    initial_data = []
+    try:
+        # Fetch trades for today's date from DB
+        today_date = datetime.now().date()
+        get_write_queue().flush() # Queued edits are committed (and their days invalidated) before reading
+        initial_data = get_trade_cache().get_trades(today_date) # Also warms the surrounding days
+        log.debug("Loaded %d trades for %s", len(initial_data), today_date)
+    except Exception:
+        log.exception("Error loading today's data from DB for daily helper")
+        # Initial data remains empty if there's an error
+
+    return html.Div(style={'width': '100%', 'boxSizing': 'border-box'}, children=[
+        html.Div([
+            html.H2("Daily Trade Log", className="page-title")
+        ], style={'display': 'flex', 'justifyContent': 'center', 'width': '100%'}),
+        #html.H2("Daily Logger", className="page-title"), #style={'textAlign': 'center', 'marginBottom': '0px'}),
 
 
-    # Main Dashboard Content (pulled out from Home tab, now directly in app.layout)    
-    html.Div(id="home-tab-content-wrapper", style={'minHeight': '800px', 'padding': '0px', 'backgroundColor': 'transparent', 'width': '100%'}, children=[
-        # NEW: Date Picker for daily metrics
-        html.Div([
-            html.Label("View Data For:", style={'fontWeight': 'bold', 'marginRight': '10px'}),
-            dcc.DatePickerSingle(
-                id='date-picker-single',
-                month_format='MMMM Y',
-                placeholder='Select a date',
-                date=datetime.now().date(), # Default to today's date
-                display_format='MM-DD-YYYY', # CHANGED: Date format
-                style={'width': '150px'} # ADDED: Style to make it smaller
-            ),
-        ], style={'textAlign': 'right', 'marginBottom': '15px'}), # CHANGED: textAlign to 'left'
-        # Main container for the two-column indicator section
-        html.Div([
-            # Column 1: Available Risk Gauge
+        # Main Dashboard Content (pulled out from Home tab, now directly in app.layout)    
+        html.Div(id="home-tab-content-wrapper", style={'minHeight': '800px', 'padding': '0px', 'backgroundColor': 'transparent', 'width': '100%'}, children=[
+            # NEW: Date Picker for daily metrics
             html.Div([
-                #html.H3("Available Risk", className="gauge-title"),
-                dcc.Graph(id='available-risk-gauge', config={'displayModeBar': False},
-                          style={'height': '180px', 'width': '100%', 'backgroundColor': 'transparent'}), 
-            ], style={'flex': '1 1 350px', 'paddingRight': '10px', 'boxSizing': 'border-box', 'justifyContent': 'center'}), # Changed flex-basis to 350px, added boxSizing
-
-            # Column 2: Stacked Progress Bars and Placeholder
+                html.Label("View Data For:", style={'fontWeight': 'bold', 'marginRight': '10px'}),
+                dcc.DatePickerSingle(
+                    id='date-picker-single',
+                    month_format='MMMM Y',
+                    placeholder='Select a date',
+                    date=datetime.now().date(), # Default to today's date
+                    display_format='MM-DD-YYYY', # CHANGED: Date format
+                    style={'width': '150px'} # ADDED: Style to make it smaller
+                ),
+            ], style={'textAlign': 'right', 'marginBottom': '15px'}), # CHANGED: textAlign to 'left'
+            # Main container for the two-column indicator section
             html.Div([
-                # Row 1: Realized P&L Progress Bar
+                # Column 1: Available Risk Gauge
                 html.Div([
-                    html.H3("Realized P&L Progress", className="gauge-title"), #style={'textAlign': 'center'}),
-                    html.Div(id='pnl-progress-bar-container', style={'width': '100%', 'height': 'auto'}),
-                ], style={'width': '100%', 'height': 'auto', 'maxWidth': '100%', 'boxSizing': 'border-box', 'marginBottom': '25px', 'margintop': '100px'}), # Added maxWidth: '100%', boxSizing
+                    #html.H3("Available Risk", className="gauge-title"),
+                    dcc.Graph(id='available-risk-gauge', config={'displayModeBar': False},
+                              style={'height': '180px', 'width': '100%', 'backgroundColor': 'transparent'}), 
+                ], style={'flex': '1 1 350px', 'paddingRight': '10px', 'boxSizing': 'border-box', 'justifyContent': 'center'}), # Changed flex-basis to 350px, added boxSizing
 
-                # Row 2: Trades per Day Progress Bar
+                # Column 2: Stacked Progress Bars and Placeholder
                 html.Div([
-                    html.H3("Trades per Day", className="gauge-title"), #style={'textAlign': 'center'}),
-                    html.Div(id='trades-progress-bar-container', style={'width': '100%', 'height': 'auto'}),
-                ], style={'width': '100%', 'height': 'auto', 'maxWidth': '100%', 'boxSizing': 'border-box', 'marginBottom': '30px'}), # Added maxWidth: '100%', boxSizing
+                    # Row 1: Realized P&L Progress Bar
+                    html.Div([
+                        html.H3("Realized P&L Progress", className="gauge-title"), #style={'textAlign': 'center'}),
+                        html.Div(id='pnl-progress-bar-container', style={'width': '100%', 'height': 'auto'}),
+                    ], style={'width': '100%', 'height': 'auto', 'maxWidth': '100%', 'boxSizing': 'border-box', 'marginBottom': '25px', 'margintop': '100px'}), # Added maxWidth: '100%', boxSizing
 
-                # Row 3: Pressing Roadmap
-                html.Div([
-                    html.Div(
-                        id="pressing-roadmap-hover-target",
-                        style={
-                            'width': '100%',
-                            'minHeight': '20px',
-                            'textAlign': 'center',
-                            'marginTop': '0',
-                            'marginBottom': '5px',
-                            'cursor': 'help',
-                            'position': 'relative'
-                        },
-                        children=[
-                            html.P(
-                                "This roadmap shows your current pressing level based on consecutive wins. Win: advance. Loss/Break-even: reset to 1x.",
-                                className="roadmap-explanation-text",
-                                style={
-                                    'fontSize': '12px',
-                                    'textAlign': 'center',
-                                    'margin': '0',
-                                    'backgroundColor': 'rgba(0, 0, 0, 0.8)',
-                                    'color': 'white',
-                                    'padding': '5px 10px',
-                                    'borderRadius': '5px',
-                                    'whiteSpace': 'nowrap',
-                                    'position': 'absolute',
-                                    'bottom': '100%',
-                                    'left': '50%',
-                                    'transform': 'translateX(-50%)',
-                                    'zIndex': '10',
-                                    'opacity': '0',
-                                    'visibility': 'hidden',
-                                    'transition': 'opacity 0.3s ease-in-out, visibility 0.3s ease-in-out'
-                                }
-                            )
-                        ]
-                    ),
-                    html.Div(id='pressing-roadmap-container', style={'width': '100%', 'height': 'auto', 'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'flexWrap': 'wrap', 'padding': '10px 0'}),
-                ], style={'width': '100%', 'height': 'auto', 'maxWidth': '100%', 'boxSizing': 'border-box', 'marginBottom': '0px'}), # Added maxWidth: '100%', boxSizing
-
-            ], style={'flex': '1 1 350px', 'paddingLeft': '10px', 'boxSizing': 'border-box', 'display': 'flex', 'flexDirection': 'column', 'justifyContent': 'space-around'}),
-        ], style={
-            'display': 'flex',
-            'flexWrap': 'wrap', # CRUCIAL: Confirmed to be here
-            'justifyContent': 'space-around',
-            'alignItems': 'flex-start',
-            'width': '100%',
-            'marginBottom': '20px',
-            'padding': '20px',
-            'boxSizing': 'border-box' # Ensures padding/border are included in the width
-        }),
-
-        # Export to Excel Button
-        html.Div([
-            html.Button("Export to Excel", id="export-excel-button", n_clicks=0,
-                        className='dash-button', style={'marginBottom': '10px'}),
-        ], style={'width': '95%', 'margin': '0 auto 20px auto', 'display': 'flex', 'alignItems': 'center', 'flexWrap': 'wrap', 'justifyContent': 'flex-start', 'padding': '0 20px'}),
+                    # Row 2: Trades per Day Progress Bar
+                    html.Div([
+                        html.H3("Trades per Day", className="gauge-title"), #style={'textAlign': 'center'}),
+                        html.Div(id='trades-progress-bar-container', style={'width': '100%', 'height': 'auto'}),
+                    ], style={'width': '100%', 'height': 'auto', 'maxWidth': '100%', 'boxSizing': 'border-box', 'marginBottom': '30px'}), # Added maxWidth: '100%', boxSizing
 
-        # DataTable
-        html.Div([
-            dash_table.DataTable(
-                id='trades-table',
-                columns=[
-                    # Define the columns for the DataTable
-                    {"name": "DB ID", "id": "id", "type": "numeric", "editable": False, "hideable": True}, # CORRECTED: Removed 'header_align'
-                    {"name": "Trade #", "id": "Trade #", "type": "numeric", "editable": False},
-                    {"name": "Futures Type", "id": "Futures Type", "presentation": "dropdown"},
-                    {"name": "Size", "id": "Size", "type": "numeric", "editable": True},
-                    {"name": "Stop Loss (pts)", "id": "Stop Loss (pts)", "type": "numeric", "editable": True},
-                    {"name": "Risk ($)", "id": "Risk ($)", "type": "numeric", "editable": False},
-                    {"name": "Status", "id": "Status"}, #"presentation": "dropdown"},
-                    {"name": "Points Realized", "id": "Points Realized", "type": "numeric", "editable": True},
-                    {"name": "Realized P&L", "id": "Realized P&L", "type": "numeric", "editable": False, "format": {"specifier": ".2f"}},
-                    {"name": "Entry Time", "id": "Entry Time", "editable": False},
-                    {"name": "Exit Time", "id": "Exit Time", "editable": True},
-                    {"name": "Trade came to me", "id": "Trade came to me"}, # "presentation": "dropdown"},
-                    {"name": "With Value", "id": "With Value"}, #, "presentation": "dropdown"},
-                    {"name": "Market Conditions", "id": "Market Conditions", "presentation": "dropdown", "editable": True, "hideable": True}, # NEW COLUMN
-                    {"name": "Score", "id": "Score"}, #, "presentation": "dropdown"},
-                    {"name": "Entry Quality", "id": "Entry Quality"}, #, "presentation": "dropdown"},
-                    {"name": "Emotional State", "id": "Emotional State", "presentation": "dropdown", "hideable": True},
-                    {"name": "Sizing", "id": "Sizing", "presentation": "dropdown"},
-                    {"name": "Notes", "id": "Notes", "type": "text", "editable": True},
-                ],
-                data=initial_data,
-                editable=True,
-                row_deletable=True,
-                style_table={
-                    'overflowX': 'auto', # Allows horizontal scrolling within the table if content overflows
-                    'minWidth': '100%',  # Ensures the table tries to take full width available
-                },
-                dropdown={
-                    'Futures Type': {
-                        'options': [{'label': i, 'value': i} for i in config['futures_types'].keys()],
-                        'clearable': False
-                    },
-                    'Status': {
-                        'options': [{'label': i, 'value': i} for i in ['Active', 'Win', 'Loss']],
-                        'clearable': False
-                    },
-                    'Trade came to me': {
-                        'options': [{'label': 'Yes', 'value': 'Yes'}, {'label': 'No', 'value': 'No'}, {'label': ' ', 'value': ''}],
-                        'clearable': False
-                    },
-                    'With Value': {
-                        'options': [{'label': 'Yes', 'value': 'Yes'}, {'label': 'No', 'value': 'No'}, {'label': ' ', 'value': ''}],
-                        'clearable': False
-                    },
-                    'Score': {
-                        'options': [
-                            {'label': ' ', 'value': ''},
-                            {'label': 'A+', 'value': 'A+'},
-                            {'label': 'B', 'value': 'B'},
-                            {'label': 'C', 'value': 'C'},
-                        ],
-                        'clearable': False
-                    },
-                    'Entry Quality': {
-                        'options': [
-                            {'label': ' ', 'value': ''},                            
-                            {'label': 'Calm / Waited Patiently', 'value': 'Calm / Waited Patiently'},
-                            {'label': 'Impulsive / FOMO', 'value': 'Impulsive / FOMO'},                                
-                            {'label': 'Forced / Overtraded', 'value': 'Forced / Overtraded'},
-                            {'label': 'Get back losses', 'value': 'Get back losses'},
-                            {'label': 'Hesitant / Missed', 'value': 'Hesitant / Missed'},
-                        ],
-                        'clearable': False
-                    },
-                    'Emotional State': {
-                        'options': [
-                            {'label': ' ', 'value': ''},
-                            {'label': 'Calm', 'value': 'Calm'},
-                            {'label': 'Fear of Loss', 'value': 'Fear of Loss'},                            
-                            {'label': 'Fear of giving away profit', 'value': 'Fear of giving away profit'},
-                            {'label': 'Greed', 'value': 'Greed'},
-                            {'label': 'Overconfidence', 'value': 'Overconfidence'},
-                            {'label': 'Frustration / Impatience', 'value': 'Frustration / Impatience'},
-                            {'label': 'Distracted', 'value': 'Distracted'},
-                        ],
-                        'clearable': False
-                    },
-                    'Sizing': {
-                        'options': [{'label': i, 'value': i} for i in ['Base', 'Press', 'derisk']],
-                        'clearable': False
-                    },
-                },              
-                style_data_conditional=[
-                    # Existing Conditional styling for Risk ($) exceeding daily_risk (applies to whole row)
-                    { # NEW: Center content in 'Status' column
-                        'if': {'column_id': 'Status'},
-                        'textAlign': 'center'
+                    # Row 3: Pressing Roadmap
+                    html.Div([
+                        html.Div(
+                            id="pressing-roadmap-hover-target",
+                            style={
+                                'width': '100%',
+                                'minHeight': '20px',
+                                'textAlign': 'center',
+                                'marginTop': '0',
+                                'marginBottom': '5px',
+                                'cursor': 'help',
+                                'position': 'relative'
+                            },
+                            children=[
+                                html.P(
+                                    "This roadmap shows your current pressing level based on consecutive wins. Win: advance. Loss/Break-even: reset to 1x.",
+                                    className="roadmap-explanation-text",
+                                    style={
+                                        'fontSize': '12px',
+                                        'textAlign': 'center',
+                                        'margin': '0',
+                                        'backgroundColor': 'rgba(0, 0, 0, 0.8)',
+                                        'color': 'white',
+                                        'padding': '5px 10px',
+                                        'borderRadius': '5px',
+                                        'whiteSpace': 'nowrap',
+                                        'position': 'absolute',
+                                        'bottom': '100%',
+                                        'left': '50%',
+                                        'transform': 'translateX(-50%)',
+                                        'zIndex': '10',
+                                        'opacity': '0',
+                                        'visibility': 'hidden',
+                                        'transition': 'opacity 0.3s ease-in-out, visibility 0.3s ease-in-out'
+                                    }
+                                )
+                            ]
+                        ),
+                        html.Div(id='pressing-roadmap-container', style={'width': '100%', 'height': 'auto', 'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'flexWrap': 'wrap', 'padding': '10px 0'}),
+                    ], style={'width': '100%', 'height': 'auto', 'maxWidth': '100%', 'boxSizing': 'border-box', 'marginBottom': '0px'}), # Added maxWidth: '100%', boxSizing
+
+                ], style={'flex': '1 1 350px', 'paddingLeft': '10px', 'boxSizing': 'border-box', 'display': 'flex', 'flexDirection': 'column', 'justifyContent': 'space-around'}),
+            ], style={
+                'display': 'flex',
+                'flexWrap': 'wrap', # CRUCIAL: Confirmed to be here
+                'justifyContent': 'space-around',
+                'alignItems': 'flex-start',
+                'width': '100%',
+                'marginBottom': '20px',
+                'padding': '20px',
+                'boxSizing': 'border-box' # Ensures padding/border are included in the width
+            }),
+
+            # Export to Excel Button
+            html.Div([
+                html.Button("Export to Excel", id="export-excel-button", n_clicks=0,
+                            className='dash-button', style={'marginBottom': '10px'}),
+            ], style={'width': '95%', 'margin': '0 auto 20px auto', 'display': 'flex', 'alignItems': 'center', 'flexWrap': 'wrap', 'justifyContent': 'flex-start', 'padding': '0 20px'}),
+
+            # DataTable
+            html.Div([
+                dash_table.DataTable(
+                    id='trades-table',
+                    columns=[
+                        # Define the columns for the DataTable
+                        {"name": "DB ID", "id": "id", "type": "numeric", "editable": False, "hideable": True}, # CORRECTED: Removed 'header_align'
+                        {"name": "Trade #", "id": "Trade #", "type": "numeric", "editable": False},
+                        {"name": "Futures Type", "id": "Futures Type", "presentation": "dropdown"},
+                        {"name": "Size", "id": "Size", "type": "numeric", "editable": True},
+                        {"name": "Stop Loss (pts)", "id": "Stop Loss (pts)", "type": "numeric", "editable": True},
+                        {"name": "Risk ($)", "id": "Risk ($)", "type": "numeric", "editable": False},
+                        {"name": "Status", "id": "Status"}, #"presentation": "dropdown"},
+                        {"name": "Points Realized", "id": "Points Realized", "type": "numeric", "editable": True},
+                        {"name": "Realized P&L", "id": "Realized P&L", "type": "numeric", "editable": False, "format": {"specifier": ".2f"}},
+                        {"name": "Entry Time", "id": "Entry Time", "editable": False},
+                        {"name": "Exit Time", "id": "Exit Time", "editable": True},
+                        {"name": "Trade came to me", "id": "Trade came to me"}, # "presentation": "dropdown"},
+                        {"name": "With Value", "id": "With Value"}, #, "presentation": "dropdown"},
+                        {"name": "Market Conditions", "id": "Market Conditions", "presentation": "dropdown", "editable": True, "hideable": True}, # NEW COLUMN
+                        {"name": "Score", "id": "Score"}, #, "presentation": "dropdown"},
+                        {"name": "Entry Quality", "id": "Entry Quality"}, #, "presentation": "dropdown"},
+                        {"name": "Emotional State", "id": "Emotional State", "presentation": "dropdown", "hideable": True},
+                        {"name": "Sizing", "id": "Sizing", "presentation": "dropdown"},
+                        {"name": "Notes", "id": "Notes", "type": "text", "editable": True},
+                    ],
+                    data=initial_data,
+                    editable=True,
+                    row_deletable=True,
+                    style_table={
+                        'overflowX': 'auto', # Allows horizontal scrolling within the table if content overflows
+                        'minWidth': '100%',  # Ensures the table tries to take full width available
                     },
-                    { # NEW: Color ONLY 'Risk ($)' cell if risk is too high
-                        'if': {
-                            'column_id': 'Risk ($)', # Target only the 'Risk ($)' column
-                            'filter_query': '{Risk ($)} > ' + str(config['daily_risk'])
+                    dropdown={
+                        'Futures Type': {
+                            'options': [{'label': i, 'value': i} for i in config['futures_types'].keys()],
+                            'clearable': False
                         },
-                        'backgroundColor': '#CC0000', # Darker red for emphasis
-                        'color': 'white' # White text for contrast on dark red
-                    },
-                    # NEW: Cell-specific coloring for 'Status' column based on its text content
-                    {
-                        'if': {
-                            'column_id': 'Status', # Target only the Status column
-                            'filter_query': '{Status} = "Win"' # Condition for Win
+                        'Status': {
+                            'options': [{'label': i, 'value': i} for i in ['Active', 'Win', 'Loss']],
+                            'clearable': False
                         },
-                        'backgroundColor': '#E8F5E9', # Very light green for profit (subtler)
-                        'color': '#1B5E20' # Dark green text for contrast
-                    },
-                    {
-                        'if': {
-                            'column_id': 'Status', # Target only the Status column
-                            'filter_query': '{Status} = "Loss"' # Condition for Lose
+                        'Trade came to me': {
+                            'options': [{'label': 'Yes', 'value': 'Yes'}, {'label': 'No', 'value': 'No'}, {'label': ' ', 'value': ''}],
+                            'clearable': False
                         },
-                        'backgroundColor': '#FFEBEE', # Very light red for loss (subtler)
-                        'color': '#CC0000' # Dark red text for contrast
-                    },
-                    {
-                        'if': {
-                            'column_id': 'Status', # Target only the Status column
-                            'filter_query': '{Status} = "BE" || {Status} = "Active"' # Condition for Break-Even or Active status
+                        'With Value': {
+                            'options': [{'label': 'Yes', 'value': 'Yes'}, {'label': 'No', 'value': 'No'}, {'label': ' ', 'value': ''}],
+                            'clearable': False
                         },
-                        'backgroundColor': '#FFFDE7', # Very light yellow for break-even
-                        'color': '#FF6F00' # Orange text
-                    },                                    
-                ],
-                style_cell={
-                    'textAlign': 'left', # Keep left alignment for text, center for numbers if needed
-                    'padding': '7px 5px', # Reduced padding for sleek rows
-                    'fontFamily': 'Arial, sans-serif',
-                    'fontSize': '13px', # Consistent font size
-                    'borderBottom': '1px solid #e0e0e0', # Lighter bottom border for horizontal lines
-                    'borderLeft': 'none', # Remove vertical borders
-                    'borderRight': 'none', # Remove vertical borders
-                    'whiteSpace': 'nowrap', # CRUCIAL: Prevents cell content from wrapping (keeps it on one line)
-                    'overflow': 'visible', # ALLOWS content to overflow if needed, for column expansion
-                    'textOverflow': 'clip', # Prevents '...' from appearing, content will just clip or push column
-                    'height': 'auto', # Allow row height to adjust
-                    # min/width/maxWidth for columns are typically better managed in style_cell_conditional
-                    'minWidth': '80px', 'width': 'auto', 'maxWidth': '300px' # Allow width to be auto/expand up to 300px
-                },
-                style_header={
-                    'backgroundColor': '#f8f8f8', # Lighter header background
-                    'color': '#2c3e50', # Darker header text
-                    'fontWeight': 'bold',
-                    'textAlign': 'left',
-                    'fontSize': '14px', # Consistent font size
-                    'padding': '8px 5px', # Reduced padding for sleek headers
-                    'borderBottom': '2px solid #dde3e9',
-                    'borderLeft': 'none',
-                    'borderRight': 'none',
-                    'whiteSpace': 'nowrap', # CRUCIAL: Prevents header content from wrapping
-                    'overflow': 'visible', # ALLOWS header content to overflow if needed, for column expansion
-                    'textOverflow': 'clip', # Prevents '...' from appearing
-                },
-                css=[{
-                    'selector': '.dash-spreadsheet-container .dash-spreadsheet-table',
-                    'rule': 'font-size: 14px;'
-                },
-                {
-                    'selector': '.dash-cell div.dash-dropdown .Select-value-label',
-                    'rule': 'padding-right: 25px !important;'
-                },
-                {
-                    'selector': '.dash-cell div.dash-dropdown .Select-arrow',
-                    'rule': 'right: 5px !important;'
-                }
-                ]
-            )
-        ], style={'marginTop': '20px', 'marginBottom': '20px', 'width': '100%', 'margin': '0 auto', 'overflowX': 'auto', 'padding': '0 20px'}), # Added horizontal padding
-
-        # Section for Input Fields (below table)       
-        html.Div([
-            html.H3("New Trade Entry", style={'textAlign': 'center', 'marginTop': '20px', 'marginBottom': '15px'}),
-
-            # Main container for the 3 columns
-            html.Div([
-                # Column 1
-                html.Div([
-                    #Row1: Did Trade Come to You?
-                    html.Div([
-                        html.Label("Did trade come to you?", style={'fontWeight': 'bold', 'display': 'block', 'marginBottom': '5px'}),
-                        dcc.Dropdown(
-                            id='input-trade-came-to-you',
-                            options=[{'label': 'Yes', 'value': 'Yes'}, {'label': 'No', 'value': 'No'}, {'label': ' ', 'value': ''}],
-                            value='',
-                            clearable=False,
-                            style={'width': '100%'}
-                        )
-                    ], style={'marginBottom': '15px'}),
-                    #Row2: With Value?
-                    html.Div([
-                        html.Label("With Value?", style={'fontWeight': 'bold', 'display': 'block', 'marginBottom': '5px'}),
-                        dcc.Dropdown(
-                            id='input-with-value',
-                            options=[{'label': 'Yes', 'value': 'Yes'}, {'label': 'No', 'value': 'No'}, {'label': ' ', 'value': ''}],
-                            value='',
-                            clearable=False,
-                            style={'width': '100%'}
-                        )
-                    ], style={'marginBottom': '15px'}),
-
-                    # NEW ROW: Market Conditions
-                    html.Div([
-                        html.Label("Market Conditions:", style={'fontWeight': 'bold', 'display': 'block', 'marginBottom': '5px'}),
-                        dcc.Dropdown(
-                            id='input-market-conditions', # NEW ID
-                            options=[
-                                {'label': 'Trending', 'value': 'Trending'},
-                                {'label': 'Balancing/Range', 'value': 'Balancing/Range'},
-                                {'label': ' ', 'value': ''} # Option for blank
+                        'Score': {
+                            'options': [
+                                {'label': ' ', 'value': ''},
+                                {'label': 'A+', 'value': 'A+'},
+                                {'label': 'B', 'value': 'B'},
+                                {'label': 'C', 'value': 'C'},
                             ],
-                            value='', # Default to blank
-                            clearable=False,
-                            style={'width': '100%'}
-                        )
-                    ], style={'marginBottom': '15px'}), # Consistent spacing
-
-                ], style={'flex': '1 1 auto', 'padding': '0 10px', 'boxSizing': 'border-box', 'maxWidth': 'calc(33.33% - 20px)'}),
-
-                # Column 2
-                html.Div([
-                    #Row1: Entry Quality
-                    html.Div([
-                        html.Label("Entry Quality:", style={'fontWeight': 'bold', 'marginRight': '10px'}),
-                        dcc.Dropdown(
-                            id='input-entry-quality',
-                            options=[
-                                {'label': ' ', 'value': ''},                                
+                            'clearable': False
+                        },
+                        'Entry Quality': {
+                            'options': [
+                                {'label': ' ', 'value': ''},                            
                                 {'label': 'Calm / Waited Patiently', 'value': 'Calm / Waited Patiently'},
                                 {'label': 'Impulsive / FOMO', 'value': 'Impulsive / FOMO'},                                
                                 {'label': 'Forced / Overtraded', 'value': 'Forced / Overtraded'},
                                 {'label': 'Get back losses', 'value': 'Get back losses'},
                                 {'label': 'Hesitant / Missed', 'value': 'Hesitant / Missed'},
                             ],
-                            value='',
-                            clearable=False,
-                            style={'width': '100%'}
-                        )
-                    ], style={'marginBottom': '15px'}),
-                    #Row2: Emotional State
-                    html.Div([
-                        html.Label("Emotional State:", style={'fontWeight': 'bold', 'marginRight': '10px'}),
-                        dcc.Dropdown(
-                            id='input-psychological-state',
-                            options=[
-                                {'label': ' ', 'value': ''},                                
-                                {'label': 'Calm', 'value': 'Calm'},                                
+                            'clearable': False
+                        },
+                        'Emotional State': {
+                            'options': [
+                                {'label': ' ', 'value': ''},
+                                {'label': 'Calm', 'value': 'Calm'},
                                 {'label': 'Fear of Loss', 'value': 'Fear of Loss'},                            
                                 {'label': 'Fear of giving away profit', 'value': 'Fear of giving away profit'},
                                 {'label': 'Greed', 'value': 'Greed'},
@@ -423,94 +236,270 @@ layout = html.Div(style={'width': '100%', 'boxSizing': 'border-box'}, children=[
                                 {'label': 'Frustration / Impatience', 'value': 'Frustration / Impatience'},
                                 {'label': 'Distracted', 'value': 'Distracted'},
                             ],
-                            value='',                            
-                            clearable=False, 
-                            style={'width': '100%'}
-                        )
-                    ], style={'marginBottom': '15px'}),
-                    #Row3: Score
+                            'clearable': False
+                        },
+                        'Sizing': {
+                            'options': [{'label': i, 'value': i} for i in ['Base', 'Press', 'derisk']],
+                            'clearable': False
+                        },
+                    },              
+                    style_data_conditional=[
+                        # Existing Conditional styling for Risk ($) exceeding daily_risk (applies to whole row)
+                        { # NEW: Center content in 'Status' column
+                            'if': {'column_id': 'Status'},
+                            'textAlign': 'center'
+                        },
+                        { # NEW: Color ONLY 'Risk ($)' cell if risk is too high
+                            'if': {
+                                'column_id': 'Risk ($)', # Target only the 'Risk ($)' column
+                                'filter_query': '{Risk ($)} > ' + str(config['daily_risk'])
+                            },
+                            'backgroundColor': '#CC0000', # Darker red for emphasis
+                            'color': 'white' # White text for contrast on dark red
+                        },
+                        # NEW: Cell-specific coloring for 'Status' column based on its text content
+                        {
+                            'if': {
+                                'column_id': 'Status', # Target only the Status column
+                                'filter_query': '{Status} = "Win"' # Condition for Win
+                            },
+                            'backgroundColor': '#E8F5E9', # Very light green for profit (subtler)
+                            'color': '#1B5E20' # Dark green text for contrast
+                        },
+                        {
+                            'if': {
+                                'column_id': 'Status', # Target only the Status column
+                                'filter_query': '{Status} = "Loss"' # Condition for Lose
+                            },
+                            'backgroundColor': '#FFEBEE', # Very light red for loss (subtler)
+                            'color': '#CC0000' # Dark red text for contrast
+                        },
+                        {
+                            'if': {
+                                'column_id': 'Status', # Target only the Status column
+                                'filter_query': '{Status} = "BE" || {Status} = "Active"' # Condition for Break-Even or Active status
+                            },
+                            'backgroundColor': '#FFFDE7', # Very light yellow for break-even
+                            'color': '#FF6F00' # Orange text
+                        },                                    
+                    ],
+                    style_cell={
+                        'textAlign': 'left', # Keep left alignment for text, center for numbers if needed
+                        'padding': '7px 5px', # Reduced padding for sleek rows
+                        'fontFamily': 'Arial, sans-serif',
+                        'fontSize': '13px', # Consistent font size
+                        'borderBottom': '1px solid #e0e0e0', # Lighter bottom border for horizontal lines
+                        'borderLeft': 'none', # Remove vertical borders
+                        'borderRight': 'none', # Remove vertical borders
+                        'whiteSpace': 'nowrap', # CRUCIAL: Prevents cell content from wrapping (keeps it on one line)
+                        'overflow': 'visible', # ALLOWS content to overflow if needed, for column expansion
+                        'textOverflow': 'clip', # Prevents '...' from appearing, content will just clip or push column
+                        'height': 'auto', # Allow row height to adjust
+                        # min/width/maxWidth for columns are typically better managed in style_cell_conditional
+                        'minWidth': '80px', 'width': 'auto', 'maxWidth': '300px' # Allow width to be auto/expand up to 300px
+                    },
+                    style_header={
+                        'backgroundColor': '#f8f8f8', # Lighter header background
+                        'color': '#2c3e50', # Darker header text
+                        'fontWeight': 'bold',
+                        'textAlign': 'left',
+                        'fontSize': '14px', # Consistent font size
+                        'padding': '8px 5px', # Reduced padding for sleek headers
+                        'borderBottom': '2px solid #dde3e9',
+                        'borderLeft': 'none',
+                        'borderRight': 'none',
+                        'whiteSpace': 'nowrap', # CRUCIAL: Prevents header content from wrapping
+                        'overflow': 'visible', # ALLOWS header content to overflow if needed, for column expansion
+                        'textOverflow': 'clip', # Prevents '...' from appearing
+                    },
+                    css=[{
+                        'selector': '.dash-spreadsheet-container .dash-spreadsheet-table',
+                        'rule': 'font-size: 14px;'
+                    },
+                    {
+                        'selector': '.dash-cell div.dash-dropdown .Select-value-label',
+                        'rule': 'padding-right: 25px !important;'
+                    },
+                    {
+                        'selector': '.dash-cell div.dash-dropdown .Select-arrow',
+                        'rule': 'right: 5px !important;'
+                    }
+                    ]
+                )
+            ], style={'marginTop': '20px', 'marginBottom': '20px', 'width': '100%', 'margin': '0 auto', 'overflowX': 'auto', 'padding': '0 20px'}), # Added horizontal padding
+
+            # Section for Input Fields (below table)       
+            html.Div([
+                html.H3("New Trade Entry", style={'textAlign': 'center', 'marginTop': '20px', 'marginBottom': '15px'}),
+
+                # Main container for the 3 columns
+                html.Div([
+                    # Column 1
                     html.Div([
-                        html.Label("Score:", style={'fontWeight': 'bold', 'marginRight': '10px'}),
-                        dcc.Dropdown(
-                            id='input-score',
-                            options=[
-                                {'label': ' ', 'value': ''},
-                                {'label': 'A+', 'value': 'A+'},
-                                {'label': 'B', 'value': 'B'},
-                                {'label': 'C', 'value': 'C'},
-                            ],
+                        #Row1: Did Trade Come to You?
+                        html.Div([
+                            html.Label("Did trade come to you?", style={'fontWeight': 'bold', 'display': 'block', 'marginBottom': '5px'}),
+                            dcc.Dropdown(
+                                id='input-trade-came-to-you',
+                                options=[{'label': 'Yes', 'value': 'Yes'}, {'label': 'No', 'value': 'No'}, {'label': ' ', 'value': ''}],
+                                value='',
+                                clearable=False,
+                                style={'width': '100%'}
+                            )
+                        ], style={'marginBottom': '15px'}),
+                        #Row2: With Value?
+                        html.Div([
+                            html.Label("With Value?", style={'fontWeight': 'bold', 'display': 'block', 'marginBottom': '5px'}),
+                            dcc.Dropdown(
+                                id='input-with-value',
+                                options=[{'label': 'Yes', 'value': 'Yes'}, {'label': 'No', 'value': 'No'}, {'label': ' ', 'value': ''}],
+                                value='',
+                                clearable=False,
+                                style={'width': '100%'}
+                            )
+                        ], style={'marginBottom': '15px'}),
+
+                        # NEW ROW: Market Conditions
+                        html.Div([
+                            html.Label("Market Conditions:", style={'fontWeight': 'bold', 'display': 'block', 'marginBottom': '5px'}),
+                            dcc.Dropdown(
+                                id='input-market-conditions', # NEW ID
+                                options=[
+                                    {'label': 'Trending', 'value': 'Trending'},
+                                    {'label': 'Balancing/Range', 'value': 'Balancing/Range'},
+                                    {'label': ' ', 'value': ''} # Option for blank
+                                ],
+                                value='', # Default to blank
+                                clearable=False,
+                                style={'width': '100%'}
+                            )
+                        ], style={'marginBottom': '15px'}), # Consistent spacing
+
+                    ], style={'flex': '1 1 auto', 'padding': '0 10px', 'boxSizing': 'border-box', 'maxWidth': 'calc(33.33% - 20px)'}),
+
+                    # Column 2
+                    html.Div([
+                        #Row1: Entry Quality
+                        html.Div([
+                            html.Label("Entry Quality:", style={'fontWeight': 'bold', 'marginRight': '10px'}),
+                            dcc.Dropdown(
+                                id='input-entry-quality',
+                                options=[
+                                    {'label': ' ', 'value': ''},                                
+                                    {'label': 'Calm / Waited Patiently', 'value': 'Calm / Waited Patiently'},
+                                    {'label': 'Impulsive / FOMO', 'value': 'Impulsive / FOMO'},                                
+                                    {'label': 'Forced / Overtraded', 'value': 'Forced / Overtraded'},
+                                    {'label': 'Get back losses', 'value': 'Get back losses'},
+                                    {'label': 'Hesitant / Missed', 'value': 'Hesitant / Missed'},
+                                ],
+                                value='',
+                                clearable=False,
+                                style={'width': '100%'}
+                            )
+                        ], style={'marginBottom': '15px'}),
+                        #Row2: Emotional State
+                        html.Div([
+                            html.Label("Emotional State:", style={'fontWeight': 'bold', 'marginRight': '10px'}),
+                            dcc.Dropdown(
+                                id='input-psychological-state',
+                                options=[
+                                    {'label': ' ', 'value': ''},                                
+                                    {'label': 'Calm', 'value': 'Calm'},                                
+                                    {'label': 'Fear of Loss', 'value': 'Fear of Loss'},                            
+                                    {'label': 'Fear of giving away profit', 'value': 'Fear of giving away profit'},
+                                    {'label': 'Greed', 'value': 'Greed'},
+                                    {'label': 'Overconfidence', 'value': 'Overconfidence'},
+                                    {'label': 'Frustration / Impatience', 'value': 'Frustration / Impatience'},
+                                    {'label': 'Distracted', 'value': 'Distracted'},
+                                ],
+                                value='',                            
+                                clearable=False, 
+                                style={'width': '100%'}
+                            )
+                        ], style={'marginBottom': '15px'}),
+                        #Row3: Score
+                        html.Div([
+                            html.Label("Score:", style={'fontWeight': 'bold', 'marginRight': '10px'}),
+                            dcc.Dropdown(
+                                id='input-score',
+                                options=[
+                                    {'label': ' ', 'value': ''},
+                                    {'label': 'A+', 'value': 'A+'},
+                                    {'label': 'B', 'value': 'B'},
+                                    {'label': 'C', 'value': 'C'},
+                                ],
+                                value='',
+                                clearable=False,
+                                style={'width': '100%'}
+                            )
+                        ], style={'marginBottom': '0px'}),
+
+                    ], style={'flex': '1 1 auto', 'padding': '0 10px', 'boxSizing': 'border-box', 'display': 'flex', 'flexDirection': 'column', 'justifyContent': 'space-between', 'maxWidth': 'calc(33.33% - 20px)'}),
+
+                    # Column 3 (Notes)
+                    html.Div([
+                        html.Label("Notes (max 400 chars):", style={'fontWeight': 'bold', 'marginBottom': '5px', 'display': 'block'}),
+                        dcc.Textarea(
+                            id='input-notes',
+                            placeholder='Enter notes here...',
+                            maxLength=400,
                             value='',
-                            clearable=False,
-                            style={'width': '100%'}
+                            style={'width': '100%', 'height': '180px', 'resize': 'vertical'}
                         )
-                    ], style={'marginBottom': '0px'}),
+                    ], style={'flex': '1 1 auto', 'padding': '0 10px', 'boxSizing': 'border-box', 'display': 'flex', 'flexDirection': 'column', 'maxWidth': 'calc(33.33% - 20px)'}),
 
-                ], style={'flex': '1 1 auto', 'padding': '0 10px', 'boxSizing': 'border-box', 'display': 'flex', 'flexDirection': 'column', 'justifyContent': 'space-between', 'maxWidth': 'calc(33.33% - 20px)'}),
+                ], style={'display': 'flex', 'flexWrap': 'wrap', 'justifyContent': 'space-around', 'alignItems': 'flex-start', 'width': '100%', 'marginBottom': '20px', 'boxSizing': 'border-box'}),
 
-                # Column 3 (Notes)
-                html.Div([
-                    html.Label("Notes (max 400 chars):", style={'fontWeight': 'bold', 'marginBottom': '5px', 'display': 'block'}),
-                    dcc.Textarea(
-                        id='input-notes',
-                        placeholder='Enter notes here...',
-                        maxLength=400,
-                        value='',
-                        style={'width': '100%', 'height': '180px', 'resize': 'vertical'}
-                    )
-                ], style={'flex': '1 1 auto', 'padding': '0 10px', 'boxSizing': 'border-box', 'display': 'flex', 'flexDirection': 'column', 'maxWidth': 'calc(33.33% - 20px)'}),
-
-            ], style={'display': 'flex', 'flexWrap': 'wrap', 'justifyContent': 'space-around', 'alignItems': 'flex-start', 'width': '100%', 'marginBottom': '20px', 'boxSizing': 'border-box'}),
-
-        ], style={'border': '1px solid #ddd', 'borderRadius': '5px', 'padding': '20px', 'marginTop': '20px', 'marginBottom': '20px', 'boxSizing': 'border-box'}),
+            ], style={'border': '1px solid #ddd', 'borderRadius': '5px', 'padding': '20px', 'marginTop': '20px', 'marginBottom': '20px', 'boxSizing': 'border-box'}),
          
 
-        # Add Trade button (Moved here, and is now the only one)
-        html.Div([
-            html.Button('Add Trade', id='add-trade-button', n_clicks=0, 
-                        className='dash-button', style={'marginBottom': '20px'}),
-        ], style={'textAlign': 'left', 'width': '100%', 'margin': '0 auto', 'padding': '20px'}), # Added horizontal padding
-    ]), 
-
-    # NEW: Main Tabs for Analytical Views (elevated from 'inner-analytical-tabs')
-    dcc.Tabs(id="main-analytical-tabs", value='tab-cumulative-pnl', children=[ # ID changed to main-analytical-tabs
-        dcc.Tab(label='Cumulative P&L', value='tab-cumulative-pnl', children=[
-            html.Div([
-                dcc.Graph(id='cumulative-pnl-chart', style={'height': '400px', 'width': '100%'}) # ADDED width: '100%'
-            ], style={'padding': '20px'})
-        ]),
-        dcc.Tab(label='KPIs', value='tab-kpis', children=[
+            # Add Trade button (Moved here, and is now the only one)
             html.Div([
-                html.Div(id='kpis-content', style={'padding': '20px'})
-            ], style={'padding': '20px'})
-        ]),
-        dcc.Tab(label='P&L Breakdown by Category', value='tab-pnl-breakdown', children=[
-            html.Div([
-                # SNIPPET FOR THE DROPDOWN FILTER HERE
-                html.Label("Draw PnL by Category:", style={'fontWeight': 'bold', 'marginRight': '10px', 'display': 'block', 'textAlign': 'center'}),
-                dcc.Dropdown(
-                    id='pnl-breakdown-category-filter',
-                    options=[
-                        {'label': 'Entry Quality', 'value': 'Entry Quality'},
-                        {'label': 'Emotional State', 'value': 'Emotional State'},
-                        {'label': 'Score', 'value': 'Score'},
-                        {'label': 'Trade came to you', 'value': 'Trade came to me'}, # NEW OPTION
-                        {'label': 'With Value', 'value': 'With Value'},               # NEW OPTION
-                        {'label': 'Show All', 'value': 'Show All'}
-                    ],
-                    value='Show All',
-                    clearable=False,
-                    style={'width': '50%', 'margin': '10px auto 20px auto'}
-                ),
-                html.Div(id='breakdown-content', style={'padding': '20px'})
-            ], style={'padding': '20px'})
-        ]),
-    ]), # End of main-analytical-tabs
-    #]), # Corrected: This is the actual closing of children list for app.layout.
+                html.Button('Add Trade', id='add-trade-button', n_clicks=0, 
+                            className='dash-button', style={'marginBottom': '20px'}),
+            ], style={'textAlign': 'left', 'width': '100%', 'margin': '0 auto', 'padding': '20px'}), # Added horizontal padding
+        ]), 
+
+        # NEW: Main Tabs for Analytical Views (elevated from 'inner-analytical-tabs')
+        dcc.Tabs(id="main-analytical-tabs", value='tab-cumulative-pnl', children=[ # ID changed to main-analytical-tabs
+            dcc.Tab(label='Cumulative P&L', value='tab-cumulative-pnl', children=[
+                html.Div([
+                    dcc.Graph(id='cumulative-pnl-chart', style={'height': '400px', 'width': '100%'}) # ADDED width: '100%'
+                ], style={'padding': '20px'})
+            ]),
+            dcc.Tab(label='KPIs', value='tab-kpis', children=[
+                html.Div([
+                    html.Div(id='kpis-content', style={'padding': '20px'})
+                ], style={'padding': '20px'})
+            ]),
+            dcc.Tab(label='P&L Breakdown by Category', value='tab-pnl-breakdown', children=[
+                html.Div([
+                    # SNIPPET FOR THE DROPDOWN FILTER HERE
+                    html.Label("Draw PnL by Category:", style={'fontWeight': 'bold', 'marginRight': '10px', 'display': 'block', 'textAlign': 'center'}),
+                    dcc.Dropdown(
+                        id='pnl-breakdown-category-filter',
+                        options=[
+                            {'label': 'Entry Quality', 'value': 'Entry Quality'},
+                            {'label': 'Emotional State', 'value': 'Emotional State'},
+                            {'label': 'Score', 'value': 'Score'},
+                            {'label': 'Trade came to you', 'value': 'Trade came to me'}, # NEW OPTION
+                            {'label': 'With Value', 'value': 'With Value'},               # NEW OPTION
+                            {'label': 'Show All', 'value': 'Show All'}
+                        ],
+                        value='Show All',
+                        clearable=False,
+                        style={'width': '50%', 'margin': '10px auto 20px auto'}
+                    ),
+                    html.Div(id='breakdown-content', style={'padding': '20px'})
+                ], style={'padding': '20px'})
+            ]),
+        ]), # End of main-analytical-tabs
+        #]), # Corrected: This is the actual closing of children list for app.layout.
 
-    html.Div(id='debug-output', style={'marginTop': '20px', 'color': 'red'}),
-    dcc.Store(id='current-pressing-index', data=0),
-    dcc.Download(id="download-dataframe-xlsx"),
-])
+        html.Div(id='debug-output', style={'marginTop': '20px', 'color': 'red'}),
+        dcc.Store(id='current-pressing-index', data=0),
+        dcc.Download(id="download-dataframe-xlsx"),
+    ])
 
 
 # NEW CALLBACK: For Export to Excel Button
@@ -530,6 +519,13 @@ def export_table_to_excel(n_clicks, table_data):
     return dash.no_update
 
 
+# Cumulative P&L chart sizing: above the threshold the curve is LTTB-downsampled and drawn
+# with WebGL; per-point value labels are only drawn for short series where they stay readable
+CUMULATIVE_PNL_DOWNSAMPLE_THRESHOLD = 2000
+CUMULATIVE_PNL_DOWNSAMPLE_POINTS = 1000
+CUMULATIVE_PNL_MAX_LABELLED_POINTS = 50
+
+
 # Callback for Cumulative P&L Line Chart
 @dash.callback(
     Output(
@@ -540,7 +536,7 @@ def export_table_to_excel(n_clicks, table_data):
 def update_cumulative_pnl_chart(rows):
     if not rows:
         # Return an empty figure or a message figure if no data
-        return go.Figure().update_layout(
+        return figures.figure(
             title="Cumulative P&L - No Data",
             xaxis_title="Trade #",
             yaxis_title="Cumulative P&L ($)",
@@ -571,7 +567,7 @@ def update_cumulative_pnl_chart(rows):
     df = df.dropna(subset=["Entry Time", "Realized P&L"])
 
     if df.empty:  # After dropping NaT, if DataFrame is empty, return empty plot
-        return go.Figure().update_layout(
+        return figures.figure(
             title="Cumulative P&L - No Valid Data",
             xaxis_title="Trade #",
             yaxis_title="Cumulative P&L ($)",
@@ -589,40 +585,51 @@ def update_cumulative_pnl_chart(rows):
         )
 
     # Sort by Entry Time to ensure correct chronological cumulative sum
-    df = df.sort_values(by="Entry Time")
-    # Add a 'Trade Number' for plotting on x-axis if dates are too messy or duplicated
-    df["Trade Number"] = range(1, len(df) + 1)
-    df["Cumulative P&L"] = df["Realized P&L"].cumsum()
-
-    fig = go.Figure(
-        data=[
-            go.Scatter(
-                x=df["Trade Number"],
-                y=df["Cumulative P&L"],
-                mode="lines+markers+text",  # ADDED 'text' mode here
-                name="Cumulative P&L",
-                hovertemplate="Trade #: %{x}<br>Time: %{customdata|%Y-%m-%d %H:%M:%S}<br>P&L: $%{y:.2f}<extra></extra>",
-                customdata=df["Entry Time"],
-                # NEW: Text properties to display values on points
-                text=df["Cumulative P&L"].apply(
-                    lambda x: f"${x:,.2f}"
-                ),  # Format text as currency
-                textposition="top center",  # Position the text above the markers
-            )
-        ]
+    df = df.sort_values(by="Entry Time", kind="stable")
+    # 'Trade Number' on the x-axis (1..n) in case dates are too messy or duplicated
+    trade_numbers = np.arange(1, len(df) + 1)
+    cumulative_pnl = np.cumsum(df["Realized P&L"].to_numpy(dtype=float))
+    entry_times = df["Entry Time"].to_numpy()
+
+    # Multi-week/month ranges can hold thousands of trades: keep a shape-preserving subset of
+    # points and draw them with WebGL instead of one SVG node (and text label) per trade
+    downsampled = len(cumulative_pnl) > CUMULATIVE_PNL_DOWNSAMPLE_THRESHOLD
+    if downsampled:
+        kept = lttb_indices(trade_numbers, cumulative_pnl, CUMULATIVE_PNL_DOWNSAMPLE_POINTS)
+        trade_numbers, cumulative_pnl, entry_times = trade_numbers[kept], cumulative_pnl[kept], entry_times[kept]
+
+    trace_props = dict(
+        x=trade_numbers,
+        y=cumulative_pnl,
+        name="Cumulative P&L",
+        hovertemplate="Trade #: %{x}<br>Time: %{customdata|%Y-%m-%d %H:%M:%S}<br>P&L: $%{y:.2f}<extra></extra>",
+        customdata=entry_times,
     )
+    if len(cumulative_pnl) <= CUMULATIVE_PNL_MAX_LABELLED_POINTS:
+        # Few enough points to show the value above each marker
+        trace_props.update(
+            mode="lines+markers+text",
+            text=[f"${value:,.2f}" for value in cumulative_pnl.tolist()],  # Format text as currency
+            textposition="top center",  # Position the text above the markers
+        )
+    else:
+        trace_props["mode"] = "lines" if downsampled else "lines+markers"
+    make_trace = figures.scattergl if downsampled else figures.scatter
+    fig = figures.figure(data=[make_trace(**trace_props)])
 
     # Set line color based on final P&L
-    final_pnl = df["Cumulative P&L"].iloc[-1]
+    final_pnl = cumulative_pnl[-1]
     if final_pnl > 0:
-        fig.update_traces(line=dict(color="green"))
+        figures.update_traces(fig, line=dict(color="green"))
     elif final_pnl < 0:
-        fig.update_traces(line=dict(color="red"))
+        figures.update_traces(fig, line=dict(color="red"))
     else:
-        fig.update_traces(line=dict(color="orange"))
+        figures.update_traces(fig, line=dict(color="orange"))
 
-    fig.update_layout(
-        title="Cumulative Realized P&L Over Trades",
+    figures.update_layout(
+        fig,
+        title="Cumulative Realized P&L Over Trades"
+        + (f" ({len(df):,} trades, {len(cumulative_pnl):,} points shown)" if downsampled else ""),
         xaxis_title="Trade Number",
         yaxis_title="Cumulative P&L ($)",
         hovermode="x unified",  # Shows hover info for all traces at an x-position
@@ -780,8 +787,8 @@ def update_pnl_breakdown_charts(rows, selected_category):
             else:
                 bar_colors.append("orange")
 
-        fig = go.Figure(
-            go.Bar(
+        fig = figures.figure(
+            figures.bar(
                 x=pnl_by_category[category],
                 y=abs(
                     pnl_by_category["Realized P&L"]
@@ -798,7 +805,8 @@ def update_pnl_breakdown_charts(rows, selected_category):
             )
         )
 
-        fig.update_layout(
+        figures.update_layout(
+            fig,
             title=f"Realized P&L by {category}",
             xaxis_title=category,
             yaxis_title="Total Realized P&L ($)",
@@ -907,7 +915,7 @@ def handle_all_table_updates(n_clicks, current_table_data, previous_table_data,
             else:
                 stop_loss_pts = None
                 risk_dollars = None
-                print("Warning: Could not calculate default Stop Loss/Risk for new trade. Check config or default values.")
+                log.warning("Could not calculate default Stop Loss/Risk for new trade. Check config or default values.")
 
             # Create the new row dictionary
             new_row = {
@@ -935,19 +943,17 @@ def handle_all_table_updates(n_clicks, current_table_data, previous_table_data,
 
             # Save the newly added trade to the SQLite database
             try:
-                # db.save_trade_to_db returns the new SQLite 'id'
-                new_db_id = db.save_trade_to_db(new_row)
+                # The queued insert resolves to the new SQLite 'id' once committed.
+                # The row needs its id right away, so this is the one write we wait on.
+                new_db_id = get_write_queue().insert(new_row).result()
                 if new_db_id is not None:
                     new_row['id'] = new_db_id # Store the DB ID in the DataTable row (hidden column)
-                    db_name, table_name = db.get_database_info()
-                    print(f"New trade {new_row.get('Trade #')} added to DB '{db_name}' table '{table_name}' with ID {new_db_id}.")
+                    log.info("New trade %s added", new_row.get('Trade #'), extra=app_logging.fields(trade_id=new_db_id))
                 else:
-                    db_name, table_name = db.get_database_info()
-                    print(f"Error saving new trade {new_row.get('Trade #')} to DB '{db_name}' table '{table_name}': {e}")
+                    log.error("Error saving new trade %s: the database returned no ID", new_row.get('Trade #'))
                     updated_rows.pop() # Remove from DataTable if DB save truly failed
-            except Exception as e:
-                db_name, table_name = db.get_database_info()
-                print(f"Error saving new trade {new_row.get('Trade #')} to DB '{db_name}' table '{table_name}': {e}")
+            except Exception:
+                log.exception("Error saving new trade %s", new_row.get('Trade #'))
             
             # Return all outputs, including reset values for input fields
             return [
@@ -980,12 +986,10 @@ def handle_all_table_updates(n_clicks, current_table_data, previous_table_data,
             
             for db_id in deleted_db_ids:
                 try:
-                    db.delete_trade_from_db(db_id) # Delete from SQLite using internal DB ID
-                    db_name, table_name = db.get_database_info()
-                    print(f"Trade with DB ID {db_id} deleted from DB '{db_name}' table '{table_name}'.")
-                except Exception as e:
-                    db_name, table_name = db.get_database_info()
-                    print(f"Error deleting trade with DB ID {db_id} from DB '{db_name}' table '{table_name}': {e}")
+                    get_write_queue().delete(db_id) # Queue delete from SQLite using internal DB ID
+                    log.info("Trade queued for deletion", extra=app_logging.fields(trade_id=db_id))
+                except Exception:
+                    log.exception("Error deleting trade", extra=app_logging.fields(trade_id=db_id))
             
             # If any rows were deleted, reset pressing index
             if deleted_db_ids:
@@ -1060,19 +1064,15 @@ def handle_all_table_updates(n_clicks, current_table_data, previous_table_data,
 
                     # Save the newly pasted row to the database and get its DB ID
                     try:
-                        new_db_id = db.save_trade_to_db(row_copy)
+                        new_db_id = get_write_queue().insert(row_copy).result()
                         if new_db_id is not None:
                             row_copy['id'] = new_db_id # Store DB ID
-                            db_name, table_name = db.get_database_info()
-                            print(f"New trade {row_copy.get('Trade #')} (pasted) saved to DB '{db_name}' table '{table_name}' with ID {new_db_id}.")
+                            log.info("New trade %s (pasted) saved", row_copy.get('Trade #'), extra=app_logging.fields(trade_id=new_db_id))
                         else:
-                            db_name, table_name = db.get_database_info()
-                            print(f"Failed to get DB ID for pasted trade {row_copy.get('Trade #')}, DB save likely failed.")
+                            log.error("Failed to get DB ID for pasted trade %s, DB save likely failed", row_copy.get('Trade #'))
                             # Consider returning initial data or error message
-                    except Exception as e:
-                        db_name, table_name = db.get_database_info()
-                        print(f"Error saving pasted trade {row_copy.get('Trade #')} to DB '{db_name}' table '{table_name}': {e}")
-                        pass
+                    except Exception:
+                        log.exception("Error saving pasted trade %s", row_copy.get('Trade #'))
 
                 else: # It's an existing row that was modified (has an ID, and was in previous_db_id_lookup)
                     # Apply recalculation and pressing logic, then update DB
@@ -1162,14 +1162,13 @@ def handle_all_table_updates(n_clicks, current_table_data, previous_table_data,
                         new_pressing_index = 0
                         pressing_action_in_this_update = 'loss' # Reset pressing roadmap if a finalized trade is un-finalized
 
-                    # Update in DB (using the 'id' of the row)
+                    # Update in DB (using the 'id' of the row). Queued: repeated edits to the same
+                    # 'id' are merged and committed together by the writer thread.
                     try:
-                        db.update_trade_in_db(row_copy['id'], row_copy)
-                        db_name, table_name = db.get_database_info()
-                        print(f"Trade with DB ID {row_copy.get('id')} updated in DB '{db_name}' table '{table_name}' (from modification).")
-                    except Exception as e:
-                        db_name, table_name = db.get_database_info()
-                        print(f"Error updating trade with DB ID {row_copy.get('id')} in DB '{db_name}' table '{table_name}' (from modification): {e}")
+                        get_write_queue().update(row_copy['id'], row_copy)
+                        log.info("Trade queued for update (from modification)", extra=app_logging.fields(trade_id=row_copy.get('id')))
+                    except Exception:
+                        log.exception("Error updating trade (from modification)", extra=app_logging.fields(trade_id=row_copy.get('id')))
 
                     # Evaluate pressing roadmap for this modified row if conclusive                 
                     if pnl_was_calculated_and_is_conclusive and row_copy.get("Status") in ["Win", "Lose", "BE"]: # CHANGED: Check for new Status values
@@ -1222,14 +1221,13 @@ def update_daily_table_from_date_picker(selected_date):
     try:
         # Fetch trades for the selected date
         selected_datetime_date = pd.to_datetime(selected_date).date() # Ensure it's a date object
-        trades_for_selected_date = db.fetch_trades_by_date(selected_datetime_date)
-        
-        db_name, table_name = db.get_database_info()
-        print(f"Loaded {len(trades_for_selected_date)} trades for {selected_datetime_date} from DB '{db_name}' table '{table_name}' via DatePicker.")
-        
-        return trades_for_selected_date
-    except Exception as e:
-        print(f"Error updating table from DatePicker for date {selected_date}: {e}")
+        get_write_queue().flush() # Queued edits are committed (and their days invalidated) before reading
+        trades_for_selected_date = get_trade_cache().get_trades(selected_datetime_date)
+        log.debug("Loaded %d trades for %s via DatePicker", len(trades_for_selected_date), selected_datetime_date)
+        # The table shows every stored column (plus the hidden 'id'), so this only rounds the numbers
+        return table_rows(trades_for_selected_date, ["id", *db.COLUMNS_TO_STORE])
+    except Exception:
+        log.exception("Error updating table from DatePicker for date %s", selected_date)
         return [] # Return empty list on error
 
 # Other callbacks (Cumulative P&L, KPIs, P&L Breakdown, etc.) in pages/daily_helper.py
@@ -1305,8 +1303,8 @@ def update_available_risk_gauge(rows, selected_date):
         {"range": [daily_risk_limit, max_range], "color": "green"},
     ]
 
-    fig = go.Figure(
-        go.Indicator(
+    fig = figures.figure(
+        figures.indicator(
             mode="gauge+number",
             value=available_risk,
             domain={"x": [0, 1], "y": [0, 1]},
@@ -1336,7 +1334,8 @@ def update_available_risk_gauge(rows, selected_date):
             },
         )
     )
-    fig.update_layout(
+    figures.update_layout(
+        fig,
         margin=dict(l=10, r=10, t=30, b=10),
         #paper_bgcolor="white",
         paper_bgcolor="#f0f2f5", # CHANGED to match page background
@@ -0,0 +1,154 @@
+# pages/diagnostics.py
+
+import dash
+from dash.dependencies import Input, Output
+from dash import dcc, html, dash_table
+from datetime import datetime
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
+import figures # Plain-dict figure builder (skips plotly.graph_objects validation)
+from instrumentation import get_callback_metrics, RECENT_CALLS # Per-callback timings recorded by the app
+
+# Register this page with Dash
+dash.register_page(
+    __name__,
+    path='/diagnostics',
+    name='Diagnostics',
+    title='Trading Dashboard - Diagnostics',
+    description='Latency, phase breakdown and response size of every Dash callback.'
+)
+
+REFRESH_INTERVAL_MS = 5000 # How often the page re-reads the metrics
+RECENT_ROWS_SHOWN = 50 # Most recent calls listed at the bottom
+
+# Bar colors per phase of the breakdown chart
+PHASE_COLORS = {'db': '#2196F3', 'pandas': '#FF9800', 'figure': '#4CAF50', 'serialize': '#9C27B0'}
+
+TILE_STYLE = {
+    'backgroundColor': '#ffffff',
+    'borderRadius': '8px',
+    'padding': '10px',
+    'boxShadow': '0 2px 5px rgba(0,0,0,0.1)',
+    'marginBottom': '20px'
+}
+TABLE_CELL_STYLE = {'fontFamily': 'Arial, sans-serif', 'fontSize': '13px', 'padding': '4px 8px', 'textAlign': 'right'}
+TABLE_LEFT_ALIGNED = [{'if': {'column_id': c}, 'textAlign': 'left'} for c in ('callback', 'time', 'outcome')]
+
+
+def _ms_column(name, column_id):
+    return {"name": name, "id": column_id, "type": "numeric", "format": {"specifier": ",.1f"}}
+
+
+SUMMARY_COLUMNS = [
+    {"name": "Callback", "id": "callback"},
+    {"name": "Calls", "id": "calls", "type": "numeric"},
+    {"name": "Errors", "id": "errors", "type": "numeric"},
+    _ms_column("Wall p50 (ms)", "wall_p50_ms"),
+    _ms_column("Wall p95 (ms)", "wall_p95_ms"),
+    _ms_column("Wall max (ms)", "wall_max_ms"),
+    _ms_column("DB avg (ms)", "db_avg_ms"),
+    _ms_column("Pandas avg (ms)", "pandas_avg_ms"),
+    _ms_column("Figure avg (ms)", "figure_avg_ms"),
+    _ms_column("Serialize avg (ms)", "serialize_avg_ms"),
+    {"name": "Response avg (KB)", "id": "response_avg_kb", "type": "numeric", "format": {"specifier": ",.1f"}},
+]
+RECENT_COLUMNS = [
+    {"name": "Time", "id": "time"},
+    {"name": "Callback", "id": "callback"},
+    {"name": "Outcome", "id": "outcome"},
+    _ms_column("Wall (ms)", "wall_ms"),
+    _ms_column("DB (ms)", "db_ms"),
+    _ms_column("Pandas (ms)", "pandas_ms"),
+    _ms_column("Figure (ms)", "figure_ms"),
+    _ms_column("Serialize (ms)", "serialize_ms"),
+    {"name": "Response (KB)", "id": "response_kb", "type": "numeric", "format": {"specifier": ",.1f"}},
+]
+
+
+# --- Layout for the Diagnostics Page ---
+def layout(**kwargs):
+    return html.Div([
+        html.H2("Callback Diagnostics", style={'textAlign': 'center', 'marginBottom': '10px'}),
+        html.P(f"Rolling window of the last {RECENT_CALLS} callback calls in this server process. "
+               "The same numbers are exported as histograms at /metrics (Prometheus text format).",
+               style={'textAlign': 'center', 'color': '#666666', 'marginBottom': '20px'}),
+
+        html.Div(style=TILE_STYLE, children=[
+            dcc.Graph(id='diagnostics-phase-chart', config={'displayModeBar': False}, style={'height': '360px'})
+        ]),
+        html.Div(style=TILE_STYLE, children=[
+            html.H4("Per callback (slowest p95 first)"),
+            dash_table.DataTable(
+                id='diagnostics-summary-table',
+                columns=SUMMARY_COLUMNS,
+                sort_action='native',
+                style_cell=TABLE_CELL_STYLE,
+                style_cell_conditional=TABLE_LEFT_ALIGNED,
+                style_header={'fontWeight': 'bold'},
+            ),
+        ]),
+        html.Div(style=TILE_STYLE, children=[
+            html.H4(f"Last {RECENT_ROWS_SHOWN} calls"),
+            dash_table.DataTable(
+                id='diagnostics-recent-table',
+                columns=RECENT_COLUMNS,
+                style_cell=TABLE_CELL_STYLE,
+                style_cell_conditional=TABLE_LEFT_ALIGNED,
+                style_header={'fontWeight': 'bold'},
+                style_data_conditional=[
+                    {'if': {'filter_query': '{outcome} = "error"'}, 'backgroundColor': '#ffebee'},
+                ],
+            ),
+        ]),
+
+        dcc.Interval(id='diagnostics-interval', interval=REFRESH_INTERVAL_MS, n_intervals=0),
+    ])
+
+
+############################################################################
+# Call Back
+############################################################################
+@dash.callback(
+    Output('diagnostics-phase-chart', 'figure'),
+    Output('diagnostics-summary-table', 'data'),
+    Output('diagnostics-recent-table', 'data'),
+    Input('diagnostics-interval', 'n_intervals'),
+)
+def update_diagnostics(n_intervals):
+    metrics = get_callback_metrics()
+    summary = metrics.summary()
+    for row in summary:
+        row['response_avg_kb'] = row.pop('response_avg_bytes') / 1024
+
+    recent = []
+    for call in reversed(metrics.recent_calls()[-RECENT_ROWS_SHOWN:]): # Newest first
+        recent.append({
+            **call,
+            'time': datetime.fromtimestamp(call['time']).strftime('%H:%M:%S'),
+            'response_kb': call['response_bytes'] / 1024,
+        })
+
+    return _create_phase_chart(summary), summary, recent
+
+
+############################################################################
+# Helper Functions
+############################################################################
+def _create_phase_chart(summary):
+    """Stacked bars of the average time per phase for every callback."""
+    if not summary:
+        return figures.figure(title="No callback calls recorded yet")
+    names = [row['callback'].rsplit('.', 1)[-1] for row in summary] # Function names are enough on the axis
+    fig = figures.figure(
+        [figures.bar(x=names, y=[row[f'{phase}_avg_ms'] for row in summary], name=phase, marker_color=color)
+         for phase, color in PHASE_COLORS.items()],
+        title="Average time per phase (ms)",
+        barmode='stack',
+        margin=dict(t=40, b=120, l=60, r=20),
+        paper_bgcolor='#ffffff', plot_bgcolor='#ffffff',
+        yaxis_title='ms',
+        xaxis_tickangle=-30,
+    )
+    return fig
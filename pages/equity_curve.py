@@ -0,0 +1,228 @@
+# pages/equity_curve.py
+
+import dash
+from dash.dependencies import Input, Output
+from dash import dcc, html
+
+# Database access (assuming utils/database.py is in the project root)
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
+import database as db
+import figures # Plain-dict figure builder (skips plotly.graph_objects validation)
+from equity_series import get_equity_store, ROLLING_WINDOW_DAYS # Persisted daily equity/drawdown series
+from instrumentation import timed # Chart builders count as figure-build time in the callback metrics
+import app_logging # Level-filtered, queued logging
+log = app_logging.get_logger(__name__)
+
+# Register this page with Dash
+dash.register_page(
+    __name__,
+    path='/equity',
+    name='Equity Curve',
+    title='Trading Dashboard - Equity Curve',
+    description='Multi-day equity curve, drawdowns and rolling performance.'
+)
+
+# Shared styles for the KPI tiles and chart tiles
+KPI_TILE_STYLE = {
+    'flex': '1 1 200px',
+    'minHeight': '110px',
+    'borderRadius': '8px',
+    'padding': '15px',
+    'textAlign': 'center',
+    'boxShadow': '0 2px 5px rgba(0,0,0,0.1)',
+    'display': 'flex',
+    'flexDirection': 'column',
+    'justifyContent': 'center',
+    'alignItems': 'center'
+}
+CHART_TILE_STYLE = {
+    'flex': '1 1 100%',
+    'backgroundColor': '#ffffff',
+    'borderRadius': '8px',
+    'padding': '10px',
+    'boxShadow': '0 2px 5px rgba(0,0,0,0.1)'
+}
+KPI_VALUE_STYLE = {'fontSize': '1.8em', 'fontWeight': 'bold', 'margin': '0'}
+
+
+def _kpi_tile(title, value_id, background, color, value=None):
+    return html.Div(style={**KPI_TILE_STYLE, 'backgroundColor': background}, children=[
+        html.H4(title, style={'marginBottom': '8px'}),
+        html.P(value, id=value_id, style={**KPI_VALUE_STYLE, 'color': color})
+    ])
+
+
+# --- Layout for the Equity Curve Page ---
+# Built on first navigation (Dash calls layout functions per page load) rather than at app startup,
+# with the KPIs and charts already filled in from the stored equity series (no callback round trip).
+def layout(**kwargs):
+    (net_pnl, max_drawdown, current_drawdown, longest_drawdown,
+     equity_fig, drawdown_fig, duration_fig, rolling_fig) = _equity_page_outputs()
+    return html.Div([
+        html.H2("Equity Curve & Drawdowns", style={'textAlign': 'center', 'marginBottom': '20px'}),
+
+        # KPI tiles
+        html.Div(style={'display': 'flex', 'flexWrap': 'wrap', 'gap': '15px', 'marginBottom': '20px'}, children=[
+            _kpi_tile("Net P&L", 'equity-net-pnl-value', '#e3f2fd', '#2196F3', net_pnl),
+            _kpi_tile("Max Drawdown", 'equity-max-drawdown-value', '#ffebee', '#F44336', max_drawdown),
+            _kpi_tile("Current Drawdown", 'equity-current-drawdown-value', '#fff3e0', '#FF9800', current_drawdown),
+            _kpi_tile("Longest Drawdown", 'equity-longest-drawdown-value', '#f3e5f5', '#9C27B0', longest_drawdown),
+        ]),
+
+        # Charts
+        html.Div(style={'display': 'flex', 'flexWrap': 'wrap', 'gap': '20px'}, children=[
+            html.Div(style=CHART_TILE_STYLE, children=[
+                dcc.Graph(id='equity-curve-chart', figure=equity_fig, config={'displayModeBar': False}, style={'height': '380px'})
+            ]),
+            html.Div(style=CHART_TILE_STYLE, children=[
+                dcc.Graph(id='equity-drawdown-chart', figure=drawdown_fig, config={'displayModeBar': False}, style={'height': '280px'})
+            ]),
+            html.Div(style=CHART_TILE_STYLE, children=[
+                dcc.Graph(id='equity-drawdown-duration-chart', figure=duration_fig, config={'displayModeBar': False}, style={'height': '250px'})
+            ]),
+            html.Div(style=CHART_TILE_STYLE, children=[
+                dcc.Graph(id='equity-rolling-chart', figure=rolling_fig, config={'displayModeBar': False}, style={'height': '320px'})
+            ]),
+        ]),
+    ])
+
+
+############################################################################
+# Call Back
+############################################################################
+@dash.callback(
+    Output('equity-net-pnl-value', 'children'),
+    Output('equity-max-drawdown-value', 'children'),
+    Output('equity-current-drawdown-value', 'children'),
+    Output('equity-longest-drawdown-value', 'children'),
+    Output('equity-curve-chart', 'figure'),
+    Output('equity-drawdown-chart', 'figure'),
+    Output('equity-drawdown-duration-chart', 'figure'),
+    Output('equity-rolling-chart', 'figure'),
+    Input('data-change-event', 'data'), # Trades changed: re-read the (incrementally refreshed) series
+    prevent_initial_call=True # The layout renders the first state
+)
+def update_equity_page(change_event):
+    return _equity_page_outputs()
+
+
+def _equity_page_outputs():
+    """The page's KPI texts and figures, in the callback's output order."""
+    try:
+        db.ensure_db_initialized() # No-op once the startup hook has run
+        series = get_equity_store().get_equity_series() # One row per trading day, kept up to date incrementally
+    except Exception:
+        log.exception("Error loading the equity series")
+        return ("$ N/A", "$ N/A", "$ N/A", "N/A") + tuple(figures.figure(title="Error loading data") for _ in range(4))
+
+    if not series:
+        return ("$0.00", "$0.00", "$0.00", "0 days") + tuple(figures.figure(title="No Trade Data") for _ in range(4))
+
+    days = [row['day'] for row in series]
+    last = series[-1]
+    max_drawdown = min(row['drawdown'] for row in series)
+    longest_drawdown_days = max(row['drawdown_days'] for row in series)
+
+    return (
+        f"${last['cum_pnl']:,.2f}",
+        f"${max_drawdown:,.2f}",
+        f"${last['drawdown']:,.2f}" + (f" ({last['drawdown_days']} days)" if last['drawdown_days'] else ""),
+        f"{longest_drawdown_days} trading days",
+        _create_equity_curve_chart(days, series),
+        _create_drawdown_chart(days, series),
+        _create_drawdown_duration_chart(days, series),
+        _create_rolling_stats_chart(days, series),
+    )
+
+
+############################################################################
+# Helper Functions
+############################################################################
+_COMMON_LAYOUT = dict(
+    margin=dict(t=40, b=40, l=60, r=60),
+    paper_bgcolor='#ffffff', plot_bgcolor='#ffffff',
+    font={'color': '#333333'},
+    hovermode='x unified',
+    xaxis={'type': 'date', 'showgrid': True},
+)
+
+
+@timed("figure")
+def _create_equity_curve_chart(days, series):
+    """Cumulative realized P&L per day with its running peak."""
+    return figures.figure(
+        data=[
+            figures.scatter(
+                x=days, y=[row['cum_pnl'] for row in series],
+                mode='lines', name='Equity (cumulative P&L)', line=dict(color='#2196F3', width=2),
+                hovertemplate='$%{y:,.2f}<extra>Equity</extra>'
+            ),
+            figures.scatter(
+                x=days, y=[row['peak'] for row in series],
+                mode='lines', name='Running peak', line=dict(color='#9E9E9E', width=1, dash='dot'),
+                hovertemplate='$%{y:,.2f}<extra>Peak</extra>'
+            ),
+        ],
+        title='Equity Curve',
+        yaxis_title='Cumulative P&L ($)',
+        legend=dict(x=0.01, y=0.99, bgcolor='rgba(255,255,255,0.7)'),
+        **_COMMON_LAYOUT
+    )
+
+
+@timed("figure")
+def _create_drawdown_chart(days, series):
+    """'Underwater' chart: distance below the running equity peak."""
+    return figures.figure(
+        data=figures.scatter(
+            x=days, y=[row['drawdown'] for row in series],
+            mode='lines', fill='tozeroy', name='Drawdown',
+            line=dict(color='#F44336', width=1), fillcolor='rgba(244, 67, 54, 0.3)',
+            hovertemplate='$%{y:,.2f}<extra>Drawdown</extra>'
+        ),
+        title='Drawdown from Peak',
+        yaxis_title='Drawdown ($)',
+        **_COMMON_LAYOUT
+    )
+
+
+@timed("figure")
+def _create_drawdown_duration_chart(days, series):
+    """Trading days spent below the last equity high, per day."""
+    return figures.figure(
+        data=figures.bar(
+            x=days, y=[row['drawdown_days'] for row in series],
+            name='Drawdown duration', marker_color='#9C27B0',
+            hovertemplate='%{y} trading days<extra>Below peak</extra>'
+        ),
+        title='Drawdown Duration (trading days since last high)',
+        yaxis_title='Days',
+        bargap=0,
+        **_COMMON_LAYOUT
+    )
+
+
+@timed("figure")
+def _create_rolling_stats_chart(days, series):
+    """Rolling win rate (left axis) and expectancy per trade (right axis)."""
+    return figures.figure(
+        data=[
+            figures.scatter(
+                x=days, y=[row['rolling_win_rate'] for row in series],
+                mode='lines', name='Win rate (%)', line=dict(color='#4CAF50'),
+                hovertemplate='%{y:.1f}%<extra>Win rate</extra>'
+            ),
+            figures.scatter(
+                x=days, y=[row['rolling_expectancy'] for row in series],
+                mode='lines', name='Expectancy ($/trade)', line=dict(color='#FF9800'), yaxis='y2',
+                hovertemplate='$%{y:,.2f}<extra>Expectancy</extra>'
+            ),
+        ],
+        title=f'Rolling {ROLLING_WINDOW_DAYS}-Day Win Rate & Expectancy',
+        yaxis={'title': 'Win rate (%)', 'range': [0, 100]},
+        yaxis2={'title': 'Expectancy ($ per trade)', 'overlaying': 'y', 'side': 'right'},
+        legend=dict(x=0.01, y=0.99, bgcolor='rgba(255,255,255,0.7)'),
+        **_COMMON_LAYOUT
+    )
@@ -3,7 +3,6 @@
 import dash
 from dash.dependencies import Input, Output, State
 from dash import dcc, html, dash_table
-import pandas as pd
 import sys
 import os
 from datetime import datetime
@@ -13,6 +12,13 @@ import base64
 # Add 'utils' to Python path so you can import 'database'
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
 import database as db # Import your database utility functions
+from payload import table_rows # Trims table rows to the displayed columns and rounds them
+from figure_cache import get_figure_cache # The table rows per dataset version
+import background # Runs the JSON import as a background job (progress, cancel)
+import app_logging # Level-filtered, queued logging
+log = app_logging.get_logger(__name__)
+from lazy_imports import lazy_module # pandas/plotly are imported on first use, not at app startup
+pd = lazy_module("pandas")
 
 # --- Page Registration ---
 dash.register_page(
@@ -23,282 +29,318 @@ dash.register_page(
     description='View and manage all historical trade data.'
 )
 
+# Columns of the historical trades table. Only these are sent to the browser (see payload.table_rows).
+HISTORICAL_TABLE_COLUMNS = [
+    {"name": "DB ID", "id": "id", "type": "numeric", "editable": False, "hideable": True}, # ADDED hideable: True
+    {"name": "Trade #", "id": "Trade #", "type": "numeric", "editable": False, "hideable": True}, # ADDED hideable: True
+    {"name": "Futures Type", "id": "Futures Type", "presentation": "dropdown", "hideable": True}, # ADDED hideable: True
+    {"name": "Size", "id": "Size", "type": "numeric", "editable": True, "hideable": True}, # ADDED hideable: True
+    {"name": "Stop Loss (pts)", "id": "Stop Loss (pts)", "type": "numeric", "editable": True, "hideable": True}, # ADDED hideable: True
+    {"name": "Risk ($)", "id": "Risk ($)", "type": "numeric", "editable": False, "hideable": True}, # ADDED hideable: True
+    {"name": "Status", "id": "Status", "presentation": "dropdown", "editable": True, "hideable": True}, # ADDED hideable: True
+    {"name": "Points Realized", "id": "Points Realized", "type": "numeric", "editable": True, "hideable": True}, # ADDED hideable: True
+    {"name": "Realized P&L", "id": "Realized P&L", "type": "numeric", "editable": False, "format": {"specifier": ".2f"}, "hideable": True}, # ADDED hideable: True
+    {"name": "Entry Time", "id": "Entry Time", "editable": False, "hideable": True}, # ADDED hideable: True
+    {"name": "Exit Time", "id": "Exit Time", "editable": True, "hideable": True}, # ADDED hideable: True
+    {"name": "Trade came to me", "id": "Trade came to me", "presentation": "dropdown", "hideable": True}, # ADDED hideable: True
+    {"name": "With Value", "id": "With Value", "presentation": "dropdown", "hideable": True}, # ADDED hideable: True
+    {"name": "Score", "id": "Score", "presentation": "dropdown", "hideable": True}, # ADDED hideable: True
+    {"name": "Entry Quality", "id": "Entry Quality", "presentation": "dropdown", "hideable": True}, # ADDED hideable: True
+    {"name": "Emotional State", "id": "Emotional State", "presentation": "dropdown", "hideable": True}, # ADDED hideable: True
+    {"name": "Sizing", "id": "Sizing", "presentation": "dropdown", "hideable": True}, # ADDED hideable: True
+    {"name": "Notes", "id": "Notes", "type": "text", "editable": True, "hideable": True}, # ADDED hideable: True
+]
+TABLE_COLUMN_IDS = [col["id"] for col in HISTORICAL_TABLE_COLUMNS]
+_ROWS_CACHE_ID = 'history-table-rows' # Figure cache entry of all trades as table rows
+
+# Import progress bar / cancel button: only shown while an import job runs
+_IMPORT_PROGRESS_STYLE = {'width': '200px', 'height': '16px', 'margin': '10px 0 10px 10px', 'verticalAlign': 'middle'}
+_CANCEL_IMPORT_STYLE = {'marginLeft': '10px'}
+_HIDDEN = {'display': 'none'}
+IMPORT_PROGRESS_EVERY = 100 # Trades between progress updates
+
+
 # --- Layout for the Historical Data Page ---
-layout = html.Div([
-    html.H2("All Historical Trades", style={'textAlign': 'center', 'marginBottom': '20px'}),
-    # Button to load all trades from the database
-    # This button will trigger a callback to load data into the DataTable
-    # NEW: Add Export JSON Button next to Load All Trades button
-    html.Div([
-        html.Button("Refresh", id="load-all-trades-button", n_clicks=0,
-                    className='dash-button', style={'marginBottom': '10px'}), # Applied class, removed padding/fontSize
-        html.Button("Export", id="export-json-button", n_clicks=0,
-                    className='dash-button', style={'marginBottom': '10px', 'marginLeft': '10px'}), # Applied class, removed padding/fontSize
+# Built on first navigation (Dash calls layout functions per page load) rather than at app startup.
+def layout(**kwargs):
+    # The trades are rendered with the page when the figure cache has them for the current data
+    # version (no empty table waiting for a callback to fill it). Otherwise the table starts empty and
+    # the browser asks filter_historical_data_table for the rows at once, so the layout request never
+    # fetches the history or runs pandas. The rows are sent once, as the table's data; the callbacks
+    # filter a server-side copy (_load_all_trades).
+    all_trades = _cached_trade_rows()
+    pending = all_trades is None
+    if pending:
+        table_data, futures_type_options = [], []
+        load_message = html.P("Loading trades...", style={'color': 'gray'})
+    else:
+        table_data, futures_type_options = _filter_trades(all_trades)
+        load_message = _loaded_message(len(all_trades))
+    return html.Div([
+        html.H2("All Historical Trades", style={'textAlign': 'center', 'marginBottom': '20px'}),
+        background.load_trigger('historical', pending), # Loads the rows right after a cache miss
+        # Button to load all trades from the database
+        # This button will trigger a callback to load data into the DataTable
+        # NEW: Add Export JSON Button next to Load All Trades button
+        html.Div([
+            html.Button("Refresh", id="load-all-trades-button", n_clicks=0,
+                        className='dash-button', style={'marginBottom': '10px'}), # Applied class, removed padding/fontSize
+            html.Button("Export", id="export-json-button", n_clicks=0,
+                        className='dash-button', style={'marginBottom': '10px', 'marginLeft': '10px'}), # Applied class, removed padding/fontSize
         
         
-        # NEW: Upload component for importing JSON
-        dcc.Upload(
-            id='upload-historical-json', # Unique ID for this upload component
-            children=html.Div([
-                #'Drag and Drop or ',
-                html.A('Upload to Database (JSON)', id='upload-historical-json-link') # User-friendly text
-            ]),
-            style={
-                'width': '280px', 'height': '40px', 'lineHeight': '40px',
-                'borderWidth': '1px', 'borderStyle': 'dashed', 'borderRadius': '5px',
-                'textAlign': 'center', 'margin': '10px 0 10px 10px', 'cursor': 'pointer',
-                'display': 'inline-block', 'verticalAlign': 'middle'
-            },
-            multiple=False # Allow only single file upload
-        ),
-        html.Div(id='load-db-output-message', style={'marginTop': '10px', 'textAlign': 'left', 'flexBasis': '100%'}) # Message area
-    ], style={'width': '95%', 'margin': '0 auto 20px auto', 'display': 'flex', 'alignItems': 'center', 'flexWrap': 'wrap', 'justifyContent': 'flex-start'}), # Added display:flex and flexWrap for alignment
+            # NEW: Upload component for importing JSON
+            dcc.Upload(
+                id='upload-historical-json', # Unique ID for this upload component
+                children=html.Div([
+                    #'Drag and Drop or ',
+                    html.A('Upload to Database (JSON)', id='upload-historical-json-link') # User-friendly text
+                ]),
+                style={
+                    'width': '280px', 'height': '40px', 'lineHeight': '40px',
+                    'borderWidth': '1px', 'borderStyle': 'dashed', 'borderRadius': '5px',
+                    'textAlign': 'center', 'margin': '10px 0 10px 10px', 'cursor': 'pointer',
+                    'display': 'inline-block', 'verticalAlign': 'middle'
+                },
+                multiple=False # Allow only single file upload
+            ),
+            # Import progress and cancel (visible while import_trades_json runs)
+            html.Progress(id='import-progress', value='0', max='1', style=_HIDDEN),
+            html.Button("Cancel import", id="cancel-import-button", n_clicks=0,
+                        className='dash-button', style=_HIDDEN),
+            html.Div(load_message, id='load-db-output-message', style={'marginTop': '10px', 'textAlign': 'left', 'flexBasis': '100%'}) # Message area
+        ], style={'width': '95%', 'margin': '0 auto 20px auto', 'display': 'flex', 'alignItems': 'center', 'flexWrap': 'wrap', 'justifyContent': 'flex-start'}), # Added display:flex and flexWrap for alignment
     
-    ##############################################
-    #Filter Historical data Html wrapper
-    ##############################################
-    html.Div([
-        html.H3("Filter Historical Data", style={'textAlign': 'center', 'width': '100%', 'marginBottom': '25px'}), # Ensure it spans full width and more margin
-        
-        # Date Range Picker
+        ##############################################
+        #Filter Historical data Html wrapper
+        ##############################################
         html.Div([
-            html.Label("Date Range:", style={'fontWeight': 'bold', 'marginRight': '10px'}),
-            dcc.DatePickerRange(
-                id='historical-date-range-picker',
-                start_date_placeholder_text="Start Date",
-                end_date_placeholder_text="End Date",
-                display_format='MM-DD-YYYY',
-                month_format='MMMM Y',
-                calendar_orientation='horizontal',
-                updatemode='bothdates',
-                clearable=True, # ADDED: Allows clearing the selected date range
-                style={'marginRight': '15px'}
-            ),
-        ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '15px', 'flexWrap': 'wrap', 'marginRight': '20px'}), # Increased margin-bottom and added right margin
-
-        # Categorical Dropdowns      
-        html.Div([ # Container for all categorical filters - now each dropdown has its own wrapper
-            # Futures Type
-            html.Div([
-                html.Label("Futures Type:", style={'fontWeight': 'bold', 'marginRight': '5px'}),
-                dcc.Dropdown(
-                    id='historical-filter-futures-type',
-                    options=[], # Options loaded by callback
-                    placeholder='All', clearable=True, style={'width': '150px'}
-                ),
-            ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '15px', 'marginRight': '20px'}), # Consistent spacing
-
-            # Status
-            html.Div([
-                html.Label("Status:", style={'fontWeight': 'bold', 'marginRight': '5px'}),
-                dcc.Dropdown(
-                    id='historical-filter-status',
-                    options=[{'label': 'Active', 'value': 'Active'}, {'label': 'Closed', 'value': 'Closed'}],
-                    placeholder='All', clearable=True, style={'width': '150px'}
-                ),
-            ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '15px', 'marginRight': '20px'}),
-
-            # Trade Came To Me
-            html.Div([
-                html.Label("Trade Came To Me:", style={'fontWeight': 'bold', 'marginRight': '5px'}),
-                dcc.Dropdown(
-                    id='historical-filter-trade-came',
-                    options=[{'label': 'Yes', 'value': 'Yes'}, {'label': 'No', 'value': 'No'}],
-                    placeholder='All', clearable=True, style={'width': '150px'}
-                ),
-            ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '15px', 'marginRight': '20px'}),
-
-            # With Value
-            html.Div([
-                html.Label("With Value:", style={'fontWeight': 'bold', 'marginRight': '5px'}),
-                dcc.Dropdown(
-                    id='historical-filter-with-value',
-                    options=[{'label': 'Yes', 'value': 'Yes'}, {'label': 'No', 'value': 'No'}],
-                    placeholder='All', clearable=True, style={'width': '150px'}
-                ),
-            ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '15px', 'marginRight': '20px'}),
-
-            # Score
-            html.Div([
-                html.Label("Score:", style={'fontWeight': 'bold', 'marginRight': '5px'}),
-                dcc.Dropdown(
-                    id='historical-filter-score',
-                    options=[{'label': 'A+', 'value': 'A+'}, {'label': 'B', 'value': 'B'}, {'label': 'C', 'value': 'C'}],
-                    placeholder='All', clearable=True, style={'width': '100px'}
-                ),
-            ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '15px', 'marginRight': '20px'}),
-
-            # Entry Quality
-            html.Div([
-                html.Label("Entry Quality:", style={'fontWeight': 'bold', 'marginRight': '5px'}),
-                dcc.Dropdown(
-                    id='historical-filter-entry-quality',
-                    options=[
-                        {'label': 'Waited Patiently', 'value': 'Waited Patiently'},
-                        {'label': 'Calm / Standard', 'value': 'Calm / Standard'},
-                        {'label': 'Impulsive / FOMO', 'value': 'Impulsive / FOMO'},
-                        {'label': 'Hesitant / Missed', 'value': 'Hesitant / Missed'},
-                        {'label': 'Forced / Overtraded', 'value': 'Forced / Overtraded'},
-                    ],
-                    placeholder='All', clearable=True, style={'width': '200px'}
-                ),
-            ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '15px', 'marginRight': '20px'}),
-
-            # Emotional State
-            html.Div([
-                html.Label("Emotional State:", style={'fontWeight': 'bold', 'marginRight': '5px'}),
-                dcc.Dropdown(
-                    id='historical-filter-emotional-state',
-                    options=[
-                        {'label': 'Calm / Disciplined', 'value': 'Calm / Disciplined'},
-                        {'label': 'Get back losses', 'value': 'Get back losses'},
-                        {'label': 'FOMO', 'value': 'FOMO'},
-                        {'label': 'Fear of giving away profit', 'value': 'Fear of giving away profit'},
-                        {'label': 'Overconfidence', 'value': 'Overconfidence'},
-                        {'label': 'Frustration / Impatience', 'value': 'Frustration / Impatience'},
-                        {'label': 'Distracted', 'value': 'Distracted'},
-                    ],
-                    placeholder='All', clearable=True, style={'width': '200px'}
-                ),
-            ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '15px', 'marginRight': '20px'}),
-
-            # Sizing
-            html.Div([
-                html.Label("Sizing:", style={'fontWeight': 'bold', 'marginRight': '5px'}),
-                dcc.Dropdown(
-                    id='historical-filter-sizing',
-                    options=[{'label': 'Base', 'value': 'Base'}, {'label': 'Increased', 'value': 'Increased'}, {'label': 'Reduced', 'value': 'Reduced'}],
-                    placeholder='All', clearable=True, style={'width': '150px'}
-                ),
-            ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '15px', 'marginRight': '20px'}),
-
-            # Show Columns (already has its own specific styling)
+            html.H3("Filter Historical Data", style={'textAlign': 'center', 'width': '100%', 'marginBottom': '25px'}), # Ensure it spans full width and more margin
+        
+            # Date Range Picker
             html.Div([
-                html.Label("Show Columns:", style={'fontWeight': 'bold', 'marginRight': '5px'}),
-                dcc.Dropdown(
-                    id='column-visibility-filter',
-                    options=[], # Will be populated by a callback
-                    value=[], # Default to showing all initially, will be dynamically set
-                    multi=True, # Allows selecting multiple columns
-                    placeholder='Select columns to show', clearable=False, style={'minWidth': '200px', 'flexGrow': 1}
+                html.Label("Date Range:", style={'fontWeight': 'bold', 'marginRight': '10px'}),
+                dcc.DatePickerRange(
+                    id='historical-date-range-picker',
+                    start_date_placeholder_text="Start Date",
+                    end_date_placeholder_text="End Date",
+                    display_format='MM-DD-YYYY',
+                    month_format='MMMM Y',
+                    calendar_orientation='horizontal',
+                    updatemode='bothdates',
+                    clearable=True, # ADDED: Allows clearing the selected date range
+                    style={'marginRight': '15px'}
                 ),
-            ], style={'display': 'flex', 'alignItems': 'center', 'flexGrow': 1}), # Remaining style from before
-
-        ], style={'display': 'flex', 'flexWrap': 'wrap', 'justifyContent': 'flex-start', 'width': '100%'}), # Parent for all filter groups
-    ], style={
-            'width': '95%',
-            'margin': '0 auto 20px auto',
-            'padding': '25px', # Increased padding for more breathing room
-            'backgroundColor': '#ffffff', # White background for the filter block
-            'borderRadius': '8px',
-            'boxShadow': '0 2px 10px rgba(0, 0, 0, 0.08)', # Consistent shadow
-            'display': 'flex', # Added flex to manage internal layout more precisely
-            'flexWrap': 'wrap', # Allow filter groups to wrap
-            'alignItems': 'flex-start', # Align items to the top
-            'justifyContent': 'space-between' # Distribute space between filter groups
-        }), 
+            ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '15px', 'flexWrap': 'wrap', 'marginRight': '20px'}), # Increased margin-bottom and added right margin
+
+            # Categorical Dropdowns      
+            html.Div([ # Container for all categorical filters - now each dropdown has its own wrapper
+                # Futures Type
+                html.Div([
+                    html.Label("Futures Type:", style={'fontWeight': 'bold', 'marginRight': '5px'}),
+                    dcc.Dropdown(
+                        id='historical-filter-futures-type',
+                        options=[], # Options loaded by callback
+                        placeholder='All', clearable=True, style={'width': '150px'}
+                    ),
+                ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '15px', 'marginRight': '20px'}), # Consistent spacing
+
+                # Status
+                html.Div([
+                    html.Label("Status:", style={'fontWeight': 'bold', 'marginRight': '5px'}),
+                    dcc.Dropdown(
+                        id='historical-filter-status',
+                        options=[{'label': 'Active', 'value': 'Active'}, {'label': 'Closed', 'value': 'Closed'}],
+                        placeholder='All', clearable=True, style={'width': '150px'}
+                    ),
+                ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '15px', 'marginRight': '20px'}),
+
+                # Trade Came To Me
+                html.Div([
+                    html.Label("Trade Came To Me:", style={'fontWeight': 'bold', 'marginRight': '5px'}),
+                    dcc.Dropdown(
+                        id='historical-filter-trade-came',
+                        options=[{'label': 'Yes', 'value': 'Yes'}, {'label': 'No', 'value': 'No'}],
+                        placeholder='All', clearable=True, style={'width': '150px'}
+                    ),
+                ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '15px', 'marginRight': '20px'}),
+
+                # With Value
+                html.Div([
+                    html.Label("With Value:", style={'fontWeight': 'bold', 'marginRight': '5px'}),
+                    dcc.Dropdown(
+                        id='historical-filter-with-value',
+                        options=[{'label': 'Yes', 'value': 'Yes'}, {'label': 'No', 'value': 'No'}],
+                        placeholder='All', clearable=True, style={'width': '150px'}
+                    ),
+                ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '15px', 'marginRight': '20px'}),
+
+                # Score
+                html.Div([
+                    html.Label("Score:", style={'fontWeight': 'bold', 'marginRight': '5px'}),
+                    dcc.Dropdown(
+                        id='historical-filter-score',
+                        options=[{'label': 'A+', 'value': 'A+'}, {'label': 'B', 'value': 'B'}, {'label': 'C', 'value': 'C'}],
+                        placeholder='All', clearable=True, style={'width': '100px'}
+                    ),
+                ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '15px', 'marginRight': '20px'}),
+
+                # Entry Quality
+                html.Div([
+                    html.Label("Entry Quality:", style={'fontWeight': 'bold', 'marginRight': '5px'}),
+                    dcc.Dropdown(
+                        id='historical-filter-entry-quality',
+                        options=[
+                            {'label': 'Waited Patiently', 'value': 'Waited Patiently'},
+                            {'label': 'Calm / Standard', 'value': 'Calm / Standard'},
+                            {'label': 'Impulsive / FOMO', 'value': 'Impulsive / FOMO'},
+                            {'label': 'Hesitant / Missed', 'value': 'Hesitant / Missed'},
+                            {'label': 'Forced / Overtraded', 'value': 'Forced / Overtraded'},
+                        ],
+                        placeholder='All', clearable=True, style={'width': '200px'}
+                    ),
+                ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '15px', 'marginRight': '20px'}),
+
+                # Emotional State
+                html.Div([
+                    html.Label("Emotional State:", style={'fontWeight': 'bold', 'marginRight': '5px'}),
+                    dcc.Dropdown(
+                        id='historical-filter-emotional-state',
+                        options=[
+                            {'label': 'Calm / Disciplined', 'value': 'Calm / Disciplined'},
+                            {'label': 'Get back losses', 'value': 'Get back losses'},
+                            {'label': 'FOMO', 'value': 'FOMO'},
+                            {'label': 'Fear of giving away profit', 'value': 'Fear of giving away profit'},
+                            {'label': 'Overconfidence', 'value': 'Overconfidence'},
+                            {'label': 'Frustration / Impatience', 'value': 'Frustration / Impatience'},
+                            {'label': 'Distracted', 'value': 'Distracted'},
+                        ],
+                        placeholder='All', clearable=True, style={'width': '200px'}
+                    ),
+                ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '15px', 'marginRight': '20px'}),
+
+                # Sizing
+                html.Div([
+                    html.Label("Sizing:", style={'fontWeight': 'bold', 'marginRight': '5px'}),
+                    dcc.Dropdown(
+                        id='historical-filter-sizing',
+                        options=[{'label': 'Base', 'value': 'Base'}, {'label': 'Increased', 'value': 'Increased'}, {'label': 'Reduced', 'value': 'Reduced'}],
+                        placeholder='All', clearable=True, style={'width': '150px'}
+                    ),
+                ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '15px', 'marginRight': '20px'}),
+
+                # Show Columns (already has its own specific styling)
+                html.Div([
+                    html.Label("Show Columns:", style={'fontWeight': 'bold', 'marginRight': '5px'}),
+                    dcc.Dropdown(
+                        id='column-visibility-filter',
+                        options=[], # Will be populated by a callback
+                        value=[], # Default to showing all initially, will be dynamically set
+                        multi=True, # Allows selecting multiple columns
+                        placeholder='Select columns to show', clearable=False, style={'minWidth': '200px', 'flexGrow': 1}
+                    ),
+                ], style={'display': 'flex', 'alignItems': 'center', 'flexGrow': 1}), # Remaining style from before
+
+            ], style={'display': 'flex', 'flexWrap': 'wrap', 'justifyContent': 'flex-start', 'width': '100%'}), # Parent for all filter groups
+        ], style={
+                'width': '95%',
+                'margin': '0 auto 20px auto',
+                'padding': '25px', # Increased padding for more breathing room
+                'backgroundColor': '#ffffff', # White background for the filter block
+                'borderRadius': '8px',
+                'boxShadow': '0 2px 10px rgba(0, 0, 0, 0.08)', # Consistent shadow
+                'display': 'flex', # Added flex to manage internal layout more precisely
+                'flexWrap': 'wrap', # Allow filter groups to wrap
+                'alignItems': 'flex-start', # Align items to the top
+                'justifyContent': 'space-between' # Distribute space between filter groups
+            }), 
     
 
-    ####################################################################################
-    #Data table to display historical data
-    ##############################################################################
-    # DataTable to display historical data
-    html.Div([
-        dash_table.DataTable(
-            id='historical-trades-table', # Unique ID for this table
-            columns=[
-                {"name": "DB ID", "id": "id", "type": "numeric", "editable": False, "hideable": True}, # ADDED hideable: True
-                {"name": "Trade #", "id": "Trade #", "type": "numeric", "editable": False, "hideable": True}, # ADDED hideable: True
-                {"name": "Futures Type", "id": "Futures Type", "presentation": "dropdown", "hideable": True}, # ADDED hideable: True
-                {"name": "Size", "id": "Size", "type": "numeric", "editable": True, "hideable": True}, # ADDED hideable: True
-                {"name": "Stop Loss (pts)", "id": "Stop Loss (pts)", "type": "numeric", "editable": True, "hideable": True}, # ADDED hideable: True
-                {"name": "Risk ($)", "id": "Risk ($)", "type": "numeric", "editable": False, "hideable": True}, # ADDED hideable: True
-                {"name": "Status", "id": "Status", "presentation": "dropdown", "editable": True, "hideable": True}, # ADDED hideable: True
-                {"name": "Points Realized", "id": "Points Realized", "type": "numeric", "editable": True, "hideable": True}, # ADDED hideable: True
-                {"name": "Realized P&L", "id": "Realized P&L", "type": "numeric", "editable": False, "format": {"specifier": ".2f"}, "hideable": True}, # ADDED hideable: True
-                {"name": "Entry Time", "id": "Entry Time", "editable": False, "hideable": True}, # ADDED hideable: True
-                {"name": "Exit Time", "id": "Exit Time", "editable": True, "hideable": True}, # ADDED hideable: True
-                {"name": "Trade came to me", "id": "Trade came to me", "presentation": "dropdown", "hideable": True}, # ADDED hideable: True
-                {"name": "With Value", "id": "With Value", "presentation": "dropdown", "hideable": True}, # ADDED hideable: True
-                {"name": "Score", "id": "Score", "presentation": "dropdown", "hideable": True}, # ADDED hideable: True
-                {"name": "Entry Quality", "id": "Entry Quality", "presentation": "dropdown", "hideable": True}, # ADDED hideable: True
-                {"name": "Emotional State", "id": "Emotional State", "presentation": "dropdown", "hideable": True}, # ADDED hideable: True
-                {"name": "Sizing", "id": "Sizing", "presentation": "dropdown", "hideable": True}, # ADDED hideable: True
-                {"name": "Notes", "id": "Notes", "type": "text", "editable": True, "hideable": True}, # ADDED hideable: True
-            ],
+        ####################################################################################
+        #Data table to display historical data
+        ##############################################################################
+        # DataTable to display historical data
+        html.Div([
+            dash_table.DataTable(
+                id='historical-trades-table', # Unique ID for this table
+                columns=HISTORICAL_TABLE_COLUMNS,
             
-            data=[], # Starts empty, data loaded by callback
-            editable=True, # Will allow editing/deleting historical trades directly
-            row_deletable=True,
-            # Add filtering and pagination later if needed for this table
-            page_action="native", # Enable pagination
-            page_size=20, # Number of rows per page
-            sort_action="native", # Enable sorting
-            filter_action="native", # Enable filtering
-            style_table={'overflowX': 'auto'} # Allow table to scroll horizontally if needed
-        )
-    ], style={'width': '95%', 'margin': '0 auto'}),
-    # NEW: Download component for JSON export
-    dcc.Download(id="download-historical-json"), 
-    # NEW: Confirmation Dialog and Store for Deletion
-    dcc.ConfirmDialog(
-        id='confirm-delete-dialog',
-        message='Are you sure you want to permanently delete this trade from the database?',
-    ),
-    dcc.Store(id='trade-id-to-delete', data=None), # To store the ID of the row pending deletion
-    html.Div(id='delete-confirmation-message', style={'marginTop': '10px', 'textAlign': 'center', 'fontWeight': 'bold'}), # Feedback message  
+                data=table_data, # All trades (no filter is set yet)
+                editable=True, # Will allow editing/deleting historical trades directly
+                row_deletable=True,
+                # Add filtering and pagination later if needed for this table
+                page_action="native", # Enable pagination
+                page_size=20, # Number of rows per page
+                sort_action="native", # Enable sorting
+                filter_action="native", # Enable filtering
+                style_table={'overflowX': 'auto'} # Allow table to scroll horizontally if needed
+            )
+        ], style={'width': '95%', 'margin': '0 auto'}),
+        # NEW: Download component for JSON export
+        dcc.Download(id="download-historical-json"), 
+        # NEW: Confirmation Dialog and Store for Deletion
+        dcc.ConfirmDialog(
+            id='confirm-delete-dialog',
+            message='Are you sure you want to permanently delete this trade from the database?',
+        ),
+        dcc.Store(id='trade-id-to-delete', data=None), # To store the ID of the row pending deletion
+        html.Div(id='delete-confirmation-message', style={'marginTop': '10px', 'textAlign': 'center', 'fontWeight': 'bold'}), # Feedback message  
         
-    # NEW: Interval for initial data load on page access
-    dcc.Interval(id='historical-load-interval', interval=1000, n_intervals=0, max_intervals=1), # Triggers once after 1 second
-    # NEW: Store to hold all raw historical data after initial load
-    dcc.Store(id='historical-trades-table-data-store', data=[]),    
-])  
+        # data_timestamp of the last user edit written to the DB (programmatic refreshes don't change it)
+        dcc.Store(id='historical-handled-edit-timestamp', data=None),
+    ])
 
 
 # --- Callbacks for the Historical Data Page ---
 ##########################################################################
-# Load All Trades from Database into DataTable callback
+# All trades as table rows (layout, Refresh, filters, change events)
 ################################################################
 
-@dash.callback(
-    Output('historical-trades-table-data-store', 'data'), # CHANGED: Output to dcc.Store
-    Output('load-db-output-message', 'children'),
-    Input('load-all-trades-button', 'n_clicks'),
-    Input('historical-load-interval', 'n_intervals'),
-    prevent_initial_call=True
-)
-def load_all_trades_into_table(n_clicks_button, n_intervals_interval):
-    ctx = dash.callback_context
-    trigger_id = ctx.triggered[0]['prop_id'].split('.')[0] if ctx.triggered else 'initial_load'
-
-    if trigger_id == 'historical-load-interval' or trigger_id == 'load-all-trades-button':
-        try:
-            db.initialize_db()
-            all_trades_raw = db.fetch_all_trades_from_db()
-            
-            df_all_trades = pd.DataFrame(all_trades_raw)
+def _cached_trade_rows():
+    """All trades as table rows from the figure cache, or None unless cached for the current trades."""
+    try:
+        db.ensure_db_initialized() # No-op once the startup hook has run
+        figure_cache = get_figure_cache()
+        return figure_cache.get(figure_cache.current_key_prefix(), _ROWS_CACHE_ID)
+    except Exception:
+        log.exception("Error reading the cached historical trades")
+        return None
+
+
+def _loaded_message(count):
+    db_name, table_name = db.get_database_info()
+    return html.Div([
+        html.P(f"Loaded {count} trades from database '{db_name}' table '{table_name}'.", style={'color': 'green'}),
+        html.P("Table is editable and changes are synced to DB. Use the button to refresh.", style={'color': 'gray', 'fontSize': '12px'})
+    ])
+
+
+def _load_all_trades():
+    """(all trades as table rows, newest first; status message), for the table callback."""
+    try:
+        db.ensure_db_initialized() # No-op once the startup hook has run
+        # Page loads, filters and Refresh reuse the rows until the next write (of any process)
+        figure_cache = get_figure_cache()
+        cache_key = figure_cache.current_key_prefix() # Taken BEFORE fetching, so a concurrent write can't be missed
+        all_trades_final = figure_cache.get(cache_key, _ROWS_CACHE_ID)
+        if all_trades_final is None:
+            df_all_trades = pd.DataFrame(db.fetch_all_trades_from_db())
             if not df_all_trades.empty and 'Entry Time' in df_all_trades.columns:
                 df_all_trades['Entry Time'] = pd.to_datetime(df_all_trades['Entry Time'], errors='coerce')
                 df_all_trades = df_all_trades.sort_values(by='Entry Time', ascending=False)
-                all_trades_final = df_all_trades.to_dict('records')
+                all_trades_final = table_rows(df_all_trades, TABLE_COLUMN_IDS) # Displayed columns only, rounded
             else:
                 all_trades_final = []
-
-            db_name, table_name = db.get_database_info()
-            
-            message = html.Div([
-                html.P(f"Loaded {len(all_trades_final)} trades from database '{db_name}' table '{table_name}'.", style={'color': 'green'}),
-                html.P("Table is editable and changes are synced to DB. Use the button to refresh.", style={'color': 'gray', 'fontSize': '12px'})
-            ])
-            return all_trades_final, message # Returns data to store
-        except Exception as e:
-            db_name, table_name = db.get_database_info()
-            message = html.Div([
-                html.P(f"Error loading trades from database '{db_name}' table '{table_name}': {e}", style={'color': 'red'}),
-                html.P("Please ensure database file exists and is accessible.", style={'color': 'gray', 'fontSize': '12px'})
-            ])
-            return [], message # Returns empty data to store on error
-    return dash.no_update, ""
+            figure_cache.put(cache_key, _ROWS_CACHE_ID, all_trades_final)
+        return all_trades_final, _loaded_message(len(all_trades_final))
+    except Exception as e:
+        log.exception("Error loading the historical trades")
+        db_name, table_name = db.get_database_info()
+        message = html.Div([
+            html.P(f"Error loading trades from database '{db_name}' table '{table_name}': {e}", style={'color': 'red'}),
+            html.P("Please ensure database file exists and is accessible.", style={'color': 'gray', 'fontSize': '12px'})
+        ])
+        return [], message # Empty data on error
 
 
 ########################################################################
@@ -328,8 +370,8 @@ def export_all_trades_json(n_clicks):
             json_string = json.dumps(all_trades, indent=2) # indent for readability
 
             return dcc.send_string(json_string, filename)
-        except Exception as e:
-            print(f"Error exporting trades to JSON: {e}")
+        except Exception:
+            log.exception("Error exporting trades to JSON")
             # In a real app, you might output an error message to the page
             return dash.no_update
     return dash.no_update
@@ -338,15 +380,27 @@ def export_all_trades_json(n_clicks):
 # NEW CALLBACK: For Importing Trades from JSON File via Upload
 ##################################################################
 
-# REPLACE its entire content with this:
-@dash.callback(
+# Runs as a background job (see utils/background.py): the request returns at once, the progress
+# bar follows the rows written so far, and "Cancel import" stops the job. Rows committed before a
+# cancel stay in the database (each trade is its own transaction); Refresh shows them.
+@background.callback(
     Output('historical-trades-table', 'data', allow_duplicate=True), # Output to refresh the table
     Output('load-db-output-message', 'children', allow_duplicate=True), # Message for import status
     Input('upload-historical-json', 'contents'), # Trigger when a file is uploaded
     State('upload-historical-json', 'filename'), # Get the filename
+    progress=[Output('import-progress', 'value'), Output('import-progress', 'max')],
+    progress_default=['0', '1'],
+    cancel=[Input('cancel-import-button', 'n_clicks')],
+    running=[
+        (Output('upload-historical-json', 'disabled'), True, False),
+        (Output('load-all-trades-button', 'disabled'), True, False),
+        (Output('import-progress', 'style'), _IMPORT_PROGRESS_STYLE, _HIDDEN),
+        # Only a background job can be cancelled
+        *([(Output('cancel-import-button', 'style'), _CANCEL_IMPORT_STYLE, _HIDDEN)] if background.is_available() else []),
+    ],
     prevent_initial_call=True
 )
-def import_trades_json(contents, filename):
+def import_trades_json(set_progress, contents, filename):
     if contents is not None:
         content_type, content_string = contents.split(',')
         decoded_content = base64.b64decode(content_string)
@@ -360,7 +414,9 @@ def import_trades_json(contents, filename):
 
                 imported_count = 0
                 error_count = 0
-                for row_data in loaded_data:
+                total = str(len(loaded_data))
+                set_progress(('0', total))
+                for index, row_data in enumerate(loaded_data, start=1):
                     # NEW: Use upsert_trade_to_db to insert new records or modify existing ones
                     # We pass the 'id' if it exists in row_data, to allow updates
                     upserted_id = db.upsert_trade_to_db(row_data) 
@@ -370,9 +426,11 @@ def import_trades_json(contents, filename):
                         row_data['id'] = upserted_id 
                     else:
                         error_count += 1
+                    if index % IMPORT_PROGRESS_EVERY == 0:
+                        set_progress((str(index), total))
                 
                 # After saving all, fetch all data from DB to refresh the table with current state
-                refreshed_data = db.fetch_all_trades_from_db()
+                refreshed_data = table_rows(db.fetch_all_trades_from_db(), TABLE_COLUMN_IDS)
                 message_text = f"Successfully imported {imported_count} trades from '{filename}'."
                 if error_count > 0:
                     message_text += f" ({error_count} trades failed to import)."
@@ -383,17 +441,22 @@ def import_trades_json(contents, filename):
         except json.JSONDecodeError:
             return dash.no_update, html.Div("Error: Invalid JSON file content.", style={'color': 'red'})
         except Exception as e:
-            print(f"Error importing trades from JSON file {filename}: {e}")
+            log.exception("Error importing trades from JSON file %s", filename)
             return dash.no_update, html.Div(f"Error processing file: {e}", style={'color': 'red'})
     return dash.no_update, dash.no_update
 
 ###################################################################################
 # NEW CALLBACK: Filter Historical Data Table based on inputs
 #########################################################################
+# The trades come from _load_all_trades (cached per dataset version), not from the browser: the
+# rows travel once, down to the table, and never back up with every filter change.
 @dash.callback(
     Output('historical-trades-table', 'data'), # Output to update the DataTable
     Output('historical-filter-futures-type', 'options'), # NEW: Output to populate Futures Type dropdown options
-    Input('historical-trades-table-data-store', 'data'), # Get all raw data from the store
+    Output('load-db-output-message', 'children'),
+    Input('load-all-trades-button', 'n_clicks'),
+    Input('data-change-event', 'data'), # Trades changed in another tab/process (or by this one)
+    Input('historical-load', 'data'), # The layout had no rows cached (see background.load_trigger)
     Input('historical-date-range-picker', 'start_date'),
     Input('historical-date-range-picker', 'end_date'),
     Input('historical-filter-futures-type', 'value'),
@@ -404,16 +467,43 @@ def import_trades_json(contents, filename):
     Input('historical-filter-entry-quality', 'value'),
     Input('historical-filter-emotional-state', 'value'),
     Input('historical-filter-sizing', 'value'),
-    prevent_initial_call=False # Allow to run on initial load to populate default view
+    # No refresh/import can start while the table is (re)loading
+    running=[
+        (Output('load-all-trades-button', 'disabled'), True, False),
+        (Output('upload-historical-json', 'disabled'), True, False),
+    ],
+    prevent_initial_call=True # The layout renders the unfiltered view itself
 )
-def filter_historical_data_table(all_historical_data, start_date, end_date, 
+def filter_historical_data_table(n_clicks_button, change_event, load, start_date, end_date,
                                  futures_type_val, status_val, trade_came_val, 
                                  with_value_val, score_val, entry_quality_val, 
                                  emotional_state_val, sizing_val):
+    all_historical_data, message = _load_all_trades()
+    if dash.callback_context.triggered_id not in ('load-all-trades-button', 'data-change-event', 'historical-load'):
+        message = dash.no_update # Only a reload reports the trade count
+    table_data, futures_type_options = _filter_trades(
+        all_historical_data, start_date, end_date, futures_type_val, status_val, trade_came_val,
+        with_value_val, score_val, entry_quality_val, emotional_state_val, sizing_val)
+    return table_data, futures_type_options, message
+
+
+background.register_load_trigger('historical')
+
+
+def _filter_trades(all_historical_data, start_date=None, end_date=None, futures_type_val=None,
+                   status_val=None, trade_came_val=None, with_value_val=None, score_val=None,
+                   entry_quality_val=None, emotional_state_val=None, sizing_val=None):
+    """(filtered table rows, Futures Type dropdown options); no filter values = all trades."""
     if not all_historical_data:
         # Return empty data and empty options if no historical data is loaded
         return [], []
 
+    if not (start_date and end_date) and not any([futures_type_val, status_val, trade_came_val, with_value_val,
+                                                  score_val, entry_quality_val, emotional_state_val, sizing_val]):
+        # Nothing to filter: the rows are already table rows, newest first
+        futures_types = {row.get('Futures Type') for row in all_historical_data} - {None}
+        return all_historical_data, [{'label': i, 'value': i} for i in sorted(futures_types)]
+
     df = pd.DataFrame(all_historical_data)
 
     # Convert relevant columns to correct dtypes for filtering
@@ -451,7 +541,7 @@ def filter_historical_data_table(all_historical_data, start_date, end_date,
         df_filtered = df_filtered[df_filtered['Sizing'] == sizing_val]
 
     # Return filtered data and dropdown options
-    return df_filtered.to_dict('records'), futures_type_options
+    return table_rows(df_filtered, TABLE_COLUMN_IDS), futures_type_options
 
 ########################################################################
 # This callback updates the SQLlite database when edits or deletions are made in the DataTable.
@@ -461,12 +551,15 @@ def filter_historical_data_table(all_historical_data, start_date, end_date,
 @dash.callback(
     Output('load-db-output-message', 'children', allow_duplicate=True),
     Output('trade-id-to-delete', 'data'), # This output sends ID to the dcc.Store
+    Output('historical-handled-edit-timestamp', 'data'),
     Input('historical-trades-table', 'data'),
     Input('load-all-trades-button', 'n_clicks'),
     State('historical-trades-table', 'data_previous'),
+    State('historical-trades-table', 'data_timestamp'),
+    State('historical-handled-edit-timestamp', 'data'),
     prevent_initial_call=True
 )
-def update_historical_db_on_edit_delete(current_data, load_btn_n_clicks, previous_data):
+def update_historical_db_on_edit_delete(current_data, load_btn_n_clicks, previous_data, data_timestamp, handled_timestamp):
     ctx = dash.callback_context
 
     message = dash.no_update
@@ -474,13 +567,18 @@ def update_historical_db_on_edit_delete(current_data, load_btn_n_clicks, previou
 
     # If the trigger was specifically the 'Load All Trades' button, do nothing with deletion logic
     if ctx.triggered_id == 'load-all-trades-button':
-        return message, trade_id_to_delete_output # Return default no_update for message and ID
+        return message, trade_id_to_delete_output, dash.no_update # Return default no_update for message and ID
+
+    # The table's data is also replaced by refreshes (Refresh, filters, change events), which leave
+    # data_previous at the last edit's rows. Only a user edit moves data_timestamp: handle each once.
+    if data_timestamp is None or data_timestamp == handled_timestamp:
+        return dash.no_update, dash.no_update, dash.no_update
 
     if previous_data is None:
-        return dash.no_update, dash.no_update
+        return dash.no_update, dash.no_update, data_timestamp
 
     if current_data == previous_data:
-        return dash.no_update, dash.no_update
+        return dash.no_update, dash.no_update, data_timestamp
 
     previous_id_map = {row.get('id'): row for row in previous_data if 'id' in row and row.get('id') is not None}
     current_id_map = {row.get('id'): row for row in current_data if 'id' in row and row.get('id') is not None}
@@ -498,9 +596,10 @@ def update_historical_db_on_edit_delete(current_data, load_btn_n_clicks, previou
             trade_id_to_delete_output = first_deleted_id # Store the ID of the trade to delete
             message = html.Div(f"Confirm deletion of Trade (DB ID: {first_deleted_id})...", style={'color': 'orange'})
 
-            return message, trade_id_to_delete_output # This triggers the show_delete_confirm_dialog
+            return message, trade_id_to_delete_output, data_timestamp # This triggers the show_delete_confirm_dialog
 
     # --- Detect MODIFIED rows (and potentially newly pasted rows if they have no 'id') ---
+    rows_to_update = [] # Existing rows that changed - written together in one transaction below
     for current_row_data in current_data:
         current_row_db_id = current_row_data.get('id')
         previous_row_data = previous_id_map.get(current_row_db_id, {}) 
@@ -523,20 +622,30 @@ def update_historical_db_on_edit_delete(current_data, load_btn_n_clicks, previou
                     else:
                         message = html.Div(f"Failed to save pasted trade.", style={'color': 'red'})
                 except Exception as e:
-                    print(f"Error saving pasted historical trade to DB: {e}")
+                    log.exception("Error saving pasted historical trade")
                     message = html.Div(f"Error saving pasted trade. {e}", style={'color': 'red'})
             else:
-                try:
-                    db.update_trade_in_db(row_copy['id'], row_copy)
-                    message = html.Div(f"Updated trade (DB ID: {row_copy.get('id')}).", style={'color': 'green'})
-                except Exception as e:
-                    print(f"Error updating historical trade (DB ID: {row_copy.get('id')}) in DB: {e}")
-                    message = html.Div(f"Error updating trade (DB ID: {row_copy.get('id')}). {e}", style={'color': 'red'})
+                rows_to_update.append((row_copy['id'], row_copy))
+
+    # --- Write all MODIFIED rows with a single commit (e.g. a multi-row paste) ---
+    if rows_to_update:
+        try:
+            outcomes = db.update_trades(rows_to_update)
+            failed_ids = [db_id for db_id, updated in outcomes.items() if not updated]
+            if failed_ids:
+                message = html.Div(f"Error updating trades (DB IDs: {', '.join(map(str, failed_ids))}).", style={'color': 'red'})
+            elif len(outcomes) == 1:
+                message = html.Div(f"Updated trade (DB ID: {rows_to_update[0][0]}).", style={'color': 'green'})
+            else:
+                message = html.Div(f"Updated {len(outcomes)} trades.", style={'color': 'green'})
+        except Exception as e:
+            log.exception("Error updating historical trades", extra=app_logging.fields(trade_ids=[db_id for db_id, _ in rows_to_update]))
+            message = html.Div(f"Error updating trades. {e}", style={'color': 'red'})
 
     if message != dash.no_update: # Only return message if there was a save/update activity
-        return message, dash.no_update # Return message, no_update for ID
+        return message, dash.no_update, data_timestamp # Return message, no_update for ID
 
-    return dash.no_update, dash.no_update # Default: no message, no ID to delete
+    return dash.no_update, dash.no_update, data_timestamp # Default: no message, no ID to delete
 
 ############################################################
 # NEW CALLBACK: Handle Confirmation Dialog for Deletion
@@ -565,14 +674,14 @@ def confirm_delete_and_delete_from_db(submit_n_clicks, trade_id_to_delete):
             try:
                 db.delete_trade_from_db(trade_id_to_delete) # Perform deletion
                 message_content = html.Div(f"Trade (DB ID: {trade_id_to_delete}) permanently deleted.", style={'color': 'green'})
-                refreshed_data = db.fetch_all_trades_from_db() # Refresh table
-                print(f"Trade with DB ID {trade_id_to_delete} permanently deleted from DB.")
+                refreshed_data = table_rows(db.fetch_all_trades_from_db(), TABLE_COLUMN_IDS) # Refresh table
+                log.info("Trade permanently deleted", extra=app_logging.fields(trade_id=trade_id_to_delete))
                 clear_trade_id_store = None # Clear the store on successful deletion
                 close_dialog = False # Explicitly close dialog
             except Exception as e:
                 message_content = html.Div(f"Error deleting trade (DB ID: {trade_id_to_delete}): {e}", style={'color': 'red'})
                 refreshed_data = dash.no_update # Don't update table if error
-                print(f"Error deleting trade (DB ID: {trade_id_to_delete}): {e}")
+                log.exception("Error deleting trade", extra=app_logging.fields(trade_id=trade_id_to_delete))
                 close_dialog = True # Keep dialog open if error, user might need to re-try
                 clear_trade_id_store = dash.no_update # Don't clear store if error
         else: # Clicked OK, but no ID was in store (edge case)
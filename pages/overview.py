@@ -4,8 +4,6 @@ import dash
 from dash.dependencies import Input, Output, State
 from dash import dcc, html
 import json
-import pandas as pd
-import plotly.graph_objects as go
 from datetime import datetime
 
 # Database access (assuming utils/database.py is in the project root)
@@ -13,24 +11,19 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
 import database as db
-
-# Load config (assuming config.json is in the project root)
-CONFIG_FILE = 'config.json'
-try:
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.join(script_dir, '..')
-    config_path = os.path.join(project_root, 'config.json')
-    with open(config_path, 'r') as f:
-        config = json.load(f)
-except FileNotFoundError:
-    #print(f"Error: {CONFIG_FILE} not found for pages/overview.py. Using default settings.")
-    config = { # Default minimal config
-        "daily_risk": 550, "profit_target": 600, "max_trades_per_day": 6,
-        "default_futures_type": "MES", "default_size": 5,
-        "futures_types": {"ES": { "mf": 50 }, "MES": { "mf": 5 }},
-        "pressing_sequence_multipliers": [1, 2, 1.5, 3],
-        "database_name": "trades.db"
-    }
+from figure_cache import get_figure_cache # Serialized overview charts per dataset version
+import figures # Plain-dict figure builder (skips plotly.graph_objects validation)
+from lazy_imports import lazy_module # pandas is imported on first use, not at app startup
+pd = lazy_module("pandas")
+np = lazy_module("numpy")
+import rolling_stats # Vectorised rolling win rate / expectancy / profit factor
+from downsample import lttb_indices # Shape-preserving downsampling for long rolling series
+from instrumentation import timed # Chart builders count as figure-build time in the callback metrics
+import background # The full-history recompute runs as a background job
+import journals
+import cross_journal # Aggregates over several journals (ATTACH + UNION ALL), without loading their trades
+import app_logging # Level-filtered, queued logging
+log = app_logging.get_logger(__name__)
 
 # Register this page with Dash
 dash.register_page(
@@ -41,139 +34,193 @@ dash.register_page(
     description='High-level overview of trading performance.'
 )
 
-# --- Layout for the Dashboard Overview Page ---
-layout = html.Div([
-    html.H2("Overall Trading Performance Overview", style={'textAlign': 'center', 'marginBottom': '20px'}),
-    
-    # Container for all the tiles
-    html.Div(id='overview-tiles-container', style={
-        'display': 'flex',
-        'flexWrap': 'wrap',
-        'justifyContent': 'center', # Center tiles horizontally
-        'gap': '20px', # Space between tiles
-        'padding': '20px',
-        'backgroundColor': '#ffffff',
-        'borderRadius': '8px',
-        'boxShadow': '0 2px 10px rgba(0, 0, 0, 0.08)'
-    }, children=[
-        # Example Tile 1: Total P&L
-        html.Div(id='total-pnl-tile', style={
-            'flex': '1 1 280px', # Flex-basis for tile width (adjust as needed)
-            'minHeight': '150px',
-            'backgroundColor': '#e3f2fd', # Light blue background
-            'borderRadius': '8px',
-            'padding': '20px',
-            'textAlign': 'center',
-            'boxShadow': '0 2px 5px rgba(0,0,0,0.1)',
-            'display': 'flex',
-            'flexDirection': 'column',
-            'justifyContent': 'center',
-            'alignItems': 'center'
-        }, children=[
-            html.H3("Total Realized P&L", style={'marginBottom': '10px'}),
-            html.P(id='total-pnl-value', style={'fontSize': '2.5em', 'fontWeight': 'bold', 'color': '#2196F3'})
-        ]),
+# Rolling performance tile: window length and the point count above which its lines are downsampled
+ROLLING_TRADE_WINDOW = rolling_stats.DEFAULT_TRADE_WINDOW
+ROLLING_MIN_TRADES = 10 # Short journals still get a (noisier) line once they have this many trades
+ROLLING_CHART_MAX_POINTS = 1000
 
-        # Example Tile 2: Win Rate
-        html.Div(id='win-rate-tile', style={
-            'flex': '1 1 280px',
-            'minHeight': '150px',
-            'backgroundColor': '#e8f5e9', # Light green background
-            'borderRadius': '8px',
-            'padding': '20px',
-            'textAlign': 'center',
-            'boxShadow': '0 2px 5px rgba(0,0,0,0.1)',
-            'display': 'flex',
-            'flexDirection': 'column',
-            'justifyContent': 'center',
-            'alignItems': 'center'
-        }, children=[
-            html.H3("Win Rate", style={'marginBottom': '10px'}),
-            html.P(id='win-rate-value', style={'fontSize': '2.5em', 'fontWeight': 'bold', 'color': '#4CAF50'})
-        ]),
+# "Combine journals" section: hidden until journals are picked
+AGGREGATE_SECTION_STYLE = {
+    'padding': '20px', 'marginBottom': '20px', 'backgroundColor': '#ffffff', 'borderRadius': '8px',
+    'boxShadow': '0 2px 10px rgba(0, 0, 0, 0.08)'
+}
+HIDDEN = {'display': 'none'}
 
-        # Example Tile 3: Total Trades
-        html.Div(id='total-trades-tile', style={
-            'flex': '1 1 280px',
-            'minHeight': '150px',
-            'backgroundColor': '#fff3e0', # Light orange background
-            'borderRadius': '8px',
-            'padding': '20px',
-            'textAlign': 'center',
-            'boxShadow': '0 2px 5px rgba(0,0,0,0.1)',
-            'display': 'flex',
-            'flexDirection': 'column',
-            'justifyContent': 'center',
-            'alignItems': 'center'
-        }, children=[
-            html.H3("Avg Trades per day", style={'marginBottom': '10px'}),
-            html.P(id='total-trades-value', style={'fontSize': '2.5em', 'fontWeight': 'bold', 'color': '#FF9800'})
+# --- Layout for the Dashboard Overview Page ---
+# A function, rendered with the KPIs and charts already filled in when the figure cache has them
+# for the current trades, so the page needs no callback round trip on navigation. Otherwise it
+# renders placeholders and the browser starts update_overview_kpis (a background job) at once;
+# the layout request itself never fetches the history or runs pandas.
+def layout(**kwargs):
+    outputs = _cached_overview_outputs()
+    pending = outputs is None
+    if pending:
+        outputs = ("...", "...", "...", "...", "...", figures.figure(), figures.figure(), figures.figure(), figures.figure())
+    (total_pnl, win_rate, avg_trades, avg_win, avg_loss,
+     origination_fig, emotional_fig, entry_quality_fig, rolling_fig) = outputs
+    return html.Div([
+        html.H2("Overall Trading Performance Overview", style={'textAlign': 'center', 'marginBottom': '20px'}),
+        background.job_status('overview'), # Progress + Cancel while update_overview_kpis runs
+        background.load_trigger('overview', pending), # Computes the KPIs right after a cache miss
+
+        # Aggregate reporting mode: the picked journals side by side and combined (cross_journal.py)
+        html.Div([
+            html.Label("Combine journals:", style={'fontWeight': 'bold'}),
+            dcc.Dropdown(
+                id='overview-journals',
+                options=journals.journal_options(),
+                value=[],
+                multi=True,
+                placeholder="This journal only",
+                style={'minWidth': '350px'}
+            ),
+        ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'center', 'gap': '10px', 'marginBottom': '20px'}),
+        html.Div(id='overview-aggregate-section', style=HIDDEN, children=[
+            html.H3("Selected Journals", style={'textAlign': 'center', 'marginBottom': '10px'}),
+            html.Div(id='overview-aggregate-kpis'),
+            dcc.Graph(id='overview-aggregate-weekly-chart', figure=figures.figure(), config={'displayModeBar': False}, style={'height': '350px'}),
+            dcc.Graph(id='overview-aggregate-cumulative-chart', figure=figures.figure(), config={'displayModeBar': False}, style={'height': '350px'}),
         ]),
 
-        # NEW TILE 4: Average Winning/Losing Trade
-        html.Div(id='avg-win-loss-tile', style={
-            'flex': '1 1 280px',
-            'minHeight': '150px',
-            'backgroundColor': '#e0f7fa', # Light cyan background
-            'borderRadius': '8px',
-            'padding': '20px',
-            'textAlign': 'center',
-            'boxShadow': '0 2px 5px rgba(0,0,0,0.1)',
+        # Container for all the tiles
+        html.Div(id='overview-tiles-container', style={
             'display': 'flex',
-            'flexDirection': 'column',
-            'justifyContent': 'center',
-            'alignItems': 'center'
-        }, children=[
-            html.H3("Avg Win / Avg Loss", style={'marginBottom': '10px'}),
-            html.P(id='avg-win-value', style={'fontSize': '1.5em', 'fontWeight': 'bold', 'color': '#4CAF50'}),
-            html.P(id='avg-loss-value', style={'fontSize': '1.5em', 'fontWeight': 'bold', 'color': '#F44336'})
-        ]),
-
-        # NEW TILE 5: "Did Trade Come To You" Pie Chart
-        html.Div(id='trade-came-pie-tile', style={
-            'flex': '1 1 400px', # Slightly wider for pie chart
-            'minHeight': '300px',
-            'backgroundColor': '#ffffff',
-            'borderRadius': '8px',
-            'padding': '10px',
-            'boxShadow': '0 2px 5px rgba(0,0,0,0.1)'
-        }, children=[
-            html.H3("Did Trade Come to you?", style={'textAlign': 'center', 'marginBottom': '0px'}),
-            dcc.Graph(id='trade-came-pie-chart', config={'displayModeBar': False}, style={'height': '250px'})
-        ]),
-
-        # NEW TILE 6: "Emotional State" Pie Chart
-        html.Div(id='emotional-state-pie-tile', style={
-            'flex': '1 1 400px', # Slightly wider for pie chart
-            'minHeight': '300px',
-            'backgroundColor': '#ffffff',
-            'borderRadius': '8px',
-            'padding': '10px',
-            'boxShadow': '0 2px 5px rgba(0,0,0,0.1)'
-        }, children=[
-            html.H3("Emotional State Breakdown", style={'textAlign': 'center', 'marginBottom': '0px'}),
-            dcc.Graph(id='emotional-state-pie-chart', config={'displayModeBar': False}, style={'height': '250px'})
-        ]),
-
-        # NEW TILE 7: Grouped Bar Chart for Entry Quality Performance
-        html.Div(id='entry-quality-bar-tile', style={
-            'flex': '1 1 600px', # Wider tile for grouped bar chart
-            'minHeight': '400px',
+            'flexWrap': 'wrap',
+            'justifyContent': 'center', # Center tiles horizontally
+            'gap': '20px', # Space between tiles
+            'padding': '20px',
             'backgroundColor': '#ffffff',
             'borderRadius': '8px',
-            'padding': '10px',
-            'boxShadow': '0 2px 5px rgba(0,0,0,0.1)'
+            'boxShadow': '0 2px 10px rgba(0, 0, 0, 0.08)'
         }, children=[
-            html.H3("Performance by Entry Quality", style={'textAlign': 'center', 'marginBottom': '0px'}),
-            dcc.Graph(id='entry-quality-bar-chart', config={'displayModeBar': False}, style={'height': '350px'})
-        ]),
+            # Example Tile 1: Total P&L
+            html.Div(id='total-pnl-tile', style={
+                'flex': '1 1 280px', # Flex-basis for tile width (adjust as needed)
+                'minHeight': '150px',
+                'backgroundColor': '#e3f2fd', # Light blue background
+                'borderRadius': '8px',
+                'padding': '20px',
+                'textAlign': 'center',
+                'boxShadow': '0 2px 5px rgba(0,0,0,0.1)',
+                'display': 'flex',
+                'flexDirection': 'column',
+                'justifyContent': 'center',
+                'alignItems': 'center'
+            }, children=[
+                html.H3("Total Realized P&L", style={'marginBottom': '10px'}),
+                html.P(total_pnl, id='total-pnl-value', style={'fontSize': '2.5em', 'fontWeight': 'bold', 'color': '#2196F3'})
+            ]),
+
+            # Example Tile 2: Win Rate
+            html.Div(id='win-rate-tile', style={
+                'flex': '1 1 280px',
+                'minHeight': '150px',
+                'backgroundColor': '#e8f5e9', # Light green background
+                'borderRadius': '8px',
+                'padding': '20px',
+                'textAlign': 'center',
+                'boxShadow': '0 2px 5px rgba(0,0,0,0.1)',
+                'display': 'flex',
+                'flexDirection': 'column',
+                'justifyContent': 'center',
+                'alignItems': 'center'
+            }, children=[
+                html.H3("Win Rate", style={'marginBottom': '10px'}),
+                html.P(win_rate, id='win-rate-value', style={'fontSize': '2.5em', 'fontWeight': 'bold', 'color': '#4CAF50'})
+            ]),
+
+            # Example Tile 3: Total Trades
+            html.Div(id='total-trades-tile', style={
+                'flex': '1 1 280px',
+                'minHeight': '150px',
+                'backgroundColor': '#fff3e0', # Light orange background
+                'borderRadius': '8px',
+                'padding': '20px',
+                'textAlign': 'center',
+                'boxShadow': '0 2px 5px rgba(0,0,0,0.1)',
+                'display': 'flex',
+                'flexDirection': 'column',
+                'justifyContent': 'center',
+                'alignItems': 'center'
+            }, children=[
+                html.H3("Avg Trades per day", style={'marginBottom': '10px'}),
+                html.P(avg_trades, id='total-trades-value', style={'fontSize': '2.5em', 'fontWeight': 'bold', 'color': '#FF9800'})
+            ]),
+
+            # NEW TILE 4: Average Winning/Losing Trade
+            html.Div(id='avg-win-loss-tile', style={
+                'flex': '1 1 280px',
+                'minHeight': '150px',
+                'backgroundColor': '#e0f7fa', # Light cyan background
+                'borderRadius': '8px',
+                'padding': '20px',
+                'textAlign': 'center',
+                'boxShadow': '0 2px 5px rgba(0,0,0,0.1)',
+                'display': 'flex',
+                'flexDirection': 'column',
+                'justifyContent': 'center',
+                'alignItems': 'center'
+            }, children=[
+                html.H3("Avg Win / Avg Loss", style={'marginBottom': '10px'}),
+                html.P(avg_win, id='avg-win-value', style={'fontSize': '1.5em', 'fontWeight': 'bold', 'color': '#4CAF50'}),
+                html.P(avg_loss, id='avg-loss-value', style={'fontSize': '1.5em', 'fontWeight': 'bold', 'color': '#F44336'})
+            ]),
+
+            # NEW TILE 5: "Did Trade Come To You" Pie Chart
+            html.Div(id='trade-came-pie-tile', style={
+                'flex': '1 1 400px', # Slightly wider for pie chart
+                'minHeight': '300px',
+                'backgroundColor': '#ffffff',
+                'borderRadius': '8px',
+                'padding': '10px',
+                'boxShadow': '0 2px 5px rgba(0,0,0,0.1)'
+            }, children=[
+                html.H3("Did Trade Come to you?", style={'textAlign': 'center', 'marginBottom': '0px'}),
+                dcc.Graph(id='trade-came-pie-chart', figure=origination_fig, config={'displayModeBar': False}, style={'height': '250px'})
+            ]),
+
+            # NEW TILE 6: "Emotional State" Pie Chart
+            html.Div(id='emotional-state-pie-tile', style={
+                'flex': '1 1 400px', # Slightly wider for pie chart
+                'minHeight': '300px',
+                'backgroundColor': '#ffffff',
+                'borderRadius': '8px',
+                'padding': '10px',
+                'boxShadow': '0 2px 5px rgba(0,0,0,0.1)'
+            }, children=[
+                html.H3("Emotional State Breakdown", style={'textAlign': 'center', 'marginBottom': '0px'}),
+                dcc.Graph(id='emotional-state-pie-chart', figure=emotional_fig, config={'displayModeBar': False}, style={'height': '250px'})
+            ]),
+
+            # NEW TILE 7: Grouped Bar Chart for Entry Quality Performance
+            html.Div(id='entry-quality-bar-tile', style={
+                'flex': '1 1 600px', # Wider tile for grouped bar chart
+                'minHeight': '400px',
+                'backgroundColor': '#ffffff',
+                'borderRadius': '8px',
+                'padding': '10px',
+                'boxShadow': '0 2px 5px rgba(0,0,0,0.1)'
+            }, children=[
+                html.H3("Performance by Entry Quality", style={'textAlign': 'center', 'marginBottom': '0px'}),
+                dcc.Graph(id='entry-quality-bar-chart', figure=entry_quality_fig, config={'displayModeBar': False}, style={'height': '350px'})
+            ]),
+
+            # NEW TILE 8: Rolling N-trade win rate / expectancy
+            html.Div(id='rolling-performance-tile', style={
+                'flex': '1 1 600px',
+                'minHeight': '400px',
+                'backgroundColor': '#ffffff',
+                'borderRadius': '8px',
+                'padding': '10px',
+                'boxShadow': '0 2px 5px rgba(0,0,0,0.1)'
+            }, children=[
+                html.H3(f"Rolling Performance (last {ROLLING_TRADE_WINDOW} trades)", style={'textAlign': 'center', 'marginBottom': '0px'}),
+                dcc.Graph(id='rolling-performance-chart', figure=rolling_fig, config={'displayModeBar': False}, style={'height': '350px'})
+            ]),
         
-        # You can add more tiles here for other KPIs like Avg P&L per Trade, Avg Win/Loss Size, etc.
-    ]),
-
-    # Hidden interval for initial data load
-    dcc.Interval(id='overview-interval', interval=1000, n_intervals=0, max_intervals=1),
-])
+            # You can add more tiles here for other KPIs like Avg P&L per Trade, Avg Win/Loss Size, etc.
+        ]),
+    ])
 
 # pages/overview.py - Add this callback at the end of the file
 # Locate this section in pages/overview.py:
@@ -191,8 +238,13 @@ layout = html.Div([
 # def update_overview_kpis(n_intervals):
 #     ...
 
-# REPLACE its entire content with this:
-@dash.callback(
+# Figure-cache ids for the overview outputs (KPI texts are cached alongside the charts)
+_OVERVIEW_CACHE_IDS = ("overview-kpis", "trade-came-pie-chart", "emotional-state-pie-chart", "entry-quality-bar-chart", "rolling-performance-chart")
+
+# Computes the KPIs when the layout had none cached, and again when the trades change. Runs as a background job
+# (utils/background.py); its result is kept in the job cache until the journal file changes, so
+# every worker serves repeat events without recomputing.
+@background.callback(
     Output('total-pnl-value', 'children'),
     Output('win-rate-value', 'children'),
     Output('total-trades-value', 'children'), # Average Trades per Day
@@ -201,60 +253,132 @@ layout = html.Div([
     Output('trade-came-pie-chart', 'figure'),
     Output('emotional-state-pie-chart', 'figure'),
     Output('entry-quality-bar-chart', 'figure'), # NEW OUTPUT for grouped bar chart
-    Input('overview-interval', 'n_intervals'),
-    prevent_initial_call=False
+    Output('rolling-performance-chart', 'figure'),
+    Input('data-change-event', 'data'), # Trades changed (any tab, process or import): recompute
+    Input('overview-load', 'data'), # The layout showed placeholders (see background.load_trigger)
+    prevent_initial_call=True,
+    cache_by_data=True,
+    interval=250,
+    **background.status_kwargs('overview'),
 )
-def update_overview_kpis(n_intervals):
-    if n_intervals == 0: # This callback will run once on page load
-        try:
-            db.initialize_db() # Ensure DB is initialized before fetching
-            all_trades = db.fetch_all_trades_from_db() # Fetch all historical data
-        except Exception as e:
-            print(f"Error fetching all historical trades for overview KPIs: {e}")
-            # Return error state for all outputs
-            return "$ N/A", "N/A%", "N/A", "$ N/A", "$ N/A", go.Figure(), go.Figure(), go.Figure()
-
-        if not all_trades:
-            return "$0.00", "0.00%", "0.00", "$0.00", "$0.00", go.Figure(), go.Figure(), go.Figure()
-
-        df = pd.DataFrame(all_trades)
-        df['Entry Time'] = pd.to_datetime(df['Entry Time'], errors='coerce')
-        # Ensure valid data for calculations and pie charts, dropna early
-        df = df.dropna(subset=['Entry Time', 'Realized P&L', 'Trade came to me', 'Emotional State', 'Entry Quality']) # Added Entry Quality to dropna
-
-        # FIX: Robust Realized P&L conversion right here
-        df['Realized P&L'] = pd.to_numeric(df['Realized P&L'], errors='coerce').fillna(0).astype(float)
-
-        # If df becomes empty after cleaning (e.g., all relevant columns are NaN)
-        if df.empty:
-            print("DEBUG Overview: DataFrame is empty after cleaning. Returning empty charts.")
-            return "$0.00", "0.00%", "0.00", "$0.00", "$0.00", go.Figure(), go.Figure(), go.Figure()
-
-        # --- Call Helper Functions ---
-        total_realized_pnl, win_rate, avg_trades_per_day, avg_win_size, avg_loss_size = _calculate_general_kpis(df)
-        trade_origination_pie_fig = _create_trade_origination_pie_chart(df)
-        emotional_state_pie_fig = _create_emotional_state_pie_chart(df)
-        entry_quality_performance_fig = _create_entry_quality_bar_chart(df) # Call the new function
-
-
-        # Return all calculated KPIs and figures
-        return (
-            f"${total_realized_pnl:,.2f}",
-            f"{win_rate:,.2f}%",
-            f"{avg_trades_per_day:,.2f}",
-            f"${avg_win_size:,.2f}",
-            f"${abs(avg_loss_size):,.2f}", # Display average loss as positive
-            trade_origination_pie_fig,
-            emotional_state_pie_fig,
-            entry_quality_performance_fig # Ensure this is returned
-        )
+def update_overview_kpis(set_progress, change_event, load):
+    return _overview_outputs(set_progress)
+
+
+background.register_load_trigger('overview')
+
+
+def _cached_overview_outputs(figure_cache=None, cache_key=None):
+    """The overview's outputs from the figure cache, or None unless all are cached for the current trades."""
+    try:
+        db.ensure_db_initialized() # No-op once the startup hook has run
+        figure_cache = figure_cache or get_figure_cache()
+        cached = figure_cache.get_many(cache_key or figure_cache.current_key_prefix(), _OVERVIEW_CACHE_IDS)
+    except Exception:
+        log.exception("Error reading the cached overview KPIs")
+        return None
+    if cached is None:
+        return None
+    kpi_texts, origination_fig, emotional_fig, entry_quality_fig, rolling_fig = cached
+    return (*kpi_texts, origination_fig, emotional_fig, entry_quality_fig, rolling_fig)
+
+
+def _overview_outputs(set_progress):
+    """The overview's KPI texts and figures, in the callback's output order."""
+    try:
+        db.ensure_db_initialized() # No-op once the startup hook has run
+        # Unchanged dataset since the last visit -> return the cached KPIs and charts,
+        # skipping the fetch, pandas and plotly entirely (the figure cache is kept in-process, not
+        # shared with background jobs)
+        figure_cache = get_figure_cache()
+        cache_key = figure_cache.current_key_prefix() # Taken BEFORE fetching, so a concurrent write can't be missed
+        cached = _cached_overview_outputs(figure_cache, cache_key)
+        if cached is not None:
+            return cached
+        set_progress("Loading trade history...")
+        all_trades = db.fetch_all_trades_from_db() # Fetch all historical data
+    except Exception:
+        log.exception("Error fetching the trade history for the overview KPIs")
+        # Return error state for all outputs
+        return "$ N/A", "N/A%", "N/A", "$ N/A", "$ N/A", figures.figure(), figures.figure(), figures.figure(), figures.figure()
+
+    if not all_trades:
+        return "$0.00", "0.00%", "0.00", "$0.00", "$0.00", figures.figure(), figures.figure(), figures.figure(), figures.figure()
+
+    df = pd.DataFrame(all_trades)
+    df['Entry Time'] = pd.to_datetime(df['Entry Time'], errors='coerce')
+    # Ensure valid data for calculations and pie charts, dropna early
+    df = df.dropna(subset=['Entry Time', 'Realized P&L', 'Trade came to me', 'Emotional State', 'Entry Quality']) # Added Entry Quality to dropna
+
+    # FIX: Robust Realized P&L conversion right here
+    df['Realized P&L'] = pd.to_numeric(df['Realized P&L'], errors='coerce').fillna(0).astype(float)
+
+    # If df becomes empty after cleaning (e.g., all relevant columns are NaN)
+    if df.empty:
+        log.debug("Overview: no complete trades after cleaning, returning empty charts")
+        return "$0.00", "0.00%", "0.00", "$0.00", "$0.00", figures.figure(), figures.figure(), figures.figure(), figures.figure()
+
+    # --- Call Helper Functions ---
+    set_progress(f"Computing KPIs and charts for {len(df):,} trades...")
+    total_realized_pnl, win_rate, avg_trades_per_day, avg_win_size, avg_loss_size = _calculate_general_kpis(df)
+    trade_origination_pie_fig = _create_trade_origination_pie_chart(df)
+    emotional_state_pie_fig = _create_emotional_state_pie_chart(df)
+    entry_quality_performance_fig = _create_entry_quality_bar_chart(df) # Call the new function
+    rolling_performance_fig = _create_rolling_performance_chart(df)
+
+    kpi_texts = [
+        f"${total_realized_pnl:,.2f}",
+        f"{win_rate:,.2f}%",
+        f"{avg_trades_per_day:,.2f}",
+        f"${avg_win_size:,.2f}",
+        f"${abs(avg_loss_size):,.2f}", # Display average loss as positive
+    ]
+    # Store serialized copies for the next visit with the same data version
+    for cache_id, payload in zip(_OVERVIEW_CACHE_IDS, (kpi_texts, trade_origination_pie_fig, emotional_state_pie_fig, entry_quality_performance_fig, rolling_performance_fig)):
+        figure_cache.put(cache_key, cache_id, payload)
+
+    # Return all calculated KPIs and figures
     return (
-        dash.no_update, dash.no_update, dash.no_update, # P&L, Win Rate, Avg Trades
-        dash.no_update, dash.no_update, # Avg Win/Loss
-        dash.no_update, dash.no_update, # Pie charts
-        dash.no_update # For the new grouped bar chart
+        *kpi_texts,
+        trade_origination_pie_fig,
+        emotional_state_pie_fig,
+        entry_quality_performance_fig, # Ensure this is returned
+        rolling_performance_fig
     )
 
+# Journals picked (or this tab's trades changed): per-journal and combined KPIs and charts from
+# cross_journal's daily/weekly aggregates. Other journals' writes show on the next redraw (their
+# change events go to the tabs on those journals).
+@dash.callback(
+    Output('overview-aggregate-section', 'style'),
+    Output('overview-aggregate-kpis', 'children'),
+    Output('overview-aggregate-weekly-chart', 'figure'),
+    Output('overview-aggregate-cumulative-chart', 'figure'),
+    Input('overview-journals', 'value'),
+    Input('data-change-event', 'data'),
+    prevent_initial_call=True # Nothing is picked when the page opens
+)
+def update_overview_aggregates(journal_names, change_event):
+    if not journal_names:
+        return HIDDEN, [], figures.figure(), figures.figure()
+    try:
+        daily = cross_journal.aggregate_report(journal_names, period='day')
+        weekly = cross_journal.aggregate_report(journal_names, period='week')
+    except Exception:
+        log.exception("Error aggregating journals %s for the overview", journal_names)
+        return AGGREGATE_SECTION_STYLE, html.P("Error loading the selected journals.", style={'textAlign': 'center', 'color': 'red'}), \
+               figures.figure(), figures.figure()
+    if not daily['journals']:
+        return AGGREGATE_SECTION_STYLE, html.P("The selected journals have no trades yet.", style={'textAlign': 'center'}), \
+               figures.figure(), figures.figure()
+    return (
+        AGGREGATE_SECTION_STYLE,
+        _aggregate_kpi_table(daily),
+        _create_aggregate_weekly_chart(weekly),
+        _create_aggregate_cumulative_chart(daily),
+    )
+
+
 ############################################################################
 # Helper Functions
 ############################################################################
@@ -281,13 +405,14 @@ def _calculate_general_kpis(df):
     return total_realized_pnl, win_rate, avg_trades_per_day, avg_win_size, avg_loss_size
 
 
+@timed("figure")
 def _create_trade_origination_pie_chart(df):
     """Creates the 'Did Trade Come To You' pie chart figure."""
     trade_origination_value_counts_series = df['Trade came to me'].value_counts(dropna=False)
     
     if trade_origination_value_counts_series.empty:
-        print("DEBUG Overview: No data for 'Trade came to me' pie chart after value_counts.")
-        return go.Figure().update_layout(title="No Trade Origination Data")
+        log.debug("Overview: no data for the 'Trade came to me' pie chart")
+        return figures.figure(title="No Trade Origination Data")
     else:
         trade_origination_counts = trade_origination_value_counts_series.reset_index()
         trade_origination_counts.columns = ['Category', 'Count']
@@ -298,14 +423,15 @@ def _create_trade_origination_pie_chart(df):
         }
         pie_colors_origination = [origination_color_map.get(cat, '#CCCCCC') for cat in trade_origination_counts['Category']]
 
-        fig = go.Figure(data=[go.Pie(
+        fig = figures.figure(data=[figures.pie(
             labels=trade_origination_counts['Category'],
             values=trade_origination_counts['Count'],
             hole=0.3,
             marker_colors=pie_colors_origination,
             hovertemplate='<b>%{label}</b><br>Count: %{value}<br>Percentage: %{percent}<extra></extra>'
         )])
-        fig.update_layout(
+        figures.update_layout(
+            fig,
             margin=dict(t=0, b=0, l=0, r=0),
             showlegend=True,
             font={'color': '#333333'},
@@ -317,13 +443,14 @@ def _create_trade_origination_pie_chart(df):
 #############################################################################
 # def _create_emotional_state_pie_chart(df):
 #############################################################################
+@timed("figure")
 def _create_emotional_state_pie_chart(df):
     """Creates the 'Emotional State' pie chart figure."""
     emotional_state_value_counts_series = df['Emotional State'].value_counts(dropna=False)
     
     if emotional_state_value_counts_series.empty:
-        print("DEBUG Overview: No data for 'Emotional State' pie chart after value_counts.")
-        return go.Figure().update_layout(title="No Emotional State Data")
+        log.debug("Overview: no data for the 'Emotional State' pie chart")
+        return figures.figure(title="No Emotional State Data")
     else:
         emotional_state_counts = emotional_state_value_counts_series.reset_index()
         emotional_state_counts.columns = ['Category', 'Count']
@@ -341,14 +468,15 @@ def _create_emotional_state_pie_chart(df):
         }
         pie_colors_emotional_state = [emotional_state_color_map.get(cat, '#CCCCCC') for cat in emotional_state_counts['Category']]
 
-        fig = go.Figure(data=[go.Pie(
+        fig = figures.figure(data=[figures.pie(
             labels=emotional_state_counts['Category'],
             values=emotional_state_counts['Count'],
             hole=0.3,
             marker_colors=pie_colors_emotional_state,
             hovertemplate='<b>%{label}</b><br>Count: %{value}<br>Percentage: %{percent}<extra></extra>'
         )])
-        fig.update_layout(
+        figures.update_layout(
+            fig,
             margin=dict(t=0, b=0, l=0, r=0),
             showlegend=True,
             font={'color': '#333333'},
@@ -362,14 +490,15 @@ def _create_emotional_state_pie_chart(df):
 # def _create_entry_quality_bar_chart(df):
 #     """Creates the grouped bar chart for Performance by Entry Quality."""
 #############################################################################
+@timed("figure")
 def _create_entry_quality_bar_chart(df):
     """Creates the grouped bar chart for Performance by Entry Quality."""
-    entry_quality_performance_fig = go.Figure()
+    entry_quality_performance_fig = figures.figure()
     
     df_entry_quality = df[df['Entry Quality'].notna() & (df['Entry Quality'] != '')].copy()
 
     if df_entry_quality.empty:
-        entry_quality_performance_fig.update_layout(title="No Entry Quality Data")
+        figures.update_layout(entry_quality_performance_fig, title="No Entry Quality Data")
     else:
         # FIX: Robust Realized P&L conversion for this helper function as well
         df_entry_quality['Realized P&L'] = pd.to_numeric(df_entry_quality['Realized P&L'], errors='coerce').fillna(0).astype(float)
@@ -388,7 +517,7 @@ def _create_entry_quality_bar_chart(df):
         performance_by_entry_quality = performance_by_entry_quality.sort_values(by='Avg_P_L', ascending=False)
 
         # Add bars for Win %
-        entry_quality_performance_fig.add_trace(go.Bar(
+        figures.add_trace(entry_quality_performance_fig, figures.bar(
             x=performance_by_entry_quality['Entry Quality'],
             y=performance_by_entry_quality['Win_Percentage'],
             name='Win %',
@@ -404,7 +533,7 @@ def _create_entry_quality_bar_chart(df):
         ))
 
         # Add bars for Avg P&L
-        entry_quality_performance_fig.add_trace(go.Bar(
+        figures.add_trace(entry_quality_performance_fig, figures.bar(
             x=performance_by_entry_quality['Entry Quality'],
             y=performance_by_entry_quality['Avg_P_L'],
             name='Avg P&L',
@@ -419,7 +548,8 @@ def _create_entry_quality_bar_chart(df):
             hovertemplate='<b>Entry Quality:</b> %{x}<br><b>Avg P&L:</b> $%{y:,.2f}<extra></extra>'
         ))
         
-        entry_quality_performance_fig.update_layout(
+        figures.update_layout(
+            entry_quality_performance_fig,
             barmode='group', # Group bars side by side
             title='Performance by Entry Quality',
             xaxis_title='Entry Quality Tag',
@@ -432,4 +562,148 @@ def _create_entry_quality_bar_chart(df):
             height=350,
             legend=dict(x=0.01, y=0.99, bgcolor='rgba(255,255,255,0.7)', bordercolor='rgba(0,0,0,0.1)'),
         )
-    return entry_quality_performance_fig
\ No newline at end of file
+    return entry_quality_performance_fig
+
+#############################################################################
+# def _create_rolling_performance_chart(df):
+#############################################################################
+@timed("figure")
+def _create_rolling_performance_chart(df):
+    """Creates the rolling N-trade win rate / expectancy line chart."""
+    df_sorted = df.sort_values(by='Entry Time', kind='stable') # Windows run over trades in time order
+    risk = pd.to_numeric(df_sorted['Risk ($)'], errors='coerce') if 'Risk ($)' in df_sorted.columns else None
+    stats = rolling_stats.rolling_trade_stats(
+        df_sorted['Realized P&L'].to_numpy(), risk, window=ROLLING_TRADE_WINDOW,
+        min_periods=min(ROLLING_MIN_TRADES, ROLLING_TRADE_WINDOW)
+    )
+    trade_numbers = np.arange(1, len(df_sorted) + 1)
+
+    fig = figures.figure()
+    for key, name, color, axis, hover in (
+        ('win_rate', 'Win rate (%)', '#4CAF50', 'y', '%{y:.1f}%'),
+        ('expectancy', 'Expectancy ($/trade)', '#FF9800', 'y2', '$%{y:,.2f}'),
+    ):
+        x, y = _downsample_line(trade_numbers, stats[key])
+        if len(y) == 0:
+            continue
+        make_trace = figures.scattergl if len(y) < len(trade_numbers) else figures.scatter
+        figures.add_trace(fig, make_trace(
+            x=x, y=y, mode='lines', name=name, line=dict(color=color), yaxis=axis,
+            hovertemplate=f'Trade #%{{x}}: {hover}<extra>{name}</extra>'
+        ))
+
+    if not fig['data']:
+        return figures.update_layout(fig, title=f"Not enough trades for a rolling window (need {ROLLING_MIN_TRADES})")
+
+    figures.update_layout(
+        fig,
+        xaxis_title='Trade # (chronological)',
+        yaxis={'title': 'Win rate (%)', 'range': [0, 100]},
+        yaxis2={'title': 'Expectancy ($ per trade)', 'overlaying': 'y', 'side': 'right'},
+        margin=dict(t=20, b=40, l=50, r=60),
+        paper_bgcolor='#ffffff', plot_bgcolor='#ffffff',
+        font={'color': '#333333'},
+        hovermode='x unified',
+        height=350,
+        legend=dict(x=0.01, y=0.99, bgcolor='rgba(255,255,255,0.7)', bordercolor='rgba(0,0,0,0.1)'),
+    )
+    return fig
+
+
+def _downsample_line(x, y):
+    """Drops NaN points and, for long series, keeps ROLLING_CHART_MAX_POINTS of them via LTTB."""
+    has_value = ~np.isnan(y)
+    x, y = x[has_value], y[has_value]
+    if len(y) > ROLLING_CHART_MAX_POINTS:
+        kept = lttb_indices(x, y, ROLLING_CHART_MAX_POINTS)
+        x, y = x[kept], y[kept]
+    return x, y
+
+
+#############################################################################
+# Aggregate reporting mode (several journals)
+#############################################################################
+def _aggregate_kpi_table(daily_report):
+    """Table of the overview KPIs: one row per journal and a Combined row."""
+    labels = journals.available_journals()
+    cell = {'padding': '6px 12px', 'textAlign': 'right', 'borderBottom': '1px solid #e0e0e0'}
+    header = html.Tr([html.Th(text, style={**cell, 'textAlign': 'left' if i == 0 else 'right'}) for i, text in enumerate(
+        ["Journal", "Total P&L", "Win Rate", "Trades", "Avg Trades per day", "Avg Win", "Avg Loss"])])
+    rows = [(f"{name} ({labels.get(name, name)})", daily_report['by_journal'][name], {}) for name in daily_report['journals']]
+    rows.append(("Combined", daily_report['combined'], {'fontWeight': 'bold'}))
+    body = []
+    for title, series, style in rows:
+        kpis = cross_journal.summarize(series)
+        pnl_color = '#4CAF50' if kpis['net_pnl'] > 0 else '#F44336' if kpis['net_pnl'] < 0 else '#333333'
+        body.append(html.Tr([
+            html.Td(title, style={**cell, 'textAlign': 'left', **style}),
+            html.Td(f"${kpis['net_pnl']:,.2f}", style={**cell, 'color': pnl_color, **style}),
+            html.Td(f"{kpis['win_rate']:,.2f}%", style={**cell, **style}),
+            html.Td(f"{kpis['trade_count']:,}", style={**cell, **style}),
+            html.Td(f"{kpis['avg_trades_per_day']:,.2f}", style={**cell, **style}),
+            html.Td(f"${kpis['avg_win']:,.2f}", style={**cell, **style}),
+            html.Td(f"${abs(kpis['avg_loss']):,.2f}", style={**cell, **style}), # Display average loss as positive
+        ]))
+    return html.Table([html.Thead(header), html.Tbody(body)], style={'margin': '0 auto', 'borderCollapse': 'collapse'})
+
+
+@timed("figure")
+def _create_aggregate_weekly_chart(weekly_report):
+    """Weekly net P&L: one bar per journal and week, with the combined total as a line."""
+    labels = journals.available_journals()
+    fig = figures.figure()
+    for name in weekly_report['journals']:
+        series = weekly_report['by_journal'][name]
+        figures.add_trace(fig, figures.bar(
+            x=[row['period'] for row in series], y=[row['net_pnl'] for row in series], name=labels.get(name, name),
+            hovertemplate='Week of %{x}: $%{y:,.2f}<extra>%{fullData.name}</extra>'
+        ))
+    combined = weekly_report['combined']
+    figures.add_trace(fig, figures.scatter(
+        x=[row['period'] for row in combined], y=[row['net_pnl'] for row in combined], mode='lines+markers',
+        name='Combined', line=dict(color='#333333'),
+        hovertemplate='Week of %{x}: $%{y:,.2f}<extra>Combined</extra>'
+    ))
+    figures.update_layout(
+        fig,
+        title='Weekly Net P&L',
+        barmode='group',
+        xaxis_title='Week (starting Monday)',
+        yaxis_title='Net P&L ($)',
+        margin=dict(t=40, b=40, l=60, r=20),
+        paper_bgcolor='#ffffff', plot_bgcolor='#ffffff',
+        font={'color': '#333333'},
+        height=350,
+        legend=dict(x=0.01, y=0.99, bgcolor='rgba(255,255,255,0.7)', bordercolor='rgba(0,0,0,0.1)'),
+    )
+    return fig
+
+
+@timed("figure")
+def _create_aggregate_cumulative_chart(daily_report):
+    """Cumulative net P&L by trading day: one line per journal and the combined line."""
+    labels = journals.available_journals()
+    fig = figures.figure()
+    lines = [(labels.get(name, name), daily_report['by_journal'][name], {}) for name in daily_report['journals']]
+    lines.append(('Combined', daily_report['combined'], {'color': '#333333', 'width': 3}))
+    for title, series, line in lines:
+        days = [row['period'] for row in series]
+        cumulative = np.cumsum([row['net_pnl'] for row in series]) if series else []
+        make_trace = figures.scattergl if len(days) > ROLLING_CHART_MAX_POINTS else figures.scatter
+        figures.add_trace(fig, make_trace(
+            x=days, y=cumulative, mode='lines', name=title, line=line,
+            hovertemplate=f'%{{x}}: $%{{y:,.2f}}<extra>{title}</extra>'
+        ))
+    figures.update_layout(
+        fig,
+        title='Cumulative Net P&L',
+        xaxis_title='Trading day',
+        yaxis_title='Cumulative P&L ($)',
+        margin=dict(t=40, b=40, l=60, r=20),
+        paper_bgcolor='#ffffff', plot_bgcolor='#ffffff',
+        font={'color': '#333333'},
+        hovermode='x unified',
+        height=350,
+        legend=dict(x=0.01, y=0.99, bgcolor='rgba(255,255,255,0.7)', bordercolor='rgba(0,0,0,0.1)'),
+    )
+    return fig
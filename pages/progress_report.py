@@ -6,8 +6,6 @@ import dash
 from dash.dependencies import Input, Output, State
 from dash import dcc, html
 import json
-import pandas as pd
-import plotly.graph_objects as go
 from datetime import datetime, timedelta # Added timedelta
 
 # Database access
@@ -15,18 +13,15 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
 import database as db
-
-# Load config
-CONFIG_FILE = 'config.json'
-try:
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.join(script_dir, '..')
-    config_path = os.path.join(project_root, 'config.json')
-    with open(config_path, 'r') as f:
-        config = json.load(f)
-except FileNotFoundError:
-    config = {"daily_risk": 550, "profit_target": 600, "max_trades_per_day": 6, "default_futures_type": "MES", "default_size": 5, "futures_types": {"ES": { "mf": 50 }, "MES": { "mf": 5 }}, "pressing_sequence_multipliers": [1, 2, 1.5, 3], "database_name": "trades.db"}
-
+import figures # Plain-dict figure builder (skips plotly.graph_objects validation)
+from figure_cache import get_figure_cache # Serialized report charts per dataset version and range
+from lazy_imports import lazy_module # pandas is imported on first use, not at app startup
+pd = lazy_module("pandas")
+import rolling_stats # Vectorised rolling profit factor / R-multiple over trading days
+from instrumentation import timed # Chart builders count as figure-build time in the callback metrics
+import background # The full-history recompute runs as a background job
+import app_logging # Level-filtered, queued logging
+log = app_logging.get_logger(__name__)
 
 # Register this page
 dash.register_page(
@@ -37,71 +32,111 @@ dash.register_page(
     description='Track progress on trading behaviors over time.'
 )
 
-# --- Layout for the Progress Report Page ---
-layout = html.Div([
-    html.H2("Trading Behavior Progress Report", style={'textAlign': 'center', 'marginBottom': '20px'}),
-
-    # Date Range Filter for the entire report
-    html.Div([
-        html.Label("Report Date Range:", style={'fontWeight': 'bold', 'marginRight': '10px'}),
-        dcc.DatePickerRange(
-            id='progress-date-range-picker',
-            start_date_placeholder_text="Start Date",
-            end_date_placeholder_text="End Date",
-            display_format='MM-DD-YYYY',
-            month_format='MMMM Y',
-            updatemode='bothdates',
-            style={'marginRight': '15px'}
-        ),
-    ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'marginBottom': '30px', 'width': '100%'}),
-
-    # Line Charts for Weekly % Trends
-    html.Div(style={
-        'display': 'flex', 'flexWrap': 'wrap', 'justifyContent': 'space-around', 'gap': '20px', 'padding': '20px',
-        'backgroundColor': '#ffffff', 'borderRadius': '8px', 'boxShadow': '0 2px 10px rgba(0, 0, 0, 0.08)',
-        'marginBottom': '30px'
-    }, children=[
-        html.Div([
-            html.H3("Trade Origination Progress (Weekly % 'Yes')", style={'textAlign': 'center', 'marginBottom': '10px'}),
-            dcc.Graph(id='trade-origination-progress-chart', config={'displayModeBar': False}, style={'height': '300px', 'width': '100%'})
-        ], style={'flex': '1 1 450px', 'minHeight': '350px', 'padding': '15px', 'boxShadow': '0 2px 5px rgba(0,0,0,0.05)', 'borderRadius': '8px', 'backgroundColor': '#f8f8f8'}),
+# Report range shown until the user picks one (also used when the picker is cleared)
+DEFAULT_RANGE_DAYS = 6 * 30 # Approx 6 months
 
-        html.Div([
-            html.H3("Entry Quality Progress (Weekly % Calm/Patient)", style={'textAlign': 'center', 'marginBottom': '10px'}),
-            dcc.Graph(id='entry-quality-progress-chart', config={'displayModeBar': False}, style={'height': '300px', 'width': '100%'})
-        ], style={'flex': '1 1 450px', 'minHeight': '350px', 'padding': '15px', 'boxShadow': '0 2px 5px rgba(0,0,0,0.05)', 'borderRadius': '8px', 'backgroundColor': '#f8f8f8'}),
+# Figure-cache ids of the report's charts, in the callback's output order
+_PROGRESS_CHART_IDS = (
+    "trade-origination", "entry-quality", "emotional-state", "negative-behaviors",
+    "entry-quality-distribution", "emotional-state-distribution", "rolling-daily-performance",
+)
 
-        html.Div([
-            html.H3("Emotional State Progress (Weekly % Calm/Disciplined)", style={'textAlign': 'center', 'marginBottom': '10px'}),
-            dcc.Graph(id='emotional-state-progress-chart', config={'displayModeBar': False}, style={'height': '300px', 'width': '100%'})
-        ], style={'flex': '1 1 450px', 'minHeight': '350px', 'padding': '15px', 'boxShadow': '0 2px 5px rgba(0,0,0,0.05)', 'borderRadius': '8px', 'backgroundColor': '#f8f8f8'}),
-        
-        # Optional: Negative Trend (Impulsive/FOMO)
-        html.Div([
-            html.H3("Negative Behaviors Trend (Weekly %)", style={'textAlign': 'center', 'marginBottom': '10px'}),
-            dcc.Graph(id='negative-behaviors-trend-chart', config={'displayModeBar': False}, style={'height': '300px', 'width': '100%'})
-        ], style={'flex': '1 1 450px', 'minHeight': '350px', 'padding': '15px', 'boxShadow': '0 2px 5px rgba(0,0,0,0.05)', 'borderRadius': '8px', 'backgroundColor': '#f8f8f8'}),
-    ]),
-
-    # Bar Charts for Percentage Distributions
-    html.Div(style={
-        'display': 'flex', 'flexWrap': 'wrap', 'justifyContent': 'space-around', 'gap': '20px', 'padding': '20px',
-        'backgroundColor': '#ffffff', 'borderRadius': '8px', 'boxShadow': '0 2px 10px rgba(0, 0, 0, 0.08)'
-    }, children=[
-        html.Div([
-            html.H3("Entry Quality Distribution (%)", style={'textAlign': 'center', 'marginBottom': '10px'}),
-            dcc.Graph(id='entry-quality-distribution-chart', config={'displayModeBar': False}, style={'height': '350px', 'width': '100%'})
-        ], style={'flex': '1 1 550px', 'minHeight': '400px', 'padding': '15px', 'boxShadow': '0 2px 5px rgba(0,0,0,0.05)', 'borderRadius': '8px', 'backgroundColor': '#f8f8f8'}),
 
-        html.Div([
-            html.H3("Emotional State Distribution (%)", style={'textAlign': 'center', 'marginBottom': '10px'}),
-            dcc.Graph(id='emotional-state-distribution-chart', config={'displayModeBar': False}, style={'height': '350px', 'width': '100%'})
-        ], style={'flex': '1 1 550px', 'minHeight': '400px', 'padding': '15px', 'boxShadow': '0 2px 5px rgba(0,0,0,0.05)', 'borderRadius': '8px', 'backgroundColor': '#f8f8f8'}),
-    ]),
+def _default_range():
+    end_date = datetime.now().date()
+    return end_date - timedelta(days=DEFAULT_RANGE_DAYS), end_date
 
-    # Hidden interval for initial data load
-    dcc.Interval(id='progress-report-interval', interval=1000, n_intervals=0, max_intervals=1),
-])
+
+# --- Layout for the Progress Report Page ---
+# Built on first navigation (Dash calls layout functions per page load) rather than at app startup.
+# Rendered with the default range's charts already in it when the figure cache has them, so no
+# callback runs until the user picks another range or the trades change. Otherwise it renders empty
+# charts and the browser starts update_progress_report (a background job) at once.
+def layout(**kwargs):
+    start_date, end_date = _default_range()
+    outputs = _cached_progress_report_outputs(start_date.isoformat(), end_date.isoformat())
+    pending = outputs is None
+    if pending:
+        outputs = tuple(figures.figure() for _ in _PROGRESS_CHART_IDS)
+    (trade_origination_fig, entry_quality_fig, emotional_state_fig, negative_behaviors_fig,
+     entry_quality_dist_fig, emotional_state_dist_fig, rolling_daily_fig) = outputs
+    return html.Div([
+        html.H2("Trading Behavior Progress Report", style={'textAlign': 'center', 'marginBottom': '20px'}),
+        background.job_status('progress-report'), # Progress + Cancel while update_progress_report runs
+        background.load_trigger('progress-report', pending), # Computes the charts right after a cache miss
+
+        # Date Range Filter for the entire report
+        html.Div([
+            html.Label("Report Date Range:", style={'fontWeight': 'bold', 'marginRight': '10px'}),
+            dcc.DatePickerRange(
+                id='progress-date-range-picker',
+                start_date_placeholder_text="Start Date",
+                end_date_placeholder_text="End Date",
+                display_format='MM-DD-YYYY',
+                month_format='MMMM Y',
+                updatemode='bothdates',
+                start_date=start_date,
+                end_date=end_date,
+                style={'marginRight': '15px'}
+            ),
+        ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'marginBottom': '30px', 'width': '100%'}),
+
+        # Line Charts for Weekly % Trends
+        html.Div(style={
+            'display': 'flex', 'flexWrap': 'wrap', 'justifyContent': 'space-around', 'gap': '20px', 'padding': '20px',
+            'backgroundColor': '#ffffff', 'borderRadius': '8px', 'boxShadow': '0 2px 10px rgba(0, 0, 0, 0.08)',
+            'marginBottom': '30px'
+        }, children=[
+            html.Div([
+                html.H3("Trade Origination Progress (Weekly % 'Yes')", style={'textAlign': 'center', 'marginBottom': '10px'}),
+                dcc.Graph(id='trade-origination-progress-chart', figure=trade_origination_fig, config={'displayModeBar': False}, style={'height': '300px', 'width': '100%'})
+            ], style={'flex': '1 1 450px', 'minHeight': '350px', 'padding': '15px', 'boxShadow': '0 2px 5px rgba(0,0,0,0.05)', 'borderRadius': '8px', 'backgroundColor': '#f8f8f8'}),
+
+            html.Div([
+                html.H3("Entry Quality Progress (Weekly % Calm/Patient)", style={'textAlign': 'center', 'marginBottom': '10px'}),
+                dcc.Graph(id='entry-quality-progress-chart', figure=entry_quality_fig, config={'displayModeBar': False}, style={'height': '300px', 'width': '100%'})
+            ], style={'flex': '1 1 450px', 'minHeight': '350px', 'padding': '15px', 'boxShadow': '0 2px 5px rgba(0,0,0,0.05)', 'borderRadius': '8px', 'backgroundColor': '#f8f8f8'}),
+
+            html.Div([
+                html.H3("Emotional State Progress (Weekly % Calm/Disciplined)", style={'textAlign': 'center', 'marginBottom': '10px'}),
+                dcc.Graph(id='emotional-state-progress-chart', figure=emotional_state_fig, config={'displayModeBar': False}, style={'height': '300px', 'width': '100%'})
+            ], style={'flex': '1 1 450px', 'minHeight': '350px', 'padding': '15px', 'boxShadow': '0 2px 5px rgba(0,0,0,0.05)', 'borderRadius': '8px', 'backgroundColor': '#f8f8f8'}),
+        
+            # Optional: Negative Trend (Impulsive/FOMO)
+            html.Div([
+                html.H3("Negative Behaviors Trend (Weekly %)", style={'textAlign': 'center', 'marginBottom': '10px'}),
+                dcc.Graph(id='negative-behaviors-trend-chart', figure=negative_behaviors_fig, config={'displayModeBar': False}, style={'height': '300px', 'width': '100%'})
+            ], style={'flex': '1 1 450px', 'minHeight': '350px', 'padding': '15px', 'boxShadow': '0 2px 5px rgba(0,0,0,0.05)', 'borderRadius': '8px', 'backgroundColor': '#f8f8f8'}),
+        ]),
+
+        # Rolling trading-day performance (profit factor / average R-multiple)
+        html.Div(style={
+            'display': 'flex', 'flexWrap': 'wrap', 'justifyContent': 'space-around', 'gap': '20px', 'padding': '20px',
+            'backgroundColor': '#ffffff', 'borderRadius': '8px', 'boxShadow': '0 2px 10px rgba(0, 0, 0, 0.08)',
+            'marginBottom': '30px'
+        }, children=[
+            html.Div([
+                html.H3(f"Performance Trend (Rolling {rolling_stats.DEFAULT_DAY_WINDOW} Trading Days)", style={'textAlign': 'center', 'marginBottom': '10px'}),
+                dcc.Graph(id='rolling-daily-performance-chart', figure=rolling_daily_fig, config={'displayModeBar': False}, style={'height': '350px', 'width': '100%'})
+            ], style={'flex': '1 1 100%', 'minHeight': '400px', 'padding': '15px', 'boxShadow': '0 2px 5px rgba(0,0,0,0.05)', 'borderRadius': '8px', 'backgroundColor': '#f8f8f8'}),
+        ]),
+
+        # Bar Charts for Percentage Distributions
+        html.Div(style={
+            'display': 'flex', 'flexWrap': 'wrap', 'justifyContent': 'space-around', 'gap': '20px', 'padding': '20px',
+            'backgroundColor': '#ffffff', 'borderRadius': '8px', 'boxShadow': '0 2px 10px rgba(0, 0, 0, 0.08)'
+        }, children=[
+            html.Div([
+                html.H3("Entry Quality Distribution (%)", style={'textAlign': 'center', 'marginBottom': '10px'}),
+                dcc.Graph(id='entry-quality-distribution-chart', figure=entry_quality_dist_fig, config={'displayModeBar': False}, style={'height': '350px', 'width': '100%'})
+            ], style={'flex': '1 1 550px', 'minHeight': '400px', 'padding': '15px', 'boxShadow': '0 2px 5px rgba(0,0,0,0.05)', 'borderRadius': '8px', 'backgroundColor': '#f8f8f8'}),
+
+            html.Div([
+                html.H3("Emotional State Distribution (%)", style={'textAlign': 'center', 'marginBottom': '10px'}),
+                dcc.Graph(id='emotional-state-distribution-chart', figure=emotional_state_dist_fig, config={'displayModeBar': False}, style={'height': '350px', 'width': '100%'})
+            ], style={'flex': '1 1 550px', 'minHeight': '400px', 'padding': '15px', 'boxShadow': '0 2px 5px rgba(0,0,0,0.05)', 'borderRadius': '8px', 'backgroundColor': '#f8f8f8'}),
+        ]),
+    ])
 
 # pages/progress_report.py - Add these helper functions after the 'layout' definition
 
@@ -186,33 +221,21 @@ def _calculate_weekly_behavior_trends(df):
 #     ...
 
 # Locate this section in pages/overview.py, inside _create_line_chart_trend function:
+@timed("figure")
 def _create_line_chart_trend(df_weekly, y_col, title, color):
     """Creates a line chart for weekly behavior trends."""
-    fig = go.Figure()
+    fig = figures.figure()
     if not df_weekly.empty:
-        # Debug prints (keep them for now)
-        print(f"DEBUG Trend: Plotting '{title}'")
-        print(f"DEBUG Trend: df_weekly head:\n{df_weekly.head()}")
-        print(f"DEBUG Trend: df_weekly info:")
-        df_weekly.info()
-        print(f"DEBUG Trend: Y-column '{y_col}' data head:\n{df_weekly[y_col].head()}")
-        print(f"DEBUG Trend: Y-column '{y_col}' data dtype: {df_weekly[y_col].dtype}")
-        print(f"DEBUG Trend: X-column 'Week_Start' data head:\n{df_weekly['Week_Start'].head()}")
-        print(f"DEBUG Trend: X-column 'Week_Start' data dtype: {df_weekly['Week_Start'].dtype}")
-
         # NEW: Ensure Week_Start is clean before adding trace
         df_weekly_clean = df_weekly.dropna(subset=['Week_Start']).copy() # Drop any rows where Week_Start is NaT
         
         # If df_weekly_clean becomes empty after dropping NaTs, return an empty figure
         if df_weekly_clean.empty:
-            print(f"DEBUG Trend: df_weekly_clean is empty after dropping NaT from 'Week_Start'. Returning empty figure for '{title}'.")
-            return fig.update_layout(title=f"{title} (No Valid Date Data)")
+            return figures.update_layout(fig, title=f"{title} (No Valid Date Data)")
 
-        # Debug print for clean data
-        print(f"DEBUG Trend: Cleaned df_weekly_clean head (after dropping NaT from Week_Start):\n{df_weekly_clean.head()}")
 
 
-        fig.add_trace(go.Scatter(
+        figures.add_trace(fig, figures.scatter(
             x=df_weekly_clean['Week_Start'], # Use the cleaned DataFrame
             y=df_weekly_clean[y_col],         # Use the cleaned DataFrame
             mode='lines+markers',
@@ -221,7 +244,6 @@ def _create_line_chart_trend(df_weekly, y_col, title, color):
             name=y_col
         ))
     
-    print("before udpate_layout")
     # fig.update_layout(
     #     title=title,
     #     xaxis_title='Week Start Date',
@@ -235,7 +257,8 @@ def _create_line_chart_trend(df_weekly, y_col, title, color):
     #     font={'color': '#333333'},
     #     margin=dict(t=40, b=30, l=40, r=20),
     # )
-    fig.update_layout(
+    figures.update_layout(
+        fig,
         title=title,
         xaxis_title='Week Start Date',
         yaxis_title='Percentage (%)',
@@ -248,8 +271,7 @@ def _create_line_chart_trend(df_weekly, y_col, title, color):
         font={'color': '#333333'},
         margin=dict(t=40, b=30, l=40, r=20),
     )
-    
-    print("after_update layout")
+
     return fig
     
 
@@ -267,14 +289,15 @@ def _calculate_categorical_distributions(df, category_col):
     
     return df_counts.sort_values(by='Percentage', ascending=False)
 
+@timed("figure")
 def _create_bar_chart_distribution(df_distribution, title, color_map=None):
     """Creates a bar chart for categorical distributions."""
-    fig = go.Figure()
+    fig = figures.figure()
     if not df_distribution.empty:
         # Use existing color map or default if not provided
         colors = [color_map.get(cat, '#CCCCCC') for cat in df_distribution['Category']] if color_map else '#3498db'
 
-        fig.add_trace(go.Bar(
+        figures.add_trace(fig, figures.bar(
             x=df_distribution['Category'],
             y=df_distribution['Percentage'],
             marker_color=colors,
@@ -285,7 +308,8 @@ def _create_bar_chart_distribution(df_distribution, title, color_map=None):
             customdata=df_distribution['Count']
         ))
     
-    fig.update_layout(
+    figures.update_layout(
+        fig,
         title=title,
         xaxis_title='Category',
         yaxis_title='Percentage (%)',
@@ -297,6 +321,43 @@ def _create_bar_chart_distribution(df_distribution, title, color_map=None):
     )
     return fig
 
+@timed("figure")
+def _create_rolling_daily_performance_chart(df):
+    """Creates the rolling trading-day profit factor / average R-multiple chart."""
+    fig = figures.figure()
+    if not df.empty:
+        risk = pd.to_numeric(df['Risk ($)'], errors='coerce') if 'Risk ($)' in df.columns else None
+        stats = rolling_stats.rolling_daily_stats(
+            df['Entry Time'], df['Realized P&L'], risk,
+            window_days=rolling_stats.DEFAULT_DAY_WINDOW,
+            min_periods=min(5, rolling_stats.DEFAULT_DAY_WINDOW) # Short date ranges still get a line
+        )
+        figures.add_trace(fig, figures.scatter(
+            x=stats['day'], y=stats['profit_factor'], mode='lines+markers', name='Profit factor',
+            line=dict(color='#3498db'), marker=dict(size=4),
+            hovertemplate='%{y:.2f}<extra>Profit factor</extra>'
+        ))
+        figures.add_trace(fig, figures.scatter(
+            x=stats['day'], y=stats['avg_r'], mode='lines+markers', name='Avg R-multiple', yaxis='y2',
+            line=dict(color='#9b59b6'), marker=dict(size=4),
+            hovertemplate='%{y:.2f}R<extra>Avg R-multiple</extra>'
+        ))
+
+    figures.update_layout(
+        fig,
+        title=f"Profit Factor & Avg R-Multiple (rolling {rolling_stats.DEFAULT_DAY_WINDOW} trading days)" if not df.empty else "No Performance Data",
+        xaxis_title='Trading Day',
+        yaxis={'title': 'Profit factor', 'rangemode': 'tozero'},
+        yaxis2={'title': 'Avg R-multiple', 'overlaying': 'y', 'side': 'right', 'zeroline': True},
+        hovermode='x unified',
+        plot_bgcolor='#f8f8f8',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font={'color': '#333333'},
+        margin=dict(t=40, b=30, l=50, r=50),
+        legend=dict(x=0.01, y=0.99, bgcolor='rgba(255,255,255,0.7)'),
+    )
+    return fig
+
 # pages/progress_report.py - Add this main callback at the very end of the file
 
 
@@ -304,72 +365,109 @@ def _create_bar_chart_distribution(df_distribution, title, color_map=None):
 # Call Back
 ###########################################################################
 
-@dash.callback(
+# Background job (utils/background.py); results are reused per date range until the journal changes
+@background.callback(
     Output('trade-origination-progress-chart', 'figure'),
     Output('entry-quality-progress-chart', 'figure'),
     Output('emotional-state-progress-chart', 'figure'),
     Output('negative-behaviors-trend-chart', 'figure'),
     Output('entry-quality-distribution-chart', 'figure'),
     Output('emotional-state-distribution-chart', 'figure'),
-    Input('progress-report-interval', 'n_intervals'), # Initial load trigger
+    Output('rolling-daily-performance-chart', 'figure'),
     Input('progress-date-range-picker', 'start_date'),
     Input('progress-date-range-picker', 'end_date'),
-    prevent_initial_call=False
+    Input('data-change-event', 'data'), # Trades changed: recompute the displayed range
+    Input('progress-report-load', 'data'), # The layout showed empty charts (see background.load_trigger)
+    prevent_initial_call=True, # The layout renders the default range
+    cache_by_data=True,
+    interval=250,
+    **background.status_kwargs('progress-report'),
 )
-def update_progress_report(n_intervals, start_date, end_date):
-    if n_intervals == 0 and not start_date and not end_date:
-        # On initial load, if no dates are pre-selected, set a default range (e.g., last 6 months)
-        end_date = datetime.now().date()
-        start_date = end_date - timedelta(days=6*30) # Approx 6 months
-        # Note: This default range is only applied if start_date/end_date are None on initial load.
-        # The PickerRange will then update, triggering the callback again with real dates.
-
-    # Fetch all historical data
+def update_progress_report(set_progress, start_date, end_date, change_event, load):
+    if not start_date or not end_date:
+        # Picker cleared: fall back to the default range
+        default_start, default_end = _default_range()
+        start_date, end_date = default_start.isoformat(), default_end.isoformat()
+    return _progress_report_outputs(set_progress, start_date, end_date)
+
+
+background.register_load_trigger('progress-report')
+
+
+def _chart_cache_ids(start_date, end_date):
+    return [f"progress-report/{start_date}/{end_date}/{chart}" for chart in _PROGRESS_CHART_IDS]
+
+
+def _cached_progress_report_outputs(start_date, end_date):
+    """The report's figures from the figure cache, or None unless all are cached for the current trades."""
+    try:
+        db.ensure_db_initialized() # No-op once the startup hook has run
+        figure_cache = get_figure_cache()
+        cached = figure_cache.get_many(figure_cache.current_key_prefix(), _chart_cache_ids(start_date, end_date))
+    except Exception:
+        log.exception("Error reading the cached progress report charts")
+        return None
+    return tuple(cached) if cached is not None else None
+
+
+def _progress_report_outputs(set_progress, start_date, end_date):
+    """The report's figures for start_date..end_date (ISO strings), in the callback's output order."""
+    chart_ids = _chart_cache_ids(start_date, end_date)
+    # Fetch all historical data (unless this range's charts are cached for the current data version)
     try:
-        db.initialize_db()
+        db.ensure_db_initialized() # No-op once the startup hook has run
+        figure_cache = get_figure_cache()
+        cache_key = figure_cache.current_key_prefix() # Taken BEFORE fetching, so a concurrent write can't be missed
+        cached = figure_cache.get_many(cache_key, chart_ids)
+        if cached is not None:
+            return tuple(cached)
+        set_progress("Loading trade history...")
         all_trades = db.fetch_all_trades_from_db()
-    except Exception as e:
-        print(f"Error fetching all historical trades for Progress Report: {e}")
+    except Exception:
+        log.exception("Error fetching the trade history for the progress report")
         # Return empty figures on error
-        return go.Figure(), go.Figure(), go.Figure(), go.Figure(), go.Figure(), go.Figure()
+        return figures.figure(), figures.figure(), figures.figure(), figures.figure(), figures.figure(), figures.figure(), figures.figure()
 
     if not all_trades:
         # Return empty figures if no data
-        return go.Figure().update_layout(title="No Trade Data"), \
-               go.Figure().update_layout(title="No Trade Data"), \
-               go.Figure().update_layout(title="No Trade Data"), \
-               go.Figure().update_layout(title="No Trade Data"), \
-               go.Figure().update_layout(title="No Trade Data"), \
-               go.Figure().update_layout(title="No Trade Data")
+        return figures.figure(title="No Trade Data"), \
+               figures.figure(title="No Trade Data"), \
+               figures.figure(title="No Trade Data"), \
+               figures.figure(title="No Trade Data"), \
+               figures.figure(title="No Trade Data"), \
+               figures.figure(title="No Trade Data"), \
+               figures.figure(title="No Trade Data")
 
     df = pd.DataFrame(all_trades)
     df_processed = _process_data_for_progress_report(df, start_date, end_date)
 
     if df_processed.empty:
-        print("DEBUG Progress Report: DataFrame is empty after date range filtering.")
-        return go.Figure().update_layout(title="No Data for Selected Range"), \
-               go.Figure().update_layout(title="No Data for Selected Range"), \
-               go.Figure().update_layout(title="No Data for Selected Range"), \
-               go.Figure().update_layout(title="No Data for Selected Range"), \
-               go.Figure().update_layout(title="No Data for Selected Range"), \
-               go.Figure().update_layout(title="No Data for Selected Range")
+        log.debug("Progress report: no trades in the selected range")
+        return figures.figure(title="No Data for Selected Range"), \
+               figures.figure(title="No Data for Selected Range"), \
+               figures.figure(title="No Data for Selected Range"), \
+               figures.figure(title="No Data for Selected Range"), \
+               figures.figure(title="No Data for Selected Range"), \
+               figures.figure(title="No Data for Selected Range"), \
+               figures.figure(title="No Data for Selected Range")
 
     # --- Weekly Trend Charts ---
+    set_progress(f"Building charts for {len(df_processed):,} trades...")
     weekly_trends_df = _calculate_weekly_behavior_trends(df_processed)
     
 
     trade_origination_fig = _create_line_chart_trend(weekly_trends_df, '%_Came_Yes', "Trade Origination Progress (Weekly % 'Yes')", '#3498db')
-    print("test2")
 
     entry_quality_fig = _create_line_chart_trend(weekly_trends_df, '%_Calm_Patient', "Entry Quality Progress (Weekly % Calm/Patient)", '#2ecc71')
     emotional_state_fig = _create_line_chart_trend(weekly_trends_df, '%_Calm_Disciplined', "Emotional State Progress (Weekly % Calm/Disciplined)", '#9b59b6')
     
     # Negative Trends
-    negative_behaviors_fig = go.Figure()
+    negative_behaviors_fig = figures.figure()
     if not weekly_trends_df.empty:
-        negative_behaviors_fig.add_trace(go.Scatter(x=weekly_trends_df['Week_Start'], y=weekly_trends_df['%_Impulsive_FOMO'], mode='lines+markers', name='% Impulsive/FOMO', line=dict(color='#e74c3c')))
-        negative_behaviors_fig.add_trace(go.Scatter(x=weekly_trends_df['Week_Start'], y=weekly_trends_df['%_GetBackLosses'], mode='lines+markers', name='% Get Back Losses', line=dict(color='#e67e22')))
-        negative_behaviors_fig.update_layout(
+        figures.add_trace(negative_behaviors_fig, figures.scatter(x=weekly_trends_df['Week_Start'], y=weekly_trends_df['%_Impulsive_FOMO'], mode='lines+markers', name='% Impulsive/FOMO', line=dict(color='#e74c3c')))
+        figures.add_trace(negative_behaviors_fig, figures.scatter(x=weekly_trends_df['Week_Start'], y=weekly_trends_df['%_GetBackLosses'], mode='lines+markers', name='% Get Back Losses', line=dict(color='#e67e22')))
+        figures.update_layout(
+            negative_behaviors_fig,
             title="Negative Behaviors Trend (Weekly %)",
             xaxis_title='Week Start Date',
             yaxis_title='Percentage (%)',
@@ -381,7 +479,7 @@ def update_progress_report(n_intervals, start_date, end_date):
             legend=dict(x=0.01, y=0.99, bgcolor='rgba(255,255,255,0.7)'),
         )
     else:
-        negative_behaviors_fig.update_layout(title="No Negative Behaviors Data")
+        figures.update_layout(negative_behaviors_fig, title="No Negative Behaviors Data")
 
 
     # --- Bar Charts for Percentage Distributions ---
@@ -402,11 +500,19 @@ def update_progress_report(n_intervals, start_date, end_date):
     entry_quality_dist_fig = _create_bar_chart_distribution(entry_quality_dist_df, "Entry Quality Distribution (%)", entry_quality_color_map)
     emotional_state_dist_fig = _create_bar_chart_distribution(emotional_state_dist_df, "Emotional State Distribution (%)", emotional_state_color_map)
 
-    return (
+    # --- Rolling trading-day performance ---
+    rolling_daily_fig = _create_rolling_daily_performance_chart(df_processed)
+
+    outputs = (
         trade_origination_fig,
         entry_quality_fig,
         emotional_state_fig,
         negative_behaviors_fig,
         entry_quality_dist_fig,
-        emotional_state_dist_fig
-    )
\ No newline at end of file
+        emotional_state_dist_fig,
+        rolling_daily_fig
+    )
+    # Serialized copies for the next visit with the same range and data version
+    for chart_id, fig in zip(chart_ids, outputs):
+        figure_cache.put(cache_key, chart_id, fig)
+    return outputs
\ No newline at end of file
@@ -0,0 +1,89 @@
+# serve.py - Runs the app with a production WSGI server
+#
+#   python serve.py [--host 127.0.0.1] [--port 8050] [--workers 2] [--threads 8]
+#                   [--server auto|gunicorn|waitress|werkzeug]
+#
+# Defaults come from config.json "server". 'auto' uses gunicorn where it is installed (several
+# worker processes), else waitress (one process, --threads threads), else Werkzeug's threaded
+# server with a warning. Debug mode and the reloader are never on here; use `python app.py` for
+# development.
+#
+# Each open browser tab holds one request thread with its /events stream (config.json "events"
+# max_streams per process, see change_events.py); the rest serve callbacks. Keep --threads above
+# max_streams, e.g. max_streams + 2 for a couple of concurrent callbacks besides the open tabs.
+
+import argparse
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(PROJECT_ROOT, 'utils'))
+from app_config import get_server_config, get_events_config
+
+
+def _installed(module_name):
+    try:
+        __import__(module_name)
+        return True
+    except ImportError:
+        return False
+
+
+def run_gunicorn(args):
+    # gunicorn is started as its own program so the workers import the app themselves
+    command = [
+        sys.executable, '-m', 'gunicorn', '-c', os.path.join(PROJECT_ROOT, 'gunicorn.conf.py'),
+        '--chdir', PROJECT_ROOT,
+        '--bind', f"{args.host}:{args.port}", '--workers', str(args.workers), '--threads', str(args.threads),
+        'wsgi:server',
+    ]
+    os.execv(sys.executable, command)
+
+
+def run_waitress(args):
+    import waitress
+    from wsgi import server
+    if args.workers > 1:
+        print(f"waitress serves from one process; ignoring --workers {args.workers} (using {args.threads} threads).")
+    waitress.serve(server, host=args.host, port=args.port, threads=args.threads)
+
+
+def run_werkzeug(args):
+    from werkzeug.serving import run_simple
+    from wsgi import server
+    print("Warning: neither gunicorn nor waitress is installed; serving with Werkzeug's threaded server.")
+    run_simple(args.host, args.port, server, threaded=True, use_reloader=False, use_debugger=False)
+
+
+SERVERS = {'gunicorn': run_gunicorn, 'waitress': run_waitress, 'werkzeug': run_werkzeug}
+
+
+def main():
+    settings = get_server_config()
+    parser = argparse.ArgumentParser(description="Serve the trading dashboard with a production WSGI server")
+    parser.add_argument("--host", default=settings['host'])
+    parser.add_argument("--port", type=int, default=settings['port'])
+    parser.add_argument("--workers", type=int, default=settings['workers'], help="Worker processes (gunicorn)")
+    parser.add_argument("--threads", type=int, default=settings['threads'], help="Request threads per process")
+    parser.add_argument("--server", choices=['auto', *SERVERS], default='auto')
+    args = parser.parse_args()
+
+    server = args.server
+    if server == 'auto':
+        if _installed('gunicorn') and os.name != 'nt': # gunicorn doesn't run on Windows
+            server = 'gunicorn'
+        elif _installed('waitress'):
+            server = 'waitress'
+        else:
+            server = 'werkzeug'
+    events = get_events_config()
+    if events['enabled'] and args.threads <= events['max_streams']:
+        print(f"Warning: --threads {args.threads} is not above events max_streams {events['max_streams']}; "
+              f"open tabs can take every request thread.")
+    print(f"Serving on http://{args.host}:{args.port} with {server} "
+          f"({args.workers if server == 'gunicorn' else 1} process(es) x {args.threads} threads)")
+    SERVERS[server](args)
+
+
+if __name__ == '__main__':
+    main()
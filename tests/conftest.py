@@ -0,0 +1,45 @@
+# tests/conftest.py - Shared test setup: import paths and a throwaway journal per test
+#
+# Run from the project root: python -m pytest tests
+
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'utils'))
+
+import pytest
+
+import database as db
+import journals
+from app_config import get_config
+
+
+def close_journal(path):
+    """Closes path's pool and caches, as if the journal had been evicted."""
+    journal = journals.get_registry().peek(path)
+    if journal is not None:
+        journal.close()
+    db.close_pool(path)
+
+
+@pytest.fixture
+def journal(tmp_path):
+    """Makes a new, initialized journal file the configured database for one test; yields its path."""
+    path = str(tmp_path / "journal.db")
+    config = get_config()
+    previous_database = config.get('database_name')
+    config['database_name'] = path # In-memory only; config.json is not written
+    try:
+        db.ensure_db_initialized()
+        yield path
+    finally:
+        close_journal(path)
+        config['database_name'] = previous_database
+
+
+def make_trade(entry_time, pnl, **extra):
+    """A trade dict as the pages save it."""
+    return {"Trade #": 1, "Futures Type": "MES", "Size": 1, "Status": "Win" if pnl > 0 else "Loss",
+            "Realized P&L": pnl, "Entry Time": entry_time, **extra}
@@ -0,0 +1,116 @@
+# tests/test_backups.py - Snapshots: rotation, restore, the .partial -> quick_check -> rename path
+# and the scheduler's claim on a due snapshot
+
+import os
+import sqlite3
+import time
+
+import pytest
+
+import backups
+import database as db
+from app_config import get_config, DEFAULT_BACKUP_CONFIG
+from conftest import make_trade
+
+
+@pytest.fixture
+def backup_dir(journal, tmp_path, monkeypatch):
+    directory = tmp_path / 'backups'
+    monkeypatch.setitem(get_config(), 'backups', {'directory': str(directory), 'keep': 2, 'pages_per_step': 1, 'step_sleep_ms': 0})
+    return directory
+
+
+def _files(db_name):
+    return sorted(os.listdir(backups.snapshot_dir(db_name)))
+
+
+def _entry_times(db_name):
+    conn = sqlite3.connect(db_name)
+    try:
+        return [row[0] for row in conn.execute(f'SELECT "Entry Time" FROM {db.TABLE_NAME} ORDER BY "Entry Time"')]
+    finally:
+        conn.close()
+
+
+def test_backups_are_opt_in():
+    assert DEFAULT_BACKUP_CONFIG['enabled'] is False
+
+
+def test_snapshot_is_checked_and_renamed_into_place(journal, backup_dir):
+    db.save_trade_to_db(make_trade("2024-03-04 10:00:00", 1.0))
+
+    snapshot = backups.create_snapshot(journal)
+
+    assert _files(journal) == [os.path.basename(snapshot['path'])] # No .partial file left
+    assert snapshot['steps'] > 1 # Copied in pages_per_step steps
+    conn = sqlite3.connect(snapshot['path'])
+    try:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'delete' # One self-contained file
+    finally:
+        conn.close()
+    assert _entry_times(snapshot['path']) == ["2024-03-04 10:00:00"]
+
+
+class _FailingQuickCheck(sqlite3.Connection):
+    def execute(self, sql, *args):
+        if sql == "PRAGMA quick_check":
+            return super().execute("SELECT 'row 1 missing from index'")
+        return super().execute(sql, *args)
+
+
+def test_snapshot_failing_quick_check_is_never_renamed(journal, backup_dir, monkeypatch):
+    db.save_trade_to_db(make_trade("2024-03-04 10:00:00", 1.0))
+    connect = sqlite3.connect
+    monkeypatch.setattr(sqlite3, 'connect', lambda *args, **kwargs: connect(*args, factory=_FailingQuickCheck, **kwargs))
+
+    with pytest.raises(sqlite3.DatabaseError, match="quick_check"):
+        backups.create_snapshot(journal)
+
+    assert _files(journal) == [] # Neither a snapshot nor the .partial file
+    assert backups.list_snapshots(journal) == []
+
+
+def test_rotation_keeps_the_newest_snapshots(journal, backup_dir):
+    db.save_trade_to_db(make_trade("2024-03-04 10:00:00", 1.0))
+    paths = []
+    for _ in range(4):
+        paths.append(backups.create_snapshot(journal)['path'])
+        time.sleep(0.05) # Same-second snapshots are ordered by file time, only as fine as the clock tick
+
+    assert [snapshot['path'] for snapshot in backups.list_snapshots(journal)] == paths[:1:-1]
+
+
+def test_restore_snapshot_brings_back_the_snapshot_and_keeps_a_safety_copy(journal, backup_dir):
+    db.save_trade_to_db(make_trade("2024-03-04 10:00:00", 1.0))
+    snapshot = backups.create_snapshot(journal)
+    db.save_trade_to_db(make_trade("2024-03-05 10:00:00", 2.0))
+    assert len(db.fetch_all_trades_from_db()) == 2
+
+    safety = backups.restore_snapshot(snapshot['path'], journal)
+
+    assert [trade['Entry Time'] for trade in db.fetch_all_trades_from_db()] == ["2024-03-04 10:00:00"]
+    assert safety['label'] == 'pre-restore'
+    assert _entry_times(safety['path']) == ["2024-03-04 10:00:00", "2024-03-05 10:00:00"]
+    assert {entry['path'] for entry in backups.list_snapshots(journal)} == {snapshot['path'], safety['path']}
+
+
+def test_due_snapshot_is_taken_once(journal, backup_dir, monkeypatch):
+    monkeypatch.setitem(get_config()['backups'], 'interval_s', 3600)
+
+    assert backups.backup_if_due(journal) is not None
+    assert backups.backup_if_due(journal) is None # Newer than interval_s
+    assert len(backups.list_snapshots(journal)) == 1
+
+
+def test_snapshot_being_written_by_another_process_is_not_duplicated(journal, backup_dir, monkeypatch):
+    monkeypatch.setitem(get_config()['backups'], 'interval_s', 0) # Always due
+    os.makedirs(backups.snapshot_dir(journal))
+    other = os.path.join(backups.snapshot_dir(journal), f"{backups.journal_stem(journal)}-20240304-100000.db.partial")
+    open(other, 'w').close()
+
+    assert backups.backup_if_due(journal) is None
+
+    abandoned = time.time() - backups.PARTIAL_STALE_S - 1
+    os.utime(other, (abandoned, abandoned)) # Left behind by a process that died
+    assert backups.backup_if_due(journal) is not None
+    assert not os.path.exists(other)
@@ -0,0 +1,107 @@
+# tests/test_database_busy.py - retry_on_busy / run_write while another connection holds the write lock
+#
+# The lock is held by a plain sqlite3 connection with BEGIN IMMEDIATE, as another server worker
+# process would. busy_timeout and the retries are shortened so the tests take a fraction of a second.
+
+import contextlib
+import sqlite3
+import threading
+
+import pytest
+
+import database as db
+from app_config import get_config
+from conftest import make_trade
+
+
+@pytest.fixture
+def busy_errors(journal, monkeypatch):
+    """Short busy_timeout/retries on journal; yields the list of busy errors retry_on_busy has seen."""
+    monkeypatch.setitem(get_config(), 'sqlite', {'busy_timeout_ms': 50, 'write_retries': 3})
+    db.close_pool(journal) # Pooled connections keep the busy_timeout they were opened with
+    seen = []
+    is_busy_error = db.is_busy_error
+
+    def counting_is_busy_error(error):
+        busy = is_busy_error(error)
+        if busy:
+            seen.append(error)
+        return busy
+    monkeypatch.setattr(db, 'is_busy_error', counting_is_busy_error)
+    return seen
+
+
+@contextlib.contextmanager
+def _write_locked(path):
+    """Holds path's write lock from a second connection until the block ends or release() is called."""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("BEGIN IMMEDIATE")
+    lock = threading.Lock()
+
+    def release():
+        with lock:
+            if conn.in_transaction:
+                conn.rollback()
+    try:
+        yield release
+    finally:
+        release()
+        conn.close()
+
+
+def _save(trade):
+    return db.run_write(lambda cursor, touched_days: db._insert_trade(cursor, trade, touched_days))
+
+
+def test_run_write_retries_until_the_lock_is_released(journal, busy_errors):
+    with _write_locked(journal) as release:
+        timer = threading.Timer(0.1, release) # Longer than one busy_timeout, shorter than all retries
+        timer.start()
+        trade_id = _save(make_trade("2024-03-04 10:00:00", 1.0))
+        timer.join()
+
+    assert busy_errors # Retried at least once
+    assert [trade['id'] for trade in db.fetch_all_trades_from_db()] == [trade_id]
+
+
+def test_run_write_raises_the_busy_error_after_the_last_retry(journal, busy_errors):
+    with _write_locked(journal):
+        with pytest.raises(sqlite3.OperationalError) as raised:
+            _save(make_trade("2024-03-04 10:00:00", 1.0))
+
+    assert busy_errors[-1] is raised.value
+    assert len(busy_errors) == 1 + 3 # The first attempt and 3 retries
+    assert db.fetch_all_trades_from_db() == [] # Nothing committed
+
+
+def test_retry_on_busy_returns_once_the_lock_is_free(journal, busy_errors):
+    attempts = []
+
+    def take_write_lock(conn):
+        attempts.append(1)
+        conn.execute("BEGIN IMMEDIATE")
+        conn.rollback()
+        return len(attempts)
+
+    conn = db.get_db_connection()
+    try:
+        with _write_locked(journal) as release:
+            timer = threading.Timer(0.1, release)
+            timer.start()
+            assert db.retry_on_busy(take_write_lock, conn) == len(attempts) > 1
+            timer.join()
+    finally:
+        conn.close()
+
+
+def test_retry_on_busy_raises_other_errors_at_once(journal, busy_errors):
+    attempts = []
+
+    def fail():
+        attempts.append(1)
+        raise sqlite3.OperationalError("no such table: missing")
+
+    with pytest.raises(sqlite3.OperationalError, match="no such table"):
+        db.retry_on_busy(fail)
+    assert len(attempts) == 1
+    assert busy_errors == []
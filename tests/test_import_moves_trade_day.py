@@ -0,0 +1,51 @@
+# tests/test_import_moves_trade_day.py - A JSON import that moves a trade to another day
+#
+# The import upserts rows by id. When an existing trade comes back with a different Entry Time,
+# the day it left must be refreshed too: it has to reach equity_dirty_days (equity_series.py)
+# and the trade change log (change_events.py) like the day it moved to.
+#
+# Run from the project root: python -m pytest tests
+
+import base64
+import json
+import sys
+
+import app # Registers the pages
+import background
+import change_events
+import database as db
+from equity_series import get_equity_store
+from conftest import make_trade as _trade
+
+historical_data = sys.modules['pages.historical_data']
+
+
+def _upload(trades):
+    return "data:application/json;base64," + base64.b64encode(json.dumps(trades).encode()).decode()
+
+
+def test_import_moving_a_trade_refreshes_the_day_it_left(journal):
+    get_equity_store().install()
+    change_events.get_change_feed().install()
+
+    trade_id = db.save_trade_to_db(_trade("2024-03-04 10:00:00", 250.0))
+    kept_id = db.save_trade_to_db(_trade("2024-03-05 10:00:00", -50.0))
+    series = get_equity_store().get_equity_series()
+    assert [row['day'] for row in series] == ["2024-03-04", "2024-03-05"]
+    with db.connection() as conn:
+        last_seq = conn.execute(f"SELECT MAX(seq) FROM {change_events.CHANGE_LOG_TABLE}").fetchone()[0]
+
+    # Same id, moved from March 4th to March 6th
+    contents = _upload([_trade("2024-03-06 11:00:00", 250.0, id=trade_id)])
+    historical_data.import_trades_json(background.no_progress, contents, "trades.json")
+
+    series = get_equity_store().get_equity_series()
+    assert [(row['day'], row['net_pnl']) for row in series] == [("2024-03-05", -50.0), ("2024-03-06", 250.0)]
+    assert series[-1]['cum_pnl'] == 200.0
+    with db.connection() as conn:
+        logged_days = {row[0] for row in conn.execute(
+            f"SELECT day FROM {change_events.CHANGE_LOG_TABLE} WHERE seq > ?", (last_seq,)
+        )}
+        ids = [row[0] for row in conn.execute(f"SELECT id FROM {db.TABLE_NAME} ORDER BY id")]
+    assert {"2024-03-04", "2024-03-06"} <= logged_days
+    assert ids == sorted([trade_id, kept_id]) # Updated in place, not re-inserted
@@ -0,0 +1,123 @@
+# tests/test_journals.py - Per-journal isolation, journal selection and closing idle journals
+
+import os
+import time
+from datetime import date
+
+import flask
+import pytest
+
+import database as db
+import journals
+from app_config import get_config
+from figure_cache import get_figure_cache
+from trade_cache import get_trade_cache
+from conftest import make_trade, close_journal
+
+DAY = date(2024, 3, 4)
+
+
+@pytest.fixture
+def two_journals(journal, tmp_path, monkeypatch):
+    """(default journal, second journal), both available and initialized."""
+    other = str(tmp_path / "other.db")
+    monkeypatch.setitem(get_config(), 'journals', {'available': {journal: "Live", other: "Test"}, 'max_open': 4,
+                                                   'idle_close_s': 900, 'pool_size': 4})
+    with db.use_database(other):
+        journals.get_registry().get(other).ensure_initialized()
+    try:
+        yield journal, other
+    finally:
+        close_journal(other)
+
+
+def _database_file(conn):
+    return conn.execute("PRAGMA database_list").fetchone()[2]
+
+
+def test_journals_have_their_own_pools_and_caches(two_journals):
+    first, second = two_journals
+    for name, pnl in ((first, 1.0), (second, 2.0)):
+        with db.use_database(name):
+            db.save_trade_to_db(make_trade("2024-03-04 10:00:00", pnl))
+            get_figure_cache().put(get_figure_cache().current_key_prefix(), "chart", name)
+
+    with db.use_database(first):
+        first_caches = get_trade_cache(), get_figure_cache()
+        first_pnls = [row['Realized P&L'] for row in get_trade_cache().get_trades(DAY)]
+        with db.connection() as conn:
+            first_file = _database_file(conn)
+        first_figure = get_figure_cache().get(get_figure_cache().current_key_prefix(), "chart")
+    with db.use_database(second):
+        second_caches = get_trade_cache(), get_figure_cache()
+        second_pnls = [row['Realized P&L'] for row in get_trade_cache().get_trades(DAY)]
+        with db.connection() as conn:
+            second_file = _database_file(conn)
+        second_figure = get_figure_cache().get(get_figure_cache().current_key_prefix(), "chart")
+
+    assert first_caches[0] is not second_caches[0] and first_caches[1] is not second_caches[1]
+    assert (first_pnls, second_pnls) == ([1.0], [2.0])
+    assert (first_figure, second_figure) == (first, second)
+    assert (os.path.realpath(first_file), os.path.realpath(second_file)) == (os.path.realpath(first), os.path.realpath(second))
+
+
+def test_only_available_journals_are_accepted(two_journals, tmp_path):
+    first, second = two_journals
+    unknown = str(tmp_path / "unknown.db")
+
+    assert journals.resolve(second) == second
+    assert journals.resolve(unknown) == first
+    assert journals.resolve("../trades.db") == first
+    assert journals.resolve(None) == first
+
+
+@pytest.mark.parametrize("header", ["unknown.db", "../other.db"])
+def test_request_with_an_unconfigured_journal_uses_the_default(two_journals, tmp_path, header):
+    first, _ = two_journals
+    server = flask.Flask(__name__)
+    with server.test_request_context(headers={journals.JOURNAL_HEADER: str(tmp_path / header)}):
+        journals.select_request_journal()
+        try:
+            assert db.get_database_info()[0] == first
+        finally:
+            journals._reset_request_journal()
+    assert not os.path.exists(tmp_path / header) # Never opened
+
+
+def _open(registry, name):
+    """Opens name in registry with a day cache and a pooled connection, as a request would."""
+    with db.use_database(name):
+        journal = registry.get(name)
+        journal.cache("trade_days", dict)
+        with db.connection():
+            pass
+    return journal
+
+
+def test_least_recently_used_journal_is_closed_beyond_max_open(two_journals, monkeypatch):
+    first, second = two_journals
+    monkeypatch.setitem(get_config()['journals'], 'max_open', 1)
+    registry = journals.JournalRegistry()
+    evicted = _open(registry, first)
+    assert first in db.pool_names()
+
+    _open(registry, second)
+
+    assert registry.open_names() == [second]
+    assert evicted.peek_cache("trade_days") is None
+    assert first not in db.pool_names()
+    assert second in db.pool_names()
+
+
+def test_idle_journal_is_closed(two_journals, monkeypatch):
+    first, second = two_journals
+    monkeypatch.setitem(get_config()['journals'], 'idle_close_s', 0.01)
+    registry = journals.JournalRegistry()
+    idle = _open(registry, first)
+    time.sleep(0.05)
+
+    _open(registry, second)
+
+    assert registry.open_names() == [second]
+    assert idle.peek_cache("trade_days") is None
+    assert first not in db.pool_names()
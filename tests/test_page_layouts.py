@@ -0,0 +1,107 @@
+# tests/test_page_layouts.py - Page layouts render from the figure cache and never compute
+#
+# Overview, Progress Report and History put their data in the layout only when the figure cache
+# has it for the current trades. On a miss they render placeholders and a load trigger
+# (background.load_trigger) that starts the page's callback; either way the layout request must
+# not query SQLite or run pandas.
+
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+import app # Registers the pages
+import background
+import database as db
+from conftest import make_trade
+
+overview = sys.modules['pages.overview']
+progress_report = sys.modules['pages.progress_report']
+historical_data = sys.modules['pages.historical_data']
+
+# Inside the Progress Report's default range, whose charts are only cached when it has trades
+DAYS = [(datetime.now() - timedelta(days=ago)).strftime("%Y-%m-%d") for ago in (3, 2, 1)]
+
+PAGES = [(overview, 'overview'), (progress_report, 'progress-report'), (historical_data, 'historical')]
+
+
+class _Forbidden:
+    """Stands in for pandas; any use of it fails the test."""
+
+    def __getattr__(self, attr):
+        raise AssertionError(f"the layout ran pandas ({attr})")
+
+
+def _forbidden_connection(*args, **kwargs):
+    raise AssertionError("the layout queried SQLite")
+
+
+@pytest.fixture
+def trades(journal):
+    for day, pnl in zip(DAYS, (250.0, -50.0, 120.0)):
+        db.save_trade_to_db(make_trade(f"{day} 10:00:00", pnl, **{
+            "Trade came to me": "Yes", "Emotional State": "Calm", "Entry Quality": "A",
+        }))
+    return journal
+
+
+def _warm_figure_cache():
+    """Runs what the pages' callbacks run, which fills the figure cache for the current trades."""
+    overview._overview_outputs(background.no_progress)
+    start_date, end_date = progress_report._default_range()
+    progress_report._progress_report_outputs(background.no_progress, start_date.isoformat(), end_date.isoformat())
+    historical_data._load_all_trades()
+
+
+def _render(page, monkeypatch):
+    """page.layout() with every SQLite connection and pandas call failing the test."""
+    with monkeypatch.context() as patch:
+        patch.setattr(db, 'connection', _forbidden_connection)
+        patch.setattr(db, '_connect', _forbidden_connection)
+        patch.setattr(page, 'pd', _Forbidden())
+        return page.layout()
+
+
+def _props(layout, component_id):
+    """The props of the component with component_id in the layout tree."""
+    def walk(node):
+        if isinstance(node, (list, tuple)):
+            for child in node:
+                found = walk(child)
+                if found is not None:
+                    return found
+        elif hasattr(node, 'to_plotly_json'):
+            props = node.to_plotly_json()['props']
+            if props.get('id') == component_id:
+                return props
+            return walk(props.get('children'))
+        return None
+    props = walk(layout)
+    assert props is not None, f"no component '{component_id}' in the layout"
+    return props
+
+
+@pytest.mark.parametrize("page,prefix", PAGES)
+def test_layout_on_a_cache_miss_renders_placeholders_and_starts_the_callback(trades, monkeypatch, page, prefix):
+    layout = _render(page, monkeypatch)
+    assert _props(layout, f'{prefix}-load-pending')['data'] is True
+
+
+@pytest.mark.parametrize("page,prefix", PAGES)
+def test_layout_on_a_warm_cache_renders_the_cached_output(trades, monkeypatch, page, prefix):
+    _warm_figure_cache()
+    layout = _render(page, monkeypatch)
+    assert _props(layout, f'{prefix}-load-pending')['data'] is False
+
+
+def test_overview_layout_shows_the_cached_kpis(trades, monkeypatch):
+    _warm_figure_cache()
+    layout = _render(overview, monkeypatch)
+    assert _props(layout, 'total-pnl-value')['children'] != "..."
+
+
+def test_history_layout_sends_the_cached_rows(trades, monkeypatch):
+    _warm_figure_cache()
+    layout = _render(historical_data, monkeypatch)
+    rows = _props(layout, 'historical-trades-table')['data']
+    assert [row['Entry Time'][:10] for row in rows] == DAYS[::-1]
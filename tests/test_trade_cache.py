@@ -0,0 +1,59 @@
+# tests/test_trade_cache.py - Day cache invalidation across this process's and other processes' writes
+
+import sqlite3
+import time
+from datetime import date
+
+import database as db
+from trade_cache import get_trade_cache
+from conftest import make_trade
+
+DAY = date(2024, 3, 4)
+OTHER_DAY = "2024-03-20 10:00:00" # Outside the days a lookup of DAY warms
+
+
+def _pnls(rows):
+    return [row['Realized P&L'] for row in rows]
+
+
+def _write_from_another_process(path, sql, params):
+    time.sleep(0.05) # File times are only as fine as the kernel's clock tick
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute(sql, params)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_own_write_keeps_the_other_cached_days(journal):
+    db.save_trade_to_db(make_trade("2024-03-04 10:00:00", 1.0))
+    cache = get_trade_cache()
+    assert _pnls(cache.get_trades(DAY)) == [1.0]
+    misses = cache.misses
+
+    db.save_trade_to_db(make_trade(OTHER_DAY, 5.0))
+
+    assert _pnls(cache.get_trades(DAY)) == [1.0]
+    assert cache.misses == misses # Still cached
+
+
+def test_own_write_after_a_foreign_write_drops_the_stale_days(journal):
+    trade_id = db.save_trade_to_db(make_trade("2024-03-04 10:00:00", 1.0))
+    cache = get_trade_cache()
+    assert _pnls(cache.get_trades(DAY)) == [1.0]
+
+    _write_from_another_process(journal, f'UPDATE {db.TABLE_NAME} SET "Realized P&L" = ? WHERE id = ?', (999.0, trade_id))
+    db.save_trade_to_db(make_trade(OTHER_DAY, 5.0)) # This process's write on a different day
+
+    assert _pnls(cache.get_trades(DAY)) == [999.0]
+
+
+def test_foreign_write_alone_drops_the_cached_days(journal):
+    trade_id = db.save_trade_to_db(make_trade("2024-03-04 10:00:00", 1.0))
+    cache = get_trade_cache()
+    assert _pnls(cache.get_trades(DAY)) == [1.0]
+
+    _write_from_another_process(journal, f'UPDATE {db.TABLE_NAME} SET "Realized P&L" = ? WHERE id = ?', (7.0, trade_id))
+
+    assert _pnls(cache.get_trades(DAY)) == [7.0]
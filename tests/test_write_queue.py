@@ -0,0 +1,136 @@
+# tests/test_write_queue.py - WriteBehindQueue: merged edits, ordering, per-op fallback, flush/close
+#
+# Tests that need several writes in one batch queue them while holding the queue's condition
+# (an RLock, so this thread can still submit): the writer thread can't pick anything up meanwhile.
+
+import sqlite3
+
+import pytest
+
+import database as db
+from write_queue import WriteBehindQueue
+from conftest import make_trade, close_journal
+
+
+@pytest.fixture
+def queue(journal):
+    write_queue = WriteBehindQueue()
+    yield write_queue
+    write_queue.close()
+
+
+def _row(trade_id, database=None):
+    conn = sqlite3.connect(database or db.get_database_info()[0])
+    conn.row_factory = sqlite3.Row
+    try:
+        row = conn.execute(f"SELECT * FROM {db.TABLE_NAME} WHERE id = ?", (trade_id,)).fetchone()
+        return dict(row) if row else None
+    finally:
+        conn.close()
+
+
+def test_edits_to_the_same_trade_merge_into_one_update(queue):
+    trade_id = queue.insert(make_trade("2024-03-04 10:00:00", 1.0)).result()
+
+    with queue._cond:
+        first = queue.update(trade_id, {"Realized P&L": 5.0, "Size": 2})
+        second = queue.update(trade_id, {"Size": 3})
+        assert queue.pending_count() == 1
+
+    assert second is first
+    assert first.result() is True
+    row = _row(trade_id)
+    assert (row["Realized P&L"], row["Size"]) == (5.0, 3) # Later values win
+
+
+def test_edits_to_the_same_id_in_another_journal_stay_separate(queue, tmp_path):
+    other = str(tmp_path / "other.db")
+    with db.use_database(other):
+        db.ensure_db_initialized()
+        other_id = db.save_trade_to_db(make_trade("2024-03-04 10:00:00", 1.0))
+    trade_id = db.save_trade_to_db(make_trade("2024-03-04 10:00:00", 1.0))
+    assert trade_id == other_id
+    try:
+        with queue._cond:
+            here = queue.update(trade_id, {"Realized P&L": 5.0})
+            with db.use_database(other):
+                there = queue.update(trade_id, {"Realized P&L": 7.0})
+
+        assert here is not there
+        assert here.result() is True and there.result() is True
+        assert _row(trade_id)["Realized P&L"] == 5.0
+        assert _row(trade_id, other)["Realized P&L"] == 7.0
+    finally:
+        close_journal(other)
+
+
+def test_writes_are_applied_in_submission_order(queue):
+    trade_id = queue.insert(make_trade("2024-03-04 10:00:00", 1.0)).result()
+
+    with queue._cond:
+        inserted = queue.insert(make_trade("2024-03-05 10:00:00", 2.0))
+        updated = queue.update(trade_id, {"Realized P&L": 5.0})
+        deleted = queue.delete(trade_id)
+        updated_after_delete = queue.update(trade_id, {"Realized P&L": 9.0}) # Must not merge into the first update
+
+    assert updated_after_delete is not updated
+    assert updated.result() is True
+    assert deleted.result() is True
+    assert updated_after_delete.result() is False # The row was gone by then
+    assert _row(trade_id) is None
+    assert _row(inserted.result())["Realized P&L"] == 2.0
+
+
+def test_failing_update_in_a_run_only_fails_itself(queue):
+    ids = [queue.insert(make_trade(f"2024-03-0{day} 10:00:00", 1.0)).result() for day in (4, 5, 6)]
+    conn = sqlite3.connect(db.get_database_info()[0])
+    conn.execute(f"""CREATE TRIGGER reject_negative BEFORE UPDATE ON {db.TABLE_NAME}
+                     WHEN NEW."Realized P&L" < 0 BEGIN SELECT RAISE(ABORT, 'rejected'); END""")
+    conn.commit()
+    conn.close()
+
+    with queue._cond: # One run of three updates: the bulk executemany fails on the second
+        futures = [queue.update(ids[0], {"Realized P&L": 10.0}),
+                   queue.update(ids[1], {"Realized P&L": -10.0}),
+                   queue.update(ids[2], {"Realized P&L": 30.0})]
+
+    assert futures[0].result() is True
+    with pytest.raises(sqlite3.IntegrityError, match="rejected"):
+        futures[1].result()
+    assert futures[2].result() is True
+    assert [_row(trade_id)["Realized P&L"] for trade_id in ids] == [10.0, 1.0, 30.0]
+
+
+def test_flush_waits_for_the_queued_writes(queue):
+    futures = [queue.insert(make_trade("2024-03-04 10:00:00", float(pnl))) for pnl in range(5)]
+
+    assert queue.flush(timeout=5) is True
+
+    assert queue.pending_count() == 0
+    assert all(future.done() for future in futures)
+    assert len(db.fetch_all_trades_from_db()) == 5
+
+
+def test_flush_times_out_while_the_journal_is_locked(queue):
+    blocker = sqlite3.connect(db.get_database_info()[0])
+    blocker.execute("BEGIN IMMEDIATE") # Another process holding the write lock
+    try:
+        future = queue.insert(make_trade("2024-03-04 10:00:00", 1.0))
+        assert queue.flush(timeout=0.05) is False
+    finally:
+        blocker.rollback()
+        blocker.close()
+    assert queue.flush(timeout=10) is True
+    assert future.result() is not None
+
+
+def test_close_commits_the_pending_writes_and_refuses_new_ones(queue):
+    futures = [queue.insert(make_trade("2024-03-04 10:00:00", float(pnl))) for pnl in range(3)]
+
+    queue.close()
+    queue.close() # Idempotent
+
+    assert all(future.done() and future.exception() is None for future in futures)
+    assert len(db.fetch_all_trades_from_db()) == 3
+    with pytest.raises(RuntimeError):
+        queue.insert(make_trade("2024-03-05 10:00:00", 1.0))
@@ -0,0 +1,169 @@
+# utils/app_config.py - Single, lazily loaded copy of config.json
+#
+# config.json used to be parsed by every page module (and utils/database.py) at import time.
+# It is now read once, on first use, and shared. Pages keep using `config['daily_risk']` etc.
+# through the `config` proxy below; the Settings page calls reload_config() after saving.
+
+import json
+import logging
+import os
+import threading
+from collections.abc import Mapping
+
+# config.json lives in the project root (one level up from 'utils')
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config.json')
+
+# Defaults used when config.json is missing
+DEFAULT_CONFIG = {
+    "daily_risk": 550,
+    "profit_target": 600,
+    "max_trades_per_day": 6,
+    "default_futures_type": "MES",
+    "default_size": 5,
+    "futures_types": {"ES": { "mf": 50 }, "MES": { "mf": 5 }},
+    "pressing_sequence_multipliers": [1, 2, 1.5, 3],
+    "database_name": "trades.db"
+}
+
+# Production server settings (config.json "server"); see serve.py and gunicorn.conf.py
+DEFAULT_SERVER_CONFIG = {
+    "host": "127.0.0.1",
+    "port": 8050,
+    "workers": 2, # Processes (gunicorn only; waitress serves from one process)
+    "threads": 8, # Request threads per process; open /events streams each hold one (see "events" max_streams)
+}
+
+# SQLite connection settings (config.json "sqlite"); see database.get_db_connection and run_write
+DEFAULT_SQLITE_CONFIG = {
+    "journal_mode": "wal", # Readers and the writer don't block each other; 'delete' for network drives
+    "busy_timeout_ms": 5000, # How long a statement waits for another process's lock
+    "write_retries": 5, # Whole-transaction retries (with backoff) once busy_timeout runs out
+}
+
+# Live change notifications (config.json "events"); see change_events.py and assets/change_events.js
+DEFAULT_EVENTS_CONFIG = {
+    "enabled": True,
+    "max_streams": 6, # Open /events streams (browser tabs) per process; each holds a server thread, keep it below "threads"
+    "poll_interval_s": 1.0, # How often the change log is checked for other processes' writes
+    "min_event_interval_s": 0.5, # Writes within this window are sent as one event
+    "heartbeat_s": 15, # Keep-alive comment on an idle stream
+    "max_stream_s": 300, # Streams are closed after this long; the browser reconnects
+    "retry_ms": 3000, # Reconnect delay the browser is told to use
+}
+
+# Journals a browser tab can switch to (config.json "journals"); see journals.py. config.json
+# "database_name" is the journal of tabs that haven't picked one and is always available.
+DEFAULT_JOURNALS_CONFIG = {
+    "available": {"trades.db": "Live Data", "sandbox_trades.db": "Test Data"}, # File -> label
+    "max_open": 4, # Journals kept open per process (connection pool + caches); least recently used closed first
+    "idle_close_s": 900, # A journal without requests for this long is closed
+    "pool_size": 4, # Idle connections kept per journal
+}
+
+# Monthly archive partitions (config.json "archive"); see trade_archive.py
+DEFAULT_ARCHIVE_CONFIG = {
+    "enabled": False, # Opt-in: roll closed months out of trades_journal in the background (Settings page)
+    "hot_months": 2, # Months kept in trades_journal, the current one included
+    "check_interval_s": 3600, # How often a journal in use is checked for months to roll
+}
+
+# Online snapshots (config.json "backups"); see backups.py and backup.py
+DEFAULT_BACKUP_CONFIG = {
+    "enabled": False, # Opt-in: snapshot the available journals in the background (Settings page)
+    "directory": "backups", # Snapshots of trades.db go to backups/trades/
+    "interval_s": 86400, # A journal is snapshotted when its newest snapshot is older than this
+    "keep": 7, # Snapshots kept per journal; older ones are deleted
+    "pages_per_step": 256, # Pages copied per backup step (-1: the whole file in one step)
+    "step_sleep_ms": 5, # Pause between steps
+}
+
+_config = None
+_config_lock = threading.Lock()
+
+
+def load_config():
+    """Reads config.json from disk (no caching). Falls back to DEFAULT_CONFIG if it is missing."""
+    try:
+        with open(CONFIG_PATH, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        # Not app_logging.get_logger: app_logging imports this module
+        logging.getLogger("trades.app_config").warning("config.json not found at %s, using default settings", CONFIG_PATH)
+        return dict(DEFAULT_CONFIG)
+
+
+def get_config():
+    """Returns the shared config dict, reading config.json on first use only."""
+    global _config
+    if _config is None:
+        with _config_lock:
+            if _config is None:
+                _config = load_config()
+    return _config
+
+
+def get_server_config():
+    """config.json's "server" section on top of DEFAULT_SERVER_CONFIG."""
+    return {**DEFAULT_SERVER_CONFIG, **(get_config().get("server") or {})}
+
+
+def get_sqlite_config():
+    """config.json's "sqlite" section on top of DEFAULT_SQLITE_CONFIG."""
+    return {**DEFAULT_SQLITE_CONFIG, **(get_config().get("sqlite") or {})}
+
+
+def get_events_config():
+    """config.json's "events" section on top of DEFAULT_EVENTS_CONFIG."""
+    return {**DEFAULT_EVENTS_CONFIG, **(get_config().get("events") or {})}
+
+
+def get_journals_config():
+    """config.json's "journals" section on top of DEFAULT_JOURNALS_CONFIG."""
+    return {**DEFAULT_JOURNALS_CONFIG, **(get_config().get("journals") or {})}
+
+
+def get_archive_config():
+    """config.json's "archive" section on top of DEFAULT_ARCHIVE_CONFIG."""
+    return {**DEFAULT_ARCHIVE_CONFIG, **(get_config().get("archive") or {})}
+
+
+def get_backup_config():
+    """config.json's "backups" section on top of DEFAULT_BACKUP_CONFIG."""
+    return {**DEFAULT_BACKUP_CONFIG, **(get_config().get("backups") or {})}
+
+
+def reload_config():
+    """Re-reads config.json (e.g. after the Settings page saved it) and returns the new config."""
+    global _config
+    with _config_lock:
+        _config = load_config()
+    return _config
+
+
+def save_config(new_config):
+    """Writes new_config to config.json and makes it the shared config."""
+    global _config
+    with _config_lock:
+        with open(CONFIG_PATH, 'w') as f:
+            json.dump(new_config, f, indent=2)
+        _config = new_config
+
+
+class _LazyConfig(Mapping):
+    """Read-only dict-like view of get_config(); nothing is read until a key is accessed."""
+
+    def __getitem__(self, key):
+        return get_config()[key]
+
+    def __iter__(self):
+        return iter(get_config())
+
+    def __len__(self):
+        return len(get_config())
+
+    def __repr__(self):
+        return f"_LazyConfig({get_config()!r})"
+
+
+# Import this in page modules instead of parsing config.json at import time
+config = _LazyConfig()
@@ -0,0 +1,162 @@
+# utils/app_logging.py - Structured, non-blocking logging for the app
+#
+# Replaces print() diagnostics in the hot paths. Loggers live under the 'trades' namespace:
+#
+#   log = app_logging.get_logger(__name__)
+#   log.info("Trade %s saved", trade_no, extra=app_logging.fields(trade_id=new_id))
+#
+# - Level filtering happens first: a disabled log call costs one level check. Messages use
+#   %-style arguments and context fields may be lazy(func, ...) values, so nothing is formatted
+#   or computed unless the record is actually emitted.
+# - Records are handed to a QueueHandler; a QueueListener thread formats them and writes to
+#   stderr, so request threads never block on console I/O.
+# - Every emitted record carries the current database name ('db') and its context fields. Output
+#   is one JSON object per line, or plain text (config.json "log_format": "text").
+#
+# configure_logging() is called from app.py's startup hook with config.json's "log_level"
+# (default INFO) and "log_format" (default json). Before that, only warnings and errors are
+# shown (Python's default last-resort handler).
+
+import atexit
+import datetime
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+
+from app_config import get_config
+
+ROOT_LOGGER_NAME = "trades"
+DEFAULT_LEVEL = "INFO"
+DEFAULT_FORMAT = "json"
+
+_listener = None
+_configure_lock = threading.Lock()
+
+
+############################################################################
+# Public API
+############################################################################
+def get_logger(name):
+    """Logger under the app's namespace, e.g. get_logger(__name__) -> 'trades.database'."""
+    name = name.rsplit('.', 1)[-1] # 'pages.daily_helper' -> 'daily_helper'
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+
+def fields(**context):
+    """Context fields for a log call's extra=... (values may be lazy(...))."""
+    return {"context": context}
+
+
+class lazy:
+    """A context field value computed only if the record is emitted: lazy(func, *args)."""
+
+    __slots__ = ("func", "args")
+
+    def __init__(self, func, *args):
+        self.func = func
+        self.args = args
+
+    def __call__(self):
+        return self.func(*self.args)
+
+
+def configure_logging(level=None, fmt=None):
+    """
+    Routes the 'trades' loggers through a queue to a background writer thread. level/fmt default
+    to config.json's "log_level"/"log_format". Safe to call again (e.g. after a config change).
+    """
+    global _listener
+    config = get_config()
+    level = (level or config.get("log_level") or DEFAULT_LEVEL).upper()
+    fmt = fmt or config.get("log_format") or DEFAULT_FORMAT
+
+    with _configure_lock:
+        root = logging.getLogger(ROOT_LOGGER_NAME)
+        if _listener is not None:
+            _listener.stop() # Flushes what is already queued
+            for handler in list(root.handlers):
+                root.removeHandler(handler)
+
+        output = logging.StreamHandler(sys.stderr)
+        output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+        log_queue = queue.SimpleQueue()
+        queue_handler = _ContextQueueHandler(log_queue)
+        _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=False)
+        _listener.start()
+
+        root.addHandler(queue_handler)
+        root.setLevel(level)
+        root.propagate = False # The console output comes from the listener only
+
+
+############################################################################
+# Handlers and formatters
+############################################################################
+class _ContextQueueHandler(logging.handlers.QueueHandler):
+    """
+    Runs in the calling thread, for emitted records only: merges the message with its arguments,
+    resolves lazy context fields and stamps the database name, then enqueues the record.
+    """
+
+    def prepare(self, record):
+        context = getattr(record, "context", None) or {}
+        record.context = {
+            key: (value() if isinstance(value, lazy) else value) for key, value in context.items()
+        }
+        record.db = _current_database() # The journal of the request/job that logged it
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.message = record.getMessage()
+        # Like QueueHandler.prepare: the listener thread only needs plain, already merged values
+        record.msg, record.args, record.exc_info = record.message, None, None
+        return record
+
+
+def _current_database():
+    import database # Not at the top: database logs through this module
+    return database.get_database_info()[0]
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, msg, db, thread, context fields, exc."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "db": getattr(record, "db", None),
+            "thread": record.threadName,
+        }
+        entry.update(getattr(record, "context", None) or {})
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Readable single-line output with the context fields appended as key=value."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s [%(db)s] %(message)s")
+
+    def format(self, record):
+        if not hasattr(record, "db"):
+            record.db = "-"
+        text = super().format(record)
+        context = getattr(record, "context", None)
+        if context:
+            text += " " + " ".join(f"{key}={value}" for key, value in context.items())
+        return text
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop() # Writes out everything still queued
+
+
+atexit.register(_stop_listener)
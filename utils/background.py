@@ -0,0 +1,223 @@
+# utils/background.py - Background (out-of-request) execution of long callbacks
+#
+# Imports of big JSON files and the full-history analytics used to run inside the request, tying
+# up a server thread/worker until they finished. background.callback() registers them as Dash
+# background callbacks instead: the request only starts a job (a forked process, managed by Dash's
+# DiskcacheManager) and returns at once; the browser then polls for progress and the result.
+# - No broker: job results, progress and cancel bookkeeping live in a diskcache directory
+#   (CACHE_DIR), which every server worker on the machine shares
+# - progress=[...] outputs are updated through the set_progress function the callback receives as
+#   its first argument; cancel=[...] inputs kill the running job; running=[...] sets properties
+#   (e.g. disabled=True on the Upload/Refresh buttons) while it runs
+# - cache_by_data=True: the result is also kept for later calls with the same inputs while the
+#   journal file is unchanged (keyed on its modification times, so writes by any process count),
+#   so repeat visits and other workers get it without recomputing
+# - Page layouts only show what is already cached. When they can't, they render placeholders with
+#   a load_trigger(): the browser then starts the page's callback once, right after rendering
+#
+# The background extras (pip install "dash[diskcache]": diskcache, multiprocess, psutil) are
+# optional. Without them callback() registers an ordinary callback: it runs in the request as
+# before, set_progress does nothing and the cancel inputs are ignored; running=[...] still works.
+#
+# Jobs are NOT forked from the server process (DiskcacheManager's default): a fork copies the
+# SQLite lock state of whatever the other request threads were doing, and the job can then wait
+# forever on a lock nobody in it will release. They are forked by a forkserver instead, a clean
+# single-threaded process that has imported the app once (started by app.py's startup hook, where
+# the platform has one; elsewhere the default start method is used).
+#
+# A job works on the journal of the request that started it (journals.py): the request's current
+# database is handed to the job process with its arguments.
+
+import functools
+import os
+import sys
+
+import dash
+from dash import dcc, html
+from dash.dependencies import Input, Output, ClientsideFunction
+
+import database as db
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache', 'background')
+DEFAULT_INTERVAL_MS = 500 # How often the browser polls a running job
+DATA_CACHE_EXPIRE_S = 24 * 3600 # cache_by_data results unused this long are dropped
+
+STATUS_DEFAULT_TEXT = "Working..." # Until the job's first set_progress (and always without the extras)
+HIDDEN = {'display': 'none'}
+STATUS_STYLE = {'display': 'flex', 'alignItems': 'center', 'justifyContent': 'center', 'gap': '10px',
+                'marginBottom': '15px', 'color': '#555'}
+
+try:
+    import diskcache
+    from dash import DiskcacheManager
+    import multiprocess
+    import psutil
+except ImportError:
+    diskcache = None
+else:
+    class _ForkserverDiskcacheManager(DiskcacheManager):
+        """DiskcacheManager starting its jobs from the forkserver (see the top of this file)."""
+
+        def call_job_fn(self, key, job_fn, args, context):
+            # Only the function's registry key goes to the job, which looks the function up in its
+            # own (identical) registry: pickling it would drag its page module's globals along
+            function_key = next(k for k, fn in self.func_registry.items() if fn is job_fn)
+            process = _job_context().Process(
+                target=_run_job,
+                args=(function_key, key, self._make_progress_key(key), args, context, db.get_database_info()[0]),
+            )
+            process.start()
+            return process.pid
+
+        # The forkserver reaps finished jobs at once, so a job's pid can vanish halfway through
+        # these psutil calls (with jobs forked from the server it stays around as a zombie)
+        def terminate_job(self, job):
+            try:
+                super().terminate_job(job)
+            except psutil.NoSuchProcess:
+                pass
+
+        def job_running(self, job):
+            try:
+                return super().job_running(job)
+            except psutil.NoSuchProcess:
+                return False
+
+
+def _run_job(function_key, result_key, progress_key, args, context, database):
+    """Entry point of a job process: runs the registered job function on the requesting tab's journal."""
+    job_manager, _ = get_background_managers()
+    with db.use_database(database):
+        job_manager.func_registry[function_key](result_key, progress_key, args, context)
+
+
+_context = None
+
+
+def _job_context():
+    global _context
+    if _context is None:
+        if "forkserver" in multiprocess.get_all_start_methods():
+            _context = multiprocess.get_context("forkserver")
+            # The jobs' functions are pickled by reference to their page modules, which can only
+            # be imported once the Dash app exists: the forkserver imports the app's module first
+            _context.set_forkserver_preload(["app" if "app" in sys.modules else "__main__"])
+        else:
+            _context = multiprocess.get_context()
+    return _context
+
+
+def _data_version():
+    # Journal name + file modification times: unlike get_data_version()'s write counter, the
+    # same in every worker process and in the forked jobs
+    return db.get_database_info()[0], db.get_data_version()[1:]
+
+
+# --- Shared managers (created on first use; page modules create them at import time) ---
+_job_manager = None
+_data_manager = None
+
+
+def get_background_managers():
+    """(jobs manager, data-cached manager), or (None, None) if the diskcache extras are missing."""
+    global _job_manager, _data_manager
+    if diskcache is None:
+        return None, None
+    if _job_manager is None:
+        # Pages are imported during dash.Dash() (before any thread serves requests): no lock needed
+        cache = diskcache.Cache(CACHE_DIR)
+        _job_manager = _ForkserverDiskcacheManager(cache)
+        _data_manager = _ForkserverDiskcacheManager(cache, cache_by=[_data_version], expire=DATA_CACHE_EXPIRE_S)
+    return _job_manager, _data_manager
+
+
+def start_job_server():
+    """Starts the forkserver now (it imports the app: 1-2 s) rather than with the first job."""
+    if diskcache is not None and _job_context().get_start_method() == "forkserver":
+        from multiprocess import forkserver
+        forkserver.ensure_running() # Returns once started; the app import continues in the server
+
+
+def is_available():
+    """True if callbacks registered with callback() run as background jobs."""
+    return diskcache is not None
+
+
+def callback(*args, progress=None, progress_default=None, cancel=None, running=None,
+             cache_by_data=False, interval=DEFAULT_INTERVAL_MS, **kwargs):
+    """
+    dash.callback(...) running the function as a background job. With progress=..., the function
+    gets a set_progress(value) function as its first argument (a no-op without the extras); direct
+    calls pass one too (e.g. no_progress). Returns the function undecorated, like dash.callback.
+    """
+    job_manager, data_manager = get_background_managers()
+    if job_manager is not None:
+        return dash.callback(
+            *args, background=True, manager=data_manager if cache_by_data else job_manager,
+            progress=progress, progress_default=progress_default, cancel=cancel, running=running,
+            interval=interval, **kwargs,
+        )
+
+    register = dash.callback(*args, running=running, **kwargs)
+    if progress is None:
+        return register
+
+    def decorator(func):
+        @functools.wraps(func)
+        def in_request(*callback_args, **callback_kwargs):
+            return func(no_progress, *callback_args, **callback_kwargs)
+        register(in_request)
+        # Like dash.callback (and the background path above): direct callers get func itself,
+        # so it takes set_progress first whether or not the extras are installed
+        return func
+    return decorator
+
+
+def no_progress(*values):
+    """set_progress that does nothing (callbacks run in the request, or called directly)."""
+
+
+############################################################################
+# Job status line (progress text + Cancel button) for the analytics pages
+############################################################################
+def job_status(prefix):
+    """Layout: '<prefix>-status' line, hidden except while the job of status_kwargs(prefix) runs."""
+    children = [html.Span(STATUS_DEFAULT_TEXT, id=f'{prefix}-status-text')]
+    if is_available(): # In-request callbacks can't be cancelled
+        children.append(html.Button("Cancel", id=f'{prefix}-cancel-button', n_clicks=0, className='dash-button'))
+    return html.Div(id=f'{prefix}-status', style=HIDDEN, children=children)
+
+
+def status_kwargs(prefix):
+    """callback() arguments wiring a job_status(prefix) line: progress text, cancel, visibility."""
+    kwargs = {
+        "progress": Output(f'{prefix}-status-text', 'children'),
+        "progress_default": STATUS_DEFAULT_TEXT,
+        "running": [(Output(f'{prefix}-status', 'style'), STATUS_STYLE, HIDDEN)],
+    }
+    if is_available():
+        kwargs["cancel"] = [Input(f'{prefix}-cancel-button', 'n_clicks')]
+    return kwargs
+
+
+############################################################################
+# First computation of a page whose layout found nothing cached
+############################################################################
+def load_trigger(prefix, pending):
+    """
+    Layout: '<prefix>-load' store, set once by the browser right after the page renders if pending
+    (the layout had to show placeholders). The page's callback takes Input(f'{prefix}-load', 'data').
+    """
+    return html.Div([
+        dcc.Store(id=f'{prefix}-load-pending', data=pending),
+        dcc.Store(id=f'{prefix}-load', data=None),
+    ])
+
+
+def register_load_trigger(prefix):
+    """Registers the clientside callback behind load_trigger(prefix); call once, at page import."""
+    dash.clientside_callback(
+        ClientsideFunction(namespace='background', function_name='load_if_pending'),
+        Output(f'{prefix}-load', 'data'),
+        Input(f'{prefix}-load-pending', 'data'),
+    )
@@ -0,0 +1,362 @@
+# utils/backups.py - Online snapshots of the journals (SQLite backup API), rotation and restore
+#
+# Export to JSON used to be the only copy of a journal, and it reads every trade into memory.
+# A snapshot is instead a page-for-page copy of the journal file made with the SQLite online
+# backup API (sqlite3.Connection.backup) while the app keeps running:
+#
+# - The copy runs in steps of config.json "backups" pages_per_step pages with a step_sleep_ms
+#   pause between steps, so a snapshot never monopolizes the disk (or the GIL: a step runs in
+#   SQLite without it).
+# - In WAL mode (the default, see database.py) the source connection holds one read transaction
+#   for the whole copy. Every step copies from the same point in time, writers keep committing
+#   to the -wal file meanwhile and are never blocked; only checkpoints wait for the snapshot to
+#   finish. Without that transaction, every write from another connection restarts the copy from
+#   the first page and a throttled snapshot of a busy journal never completes.
+# - In rollback-journal mode ('delete') a read transaction would block every writer for the whole
+#   copy, so the file is copied in one step instead (writers wait for that step, up to busy_timeout).
+# - The copy is written to a .partial file, switched to journal_mode DELETE (one self-contained
+#   file), checked with PRAGMA quick_check and only then renamed into place.
+#
+# Snapshots of a journal go to <directory>/<journal file name without .db>/, named after the
+# local time they were taken (trades-20261019-153000.db); the newest "keep" are kept.
+# Scheduled snapshots are opt-in (config.json "backups" enabled, or the Settings page): one thread
+# per server process, started by app.py's startup tasks, snapshots every available journal whose
+# newest snapshot is older than interval_s (start_scheduler / backup_if_due). Several worker
+# processes may run that thread; a snapshot is claimed under the journal's write lock, so only
+# one of them takes it.
+#
+# restore_snapshot() copies a snapshot back over a journal, online too: it first snapshots the
+# journal as it is (label 'pre-restore'), then copies the snapshot in one step under the write
+# lock, so readers see the old or the restored journal, never a mix. A full-refresh change event
+# is logged for the pages open on it (change_events.py). See backup.py for the command line.
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import database as db
+import change_events
+from app_config import get_backup_config
+from instrumentation import timed
+from app_logging import get_logger
+
+SNAPSHOT_SUFFIX = '.db'
+PARTIAL_SUFFIX = '.partial' # A snapshot being written
+PARTIAL_STALE_S = 3600 # A .partial file untouched this long was left behind by a process that died
+_TIME_FORMAT = '%Y%m%d-%H%M%S'
+# <journal>-<YYYYmmdd-HHMMSS>[-<n>][-<label>].db
+_SNAPSHOT_RE = re.compile(r'^(?P<journal>.+)-(?P<time>\d{8}-\d{6})(?:-(?P<n>\d+))?(?:-(?P<label>[a-z][a-z-]*))?\.db$')
+
+log = get_logger(__name__)
+
+
+def journal_stem(db_name):
+    """'trades' for 'trades.db' (or 'data/trades.db'): the journal's snapshot directory and file prefix."""
+    stem, ext = os.path.splitext(os.path.basename(db_name))
+    return stem if ext == SNAPSHOT_SUFFIX else os.path.basename(db_name)
+
+
+def snapshot_dir(db_name):
+    """Directory holding db_name's snapshots."""
+    return os.path.join(get_backup_config()['directory'], journal_stem(db_name))
+
+
+def list_snapshots(db_name=None):
+    """
+    db_name's snapshots (default: the current database), newest first, as dicts with
+    'path', 'taken_at' (datetime, local time), 'label' (None or e.g. 'pre-restore') and 'bytes'.
+    """
+    db_name = db_name or db.get_database_info()[0]
+    directory, stem = snapshot_dir(db_name), journal_stem(db_name)
+    try:
+        file_names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    snapshots = []
+    for file_name in file_names:
+        match = _SNAPSHOT_RE.match(file_name)
+        if not match or match['journal'] != stem:
+            continue # .partial files of a snapshot being written, or anything else
+        path = os.path.join(directory, file_name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue # Rotated away meanwhile
+        snapshots.append((stat.st_mtime_ns, {
+            'path': path,
+            'taken_at': datetime.strptime(match['time'], _TIME_FORMAT),
+            'label': match['label'],
+            'bytes': stat.st_size,
+        }))
+    # Names only have seconds: snapshots taken within the same one are ordered by write time
+    snapshots.sort(key=lambda item: (item[1]['taken_at'], item[0]), reverse=True)
+    return [snapshot for _, snapshot in snapshots]
+
+
+def find_snapshot(db_name=None, at=None):
+    """db_name's newest snapshot taken at or before at (a datetime; None = the newest), or None."""
+    for snapshot in list_snapshots(db_name):
+        if at is None or snapshot['taken_at'] <= at:
+            return snapshot
+    return None
+
+
+def _new_snapshot_path(db_name, label=None):
+    directory, stem = snapshot_dir(db_name), journal_stem(db_name)
+    base = f"{stem}-{datetime.now().strftime(_TIME_FORMAT)}"
+    suffix = f"-{label}{SNAPSHOT_SUFFIX}" if label else SNAPSHOT_SUFFIX
+    path = os.path.join(directory, base + suffix)
+    n = 0
+    while os.path.exists(path) or os.path.exists(path + PARTIAL_SUFFIX): # Several snapshots within one second
+        n += 1
+        path = os.path.join(directory, f"{base}-{n}{suffix}")
+    return path
+
+
+############################################################################
+# Snapshots
+############################################################################
+@timed("db")
+def create_snapshot(db_name=None, label=None, rotate=True):
+    """
+    Copies db_name (default: the current database) into a new snapshot, online, and deletes the
+    snapshots beyond config.json "backups" keep (unless rotate is False). Returns the new
+    snapshot's list_snapshots() entry plus 'pages', 'steps' and 'seconds'.
+    """
+    db_name = db_name or db.get_database_info()[0]
+    if not os.path.exists(db_name):
+        raise FileNotFoundError(f"Journal '{db_name}' does not exist")
+    os.makedirs(snapshot_dir(db_name), exist_ok=True)
+    return _write_snapshot(db_name, _new_snapshot_path(db_name, label), label, rotate)
+
+
+def _write_snapshot(db_name, path, label=None, rotate=True):
+    settings = get_backup_config()
+    partial_path = path + PARTIAL_SUFFIX
+    progress = {'steps': 0, 'pages': 0}
+    started = time.perf_counter()
+
+    source = db._connect(db_name) # Same busy_timeout (and profiling) as the app's connections
+    target = sqlite3.connect(partial_path)
+    try:
+        wal = source.execute("PRAGMA journal_mode").fetchone()[0].lower() == 'wal'
+        if wal:
+            # Pin one point in time: later commits by other connections don't restart the copy
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        pages_per_step = int(settings['pages_per_step']) if wal else -1
+        step_sleep = max(0.0, float(settings['step_sleep_ms']) / 1000)
+
+        def on_step(status, remaining, total):
+            progress['steps'] += 1
+            progress['pages'] = total
+            if remaining and step_sleep:
+                time.sleep(step_sleep)
+
+        source.backup(target, pages=pages_per_step, progress=on_step)
+        if source.in_transaction:
+            source.rollback()
+        target.execute("PRAGMA journal_mode = DELETE") # No -wal file next to the snapshot
+        check = target.execute("PRAGMA quick_check").fetchone()[0]
+        if check != 'ok':
+            raise sqlite3.DatabaseError(f"Snapshot of '{db_name}' failed quick_check: {check}")
+        target.close()
+        os.replace(partial_path, path)
+    except BaseException:
+        target.close()
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    finally:
+        source.close()
+
+    seconds = time.perf_counter() - started
+    snapshot = {
+        'path': path,
+        'taken_at': datetime.strptime(_SNAPSHOT_RE.match(os.path.basename(path))['time'], _TIME_FORMAT),
+        'label': label,
+        'bytes': os.path.getsize(path),
+        'pages': progress['pages'],
+        'steps': progress['steps'],
+        'seconds': seconds,
+    }
+    log.info("Snapshot of '%s' written to %s (%.1f MB in %d steps, %.2f s)",
+             db_name, path, snapshot['bytes'] / 1e6, progress['steps'], seconds)
+    if rotate:
+        rotate_snapshots(db_name)
+    return snapshot
+
+
+def rotate_snapshots(db_name=None):
+    """Deletes db_name's snapshots beyond the newest config.json "backups" keep; returns their paths."""
+    keep = max(1, int(get_backup_config()['keep']))
+    deleted = []
+    for snapshot in list_snapshots(db_name)[keep:]:
+        try:
+            os.remove(snapshot['path'])
+            deleted.append(snapshot['path'])
+        except FileNotFoundError:
+            pass # Another process rotated it first
+    return deleted
+
+
+############################################################################
+# Restore
+############################################################################
+def _check_snapshot(path):
+    """Raises if path isn't an intact journal snapshot."""
+    conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+    try:
+        check = conn.execute("PRAGMA quick_check").fetchone()[0]
+        if check != 'ok':
+            raise sqlite3.DatabaseError(f"Snapshot {path} failed quick_check: {check}")
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (db.TABLE_NAME,)).fetchone() is None:
+            raise sqlite3.DatabaseError(f"{path} has no {db.TABLE_NAME} table")
+    finally:
+        conn.close()
+
+
+def _last_change_seq(conn):
+    try:
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (change_events.CHANGE_LOG_TABLE,)).fetchone()
+    except sqlite3.OperationalError: # No AUTOINCREMENT table at all: no change log
+        return 0
+    return row[0] if row else 0
+
+
+def _log_restore(conn, last_seq):
+    # The snapshot's change log is behind the one the open pages have followed: number on from
+    # the pre-restore seq and log a full refresh (day NULL), so every open page reloads
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                    (change_events.CHANGE_LOG_TABLE,)).fetchone() is None:
+        return
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        updated = conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?",
+                               (last_seq, change_events.CHANGE_LOG_TABLE)).rowcount
+        if not updated:
+            conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (change_events.CHANGE_LOG_TABLE, last_seq))
+        conn.execute(f"INSERT INTO {change_events.CHANGE_LOG_TABLE} (day) VALUES (NULL)")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+@timed("db")
+def restore_snapshot(path, db_name=None):
+    """
+    Replaces db_name's contents (default: the current database) with the snapshot at path, online.
+    The journal is snapshotted first (label 'pre-restore'). Returns that safety snapshot's entry,
+    or None if db_name didn't exist yet.
+    """
+    db_name = db_name or db.get_database_info()[0]
+    _check_snapshot(path)
+    # Not rotated yet: rotation could delete the (oldest) snapshot being restored
+    safety = create_snapshot(db_name, label='pre-restore', rotate=False) if os.path.exists(db_name) else None
+
+    source = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+    live = db._connect(db_name)
+    try:
+        last_seq = _last_change_seq(live)
+        # One step: the write lock is held while the pages are copied, so no reader sees a mix
+        source.backup(live)
+        db.retry_on_busy(_log_restore, live, last_seq)
+    finally:
+        live.close()
+        source.close()
+
+    with db.use_database(db_name):
+        db.close_pool(db_name) # Idle connections still cache the old schema and pages
+        db._notify_write(None) # This process's caches: the whole journal changed
+    rotate_snapshots(db_name)
+    log.info("Restored '%s' from %s", db_name, path)
+    return safety
+
+
+############################################################################
+# Scheduling
+############################################################################
+# Snapshots are taken on one daemon thread per server process, never from a request. The thread
+# re-reads the setting on every round, so switching it on takes effect within CHECK_INTERVAL_S.
+CHECK_INTERVAL_S = 60
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def start_scheduler(journal_names):
+    """
+    Starts (once per process) the thread that snapshots every journal in journal_names() (a
+    callable, e.g. journals.available_journals) when one is due, while backups are enabled.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = threading.Thread(target=_run_scheduler, args=(journal_names,), name="backups", daemon=True)
+            _scheduler.start()
+
+
+def _run_scheduler(journal_names):
+    while True:
+        settings = get_backup_config()
+        if settings['enabled']:
+            for db_name in journal_names():
+                if not os.path.exists(db_name): # Nobody has opened it yet: nothing to snapshot
+                    continue
+                try:
+                    backup_if_due(db_name)
+                except Exception:
+                    log.exception("Snapshot of '%s' failed", db_name)
+        time.sleep(max(1.0, min(float(settings['interval_s']), CHECK_INTERVAL_S)))
+
+
+def backup_if_due(db_name):
+    """
+    Snapshots db_name unless its newest snapshot is younger than config.json "backups" interval_s
+    or another process is writing one. Returns the new snapshot's entry, or None.
+    """
+    os.makedirs(snapshot_dir(db_name), exist_ok=True)
+    path = db.retry_on_busy(_claim_snapshot, db_name)
+    return _write_snapshot(db_name, path) if path is not None else None
+
+
+def _claim_snapshot(db_name):
+    """The path of a due snapshot of db_name, claimed by creating its .partial file; None if none is due."""
+    # Under the journal's write lock, so the processes checking at the same time take turns and
+    # each one sees the snapshot (or .partial file) of the one before it
+    conn = db._connect(db_name)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if not _snapshot_due(db_name):
+                return None
+            path = _new_snapshot_path(db_name)
+            open(path + PARTIAL_SUFFIX, 'x').close()
+            return path
+        finally:
+            conn.rollback()
+    finally:
+        conn.close()
+
+
+def _snapshot_due(db_name):
+    newest = find_snapshot(db_name)
+    if newest is not None and 0 <= (datetime.now() - newest['taken_at']).total_seconds() < float(get_backup_config()['interval_s']):
+        return False
+    directory, prefix = snapshot_dir(db_name), journal_stem(db_name) + '-'
+    in_progress = False
+    for file_name in os.listdir(directory):
+        if not (file_name.startswith(prefix) and file_name.endswith(SNAPSHOT_SUFFIX + PARTIAL_SUFFIX)):
+            continue
+        path = os.path.join(directory, file_name)
+        try:
+            if time.time() - os.path.getmtime(path) < PARTIAL_STALE_S:
+                in_progress = True # Being written (every copy step touches it)
+            else:
+                os.remove(path)
+        except FileNotFoundError:
+            pass # Finished or cleaned up meanwhile
+    return not in_progress
@@ -0,0 +1,305 @@
+# utils/change_events.py - Push notifications to the browser when trades change
+#
+# Pages used to load their data once (a one-shot dcc.Interval) and never noticed trades written
+# from another tab, another window or a background import. This module tells them:
+#
+# - trade_change_log: one row per changed trading day, appended by triggers on trades_journal
+#   inside the writer's own transaction (like equity_series' dirty days), so every writer is seen:
+#   this process, the other server workers, background jobs, a DB browser. The triggers prune the
+#   log as it grows; only the last CHANGE_LOG_KEEP changes are kept.
+# - ChangeFeed: one watcher thread per process reads new log rows (an indexed seq > ? query) of
+#   every journal someone is subscribed to, and hands each of that journal's subscribers an event
+#   {"seq", "db", "days"}. It polls every poll_interval_s and is woken at once by this process's
+#   own writes (database write listener). Events are coalesced: at most one per
+#   min_event_interval_s, so a 10,000-row import becomes a handful of events.
+#   "days" lists the changed 'YYYY-MM-DD' days, or is None when unknown (a trade without an
+#   Entry Time, too many days, the client missed changes): refresh all.
+# - /events (register_events_endpoint): Server-Sent Events stream of those events, with keep-alive
+#   comments. assets/change_events.js puts each event into the 'data-change-event' store of
+#   app.layout, which Overview, Calendar, Progress Report, Equity and
+#   History use as a callback input.
+#
+# Each open stream holds one server thread for as long as the tab is open (WSGI has no way to park
+# it), so streams are capped per process (config.json "events" max_streams, kept below the server's
+# threads; see the thread budget in serve.py and gunicorn.conf.py); further tabs get 503 and retry later. Streams end after max_stream_s and the browser
+# reconnects (with Last-Event-ID, so changes made in between are not lost).
+
+import json
+import queue
+import threading
+import time
+
+import database as db
+from app_config import get_events_config
+from instrumentation import timed
+from app_logging import get_logger
+
+CHANGE_LOG_TABLE = 'trade_change_log'
+CHANGE_LOG_KEEP = 10000 # Log rows kept; pruned by the insert trigger every CHANGE_LOG_PRUNE_EVERY rows
+CHANGE_LOG_PRUNE_EVERY = 1000
+MAX_EVENT_DAYS = 366 # More changed days than this in one event: sent as days=None (reload everything)
+SUBSCRIBER_QUEUE_SIZE = 100 # Events a slow client may fall behind by before it is told to reload
+
+log = get_logger(__name__)
+
+
+def _trigger_day_sql(ref):
+    """Trading day of the NEW/OLD row inside a trigger body (NULL without an Entry Time)."""
+    return f"NULLIF(substr({ref}.\"Entry Time\", 1, 10), '')"
+
+
+class _Subscriber:
+    """One open /events stream: its journal and a bounded queue of events for it."""
+
+    def __init__(self, database):
+        self.database = database
+        self.events = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def put(self, event):
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            # The client stopped reading for a while: replace the backlog by a full refresh
+            with self.events.mutex:
+                self.events.queue.clear()
+            self.events.put_nowait({**event, "days": None})
+
+    def get(self, timeout):
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class ChangeFeed:
+    """Watches the subscribed journals' trade_change_log and fans changes out to their subscribers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock) # Signaled by local writes and new subscribers
+        self._subscribers = set()
+        self._installed = set() # Database names whose table/triggers this process has ensured
+        self._thread = None
+        self._pending_write = False
+        self._last_seq = {} # Database name -> last log seq the watcher has seen there
+
+    @timed("db")
+    def install(self):
+        """Creates the change log and its triggers in the current database (idempotent)."""
+        conn = db.get_db_connection()
+        try:
+            db.retry_on_busy(self._ensure_tables, conn) # Other processes may hold the write lock
+        finally:
+            conn.close()
+
+    def subscribe(self, database):
+        """
+        Returns a new subscriber to database's changes, or None if config.json "events"
+        max_streams are already open (on all journals together).
+        """
+        with self._lock:
+            if len(self._subscribers) >= get_events_config()["max_streams"]:
+                return None
+            subscriber = _Subscriber(database)
+            self._subscribers.add(subscriber)
+            if self._thread is None:
+                db.add_write_listener(self._on_write)
+                self._thread = threading.Thread(target=self._watch, name="change-feed", daemon=True)
+                self._thread.start()
+            self._wake.notify_all()
+            return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def current_seq(self, database):
+        """database's last change seq as seen by the watcher, or None before it has polled database."""
+        with self._lock:
+            return self._last_seq.get(database)
+
+    # --- Internals ---
+
+    def _on_write(self, db_name, days, version_before):
+        # Database write listener: runs in the writing thread right after its commit
+        with self._lock:
+            self._pending_write = True
+            self._wake.notify_all()
+
+    def _watch(self):
+        settings = get_events_config()
+        last_event = 0.0
+        while True:
+            with self._lock:
+                while not self._subscribers:
+                    self._wake.wait() # Nobody listening: don't touch the database
+                if not self._pending_write:
+                    self._wake.wait(settings["poll_interval_s"])
+                self._pending_write = False
+                databases = {subscriber.database for subscriber in self._subscribers}
+            # Coalesce bursts of writes (imports, multi-row pastes) into one event
+            time.sleep(max(0.0, last_event + settings["min_event_interval_s"] - time.monotonic()))
+            for db_name in sorted(databases):
+                try:
+                    with db.use_database(db_name), db.connection() as conn:
+                        if db_name not in self._last_seq:
+                            self._start_following(conn, db_name)
+                            continue
+                        event = self._read_changes(conn, db_name)
+                except Exception:
+                    log.exception("Error reading the trade change log of '%s'", db_name)
+                    continue
+                if event is not None:
+                    self._publish(event)
+                    last_event = time.monotonic()
+
+    def _start_following(self, conn, db_name):
+        # First subscriber to a journal in this process: changes count from now on
+        if db_name not in self._installed:
+            db.retry_on_busy(self._ensure_tables, conn)
+        row = conn.execute(f"SELECT MAX(seq) AS seq FROM {CHANGE_LOG_TABLE}").fetchone()
+        with self._lock:
+            self._last_seq[db_name] = row['seq'] or 0
+
+    @timed("db")
+    def _read_changes(self, conn, db_name):
+        last_seq = self._last_seq[db_name]
+        rows = conn.execute(
+            f"SELECT seq, day FROM {CHANGE_LOG_TABLE} WHERE seq > ? ORDER BY seq ASC", (last_seq,)
+        ).fetchall()
+        if not rows:
+            return None
+        days = set()
+        # A gap at the start means the triggers pruned changes we never read
+        complete = rows[0]['seq'] == last_seq + 1
+        for row in rows:
+            if row['day'] is None:
+                complete = False
+            days.add(row['day'])
+        with self._lock:
+            self._last_seq[db_name] = rows[-1]['seq']
+        if not complete or len(days) > MAX_EVENT_DAYS:
+            days = None
+        return {"seq": rows[-1]['seq'], "db": db_name, "days": sorted(days) if days is not None else None}
+
+    def _publish(self, event):
+        with self._lock:
+            subscribers = [s for s in self._subscribers if s.database == event["db"]]
+        for subscriber in subscribers:
+            subscriber.put(event)
+
+    def _ensure_tables(self, conn):
+        db_name = db.get_database_info()[0]
+        if db_name in self._installed:
+            return
+        try:
+            self._create_tables(conn)
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        self._installed.add(db_name)
+
+    @staticmethod
+    def _create_tables(conn):
+        # One transaction under the write lock, so worker processes starting together don't race
+        conn.executescript(f"""
+        BEGIN IMMEDIATE;
+        CREATE TABLE IF NOT EXISTS {CHANGE_LOG_TABLE} (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            day TEXT
+        );
+
+        CREATE TRIGGER IF NOT EXISTS {db.TABLE_NAME}_changes_insert AFTER INSERT ON {db.TABLE_NAME}
+        BEGIN
+            INSERT INTO {CHANGE_LOG_TABLE} (day) VALUES ({_trigger_day_sql('NEW')});
+        END;
+        CREATE TRIGGER IF NOT EXISTS {db.TABLE_NAME}_changes_delete AFTER DELETE ON {db.TABLE_NAME}
+        BEGIN
+            INSERT INTO {CHANGE_LOG_TABLE} (day) VALUES ({_trigger_day_sql('OLD')});
+        END;
+        CREATE TRIGGER IF NOT EXISTS {db.TABLE_NAME}_changes_update AFTER UPDATE ON {db.TABLE_NAME}
+        BEGIN
+            INSERT INTO {CHANGE_LOG_TABLE} (day) VALUES ({_trigger_day_sql('OLD')});
+            INSERT INTO {CHANGE_LOG_TABLE} (day) SELECT {_trigger_day_sql('NEW')}
+                WHERE {_trigger_day_sql('NEW')} IS NOT {_trigger_day_sql('OLD')};
+        END;
+        CREATE TRIGGER IF NOT EXISTS {CHANGE_LOG_TABLE}_prune AFTER INSERT ON {CHANGE_LOG_TABLE}
+        WHEN NEW.seq % {CHANGE_LOG_PRUNE_EVERY} = 0
+        BEGIN
+            DELETE FROM {CHANGE_LOG_TABLE} WHERE seq <= NEW.seq - {CHANGE_LOG_KEEP};
+        END;
+        COMMIT;
+        """)
+
+
+############################################################################
+# Server-Sent Events endpoint
+############################################################################
+def register_events_endpoint(server, path="/events"):
+    """Serves the change feed as a text/event-stream at path (see the top of this file)."""
+    import flask
+
+    def events_endpoint():
+        settings = get_events_config()
+        if not settings["enabled"]:
+            return flask.Response(status=204) # EventSource stops reconnecting on 204
+        feed = get_change_feed()
+        database = db.get_database_info()[0] # The tab's journal (?journal=, see journals.py)
+        subscriber = feed.subscribe(database)
+        if subscriber is None:
+            return flask.Response("Too many open event streams", status=503, mimetype="text/plain",
+                                  headers={"Retry-After": str(settings["retry_ms"] // 1000)})
+        last_event_id = flask.request.headers.get("Last-Event-ID")
+
+        def stream():
+            try:
+                yield f"retry: {settings['retry_ms']}\n\n"
+                missed = _missed_changes(feed, database, last_event_id)
+                if missed is not None:
+                    yield _format_event(missed)
+                deadline = time.monotonic() + settings["max_stream_s"]
+                while time.monotonic() < deadline:
+                    event = subscriber.get(timeout=settings["heartbeat_s"])
+                    # A comment line keeps proxies from timing out the idle connection (and lets
+                    # the server notice a closed tab: the write fails and the generator is closed)
+                    yield ": keep-alive\n\n" if event is None else _format_event(event)
+            finally:
+                feed.unsubscribe(subscriber)
+
+        return flask.Response(stream(), mimetype="text/event-stream", headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no", # Don't let an nginx in front buffer the stream
+        })
+
+    server.add_url_rule(path, endpoint="change_events", view_func=events_endpoint)
+
+
+def _missed_changes(feed, database, last_event_id):
+    """A reload-everything event if the reconnecting client's last event is behind the feed."""
+    seq = feed.current_seq(database)
+    if not last_event_id or seq is None:
+        return None
+    last_db, _, last_seq = last_event_id.rpartition(":")
+    if last_db == database and last_seq.isdigit() and int(last_seq) >= seq:
+        return None
+    return {"seq": seq, "db": database, "days": None}
+
+
+def _format_event(event):
+    return f"id: {event['db']}:{event['seq']}\nevent: change\ndata: {json.dumps(event)}\n\n"
+
+
+# --- Shared instance ---
+_change_feed = None
+_change_feed_lock = threading.Lock()
+
+
+def get_change_feed():
+    """Returns the process-wide ChangeFeed, creating it on first use."""
+    global _change_feed
+    if _change_feed is None:
+        with _change_feed_lock:
+            if _change_feed is None:
+                _change_feed = ChangeFeed()
+    return _change_feed
@@ -0,0 +1,125 @@
+# utils/compression.py - Brotli/gzip compression of Flask/Dash responses
+#
+# Dash sends callback responses (figures, table rows) and its JavaScript bundles uncompressed.
+# install_compression(server) adds an after_request hook that compresses every compressible
+# response the client accepts an encoding for:
+# - brotli ('br') if the optional brotli package is installed and the client accepts it, else gzip
+# - only text-like mimetypes (JSON, HTML, JS, CSS, SVG) of at least min_size bytes
+# - Dash's component bundles (e.g. the 3+ MB plotly.js; fingerprinted or ETag'd, so their content
+#   never changes under the same key) are compressed once, harder, and then served from a small LRU
+# - responses that already carry a Content-Encoding, streamed responses and non-200 responses
+#   are left alone
+
+import gzip
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli # Optional (pip install brotli); without it responses are gzipped
+except ImportError:
+    brotli = None
+
+DEFAULT_MIN_SIZE = 1024 # Bytes; smaller bodies don't gain enough to pay for the header
+DEFAULT_LEVEL = 6 # zlib level: most of the size win of 9 at a fraction of the CPU
+# Brotli quality: 4 beats gzip -6 on size at about the same speed (callback responses);
+# cached bundles are compressed once per process, so they can afford a much higher setting
+BROTLI_QUALITY = 4
+BROTLI_STATIC_QUALITY = 9
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/javascript",
+    "text/javascript",
+    "text/html",
+    "text/css",
+    "text/plain",
+    "image/svg+xml",
+}
+
+_STATIC_CACHE_ENTRIES = 64
+_COMPONENT_SUITES_PREFIX = "/_dash-component-suites/"
+
+
+class _CompressedBodyCache:
+    """LRU of compressed bodies of immutable responses, keyed by (path, ETag, encoding)."""
+
+    def __init__(self, max_entries=_STATIC_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key, body):
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def install_compression(server, min_size=DEFAULT_MIN_SIZE, level=DEFAULT_LEVEL):
+    """Registers the compression after_request hook on a Flask server (e.g. app.server)."""
+    import flask
+
+    static_cache = _CompressedBodyCache()
+
+    def compress_response(response):
+        encoding = choose_encoding(flask.request.headers.get("Accept-Encoding", ""))
+        if encoding is None or not _should_compress(response, min_size):
+            return response
+        etag = response.headers.get("ETag")
+        is_bundle = flask.request.path.startswith(_COMPONENT_SUITES_PREFIX)
+        cache_key = (flask.request.path, etag, encoding) if (etag or is_bundle) else None
+        body = static_cache.get(cache_key) if cache_key else None
+        if body is None:
+            response.direct_passthrough = False # Lets get_data() read file-backed responses
+            body = compress(response.get_data(), encoding, level, static=cache_key is not None)
+            if cache_key:
+                static_cache.put(cache_key, body)
+        response.set_data(body)
+        response.headers["Content-Encoding"] = encoding
+        response.headers["Content-Length"] = str(len(body))
+        response.vary.add("Accept-Encoding")
+        # The ETag is left as is: Dash answers If-None-Match by comparing it verbatim
+        return response
+
+    server.after_request(compress_response)
+
+
+def choose_encoding(accept_encoding):
+    """'br' or 'gzip' (the best one the client accepts and this process can produce), or None."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue # Explicitly refused
+        accepted.add(name.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(data, encoding, level=DEFAULT_LEVEL, static=False):
+    """data compressed with 'br' or 'gzip' (static=True: spend more CPU, the result is cached)."""
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_STATIC_QUALITY if static else BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=9 if static else level)
+
+
+def _should_compress(response, min_size):
+    if response.status_code != 200 or "Content-Encoding" in response.headers:
+        return False
+    if response.is_streamed and not response.direct_passthrough:
+        return False # Generators are sent as they are produced
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return False
+    length = response.calculate_content_length()
+    return length is None or length >= min_size
@@ -0,0 +1,199 @@
+# utils/cross_journal.py - Aggregate reports across several journals (SQLite ATTACH)
+#
+# The Overview and Calendar pages can report on several journals at once (e.g. the live and the
+# test account side by side, plus their total). Rather than fetching every journal's trades into
+# pandas, one connection ATTACHes the journal files and a single statement aggregates them all:
+#
+#   WITH per_journal AS MATERIALIZED (
+#       SELECT 'trades.db' AS journal, <day or week> AS period, COUNT(*) AS trade_count, ...
+#         FROM j0.trades_journal WHERE "Entry Time" >= ? AND "Entry Time" < ? GROUP BY period
+#       UNION ALL
+#       SELECT 'sandbox_trades.db', ... FROM j1.trades_journal WHERE ... GROUP BY period
+#   )
+#   SELECT ... FROM per_journal                                        -- per-journal series
+#   UNION ALL
+#   SELECT NULL, period, SUM(trade_count), ... FROM per_journal GROUP BY period  -- combined series
+#
+# - The date range and the GROUP BY are pushed down into every UNION ALL branch: each journal is
+#   reduced to one row per day/week inside SQLite before the branches meet, and only those rows
+#   reach Python. Archived months (trade_archive.py) come from their frozen per-day aggregates.
+# - Journals are attached by file name, like database.py opens them, on a query_only in-memory
+#   connection. Only the journals in config.json "journals" available are accepted; files that don't
+#   exist yet or have no trades table are left out of the report ('journals' lists those included).
+# - Reports are kept in the current journal's figure cache, keyed by the data version of every
+#   journal in them, so a write to any of them is picked up by the next report.
+# - At most SQLite's attach limit (10 by default) journals per report; the rest are skipped.
+
+import contextlib
+import os
+import sqlite3
+from datetime import timedelta
+
+import database as db
+import journals
+import trade_archive # Archived months: frozen daily aggregates instead of their trades
+from figure_cache import get_figure_cache
+from instrumentation import timed
+from app_logging import get_logger
+
+PERIODS = ('day', 'week')
+REPORT_COLUMNS = ["period", "trade_count", "win_count", "gross_profit", "gross_loss", "net_pnl"]
+
+# Same expressions as equity_series.py: Entry Time is stored as '%Y-%m-%d %H:%M:%S'
+_DAY_SQL = 'substr("Entry Time", 1, 10)'
+_PNL_SQL = 'COALESCE(CAST("Realized P&L" AS REAL), 0)'
+_PERIOD_SQL = {
+    'day': _DAY_SQL,
+    'week': f"date({_DAY_SQL}, 'weekday 0', '-6 days')", # Monday of the trade's week
+}
+_ARCHIVED_PERIOD_SQL = { # The same periods of trade_archive's frozen per-day rows
+    'day': 'day',
+    'week': "date(day, 'weekday 0', '-6 days')",
+}
+# Range bounds without start/end dates: every trade with an Entry Time ('' sorts before '0000')
+_NO_START, _NO_END = '0000', '9999'
+
+# MATERIALIZED keeps the per-journal branches from running twice (once per use of the CTE)
+_MATERIALIZED = 'MATERIALIZED ' if sqlite3.sqlite_version_info >= (3, 35, 0) else ''
+
+log = get_logger(__name__)
+
+
+def selected_journals(journal_names):
+    """The available journals among journal_names, in the order of available_journals()."""
+    wanted = set(journal_names or ())
+    return [name for name in journals.available_journals() if name in wanted]
+
+
+def report_key_prefix(journal_names):
+    """Figure-cache key prefix of a report on journal_names: changes with any of their data versions."""
+    versions = []
+    for name in journal_names:
+        with db.use_database(name):
+            versions.append((name, db.get_data_version()))
+    return 'cross-journal', tuple(versions)
+
+
+def aggregate_report(journal_names, period='day', start_date=None, end_date=None):
+    """
+    Daily or weekly aggregates of the given journals, per journal and combined, from start_date to
+    end_date inclusive (datetime.date objects; None = unbounded). Returns
+    {'journals': [names reported], 'combined': [rows], 'by_journal': {name: [rows]}} where rows are
+    dicts of REPORT_COLUMNS ('period' is the day, or the Monday of the week), oldest first.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"period must be one of {PERIODS}, not {period!r}")
+    names = selected_journals(journal_names)
+    # A plain string range selects whole days, as in database.fetch_trades_between
+    start_str = start_date.isoformat() if start_date else _NO_START
+    end_exclusive_str = (end_date + timedelta(days=1)).isoformat() if end_date else _NO_END
+
+    figure_cache = get_figure_cache()
+    cache_key = report_key_prefix(names) # Taken BEFORE querying, so a concurrent write can't be missed
+    cache_id = f"{period}:{start_str}:{end_exclusive_str}"
+    report = figure_cache.get(cache_key, cache_id)
+    if report is None:
+        report = _query_report(names, period, start_str, end_exclusive_str)
+        figure_cache.put(cache_key, cache_id, report)
+    return report
+
+
+@timed("db")
+def _query_report(names, period, start_str, end_exclusive_str):
+    report = {'journals': [], 'combined': [], 'by_journal': {}}
+    with _attached(names) as (conn, attached):
+        if not attached:
+            return report
+        branches, params = [], []
+        for alias, name, has_archive in attached:
+            branch = f"""
+                SELECT {_PERIOD_SQL[period]} AS period,
+                       COUNT(*) AS trade_count,
+                       SUM(CASE WHEN {_PNL_SQL} > 0 THEN 1 ELSE 0 END) AS win_count,
+                       SUM(CASE WHEN {_PNL_SQL} > 0 THEN {_PNL_SQL} ELSE 0 END) AS gross_profit,
+                       SUM(CASE WHEN {_PNL_SQL} < 0 THEN {_PNL_SQL} ELSE 0 END) AS gross_loss,
+                       SUM({_PNL_SQL}) AS net_pnl
+                FROM {alias}.{db.TABLE_NAME}
+                WHERE "Entry Time" >= ? AND "Entry Time" < ?
+                GROUP BY period
+            """
+            params += [name, start_str, end_exclusive_str]
+            if has_archive: # Archived days: their frozen aggregates, never the archived trades
+                branch += f"""
+                UNION ALL
+                SELECT {_ARCHIVED_PERIOD_SQL[period]} AS period, trade_count, win_count, gross_profit, gross_loss, net_pnl
+                FROM {alias}.{trade_archive.FROZEN_SUMMARY_TABLE}
+                WHERE day >= ? AND day < ?
+                """
+                params += [start_str, end_exclusive_str]
+            branches.append(f"""
+                SELECT ? AS journal, period, SUM(trade_count) AS trade_count, SUM(win_count) AS win_count,
+                       SUM(gross_profit) AS gross_profit, SUM(gross_loss) AS gross_loss, SUM(net_pnl) AS net_pnl
+                FROM ({branch})
+                GROUP BY period
+            """)
+        rows = conn.execute(f"""
+            WITH per_journal AS {_MATERIALIZED}({' UNION ALL '.join(branches)})
+            SELECT journal, {', '.join(REPORT_COLUMNS)} FROM per_journal
+            UNION ALL
+            SELECT NULL, period, SUM(trade_count), SUM(win_count), SUM(gross_profit), SUM(gross_loss), SUM(net_pnl)
+            FROM per_journal GROUP BY period
+            ORDER BY period, journal
+        """, params).fetchall()
+
+    report['journals'] = [name for _, name, _ in attached]
+    report['by_journal'] = {name: [] for name in report['journals']}
+    for row in rows:
+        series = report['combined'] if row['journal'] is None else report['by_journal'][row['journal']]
+        series.append({column: row[column] for column in REPORT_COLUMNS})
+    return report
+
+
+@contextlib.contextmanager
+def _attached(names):
+    """
+    A query_only connection with the journals attached as j0, j1, ...:
+    (conn, [(alias, name, has archived months)]).
+    """
+    conn = db._connect(':memory:') # Profiled like the pooled connections; same busy_timeout
+    try:
+        limit = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+        attached = []
+        for name in names:
+            if len(attached) >= limit:
+                log.warning("Cross-journal report: only %d journals can be attached, skipping '%s'", limit, name)
+                continue
+            if not os.path.exists(name): # ATTACH would create an empty file
+                continue
+            alias = f"j{len(attached)}"
+            conn.execute(f"ATTACH DATABASE ? AS {alias}", (name,))
+            tables = {row[0] for row in conn.execute(
+                f"SELECT name FROM {alias}.sqlite_master WHERE type = 'table' AND name IN (?, ?)",
+                (db.TABLE_NAME, trade_archive.FROZEN_SUMMARY_TABLE)
+            )}
+            if db.TABLE_NAME not in tables: # Never initialized: nothing to report
+                conn.execute(f"DETACH DATABASE {alias}")
+                continue
+            attached.append((alias, name, trade_archive.FROZEN_SUMMARY_TABLE in tables))
+        conn.execute("PRAGMA query_only = ON")
+        yield conn, attached
+    finally:
+        conn.close()
+
+
+def summarize(rows):
+    """
+    Overall figures of a daily series (combined or one journal's): total P&L, win rate (%),
+    trades per trading day, average win and average loss (trades at or below 0, like the Overview).
+    """
+    trade_count = sum(row['trade_count'] for row in rows)
+    win_count = sum(row['win_count'] for row in rows)
+    loss_count = trade_count - win_count
+    return {
+        'trade_count': trade_count,
+        'net_pnl': sum(row['net_pnl'] for row in rows),
+        'win_rate': (win_count / trade_count * 100) if trade_count else 0,
+        'avg_trades_per_day': (trade_count / len(rows)) if rows else 0,
+        'avg_win': (sum(row['gross_profit'] for row in rows) / win_count) if win_count else 0,
+        'avg_loss': (sum(row['gross_loss'] for row in rows) / loss_count) if loss_count else 0,
+    }
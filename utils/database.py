@@ -1,64 +1,53 @@
 # utils/database.py - COMPLETE CODE FOR DB HANDLING
 
-import sqlite3
-import pandas as pd
-import json
-from datetime import datetime
+import contextlib
+import contextvars
+import heapq
 import os
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from app_config import get_config, get_sqlite_config, get_journals_config
+import query_profiler # Opt-in per-statement timings and slow-query log
+from instrumentation import timed # Counts the time callbacks spend in here as DB time
+from app_logging import get_logger, fields, lazy # Level-filtered, queued logging instead of print()
+
+log = get_logger(__name__)
 
-# --- Load config to get database name ---
-script_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.join(script_dir, '..')
-config_path = os.path.join(project_root, 'config.json')
-try:
-    with open(config_path, 'r') as f:
-        app_config = json.load(f)
-except FileNotFoundError:
-    print(f"Error: config.json not found at {config_path}. Using default database name 'trades.db'.")
-    app_config = {}
-
-DATABASE_NAME = app_config.get('database_name', 'trades.db')
 TABLE_NAME = 'trades_journal'
 
-# --- Define a helper to get the current DB name from config ---
-# This helper will be called dynamically by connection functions
+# --- Helper to get the current DB name ---
+# The journal selected for this request or job (use_database; see journals.py), else config.json's
+# default. config.json is parsed once by app_config (not on every call), so this is cheap to call per connection.
+_current_database = contextvars.ContextVar('current_database', default=None)
+
+
 def _get_current_db_name():
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.join(script_dir, '..')
-    config_path = os.path.join(project_root, 'config.json')
-    
-    current_app_config = {}
-    try:
-        with open(config_path, 'r') as f:
-            current_app_config = json.load(f)
-    except FileNotFoundError:
-        print(f"Error: config.json not found at {config_path}. Using default database name 'trades.db' for connection.")
-    
-    return current_app_config.get('database_name', 'trades.db')
+    return _current_database.get() or get_config().get('database_name', 'trades.db')
 
 
-# Now, modify get_db_connection() and initialize_db() to use _get_current_db_name()
+def set_current_database(db_name):
+    """Makes db_name the current database of this thread/context. Returns a token for reset_current_database()."""
+    return _current_database.set(db_name)
 
-# Locate get_db_connection() function:
-def get_db_connection():
-    """Establishes a connection to the SQLite database, dynamically getting the name from config."""
-    current_db_name = _get_current_db_name() # Dynamically get the latest DB name
-    conn = sqlite3.connect(current_db_name)
-    conn.row_factory = sqlite3.Row
-    return conn
 
-# Locate initialize_db() function:
-def initialize_db():
-    """
-    Creates the trades_journal table if it doesn't exist in the currently configured database.
-    This function now uses the dynamically loaded DB name.
-    """
-    conn = get_db_connection() # This will now get the latest DB name
-    cursor = conn.cursor()
+def reset_current_database(token):
+    """Undoes the set_current_database() call that returned token."""
+    _current_database.reset(token)
+
+
+@contextlib.contextmanager
+def use_database(db_name):
+    """Runs the with-block against db_name instead of the current database."""
+    token = set_current_database(db_name)
+    try:
+        yield
+    finally:
+        reset_current_database(token)
 
-    # ... (rest of initialize_db - CREATE TABLE IF NOT EXISTS logic) ...
-    # You might want to update the print statement here to show the dynamic name
-    print(f"Database '{_get_current_db_name()}' and table '{TABLE_NAME}' initialized (if not already existing).")
 
 # List of all columns in the DataTable that we want to store and retrieve.
 # IMPORTANT: 'id' is the internal SQLite PRIMARY KEY.
@@ -71,78 +60,389 @@ COLUMNS_TO_STORE = [
 ]
 
 def get_db_connection():
-    """Establishes a connection to the SQLite database."""
-    conn = sqlite3.connect(DATABASE_NAME)
+    """
+    Establishes a connection to the currently configured SQLite database.
+    Statements wait up to config.json "sqlite" busy_timeout_ms for locks held by other connections
+    (other threads or server worker processes) instead of failing with 'database is locked'.
+    """
+    return _connect(_get_current_db_name())
+
+
+def _connect(db_name, check_same_thread=True):
+    if query_profiler.is_enabled(): # Opt-in (config.json "sql_profiler"): times every statement
+        conn = query_profiler.connect(db_name, check_same_thread=check_same_thread)
+    else:
+        conn = sqlite3.connect(db_name, check_same_thread=check_same_thread)
+    conn.execute(f"PRAGMA busy_timeout = {int(get_sqlite_config()['busy_timeout_ms'])}")
     conn.row_factory = sqlite3.Row # Allows accessing columns by name
     return conn
 
-# Locate this section in utils/database.py:
-# def initialize_db():
-#     """Creates the trades_journal table if it doesn't exist."""
-#     conn = get_db_connection()
-#     cursor = conn.cursor()
-#     # ... rest of initialize_db ...
-#     print(f"Database '{_get_current_db_name()}' and table '{TABLE_NAME}' initialized (if not already existing).")
 
+#######################################################################################
+# Connection pools - one per database file
+#######################################################################################
+# Reads and writes borrow a connection from the current database's pool (connection()) instead of
+# opening the file, reading its schema and closing it again on every call. Each journal has its
+# own pool, so sessions on different journals never share connections; journals.py closes the
+# pools of journals nobody has used for a while (close_pool).
+class ConnectionPool:
+    """Idle connections to one database file, handed out again instead of reopening the file."""
+
+    def __init__(self, db_name, size):
+        self.db_name = db_name
+        self.size = size # Idle connections kept; more can be borrowed at once, the extras are closed
+        self._idle = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def acquire(self):
+        profiled = query_profiler.is_enabled()
+        with self._lock:
+            while self._idle:
+                conn = self._idle.pop() # Most recently used first: its page cache is the warmest
+                if isinstance(conn, query_profiler.ProfilingConnection) == profiled:
+                    return conn
+                conn.close() # Opened before the profiler was switched on/off
+        # Borrowers may be any thread; a connection is only ever used by one of them at a time
+        return _connect(self.db_name, check_same_thread=False)
+
+    def release(self, conn):
+        try:
+            if conn.in_transaction: # Never hand out a connection with a transaction left open
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            return
+        with self._lock:
+            if not self._closed and len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        """Closes the idle connections; borrowed ones are closed when they come back."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def idle_count(self):
+        with self._lock:
+            return len(self._idle)
+
+
+_pools = {} # database name -> ConnectionPool
+_pools_lock = threading.Lock()
+
+
+def _get_pool(db_name):
+    with _pools_lock:
+        pool = _pools.get(db_name)
+        if pool is None:
+            pool = _pools[db_name] = ConnectionPool(db_name, int(get_journals_config()['pool_size']))
+        return pool
 
-# REPLACE its entire content with this:
+
+@contextlib.contextmanager
+def connection():
+    """Borrows a connection to the current database from its pool; it goes back at the end of the with-block."""
+    pool = _get_pool(_get_current_db_name())
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+
+def pool_names():
+    """Names of the databases that have a pool."""
+    with _pools_lock:
+        return list(_pools)
+
+
+def close_pool(db_name):
+    """Closes db_name's pool (the next connection() opens a new one)."""
+    with _pools_lock:
+        pool = _pools.pop(db_name, None)
+    if pool is not None:
+        pool.close()
+
+
+#######################################################################################
+# Concurrency - several threads and server worker processes share one database file
+#######################################################################################
+# - The file is switched to WAL journaling once (initialize_db): readers never block the writer
+#   and the writer never blocks readers. Only writers queue for the single write lock.
+# - Every write transaction starts with BEGIN IMMEDIATE, so it takes the write lock up front and
+#   waits for it (busy_timeout). With Python's default deferred BEGIN, a transaction that has
+#   already read and then tries to write can fail with SQLITE_BUSY at once, without waiting.
+# - If the lock is still held when busy_timeout runs out, run_write() rolls back and retries
+#   the whole transaction with exponential backoff and jitter.
+_RETRY_BASE_DELAY = 0.05 # Seconds before the first retry; doubles on every attempt
+_RETRY_MAX_DELAY = 2.0
+
+
+def is_busy_error(error):
+    """True if error means 'another connection holds the lock' (SQLITE_BUSY / SQLITE_LOCKED)."""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    code = getattr(error, 'sqlite_errorcode', None)
+    if code is not None:
+        return (code & 0xFF) in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED) # Low byte: primary code
+    return 'locked' in str(error) or 'busy' in str(error)
+
+
+def retry_on_busy(func, *args):
+    """
+    Calls func(*args), calling it again with exponential backoff while it fails because the
+    database is busy (up to config.json "sqlite" write_retries retries). func must leave no
+    transaction open when it raises.
+    """
+    retries = int(get_sqlite_config()['write_retries'])
+    for attempt in range(retries + 1):
+        try:
+            return func(*args)
+        except sqlite3.OperationalError as e:
+            if not is_busy_error(e) or attempt == retries:
+                raise
+            delay = min(_RETRY_MAX_DELAY, _RETRY_BASE_DELAY * 2 ** attempt) * random.uniform(0.5, 1.0)
+            log.warning("Database busy, retrying in %.0f ms", delay * 1000,
+                        extra=fields(attempt=attempt + 1, retries=retries, error=str(e)))
+            time.sleep(delay)
+
+
+def run_write(operation):
+    """
+    Runs operation(cursor, touched_days) in one BEGIN IMMEDIATE transaction on a pooled connection,
+    commits it and then notifies the write listeners with the days the operation added to
+    touched_days (a fresh set on every attempt) and the data version from just before the write. Busy databases are retried (retry_on_busy), so
+    operation may run more than once and must not have side effects outside the transaction.
+    Returns operation's result; any other error is raised after the rollback.
+    """
+    def attempt():
+        touched_days = set()
+        with connection() as conn:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                # Taken under the write lock: no other process can commit until this one has
+                version_before = get_data_version()
+                result = operation(conn.cursor(), touched_days)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        return result, touched_days, version_before
+
+    result, touched_days, version_before = retry_on_busy(attempt)
+    _notify_write(touched_days, version_before)
+    return result
+
+
+def _fetch_rows(sql, params=()):
+    """
+    Runs a read query on a pooled connection and returns all its rows. In WAL mode reads don't wait
+    for writers, but they can briefly hit a lock during a checkpoint, so they are retried too.
+    """
+    def attempt():
+        with connection() as conn:
+            return conn.execute(sql, params).fetchall()
+    return retry_on_busy(attempt)
+
+
+def _fetch_trade_rows(where_sql, params, archive_tables):
+    """
+    Rows (id + COLUMNS_TO_STORE) matching where_sql from trades_journal and the archive tables
+    archive_tables(conn) returns (trade_archive.py), ordered by Entry Time. Each table is queried
+    on its own: an archive table only holds its month, so the archives read oldest month first are
+    already in order and only trades_journal's rows have to be merged in.
+    """
+    columns = ', '.join(f'"{col}"' for col in COLUMNS_TO_STORE)
+    select = f'SELECT id, {columns} FROM {{table}} {where_sql} ORDER BY "Entry Time" ASC'
+
+    def attempt():
+        with connection() as conn:
+            conn.execute("BEGIN") # One snapshot for all the tables (a roll may move rows in between)
+            try:
+                hot_rows = conn.execute(select.format(table=TABLE_NAME), params).fetchall()
+                archived_rows = []
+                for table in archive_tables(conn):
+                    archived_rows += conn.execute(select.format(table=table), params).fetchall()
+            finally:
+                conn.rollback()
+        if not archived_rows or not hot_rows:
+            return archived_rows or hot_rows
+        # NULL Entry Times first, like ORDER BY
+        return list(heapq.merge(archived_rows, hot_rows, key=lambda row: (row['Entry Time'] is not None, row['Entry Time'] or '')))
+    return retry_on_busy(attempt)
+
+
+def _set_journal_mode(conn):
+    """Switches the database file to config.json "sqlite" journal_mode (persists in the file)."""
+    wanted = str(get_sqlite_config()['journal_mode']).lower()
+    mode = conn.execute(f"PRAGMA journal_mode = {wanted}").fetchone()[0]
+    if mode.lower() != wanted: # e.g. WAL isn't possible on some network file systems
+        log.warning("Could not switch the database to journal_mode=%s, using %s", wanted, mode)
+
+
+@timed("db")
 def initialize_db():
     """
     Creates the trades_journal table if it doesn't exist,
     and adds any new columns defined in COLUMNS_TO_STORE.
     """
+    retry_on_busy(_initialize_schema)
+    log.info("Database and table '%s' ensured", TABLE_NAME)
+
+
+def _initialize_schema():
     conn = get_db_connection()
-    cursor = conn.cursor()
-
-    # Get current table info to check for existing columns
-    cursor.execute(f"PRAGMA table_info({TABLE_NAME});")
-    existing_columns_info = cursor.fetchall()
-    existing_column_names = [col[1] for col in existing_columns_info] # col[1] is the name
-
-    # Define columns with appropriate SQLite types for initial creation
-    column_definitions = []
-    for col in COLUMNS_TO_STORE:
-        if col in ["Trade #", "Size", "Stop Loss (pts)", "Risk ($)", "Points Realized", "Realized P&L"]:
-            column_definitions.append(f"\"{col}\" REAL") # Use REAL for numbers (floats/integers)
-        else:
-            column_definitions.append(f"\"{col}\" TEXT") # Use TEXT for strings/dropdowns
-
-    # 1. Create table if it doesn't exist
-    create_table_sql = f"""
-    CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        {', '.join(column_definitions)}
-    );
-    """
-    cursor.execute(create_table_sql)
-    conn.commit()
-    print(f"Database '{_get_current_db_name()}' and table '{TABLE_NAME}' ensured.")
-
-    # 2. Add new columns to existing table if they are in COLUMNS_TO_STORE but not in DB
-    for col in COLUMNS_TO_STORE:
-        if col not in existing_column_names:
-            column_type = "REAL" if col in ["Trade #", "Size", "Stop Loss (pts)", "Risk ($)", "Points Realized", "Realized P&L"] else "TEXT"
-            alter_table_sql = f"ALTER TABLE {TABLE_NAME} ADD COLUMN \"{col}\" {column_type};"
-            try:
-                cursor.execute(alter_table_sql)
-                conn.commit()
-                print(f"Added new column '{col}' to table '{TABLE_NAME}'.")
-            except sqlite3.Error as e:
-                # This can happen if column was added between checks or other issues
-                print(f"Warning: Could not add column '{col}' to table '{TABLE_NAME}': {e}")
-                conn.rollback() # Rollback if alter failed
-    conn.close()
+    try:
+        _set_journal_mode(conn) # Must happen outside a transaction
+        cursor = conn.cursor()
+
+        # Define columns with appropriate SQLite types for initial creation
+        column_definitions = []
+        for col in COLUMNS_TO_STORE:
+            if col in ["Trade #", "Size", "Stop Loss (pts)", "Risk ($)", "Points Realized", "Realized P&L"]:
+                column_definitions.append(f"\"{col}\" REAL") # Use REAL for numbers (floats/integers)
+            else:
+                column_definitions.append(f"\"{col}\" TEXT") # Use TEXT for strings/dropdowns
+
+        # Several server worker processes may start at once against the same file: take the write
+        # lock first, so the schema check and any ALTERs below happen in one process at a time (the
+        # others wait up to busy_timeout, then find the columns already there)
+        cursor.execute("BEGIN IMMEDIATE")
+
+        # 1. Create table if it doesn't exist
+        create_table_sql = f"""
+        CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            {', '.join(column_definitions)}
+        );
+        """
+        cursor.execute(create_table_sql)
+
+        # Get current table info to check for existing columns (after CREATE, so a fresh table has them all)
+        cursor.execute(f"PRAGMA table_info({TABLE_NAME});")
+        existing_columns_info = cursor.fetchall()
+        existing_column_names = [col[1] for col in existing_columns_info] # col[1] is the name
+
+        # 2. Add new columns to existing table if they are in COLUMNS_TO_STORE but not in DB
+        for col in COLUMNS_TO_STORE:
+            if col not in existing_column_names:
+                column_type = "REAL" if col in ["Trade #", "Size", "Stop Loss (pts)", "Risk ($)", "Points Realized", "Realized P&L"] else "TEXT"
+                alter_table_sql = f"ALTER TABLE {TABLE_NAME} ADD COLUMN \"{col}\" {column_type};"
+                try:
+                    cursor.execute(alter_table_sql)
+                    log.info("Added new column '%s' to table '%s'", col, TABLE_NAME)
+                except sqlite3.Error as e:
+                    # A failed ALTER only undoes itself; the rest of the transaction stands
+                    log.warning("Could not add column '%s' to table '%s': %s", col, TABLE_NAME, e)
+
+        # 3. Archive catalog; archived months get the new columns too (trade_archive.py)
+        _trade_archive().create_tables(cursor)
+        conn.commit()
+    except BaseException:
+        conn.rollback() # Leaves nothing half done for retry_on_busy's next attempt
+        raise
+    finally:
+        conn.close()
 
 
+def _trade_archive():
+    import trade_archive # Not at the top: trade_archive uses this module
+    return trade_archive
 
-def save_trade_to_db(trade_data_row):
+
+_initialized_databases = set()
+_initialize_lock = threading.Lock()
+
+def ensure_db_initialized():
     """
-    Saves a single trade (row) to the database.
-    Returns the SQLite-generated primary key (id) for the new row.
+    Runs initialize_db() once per database file per process.
+    Called from the app startup hook and before reads, instead of initializing on every page load.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    db_name = _get_current_db_name()
+    if db_name in _initialized_databases:
+        return
+    with _initialize_lock:
+        if db_name not in _initialized_databases:
+            initialize_db()
+            _initialized_databases.add(db_name)
+
+
+#######################################################################################
+# Write listeners - notified after every committed write (used for cache invalidation)
+#######################################################################################
+# Each listener is called as listener(database_name, days, version_before) where days is the set
+# of trading days ('YYYY-MM-DD') touched by the write, or None if unknown (treat the whole DB as
+# changed), and version_before is get_data_version() inside the write's transaction, before it
+# wrote anything (None if unknown). A listener that remembers data versions can tell from it
+# whether another process wrote since it last looked.
+_write_listeners = []
+
+
+def add_write_listener(listener):
+    """Registers a callable to be notified after every committed write."""
+    if listener not in _write_listeners:
+        _write_listeners.append(listener)
+
+
+def remove_write_listener(listener):
+    """Unregisters a callable added with add_write_listener()."""
+    if listener in _write_listeners:
+        _write_listeners.remove(listener)
+
 
+_write_versions = {} # database name -> number of committed writes made by this process
+_write_versions_lock = threading.Lock()
+
+
+def _notify_write(days, version_before=None):
+    """Tells every write listener which days just changed. Call only AFTER conn.commit()."""
+    db_name = _get_current_db_name()
+    with _write_versions_lock:
+        _write_versions[db_name] = _write_versions.get(db_name, 0) + 1
+    for listener in list(_write_listeners):
+        try:
+            listener(db_name, days, version_before)
+        except Exception:
+            log.exception("Error in database write listener %s", listener)
+
+
+@timed("db")
+def get_data_version():
+    """
+    Returns a hashable token that changes whenever the current database's trades may have changed.
+    It combines this process's write counter with the modification times of the database file
+    (and its -wal file, if any), so writes made by other processes are noticed too.
+    """
+    db_name = _get_current_db_name()
+    with _write_versions_lock:
+        write_count = _write_versions.get(db_name, 0)
+    file_times = []
+    for path in (db_name, db_name + '-wal'):
+        try:
+            file_times.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            file_times.append(None) # File doesn't exist (yet)
+    return (write_count, *file_times)
+
+
+def _trade_day(entry_time):
+    """Returns the 'YYYY-MM-DD' part of an 'Entry Time' value, or None if it is blank."""
+    if not entry_time:
+        return None
+    return str(entry_time)[:10]
+
+
+def _insert_trade(cursor, trade_data_row, touched_days=None):
+    """
+    Runs the INSERT for a single trade on an existing cursor (no commit).
+    Returns the SQLite-generated primary key (id) for the new row.
+    The trade's day is added to touched_days (a set) if one is given.
+    """
     # Filter trade_data_row to only include columns we want to store
     # Ensure keys match COLUMNS_TO_STORE
     filtered_data = {col: trade_data_row.get(col) for col in COLUMNS_TO_STORE}
@@ -152,19 +452,25 @@ def save_trade_to_db(trade_data_row):
     values = tuple(filtered_data.values())
 
     insert_sql = f"INSERT INTO {TABLE_NAME} ({columns}) VALUES ({placeholders})"
-    
+    cursor.execute(insert_sql, values)
+    if touched_days is not None:
+        touched_days.add(_trade_day(filtered_data.get("Entry Time")))
+    return cursor.lastrowid # Get the auto-generated ID
+
+
+@timed("db")
+def save_trade_to_db(trade_data_row):
+    """
+    Saves a single trade (row) to the database.
+    Returns the SQLite-generated primary key (id) for the new row.
+    """
     try:
-        cursor.execute(insert_sql, values)
-        conn.commit()
-        last_row_id = cursor.lastrowid # Get the auto-generated ID
-        # print(f"Trade saved to DB with id: {last_row_id}")
+        last_row_id = run_write(lambda cursor, touched_days: _insert_trade(cursor, trade_data_row, touched_days))
+        log.debug("Trade saved", extra=fields(trade_id=last_row_id))
         return last_row_id # Return the new DB ID
-    except sqlite3.Error as e:
-        print(f"Error saving trade to DB: {e}")
-        conn.rollback()
+    except sqlite3.Error:
+        log.exception("Error saving trade to DB")
         return None # Return None on failure
-    finally:
-        conn.close()
 
 #######################################################################################
 # Function to Upsert Trade data - handle both insert and update operations
@@ -172,6 +478,7 @@ def save_trade_to_db(trade_data_row):
 # If 'id' is provided and matches an existing record, it will update that record.
 # If 'id' is not provided or does not match, it will insert a new record
 ########################################################################################
+@timed("db")
 def upsert_trade_to_db(trade_data_row):
     """
     Inserts a new trade or replaces an existing one based on the 'id' (primary key).
@@ -179,10 +486,7 @@ def upsert_trade_to_db(trade_data_row):
     If no 'id' or 'id' does not match, a new record is inserted.
     Returns the SQLite-generated primary key (id) for the upserted row.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    # Get all column names including 'id' for the INSERT OR REPLACE statement
+    # Get all column names including 'id' for the upsert statement
     # Ensure data has all required columns, even if None
     all_columns_in_db = ["id"] + COLUMNS_TO_STORE # COLUMNS_TO_STORE does NOT include 'id'
 
@@ -192,13 +496,20 @@ def upsert_trade_to_db(trade_data_row):
     filtered_data = {col: trade_data_row.get(col) for col in all_columns_in_db}
     
     # Exclude 'id' from columns_str and placeholders_str if it's a new insert where id will be AUTOINCREMENTED
-    # If trade_data_row has an id, we'll include it in the INSERT OR REPLACE
+    # If trade_data_row has an id, we'll include it in the upsert
     # Otherwise, we let AUTOINCREMENT handle it.
     if 'id' in trade_data_row and trade_data_row['id'] is not None:
         columns_to_insert = ', '.join(f"\"{col}\"" for col in all_columns_in_db)
         placeholders = ', '.join('?' * len(all_columns_in_db))
         values = tuple(filtered_data.values())
-        upsert_sql = f"INSERT OR REPLACE INTO {TABLE_NAME} ({columns_to_insert}) VALUES ({placeholders})"
+        # ON CONFLICT DO UPDATE rather than INSERT OR REPLACE: REPLACE deletes the old row without
+        # firing DELETE triggers (unless recursive_triggers is on), so the day a trade moved away
+        # from never reached equity_dirty_days or the change log. An UPDATE fires the UPDATE triggers.
+        update_clause = ', '.join(f"\"{col}\" = excluded.\"{col}\"" for col in COLUMNS_TO_STORE)
+        upsert_sql = (
+            f"INSERT INTO {TABLE_NAME} ({columns_to_insert}) VALUES ({placeholders}) "
+            f"ON CONFLICT(id) DO UPDATE SET {update_clause}"
+        )
     else:
         # If no 'id' is provided, we treat it as a new insert and let AUTOINCREMENT provide the ID
         columns_to_insert_no_id = ', '.join(f"\"{col}\"" for col in COLUMNS_TO_STORE)
@@ -206,29 +517,30 @@ def upsert_trade_to_db(trade_data_row):
         values_no_id = tuple(trade_data_row.get(col) for col in COLUMNS_TO_STORE) # Only values for COLUMNS_TO_STORE
         upsert_sql = f"INSERT INTO {TABLE_NAME} ({columns_to_insert_no_id}) VALUES ({placeholders_no_id})"
     
-    try:
+    def upsert(cursor, touched_days):
+        # Days touched: the day the row is moving to, plus the day it was on (if it already exists)
+        touched_days.add(_trade_day(trade_data_row.get("Entry Time")))
+        if 'id' in trade_data_row and trade_data_row['id'] is not None:
+            _trade_archive().thaw(cursor, [trade_data_row['id']]) # An archived row is replaced in trades_journal
+            touched_days.update(_trade_day(t) for t in _entry_times_by_id(cursor, [trade_data_row['id']]).values())
+
         cursor.execute(upsert_sql, values if ('id' in trade_data_row and trade_data_row['id'] is not None) else values_no_id)
-        conn.commit()
-        
         # Get the ID of the row that was just inserted/replaced
-        result_id = trade_data_row['id'] if ('id' in trade_data_row and trade_data_row['id'] is not None) else cursor.lastrowid
-        # print(f"Trade upserted to DB with ID: {result_id}")
+        return trade_data_row['id'] if ('id' in trade_data_row and trade_data_row['id'] is not None) else cursor.lastrowid
+
+    try:
+        result_id = run_write(upsert)
+        log.debug("Trade upserted", extra=fields(trade_id=result_id))
         return result_id # Return the ID (new or existing)
-    except sqlite3.Error as e:
-        print(f"Error upserting trade to DB: {e}")
-        conn.rollback()
+    except sqlite3.Error:
+        log.exception("Error upserting trade to DB")
         return None # Return None on failure
-    finally:
-        conn.close()
 
+@timed("db")
 def fetch_all_trades_from_db():
     """Fetches all trades from the database as a list of dictionaries, including their internal 'id'."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    # Select all columns, including 'id'
-    cursor.execute(f"SELECT id, {', '.join(f'\"{col}\"' for col in COLUMNS_TO_STORE)} FROM {TABLE_NAME} ORDER BY \"Entry Time\" ASC")
-    rows = cursor.fetchall()
-    conn.close()
+    # Select all columns, including 'id' (trades_journal and every archived month)
+    rows = _fetch_trade_rows("", (), lambda conn: _trade_archive().archive_tables(conn))
 
     trades = []
     for row in rows:
@@ -241,26 +553,47 @@ def fetch_all_trades_from_db():
 
 
 
+@timed("db")
 def fetch_trades_by_date(target_date):
     """
     Fetches trades from the database for a specific date.
     target_date should be a datetime.date object.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
     # Convert target_date to string format matching Entry Time in DB
     date_str = target_date.strftime("%Y-%m-%d") # Format for comparison
 
     # Use LIKE for partial match on date part, assuming Entry Time stores %Y-%m-%d %H:%M:%S
     # Or, if we ensured consistency, we could use date() function of SQLite
     # For robustness, let's use LIKE on the date part
-    cursor.execute(
-        f"SELECT id, {', '.join(f'\"{col}\"' for col in COLUMNS_TO_STORE)} FROM {TABLE_NAME} WHERE \"Entry Time\" LIKE ? ORDER BY \"Entry Time\" ASC",
-        (f"{date_str}%",) # Match YYYY-MM-DD at the beginning of Entry Time string
+    rows = _fetch_trade_rows(
+        "WHERE \"Entry Time\" LIKE ?",
+        (f"{date_str}%",), # Match YYYY-MM-DD at the beginning of Entry Time string
+        lambda conn: _trade_archive().archive_tables_for_days(conn, [date_str])
+    )
+
+    trades = []
+    for row in rows:
+        trade_dict = {}
+        trade_dict['id'] = row['id']
+        for col_name in COLUMNS_TO_STORE:
+            trade_dict[col_name] = row[col_name]
+        trades.append(trade_dict)
+    return trades
+
+@timed("db")
+def fetch_trades_between(start_date, end_date):
+    """
+    Fetches trades whose 'Entry Time' falls on any day from start_date to end_date (inclusive).
+    start_date/end_date should be datetime.date objects. One query serves a whole range of days.
+    """
+    # 'Entry Time' is stored as '%Y-%m-%d %H:%M:%S', so a plain string range selects whole days
+    start_str = start_date.strftime("%Y-%m-%d")
+    end_exclusive_str = (end_date + timedelta(days=1)).strftime("%Y-%m-%d")
+    rows = _fetch_trade_rows(
+        "WHERE \"Entry Time\" >= ? AND \"Entry Time\" < ?",
+        (start_str, end_exclusive_str),
+        lambda conn: _trade_archive().archive_tables(conn, start_str, end_exclusive_str) # Only the months in range
     )
-    rows = cursor.fetchall()
-    conn.close()
 
     trades = []
     for row in rows:
@@ -271,48 +604,142 @@ def fetch_trades_by_date(target_date):
         trades.append(trade_dict)
     return trades
 
+@timed("db")
+def fetch_trades_on_days(days):
+    """
+    Fetches the trades whose 'Entry Time' falls on any of the given days ('YYYY-MM-DD' strings),
+    e.g. the days a change notification reported. Newest first.
+    """
+    days = sorted(set(days))
+    trades = []
+    for start in range(0, len(days), _MAX_SQL_PARAMS):
+        chunk = days[start:start + _MAX_SQL_PARAMS]
+        rows = _fetch_trade_rows(
+            f"WHERE substr(\"Entry Time\", 1, 10) IN ({', '.join('?' * len(chunk))})",
+            chunk,
+            lambda conn: _trade_archive().archive_tables_for_days(conn, chunk)
+        )
+        trades.extend({'id': row['id'], **{col_name: row[col_name] for col_name in COLUMNS_TO_STORE}} for row in rows)
+    trades.sort(key=lambda trade: trade['Entry Time'], reverse=True)
+    return trades
+
+@timed("db")
 def update_trade_in_db(internal_db_id, new_data):
     """
     Updates an existing trade in the database using its internal 'id'.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    set_clauses = []
-    values = []
-    for col_name, value in new_data.items():
-        if col_name not in ["id", "Trade #"]: # Don't update internal 'id' or user-facing 'Trade #'
-            set_clauses.append(f"\"{col_name}\" = ?")
-            values.append(value)
-    
-    values.append(internal_db_id) # The internal DB ID for the WHERE clause
-
-    update_sql = f"UPDATE {TABLE_NAME} SET {', '.join(set_clauses)} WHERE id = ?" # UPDATED: Use 'id' as key
-    
     try:
-        cursor.execute(update_sql, values)
-        conn.commit()
-        # print(f"Trade with DB ID {internal_db_id} updated in DB.")
-    except sqlite3.Error as e:
-        print(f"Error updating trade with DB ID {internal_db_id} in DB: {e}")
-        conn.rollback()
-    finally:
-        conn.close()
+        run_write(lambda cursor, touched_days: _update_trades(cursor, [(internal_db_id, new_data)], touched_days))
+        log.debug("Trade updated", extra=fields(trade_id=internal_db_id))
+    except sqlite3.Error:
+        log.exception("Error updating trade in DB", extra=fields(trade_id=internal_db_id))
 
+
+@timed("db")
 def delete_trade_from_db(internal_db_id):
     """Deletes a trade from the database by its internal 'id'."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    delete_sql = f"DELETE FROM {TABLE_NAME} WHERE id = ?" # UPDATED: Use 'id' as key
     try:
-        cursor.execute(delete_sql, (internal_db_id,))
-        conn.commit()
-        # print(f"Trade with DB ID {internal_db_id} deleted from DB.")
-    except sqlite3.Error as e:
-        print(f"Error deleting trade with DB ID {internal_db_id} from DB: {e}")
-        conn.rollback()
-    finally:
-        conn.close()
+        run_write(lambda cursor, touched_days: _delete_trades(cursor, [internal_db_id], touched_days))
+        log.debug("Trade deleted", extra=fields(trade_id=internal_db_id))
+    except sqlite3.Error:
+        log.exception("Error deleting trade from DB", extra=fields(trade_id=internal_db_id))
+
+
+#######################################################################################
+# Bulk write helpers - several rows in ONE transaction (one commit) using executemany
+#######################################################################################
+_MAX_SQL_PARAMS = 900 # Stay under SQLite's host parameter limit for IN (...) lists
+
+
+def _entry_times_by_id(cursor, internal_db_ids):
+    """Returns {id: 'Entry Time'} for the ids in internal_db_ids that exist in the table."""
+    found = {}
+    for start in range(0, len(internal_db_ids), _MAX_SQL_PARAMS):
+        chunk = internal_db_ids[start:start + _MAX_SQL_PARAMS]
+        cursor.execute(f"SELECT id, \"Entry Time\" FROM {TABLE_NAME} WHERE id IN ({', '.join('?' * len(chunk))})", chunk)
+        found.update((row[0], row[1]) for row in cursor.fetchall())
+    return found
+
+
+def _delete_trades(cursor, internal_db_ids, touched_days=None):
+    """Runs a multi-row DELETE on an existing cursor (no commit). Returns {id: deleted?}."""
+    ids = list(dict.fromkeys(i for i in internal_db_ids if i is not None)) # De-duplicate, keep order
+    _trade_archive().thaw(cursor, ids) # Archived rows are moved back first (their months refrozen)
+    existing = _entry_times_by_id(cursor, ids)
+    cursor.executemany(f"DELETE FROM {TABLE_NAME} WHERE id = ?", [(i,) for i in ids if i in existing])
+    if touched_days is not None:
+        touched_days.update(_trade_day(t) for t in existing.values())
+    return {i: i in existing for i in ids}
+
+
+def _update_trades(cursor, updates, touched_days=None):
+    """
+    Runs a multi-row UPDATE on an existing cursor (no commit). Returns {id: updated?}.
+    updates is a list of (internal_db_id, changes_dict). Changes for the same id are merged
+    (later values win) and rows that change the same set of columns share one executemany.
+    Both the old and (if 'Entry Time' changes) new day of each row are added to touched_days.
+    """
+    merged = {}
+    for internal_db_id, changes in updates:
+        if internal_db_id is None:
+            continue
+        merged.setdefault(internal_db_id, {}).update(
+            {col: val for col, val in changes.items() if col not in ["id", "Trade #"]} # Never update 'id' or 'Trade #'
+        )
+
+    ids = list(merged)
+    _trade_archive().thaw(cursor, ids) # Archived rows are moved back first (their months refrozen)
+    existing = _entry_times_by_id(cursor, ids)
+
+    statements = {} # column tuple -> list of parameter tuples
+    for internal_db_id in ids:
+        changes = merged[internal_db_id]
+        if internal_db_id not in existing or not changes:
+            continue
+        columns = tuple(changes)
+        statements.setdefault(columns, []).append(tuple(changes.values()) + (internal_db_id,))
+        if touched_days is not None:
+            touched_days.add(_trade_day(existing[internal_db_id]))
+            if "Entry Time" in changes:
+                touched_days.add(_trade_day(changes["Entry Time"]))
+
+    for columns, params in statements.items():
+        set_clause = ', '.join(f"\"{col}\" = ?" for col in columns)
+        cursor.executemany(f"UPDATE {TABLE_NAME} SET {set_clause} WHERE id = ?", params)
+    return {i: i in existing for i in ids}
+
+
+@timed("db")
+def delete_trades(internal_db_ids):
+    """
+    Deletes several trades by their internal 'id' in a single transaction.
+    Returns a dict {id: True if the row was deleted, False if it did not exist or the delete failed}.
+    """
+    ids = [i for i in internal_db_ids if i is not None]
+    if not ids:
+        return {}
+    try:
+        return run_write(lambda cursor, touched_days: _delete_trades(cursor, ids, touched_days))
+    except sqlite3.Error:
+        log.exception("Error deleting %d trades from DB", len(ids), extra=fields(trade_ids=ids))
+        return {i: False for i in ids}
+
+
+@timed("db")
+def update_trades(updates):
+    """
+    Updates several trades in a single transaction.
+    updates is a list of (internal_db_id, changes_dict) pairs, e.g. [(12, {"Notes": "..."}), ...].
+    Returns a dict {id: True if the row was updated, False if it did not exist or the update failed}.
+    """
+    updates = [(i, changes) for i, changes in updates if i is not None]
+    if not updates:
+        return {}
+    try:
+        return run_write(lambda cursor, touched_days: _update_trades(cursor, updates, touched_days))
+    except sqlite3.Error:
+        log.exception("Error updating %d trades in DB", len(updates), extra=fields(trade_ids=lazy(lambda: [i for i, _ in updates])))
+        return {i: False for i, _ in updates}
 
 
 # Get database name and table name for external use
@@ -321,5 +748,5 @@ def get_database_info():
     current_db_name = _get_current_db_name() # Get the name dynamically
     return current_db_name, TABLE_NAME
 
-# Initialize the database when this module is imported
-initialize_db()
\ No newline at end of file
+# NOTE: the database is no longer initialized when this module is imported.
+# app.py runs ensure_db_initialized() once from its startup hook.
\ No newline at end of file
@@ -0,0 +1,58 @@
+# utils/downsample.py - Largest-Triangle-Three-Buckets (LTTB) downsampling for line charts
+#
+# LTTB keeps the points that matter visually (peaks, troughs, sharp turns) while reducing a long
+# series to a fixed number of points, so an equity curve of tens of thousands of trades still
+# looks right when drawn with ~1000 points. Functions return the INDICES of the kept points, so
+# the caller can select matching hover data (times, trade numbers, ...) from the same rows.
+
+from lazy_imports import lazy_module
+np = lazy_module("numpy")
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Returns the sorted indices of the n_out points LTTB keeps from the series (x, y).
+    x must be increasing. The first and last points are always kept; if the series has
+    n_out points or fewer, all indices are returned.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Bucket edges for the n - 2 inner points, split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    starts, ends = edges[:-1], np.maximum(edges[1:], edges[:-1] + 1)
+
+    # Average point of every bucket, computed in one pass; the average of the NEXT bucket
+    # (or the last point, for the final bucket) is the third corner of each triangle
+    sizes = ends - starts
+    avg_x = np.add.reduceat(x[:ends[-1]], starts) / sizes
+    avg_y = np.add.reduceat(y[:ends[-1]], starts) / sizes
+    next_x = np.append(avg_x[1:], x[-1]).tolist()
+    next_y = np.append(avg_y[1:], y[-1]).tolist()
+
+    kept = [0]
+    previous = 0
+    if n / (n_out - 2) < 32:
+        # Small buckets: plain Python beats per-bucket numpy call overhead
+        xs, ys = x.tolist(), y.tolist()
+        for bucket, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+            px, py, ax, ay = xs[previous], ys[previous], next_x[bucket], next_y[bucket]
+            best, best_area = start, -1.0
+            for i in range(start, end):
+                # Largest triangle (previous kept point, candidate, next bucket average) wins
+                area = abs((px - ax) * (ys[i] - py) - (px - xs[i]) * (ay - py))
+                if area > best_area:
+                    best, best_area = i, area
+            kept.append(best)
+            previous = best
+    else:
+        for bucket, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+            px, py, ax, ay = x[previous], y[previous], next_x[bucket], next_y[bucket]
+            areas = np.abs((px - ax) * (y[start:end] - py) - (px - x[start:end]) * (ay - py))
+            previous = start + int(np.argmax(areas))
+            kept.append(previous)
+    kept.append(n - 1)
+    return np.asarray(kept)
@@ -0,0 +1,322 @@
+# utils/equity_series.py - Precomputed, persisted daily equity/drawdown series
+#
+# Tables kept next to trades_journal in the same SQLite file:
+# - daily_summary: one row per trading day (trade count, wins, gross profit/loss, net P&L),
+#   aggregated from trades_journal plus the frozen aggregates of archived months (trade_archive.py).
+# - equity_series: one row per trading day with the running values the Equity Curve page charts
+#   (cumulative P&L, running peak, drawdown, drawdown duration, rolling win rate / expectancy).
+# - equity_dirty_days: days whose trades changed since the last refresh. Filled by triggers on
+#   trades_journal, so every writer (this app, another worker process, a manual edit in a DB
+#   browser) marks days dirty inside its own transaction.
+#
+# get_equity_series() re-aggregates only the dirty days and recomputes the running series from the
+# earliest dirty day onward. Appending today's trades costs one day of work, and loading the page
+# reads the stored series (one row per day, never the raw trades).
+import threading
+
+import database as db
+import trade_archive # Archived months' frozen daily aggregates
+from instrumentation import timed
+from app_logging import get_logger
+
+SUMMARY_TABLE = 'daily_summary'
+SERIES_TABLE = 'equity_series'
+DIRTY_TABLE = 'equity_dirty_days'
+META_TABLE = 'equity_series_meta'
+
+# Rolling win rate / expectancy window, in trading days. Changing it triggers a full rebuild.
+ROLLING_WINDOW_DAYS = 20
+
+SERIES_COLUMNS = [
+    "day", "net_pnl", "trade_count", "cum_pnl", "peak", "drawdown",
+    "drawdown_days", "rolling_win_rate", "rolling_expectancy",
+]
+
+# Entry Time is stored as '%Y-%m-%d %H:%M:%S'; the first 10 characters are the trading day
+_DAY_SQL = 'substr("Entry Time", 1, 10)'
+_PNL_SQL = 'COALESCE(CAST("Realized P&L" AS REAL), 0)'
+_MAX_SQL_PARAMS = 900 # Stay under SQLite's bound-parameter limit
+
+log = get_logger(__name__)
+
+
+def _trigger_day_sql(ref):
+    """Trading day of the NEW/OLD row inside a trigger body."""
+    return f'substr({ref}."Entry Time", 1, 10)'
+
+
+def _trigger_has_day_sql(ref):
+    """True (in SQL) if the NEW/OLD row has an Entry Time."""
+    return f"{ref}.\"Entry Time\" IS NOT NULL AND {ref}.\"Entry Time\" != ''"
+
+
+class EquitySeriesStore:
+    """Maintains daily_summary/equity_series for the current database and serves the stored series."""
+
+    def __init__(self, window_days=ROLLING_WINDOW_DAYS):
+        self.window_days = window_days
+        self._locks = {} # Database name -> lock: one refresh at a time per journal and process (SQLite serializes processes)
+        self._locks_lock = threading.Lock()
+        self._installed = set() # Database names whose tables/triggers this process has ensured
+
+    @timed("db")
+    def get_equity_series(self):
+        """
+        Returns the stored daily series for the current database as a list of dicts
+        (keys: SERIES_COLUMNS), oldest day first. Dirty days are refreshed first.
+        """
+        with self._database_lock(), db.connection() as conn:
+            db.retry_on_busy(self._ensure_tables, conn) # Other processes may hold the write lock
+            # Plain read first: a page view only takes the write lock when there's something to fold in
+            conn.execute("BEGIN")
+            try:
+                series = self._read_series(conn) if self._is_up_to_date(conn) else None
+            finally:
+                conn.rollback()
+            if series is None:
+                db.retry_on_busy(self._refresh, conn, False)
+                series = self._read_series(conn)
+            return series
+
+    @timed("db")
+    def install(self):
+        """Creates the tables and change-tracking triggers in the current database (idempotent)."""
+        with self._database_lock():
+            conn = db.get_db_connection()
+            try:
+                db.retry_on_busy(self._ensure_tables, conn)
+            finally:
+                conn.close()
+
+    @timed("db")
+    def rebuild(self):
+        """Recomputes both tables from scratch for the current database."""
+        with self._database_lock():
+            conn = db.get_db_connection()
+            try:
+                db.retry_on_busy(self._ensure_tables, conn)
+                db.retry_on_busy(self._refresh, conn, True)
+            finally:
+                conn.close()
+
+    def _database_lock(self):
+        """The lock of the current database (sessions on other journals don't wait for it)."""
+        db_name = db.get_database_info()[0]
+        with self._locks_lock:
+            return self._locks.setdefault(db_name, threading.Lock())
+
+    # --- Internals (caller holds the database's lock) ---
+
+    def _ensure_tables(self, conn):
+        db_name = db.get_database_info()[0]
+        if db_name in self._installed:
+            return
+        # One transaction under the write lock, so worker processes starting together don't race
+        try:
+            self._create_tables(conn)
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        self._installed.add(db_name)
+
+    @staticmethod
+    def _create_tables(conn):
+        conn.executescript(f"""
+        BEGIN IMMEDIATE;
+        CREATE TABLE IF NOT EXISTS {SUMMARY_TABLE} (
+            day TEXT PRIMARY KEY,
+            trade_count INTEGER NOT NULL,
+            win_count INTEGER NOT NULL,
+            gross_profit REAL NOT NULL,
+            gross_loss REAL NOT NULL,
+            net_pnl REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS {SERIES_TABLE} (
+            day TEXT PRIMARY KEY,
+            net_pnl REAL NOT NULL,
+            trade_count INTEGER NOT NULL,
+            cum_pnl REAL NOT NULL,
+            peak REAL NOT NULL,
+            drawdown REAL NOT NULL,
+            drawdown_days INTEGER NOT NULL,
+            rolling_win_rate REAL,
+            rolling_expectancy REAL
+        );
+        CREATE TABLE IF NOT EXISTS {DIRTY_TABLE} (
+            day TEXT PRIMARY KEY
+        );
+        CREATE TABLE IF NOT EXISTS {META_TABLE} (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+
+        CREATE TRIGGER IF NOT EXISTS {db.TABLE_NAME}_equity_insert AFTER INSERT ON {db.TABLE_NAME}
+        WHEN {_trigger_has_day_sql('NEW')}
+        BEGIN
+            INSERT OR IGNORE INTO {DIRTY_TABLE} (day) VALUES ({_trigger_day_sql('NEW')});
+        END;
+        CREATE TRIGGER IF NOT EXISTS {db.TABLE_NAME}_equity_delete AFTER DELETE ON {db.TABLE_NAME}
+        WHEN {_trigger_has_day_sql('OLD')}
+        BEGIN
+            INSERT OR IGNORE INTO {DIRTY_TABLE} (day) VALUES ({_trigger_day_sql('OLD')});
+        END;
+        CREATE TRIGGER IF NOT EXISTS {db.TABLE_NAME}_equity_update
+        AFTER UPDATE OF "Entry Time", "Realized P&L" ON {db.TABLE_NAME}
+        BEGIN
+            INSERT OR IGNORE INTO {DIRTY_TABLE} (day) SELECT {_trigger_day_sql('OLD')} WHERE {_trigger_has_day_sql('OLD')};
+            INSERT OR IGNORE INTO {DIRTY_TABLE} (day) SELECT {_trigger_day_sql('NEW')} WHERE {_trigger_has_day_sql('NEW')};
+        END;
+        COMMIT;
+        """)
+
+    def _is_up_to_date(self, conn):
+        """True if no day is dirty and the series was built with this window (read only)."""
+        row = conn.execute(f"SELECT value FROM {META_TABLE} WHERE key = 'window_days'").fetchone()
+        if row is None or row['value'] != str(self.window_days):
+            return False
+        return conn.execute(f"SELECT 1 FROM {DIRTY_TABLE} LIMIT 1").fetchone() is None
+
+    @staticmethod
+    def _read_series(conn):
+        cursor = conn.execute(f"SELECT {', '.join(SERIES_COLUMNS)} FROM {SERIES_TABLE} ORDER BY day ASC")
+        return [dict(row) for row in cursor.fetchall()]
+
+    def _refresh(self, conn, full):
+        """
+        Brings daily_summary/equity_series up to date in one write transaction. Rebuilds
+        everything if asked to, if the tables were never built (e.g. trades existed before the
+        triggers) or if the rolling window changed; otherwise only the dirty days are redone.
+        """
+        conn.execute("BEGIN IMMEDIATE") # Hold the write lock so no trade changes mid-refresh
+        try:
+            row = conn.execute(f"SELECT value FROM {META_TABLE} WHERE key = 'window_days'").fetchone()
+            full = full or row is None or row['value'] != str(self.window_days)
+            if full:
+                conn.execute(f"DELETE FROM {SUMMARY_TABLE}")
+                conn.execute(f"""
+                    INSERT INTO {SUMMARY_TABLE} (day, trade_count, win_count, gross_profit, gross_loss, net_pnl)
+                    {self._summary_select_sql()}
+                """)
+                self._recompute_series(conn, from_day=None)
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {META_TABLE} (key, value) VALUES ('window_days', ?)",
+                    (str(self.window_days),)
+                )
+            else:
+                days = [r['day'] for r in conn.execute(f"SELECT day FROM {DIRTY_TABLE} ORDER BY day ASC")]
+                if not days:
+                    conn.rollback() # Nothing to do; release the write lock
+                    return
+                for start in range(0, len(days), _MAX_SQL_PARAMS):
+                    chunk = days[start:start + _MAX_SQL_PARAMS]
+                    placeholders = ', '.join('?' for _ in chunk)
+                    conn.execute(f"DELETE FROM {SUMMARY_TABLE} WHERE day IN ({placeholders})", chunk)
+                    conn.execute(f"""
+                        INSERT INTO {SUMMARY_TABLE} (day, trade_count, win_count, gross_profit, gross_loss, net_pnl)
+                        {self._summary_select_sql(f"IN ({placeholders})")}
+                    """, chunk * 2) # The day filter appears once per source
+                self._recompute_series(conn, from_day=days[0])
+            conn.execute(f"DELETE FROM {DIRTY_TABLE}")
+            conn.commit()
+            if full:
+                log.info("Equity series rebuilt")
+        except Exception:
+            conn.rollback()
+            raise
+
+    @staticmethod
+    def _summary_select_sql(day_filter=None):
+        """
+        Per-day aggregates: trades_journal's trades plus the archived days' frozen aggregates
+        (trade_archive.py), only for the days matching day_filter (e.g. "IN (?, ?)") if given.
+        """
+        hot_filter = f"AND {_DAY_SQL} {day_filter}" if day_filter else ""
+        frozen_filter = f"WHERE day {day_filter}" if day_filter else ""
+        return f"""
+            SELECT day, SUM(trade_count), SUM(win_count), SUM(gross_profit), SUM(gross_loss), SUM(net_pnl)
+            FROM (
+                SELECT {_DAY_SQL} AS day,
+                       COUNT(*) AS trade_count,
+                       SUM(CASE WHEN {_PNL_SQL} > 0 THEN 1 ELSE 0 END) AS win_count,
+                       SUM(CASE WHEN {_PNL_SQL} > 0 THEN {_PNL_SQL} ELSE 0 END) AS gross_profit,
+                       SUM(CASE WHEN {_PNL_SQL} < 0 THEN {_PNL_SQL} ELSE 0 END) AS gross_loss,
+                       SUM({_PNL_SQL}) AS net_pnl
+                FROM {db.TABLE_NAME}
+                WHERE "Entry Time" IS NOT NULL AND "Entry Time" != '' {hot_filter}
+                GROUP BY {_DAY_SQL}
+                UNION ALL
+                SELECT day, trade_count, win_count, gross_profit, gross_loss, net_pnl
+                FROM {trade_archive.FROZEN_SUMMARY_TABLE} {frozen_filter}
+            )
+            GROUP BY day
+        """
+
+    def _recompute_series(self, conn, from_day):
+        """
+        Rewrites equity_series rows from from_day (None = the beginning) onward, seeding the
+        running values from the stored row just before it.
+        """
+        cum_pnl = peak = 0.0
+        drawdown_days = 0
+        window = [] # (trade_count, win_count, net_pnl) of the last window_days days
+        if from_day is None:
+            conn.execute(f"DELETE FROM {SERIES_TABLE}")
+        else:
+            conn.execute(f"DELETE FROM {SERIES_TABLE} WHERE day >= ?", (from_day,))
+            previous = conn.execute(
+                f"SELECT cum_pnl, peak, drawdown_days FROM {SERIES_TABLE} WHERE day < ? ORDER BY day DESC LIMIT 1",
+                (from_day,)
+            ).fetchone()
+            if previous is not None:
+                cum_pnl, peak, drawdown_days = previous['cum_pnl'], previous['peak'], previous['drawdown_days']
+            window = [
+                (row['trade_count'], row['win_count'], row['net_pnl'])
+                for row in reversed(conn.execute(
+                    f"SELECT trade_count, win_count, net_pnl FROM {SUMMARY_TABLE} WHERE day < ? ORDER BY day DESC LIMIT ?",
+                    (from_day, self.window_days - 1)
+                ).fetchall())
+            ]
+
+        summary_rows = conn.execute(
+            f"SELECT day, trade_count, win_count, net_pnl FROM {SUMMARY_TABLE} WHERE day >= ? ORDER BY day ASC",
+            (from_day or '',)
+        ).fetchall()
+
+        series_rows = []
+        for row in summary_rows:
+            cum_pnl += row['net_pnl']
+            if cum_pnl >= peak:
+                peak = cum_pnl
+                drawdown_days = 0 # New equity high
+            else:
+                drawdown_days += 1 # Trading days since the last high
+            window.append((row['trade_count'], row['win_count'], row['net_pnl']))
+            if len(window) > self.window_days:
+                window.pop(0)
+            window_trades = sum(w[0] for w in window)
+            rolling_win_rate = (sum(w[1] for w in window) / window_trades * 100) if window_trades else None
+            rolling_expectancy = (sum(w[2] for w in window) / window_trades) if window_trades else None
+            series_rows.append((
+                row['day'], row['net_pnl'], row['trade_count'], cum_pnl, peak, cum_pnl - peak,
+                drawdown_days, rolling_win_rate, rolling_expectancy,
+            ))
+
+        conn.executemany(
+            f"INSERT INTO {SERIES_TABLE} ({', '.join(SERIES_COLUMNS)}) VALUES ({', '.join('?' for _ in SERIES_COLUMNS)})",
+            series_rows
+        )
+
+
+# --- Shared instance ---
+_equity_store = None
+_equity_store_lock = threading.Lock()
+
+
+def get_equity_store():
+    """Returns the process-wide equity series store."""
+    global _equity_store
+    with _equity_store_lock:
+        if _equity_store is None:
+            _equity_store = EquitySeriesStore()
+        return _equity_store
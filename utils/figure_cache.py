@@ -0,0 +1,78 @@
+# utils/figure_cache.py - Cache of serialized chart payloads keyed by dataset version
+#
+# Entries are keyed by (database name, data version, chart id), where the data version comes from
+# database.get_data_version() and changes on every committed write. A page can therefore check
+# the cache BEFORE fetching trades: if the dataset hasn't changed since the chart was last built,
+# the stored JSON is returned as a plain dict (which dcc.Graph accepts as a figure) and neither
+# pandas nor plotly has to run. Old versions simply age out of the LRU.
+# Each open journal has its own cache (journals.Journal.cache), so one account's charts never
+# push another account's out.
+
+import json
+import threading
+from collections import OrderedDict
+
+import database as db
+import journals
+from lazy_imports import lazy_module
+plotly_json = lazy_module("plotly.io.json") # Only needed when storing a freshly built figure
+
+
+class FigureCache:
+    """LRU cache of serialized figures (or any JSON-serializable payload) per dataset version."""
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # (db_name, data_version, chart_id) -> JSON string
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def current_key_prefix():
+        """Returns (database name, data version) for the currently configured database."""
+        return db.get_database_info()[0], db.get_data_version()
+
+    def get(self, key_prefix, chart_id):
+        """Returns the cached payload for chart_id as a new dict/list, or None on a miss."""
+        key = (*key_prefix, chart_id)
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return json.loads(payload) # Fresh object every time, so callers can't mutate the cache
+
+    def get_many(self, key_prefix, chart_ids):
+        """Returns a list of cached payloads for chart_ids, or None unless ALL of them are cached."""
+        payloads = []
+        for chart_id in chart_ids:
+            payload = self.get(key_prefix, chart_id)
+            if payload is None:
+                return None
+            payloads.append(payload)
+        return payloads
+
+    def put(self, key_prefix, chart_id, figure):
+        """Serializes figure (a go.Figure, figure dict or other JSON-able value) and stores it."""
+        payload = plotly_json.to_json_plotly(figure) # Handles go objects, numpy arrays, pandas values
+        key = (*key_prefix, chart_id)
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False) # Evict least recently used
+        return payload
+
+    def clear(self):
+        """Drops every cached payload."""
+        with self._lock:
+            self._entries.clear()
+
+
+# --- Per-journal instances ---
+def get_figure_cache():
+    """Returns the current journal's figure cache."""
+    return journals.get_journal().cache("figures", FigureCache)
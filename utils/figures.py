@@ -0,0 +1,231 @@
+# utils/figures.py - Lightweight figure builder (plain dict figure specs)
+#
+# plotly.graph_objects validates every property on construction, which dominates the cost of
+# building the small charts this app shows. The helpers below emit the same JSON structure that
+# go.Figure(...).to_plotly_json() would, as plain dicts that dcc.Graph accepts directly:
+#
+#   fig = figures.figure(figures.bar(x=..., y=..., marker_color="green"), title="P&L")
+#   figures.update_layout(fig, yaxis_range=[0, 100])
+#
+# - Keyword arguments support plotly's "magic underscore" paths (marker_color, xaxis_title, ...).
+# - String titles are expanded to {"text": ...} as plotly.js 3 requires.
+# - numpy arrays / pandas Series are converted straight to lists; long numeric arrays are sent as
+#   base64 typed arrays ({"dtype": "f8", "bdata": ...}), which plotly.js decodes without parsing
+#   one JSON number per point.
+# There is NO validation: a misspelled property is silently ignored by plotly.js, so check new
+# charts in the browser.
+
+import base64
+import datetime
+import math
+
+from lazy_imports import lazy_module
+np = lazy_module("numpy") # Only needed once a chart actually contains array data
+
+# Numeric arrays at least this long are encoded as base64 typed arrays instead of JSON lists
+TYPED_ARRAY_MIN_LENGTH = 64
+
+# Real plotly property names that contain an underscore (never split as magic-underscore paths)
+_UNDERSCORE_PROPERTIES = {'plot_bgcolor', 'paper_bgcolor', 'error_x', 'error_y'}
+
+# numpy dtype kind/itemsize -> plotly.js typed array dtype (plotly.js has no 64-bit integers)
+_TYPED_ARRAY_DTYPES = {
+    ('f', 8): 'f8', ('f', 4): 'f4',
+    ('i', 4): 'i4', ('i', 2): 'i2', ('i', 1): 'i1',
+    ('u', 4): 'u4', ('u', 2): 'u2', ('u', 1): 'u1',
+}
+
+
+############################################################################
+# Figures
+############################################################################
+def figure(data=None, layout=None, **layout_props):
+    """
+    Returns a figure dict. data is a trace dict or a list of them; layout is a layout dict
+    and/or layout_props are layout keyword arguments (magic underscores allowed).
+    """
+    if data is None:
+        data = []
+    elif isinstance(data, dict):
+        data = [data]
+    fig = {"data": list(data), "layout": {}}
+    if layout:
+        update_layout(fig, **layout)
+    if layout_props:
+        update_layout(fig, **layout_props)
+    return fig
+
+
+def update_layout(fig, **layout_props):
+    """Merges layout properties into fig (like go.Figure.update_layout) and returns fig."""
+    _update(fig["layout"], layout_props)
+    return fig
+
+
+def add_trace(fig, trace):
+    """Appends a trace dict to fig and returns fig."""
+    fig["data"].append(trace)
+    return fig
+
+
+def update_traces(fig, **trace_props):
+    """Merges properties into every trace of fig (like go.Figure.update_traces) and returns fig."""
+    for trace in fig["data"]:
+        _update(trace, trace_props)
+    return fig
+
+
+############################################################################
+# Traces (only the types this app uses)
+############################################################################
+def _trace(trace_type, props):
+    trace = {"type": trace_type}
+    _update(trace, props)
+    return trace
+
+
+def scatter(**props):
+    """SVG line/marker trace (go.Scatter)."""
+    return _trace("scatter", props)
+
+
+def scattergl(**props):
+    """WebGL line/marker trace (go.Scattergl), for series with many points."""
+    return _trace("scattergl", props)
+
+
+def bar(**props):
+    """Bar trace (go.Bar)."""
+    return _trace("bar", props)
+
+
+def pie(**props):
+    """Pie/donut trace (go.Pie)."""
+    return _trace("pie", props)
+
+
+def indicator(**props):
+    """Gauge/number indicator trace (go.Indicator)."""
+    return _trace("indicator", props)
+
+
+############################################################################
+# Property helpers
+############################################################################
+def _update(target, props):
+    """Sets props on the target dict, expanding magic-underscore keys into nested dicts."""
+    for key, value in props.items():
+        path = _property_path(key)
+        node = target
+        for part in path[:-1]:
+            child = node.get(part)
+            if not isinstance(child, dict):
+                child = node[part] = {}
+            node = child
+        leaf = path[-1]
+        value = _normalize(leaf, value)
+        if isinstance(value, dict) and isinstance(node.get(leaf), dict):
+            _deep_merge(node[leaf], value) # update_layout(xaxis={...}) merges, like plotly
+        else:
+            node[leaf] = value
+
+
+def _property_path(key):
+    """'xaxis_title_font' -> ['xaxis', 'title', 'font'], keeping names like 'paper_bgcolor' whole."""
+    parts = key.split('_')
+    path = []
+    i = 0
+    while i < len(parts):
+        if i + 1 < len(parts) and f"{parts[i]}_{parts[i + 1]}" in _UNDERSCORE_PROPERTIES:
+            path.append(f"{parts[i]}_{parts[i + 1]}")
+            i += 2
+        else:
+            path.append(parts[i])
+            i += 1
+    return path
+
+
+def _deep_merge(target, source):
+    for key, value in source.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _deep_merge(target[key], value)
+        else:
+            target[key] = value
+
+
+def _normalize(key, value):
+    """Converts a property value to plain JSON-able Python (titles, nested dicts, arrays)."""
+    if key == 'title' and isinstance(value, str):
+        return {"text": value}
+    if isinstance(value, dict):
+        return {k: _normalize(k, v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(None, v) for v in value]
+    if isinstance(value, (str, bool, int, type(None))):
+        return value
+    if isinstance(value, float):
+        return None if math.isnan(value) else value
+    if hasattr(value, 'to_numpy'): # pandas Series / Index
+        return to_plain_array(value.to_numpy())
+    if type(value).__module__ == 'numpy':
+        if isinstance(value, np.ndarray):
+            return to_plain_array(value)
+        return _plain_scalar(value.item())
+    return _plain_scalar(value)
+
+
+def to_plain_array(arr):
+    """
+    Converts a numpy array to what plotly.js expects: a base64 typed array for long numeric
+    data, ISO strings for datetimes, or a plain list otherwise.
+    """
+    arr = np.asarray(arr)
+    kind = arr.dtype.kind
+    if kind in 'iuf' and arr.ndim == 1 and len(arr) >= TYPED_ARRAY_MIN_LENGTH:
+        return _typed_array(arr)
+    if kind == 'M': # datetime64 -> ISO strings, NaT -> None (a gap)
+        strings = np.datetime_as_string(arr, unit='s')
+        return [None if s == 'NaT' else s for s in strings.tolist()]
+    if kind == 'f':
+        return [None if math.isnan(v) else v for v in arr.tolist()]
+    if kind == 'O':
+        return [_plain_scalar(v) for v in arr.tolist()]
+    return arr.tolist()
+
+
+def _typed_array(arr):
+    if arr.dtype.kind == 'i' and arr.dtype.itemsize == 8:
+        # int64 isn't a plotly.js typed array; narrow to int32 when the values fit
+        if len(arr) == 0 or (arr.min() >= -2**31 and arr.max() < 2**31):
+            arr = arr.astype('<i4')
+        else:
+            arr = arr.astype('<f8')
+    elif arr.dtype.kind == 'u' and arr.dtype.itemsize == 8:
+        arr = arr.astype('<f8')
+    dtype = _TYPED_ARRAY_DTYPES[(arr.dtype.kind, arr.dtype.itemsize)]
+    arr = np.ascontiguousarray(arr, dtype=arr.dtype.newbyteorder('<'))
+    return {"dtype": dtype, "bdata": base64.b64encode(arr.tobytes()).decode('ascii')}
+
+
+def _plain_scalar(value):
+    """Converts a single (possibly numpy/pandas/datetime) value to plain JSON-able Python."""
+    if value is None or isinstance(value, (str, bool, int)):
+        return value
+    if isinstance(value, float):
+        return None if math.isnan(value) else value
+    if type(value).__module__ == 'numpy':
+        return _plain_scalar(value.item())
+    if isinstance(value, (datetime.datetime, datetime.date)): # Includes pandas Timestamp
+        if value != value: # pandas NaT
+            return None
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {k: _normalize(k, v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(None, v) for v in value]
+    try:
+        if value != value: # pd.NA / NaT and other NaN-like values
+            return None
+    except TypeError: # pd.NA refuses to be used as a bool
+        return None
+    return value
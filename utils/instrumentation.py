@@ -0,0 +1,345 @@
+# utils/instrumentation.py - Per-callback latency and payload-size instrumentation
+#
+# instrument_callbacks(app) wraps every registered Dash callback (dash.callback and app.callback
+# alike) and records, per call:
+# - wall: the whole callback, including the JSON encoding of its response
+# - db: time inside functions marked @timed("db") (the database / equity series functions)
+# - figure: time inside functions marked @timed("figure") (the pages' chart builders)
+# - serialize: time spent JSON-encoding the response
+# - pandas: the rest of the callback body (wall minus the phases above). The callbacks do little
+#   else besides DataFrame work, so this is where their pandas time ends up.
+# - response_bytes: size of the serialized response
+#
+# The numbers feed Prometheus-style histograms (served as text at /metrics, local requests only,
+# see register_metrics_endpoint) and a rolling window of recent calls for the Diagnostics page.
+#
+#   @instrumentation.timed("db")
+#   def fetch_all_trades_from_db(): ...
+
+import contextvars
+import functools
+import math
+import threading
+import time
+from collections import deque
+
+from app_logging import get_logger
+
+# Histogram bucket upper bounds (Prometheus 'le' labels); +Inf is implicit
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+
+PHASES = ("wall", "db", "pandas", "figure", "serialize")
+_MEASURED_PHASES = ("db", "figure", "serialize") # pandas is derived from the others
+
+RECENT_CALLS = 500 # Calls kept for the Diagnostics page
+
+log = get_logger(__name__)
+
+# The record of the callback running in this context (None outside callbacks). Dash runs each
+# callback in its own copy of the context, so concurrent requests never share a record.
+_current_call = contextvars.ContextVar("instrumented_callback_call", default=None)
+
+
+class _CallRecord:
+    """Phase timings collected while one callback runs."""
+
+    __slots__ = ("phase_seconds", "active_phases")
+
+    def __init__(self):
+        self.phase_seconds = dict.fromkeys(_MEASURED_PHASES, 0.0)
+        self.active_phases = set() # Phases currently being timed (nested calls aren't counted twice)
+
+
+class _Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense (bucket counts, sum, count)."""
+
+    __slots__ = ("bounds", "counts", "total", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1) # Last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative_counts(self):
+        running = 0
+        for count in self.counts:
+            running += count
+            yield running
+
+
+class CallbackMetrics:
+    """
+    Histograms and recent calls for every instrumented callback.
+    Use get_callback_metrics() to get the shared instance.
+    """
+
+    def __init__(self, recent_calls=RECENT_CALLS):
+        self._lock = threading.Lock()
+        self._durations = {} # (callback, phase) -> _Histogram
+        self._sizes = {} # callback -> _Histogram
+        self._outcomes = {} # (callback, outcome) -> count
+        self._recent = deque(maxlen=recent_calls)
+
+    def record(self, callback, outcome, phase_seconds, response_bytes):
+        """Adds one finished call. outcome is 'ok', 'prevented' or 'error'."""
+        with self._lock:
+            for phase, seconds in phase_seconds.items():
+                histogram = self._durations.get((callback, phase))
+                if histogram is None:
+                    histogram = self._durations[(callback, phase)] = _Histogram(DURATION_BUCKETS)
+                histogram.observe(seconds)
+            if outcome == "ok":
+                histogram = self._sizes.get(callback)
+                if histogram is None:
+                    histogram = self._sizes[callback] = _Histogram(SIZE_BUCKETS)
+                histogram.observe(response_bytes)
+            self._outcomes[(callback, outcome)] = self._outcomes.get((callback, outcome), 0) + 1
+            self._recent.append({
+                "time": time.time(),
+                "callback": callback,
+                "outcome": outcome,
+                "response_bytes": response_bytes,
+                **{f"{phase}_ms": seconds * 1000 for phase, seconds in phase_seconds.items()},
+            })
+
+    def recent_calls(self):
+        """The most recent calls (oldest first) as a list of dicts."""
+        with self._lock:
+            return list(self._recent)
+
+    def summary(self):
+        """
+        One dict per callback over the recent calls: call count, errors, wall p50/p95/max and the
+        mean of every phase and of the response size. Slowest p95 first.
+        """
+        by_callback = {}
+        for call in self.recent_calls():
+            by_callback.setdefault(call["callback"], []).append(call)
+        rows = []
+        for callback, calls in by_callback.items():
+            walls = sorted(call["wall_ms"] for call in calls)
+            row = {
+                "callback": callback,
+                "calls": len(calls),
+                "errors": sum(1 for call in calls if call["outcome"] == "error"),
+                "wall_p50_ms": _percentile(walls, 0.50),
+                "wall_p95_ms": _percentile(walls, 0.95),
+                "wall_max_ms": walls[-1],
+            }
+            for phase in PHASES[1:]:
+                row[f"{phase}_avg_ms"] = sum(call[f"{phase}_ms"] for call in calls) / len(calls)
+            row["response_avg_bytes"] = sum(call["response_bytes"] for call in calls) / len(calls)
+            rows.append(row)
+        rows.sort(key=lambda row: row["wall_p95_ms"], reverse=True)
+        return rows
+
+    def render_prometheus(self):
+        """All histograms and counters in the Prometheus text exposition format."""
+        with self._lock:
+            lines = [
+                "# HELP dash_callback_duration_seconds Time spent per Dash callback call, by phase.",
+                "# TYPE dash_callback_duration_seconds histogram",
+            ]
+            for (callback, phase), histogram in sorted(self._durations.items()):
+                lines += _histogram_lines("dash_callback_duration_seconds",
+                                          f'callback="{_escape(callback)}",phase="{phase}"', histogram)
+            lines += [
+                "# HELP dash_callback_response_bytes Size of the serialized callback response.",
+                "# TYPE dash_callback_response_bytes histogram",
+            ]
+            for callback, histogram in sorted(self._sizes.items()):
+                lines += _histogram_lines("dash_callback_response_bytes",
+                                          f'callback="{_escape(callback)}"', histogram)
+            lines += [
+                "# HELP dash_callback_calls_total Dash callback calls by outcome (ok, prevented, error).",
+                "# TYPE dash_callback_calls_total counter",
+            ]
+            for (callback, outcome), count in sorted(self._outcomes.items()):
+                lines.append(f'dash_callback_calls_total{{callback="{_escape(callback)}",outcome="{outcome}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self._durations.clear()
+            self._sizes.clear()
+            self._outcomes.clear()
+            self._recent.clear()
+
+
+############################################################################
+# Timing phases
+############################################################################
+class _PhaseTimer:
+    """Context manager / decorator behind timed(); a no-op outside instrumented callbacks."""
+
+    __slots__ = ("phase", "record", "start")
+
+    def __init__(self, phase):
+        self.phase = phase
+        self.record = None
+
+    def __enter__(self):
+        record = _current_call.get()
+        if record is not None and self.phase not in record.active_phases:
+            record.active_phases.add(self.phase)
+            self.record = record
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.record is not None:
+            self.record.phase_seconds[self.phase] += time.perf_counter() - self.start
+            self.record.active_phases.discard(self.phase)
+            self.record = None
+        return False
+
+    def __call__(self, func):
+        phase = self.phase
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _PhaseTimer(phase):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def timed(phase):
+    """
+    Attributes time to a phase ('db', 'figure' or 'serialize') of the running callback.
+    Works as a decorator or as `with timed("db"): ...`. Nested uses of the same phase count once.
+    """
+    if phase not in _MEASURED_PHASES:
+        raise ValueError(f"Unknown phase '{phase}', expected one of {_MEASURED_PHASES}")
+    return _PhaseTimer(phase)
+
+
+############################################################################
+# Wiring into Dash / Flask
+############################################################################
+def instrument_callbacks(app):
+    """
+    Wraps every callback registered on app (call it once the pages' callbacks have been copied
+    into app.callback_map, i.e. from a before_request hook). Safe to call more than once.
+    """
+    metrics = get_callback_metrics()
+    count = 0
+    for entry in app.callback_map.values():
+        callback = entry.get("callback")
+        if callback is None or getattr(callback, "_instrumented", False):
+            continue
+        entry["callback"] = _instrument(callback, metrics)
+        count += 1
+    _instrument_serialization()
+    if count:
+        log.info("Instrumented %d Dash callbacks", count)
+
+
+def _instrument(callback, metrics):
+    # Dash keeps the user function's name on its wrapper (functools.wraps)
+    name = f"{getattr(callback, '__module__', '?')}.{getattr(callback, '__name__', '?')}"
+
+    @functools.wraps(callback)
+    def instrumented(*args, **kwargs):
+        record = _CallRecord()
+        token = _current_call.set(record)
+        outcome = "ok"
+        response = None
+        start = time.perf_counter()
+        try:
+            response = callback(*args, **kwargs)
+            return response
+        except Exception as e:
+            # PreventUpdate is Dash's normal "nothing to do" signal, not a failure
+            outcome = "prevented" if type(e).__name__ == "PreventUpdate" else "error"
+            raise
+        finally:
+            wall = time.perf_counter() - start
+            _current_call.reset(token)
+            phase_seconds = {"wall": wall, **record.phase_seconds}
+            phase_seconds["pandas"] = max(0.0, wall - sum(record.phase_seconds.values()))
+            # Dash returns the response already JSON-encoded (ASCII-only, so characters == bytes)
+            response_bytes = len(response) if isinstance(response, (str, bytes)) else 0
+            metrics.record(name, outcome, phase_seconds, response_bytes)
+
+    instrumented._instrumented = True
+    return instrumented
+
+
+_serialization_lock = threading.Lock()
+
+
+def _instrument_serialization():
+    """Times Dash's response encoding (dash._callback.to_json) as the 'serialize' phase."""
+    from dash import _callback as dash_callback
+    with _serialization_lock:
+        to_json = getattr(dash_callback, "to_json", None)
+        if to_json is None or getattr(to_json, "_instrumented", False):
+            return # Not found in this Dash version: serialization stays part of 'pandas'
+        timed_to_json = timed("serialize")(to_json)
+        timed_to_json._instrumented = True
+        dash_callback.to_json = timed_to_json
+
+
+_LOCAL_ADDRESSES = {"127.0.0.1", "::1", "localhost"}
+
+
+def register_metrics_endpoint(server, path="/metrics"):
+    """Serves the metrics in Prometheus text format at path, to local clients only."""
+    import flask
+
+    def metrics_endpoint():
+        if flask.request.remote_addr not in _LOCAL_ADDRESSES:
+            flask.abort(403)
+        return flask.Response(get_callback_metrics().render_prometheus(),
+                              mimetype="text/plain; version=0.0.4")
+
+    server.add_url_rule(path, endpoint="callback_metrics", view_func=metrics_endpoint)
+
+
+############################################################################
+# Helper Functions
+############################################################################
+def _histogram_lines(metric, labels, histogram):
+    lines = []
+    bounds = [str(bound) for bound in histogram.bounds] + ["+Inf"]
+    for bound, count in zip(bounds, histogram.cumulative_counts()):
+        lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {count}')
+    lines.append(f"{metric}_sum{{{labels}}} {histogram.total}")
+    lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+def _escape(label_value):
+    return label_value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted, non-empty list."""
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+# --- Shared instance ---
+_callback_metrics = None
+_callback_metrics_lock = threading.Lock()
+
+
+def get_callback_metrics():
+    """Returns the process-wide callback metrics."""
+    global _callback_metrics
+    with _callback_metrics_lock:
+        if _callback_metrics is None:
+            _callback_metrics = CallbackMetrics()
+        return _callback_metrics
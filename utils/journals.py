@@ -0,0 +1,188 @@
+# utils/journals.py - Per-session journal selection, with per-journal connection pools and caches
+#
+# The Settings page used to switch journals by rewriting config.json "database_name", which moved
+# every user of the process to the other file at once. The journal is now chosen per browser tab:
+#
+# - app.layout's 'journal-id' dcc.Store (sessionStorage, so each tab has its own) holds the tab's
+#   journal; the Settings page's journal dropdown writes it. assets/journals.js sends it along with
+#   every Dash request (X-Journal header) and assets/change_events.js with the /events stream
+#   (?journal=).
+# - select_request_journal(), a before_request hook, makes that journal the current database for
+#   the rest of the request (database.set_current_database), so callbacks and caches pick it up
+#   without passing it around. Work that leaves the request remembers it: queued writes
+#   (write_queue) and background jobs (background.py) run under their submitter's journal.
+# - Only the journals in config.json "journals" available (plus "database_name", the journal of
+#   tabs that haven't picked one) are accepted; anything else falls back to "database_name".
+# - Every open journal has its own connection pool (database.connection) and its own figure and
+#   day caches (Journal.cache), so a busy account can't evict another account's entries.
+#   JournalRegistry keeps the open journals in LRU order and closes the least recently used one
+#   beyond "max_open", and any journal without a request for "idle_close_s": its pooled
+#   connections are closed and its caches dropped. The next request for it opens it again.
+
+import threading
+import time
+from collections import OrderedDict
+
+import database as db
+import change_events
+from equity_series import get_equity_store
+from app_config import get_config, get_journals_config
+from app_logging import get_logger
+
+STORE_ID = 'journal-id' # dcc.Store in app.layout
+JOURNAL_HEADER = 'X-Journal'
+JOURNAL_QUERY_ARG = 'journal'
+
+log = get_logger(__name__)
+
+
+def default_journal():
+    """The journal of tabs that haven't picked one (config.json "database_name")."""
+    return get_config().get('database_name', 'trades.db')
+
+
+def available_journals():
+    """{database file: label} of the journals a tab may switch to, the default journal first."""
+    available = dict(get_journals_config()["available"])
+    default = default_journal()
+    return {default: available.pop(default, default), **available}
+
+
+def journal_options():
+    """dcc.Dropdown options for the available journals ("file (label)")."""
+    return [{'label': f"{name} ({label})", 'value': name} for name, label in available_journals().items()]
+
+
+def resolve(journal_id):
+    """journal_id if it is an available journal, else the default journal."""
+    return journal_id if journal_id in available_journals() else default_journal()
+
+
+class Journal:
+    """One open journal: its caches (its connection pool lives in database.py, keyed by name)."""
+
+    def __init__(self, name):
+        self.name = name
+        self.last_used = time.monotonic()
+        self._caches = {}
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def cache(self, kind, factory):
+        """This journal's cache of the given kind, created with factory() on first use."""
+        with self._lock:
+            cache = self._caches.get(kind)
+            if cache is None:
+                cache = self._caches[kind] = factory()
+            return cache
+
+    def peek_cache(self, kind):
+        """This journal's cache of the given kind, or None if it hasn't been created."""
+        with self._lock:
+            return self._caches.get(kind)
+
+    def ensure_initialized(self):
+        """Creates the journal's tables and triggers once per process (the journal must be current)."""
+        if self._initialized:
+            return
+        with self._lock:
+            if self._initialized:
+                return
+            db.ensure_db_initialized()
+            get_equity_store().install()
+            change_events.get_change_feed().install()
+            self._initialized = True
+
+    def close(self):
+        with self._lock:
+            self._caches.clear()
+        db.close_pool(self.name)
+
+
+class JournalRegistry:
+    """The open journals, least recently used first."""
+
+    def __init__(self):
+        self._journals = OrderedDict() # name -> Journal
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        """The open journal called name (opened if needed), now the most recently used one."""
+        settings = get_journals_config()
+        now = time.monotonic()
+        with self._lock:
+            journal = self._journals.get(name)
+            if journal is None:
+                journal = self._journals[name] = Journal(name)
+            self._journals.move_to_end(name)
+            journal.last_used = now
+            evicted = []
+            while len(self._journals) > max(1, int(settings["max_open"])):
+                evicted.append(self._journals.popitem(last=False)[1])
+            for other in list(self._journals.values()):
+                if other is not journal and now - other.last_used > settings["idle_close_s"]:
+                    evicted.append(self._journals.pop(other.name))
+            open_names = set(self._journals)
+        for old in evicted: # Outside the lock: closing waits for the pool's lock
+            old.close()
+            log.info("Closed journal '%s'", old.name)
+        if evicted:
+            # Pools opened outside a request (write queue, change feed) for journals that aren't open
+            for name in set(db.pool_names()) - open_names:
+                db.close_pool(name)
+        return journal
+
+    def peek(self, name):
+        """The open journal called name, or None (doesn't open it or count as a use)."""
+        with self._lock:
+            return self._journals.get(name)
+
+    def open_names(self):
+        """Names of the open journals, least recently used first."""
+        with self._lock:
+            return list(self._journals)
+
+
+def get_journal():
+    """The current database's Journal (see database.use_database)."""
+    return get_registry().get(db.get_database_info()[0])
+
+
+############################################################################
+# Request hooks
+############################################################################
+def select_request_journal():
+    """before_request hook: makes the tab's journal the current database for this request."""
+    import flask
+    request = flask.request
+    name = resolve(request.headers.get(JOURNAL_HEADER) or request.args.get(JOURNAL_QUERY_ARG))
+    flask.g.journal_token = db.set_current_database(name)
+    get_registry().get(name).ensure_initialized()
+
+
+def _reset_request_journal(exc=None):
+    import flask
+    token = flask.g.pop('journal_token', None)
+    if token is not None:
+        db.reset_current_database(token)
+
+
+def install_journal_selection(server):
+    """Registers the request hooks. Register after the startup hook (it loads config.json first)."""
+    server.before_request(select_request_journal)
+    server.teardown_request(_reset_request_journal)
+
+
+# --- Shared instance ---
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Returns the process-wide JournalRegistry, creating it on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = JournalRegistry()
+    return _registry
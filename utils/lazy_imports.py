@@ -0,0 +1,80 @@
+# utils/lazy_imports.py - Defer heavy library imports until they are first used
+#
+# pandas alone is about half of the app's cold-start time and plotly.graph_objects adds more, yet
+# page modules only need them inside callbacks. Binding them through lazy_module() keeps the
+# familiar `pd.DataFrame(...)` call sites while the real import happens on the first attribute
+# access (after the server is already up).
+
+import importlib
+import threading
+
+from app_logging import get_logger
+
+log = get_logger(__name__)
+
+
+class _LazyModule:
+    """Stand-in for a module that is imported on first attribute access."""
+
+    def __init__(self, module_name):
+        self._module_name = module_name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._module_name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded yet"
+        return f"<lazy module '{self._module_name}' ({state})>"
+
+
+def lazy_module(module_name):
+    """Returns a proxy for module_name; e.g. `pd = lazy_module('pandas')`."""
+    return _LazyModule(module_name)
+
+
+def import_now(*module_names):
+    """Imports the given modules in the calling thread (a failed import is logged, not raised)."""
+    for name in module_names:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            log.warning("Import of %s failed: %s", name, e)
+
+
+# Set while no import_in_background() is running
+_background_imports_done = threading.Event()
+_background_imports_done.set()
+
+
+def import_in_background(*module_names):
+    """
+    Starts importing the given modules in a daemon thread and returns at once. The app starts
+    this when it is imported, so the imports overlap with binding and the first page's assets.
+    """
+    _background_imports_done.clear()
+    threading.Thread(target=_import_and_signal, args=(module_names,), name="import-warmup", daemon=True).start()
+
+
+def wait_for_background_imports():
+    """
+    Blocks until import_in_background() has finished (returns at once afterwards). plotly peeks
+    at sys.modules for pandas, so code that serializes responses must not run while pandas is
+    only half imported by the warm-up thread.
+    """
+    _background_imports_done.wait()
+
+
+def _import_and_signal(module_names):
+    try:
+        import_now(*module_names)
+    finally:
+        _background_imports_done.set()
@@ -0,0 +1,66 @@
+# utils/payload.py - Smaller DataTable payloads
+#
+# Table callbacks used to send every stored column of every row, floats at full precision
+# (e.g. 1237.5000000000002) and 'Entry Time' as pandas Timestamps. table_rows() builds only what
+# the table needs, before the rows are serialized:
+# - only the given column ids (the table's columns, including the hidden 'id' used for writes)
+# - the numbers in ROUNDED_COLUMNS rounded to what the table shows (money and points: 2 decimals),
+#   and whole numbers sent as integers ('5' rather than '5.0'; SQLite REAL columns read back as floats)
+# - NaN/NaT as None, timestamps as 'YYYY-MM-DD HH:MM:SS' (the format stored in the database, so
+#   edited rows are written back unchanged)
+
+import datetime
+import math
+
+from lazy_imports import lazy_module # pandas is imported on first use, not at app startup
+
+pd = lazy_module("pandas")
+
+# Column -> decimals kept in table payloads
+ROUNDED_COLUMNS = {
+    "Risk ($)": 2,
+    "Points Realized": 2,
+    "Realized P&L": 2,
+}
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def table_rows(records, column_ids, rounded=ROUNDED_COLUMNS):
+    """
+    DataTable rows (list of dicts) with only column_ids, rounded and JSON-ready.
+    records is a list of dicts or a DataFrame; missing columns are left out of the rows.
+    """
+    if isinstance(records, list):
+        return [
+            {col: _clean_value(row[col], rounded.get(col)) for col in column_ids if col in row}
+            for row in records
+        ]
+
+    # Column by column into plain Python lists, then zipped into rows: much faster than
+    # DataFrame.to_dict('records') on an object-dtype frame (which boxes every value)
+    names = [col for col in column_ids if col in records.columns]
+    values = []
+    for col in names:
+        series = records[col]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            series = series.dt.strftime(TIMESTAMP_FORMAT) # NaT stays missing
+        elif pd.api.types.is_float_dtype(series):
+            if col in rounded:
+                series = series.round(rounded[col])
+            if (series.dropna() % 1 == 0).all(): # e.g. 'Size', 'Trade #': send as integers
+                values.append([None if v != v else int(v) for v in series.tolist()])
+                continue
+        values.append([None if v != v else v for v in series.tolist()]) # v != v: NaN/NaT -> None
+    return [dict(zip(names, row)) for row in zip(*values)]
+
+
+def _clean_value(value, decimals):
+    if isinstance(value, float):
+        if math.isnan(value):
+            return None
+        if decimals is not None:
+            value = round(value, decimals)
+        return int(value) if value.is_integer() else value
+    if isinstance(value, datetime.datetime):
+        return value.strftime(TIMESTAMP_FORMAT) # Also pandas Timestamps (a datetime subclass)
+    return value
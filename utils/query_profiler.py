@@ -0,0 +1,334 @@
+# utils/query_profiler.py - Opt-in SQL query profiler and rotating slow-query log
+#
+# When enabled, database.get_db_connection() opens connections with ProfilingConnection, whose
+# cursors time every statement from execute() until its last row is fetched (or the cursor moves
+# on / closes) and record:
+# - the statement and the SHAPE of its parameters (types and counts, never the values)
+# - duration, rows returned, rows changed
+# - SQLite VM steps (counted with a progress handler every PROGRESS_STEP instructions), a proxy for
+#   how much work the query did
+# Statements slower than the threshold are written to a rotating slow-query log together with
+# their EXPLAIN QUERY PLAN and an estimate of the rows scanned (row counts of the tables the plan
+# reads with a full SCAN). summary() aggregates all profiled statements in this process.
+#
+# Turn it on in config.json:
+#   "sql_profiler": {"enabled": true, "slow_query_ms": 50, "log_path": "logs/slow_queries.log"}
+# or from code (benchmarks/sql_profile.py does this): query_profiler.enable(slow_query_ms=0)
+
+import logging
+import logging.handlers
+import os
+import re
+import sqlite3
+import threading
+import time
+import weakref
+
+from app_config import get_config
+
+DEFAULT_SLOW_QUERY_MS = 50
+# Relative log paths are resolved against the project root (one level up from 'utils')
+DEFAULT_LOG_PATH = os.path.join('logs', 'slow_queries.log')
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+PROGRESS_STEP = 1000 # VM instructions between progress handler calls
+
+_PROJECT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+# Only these statements get an EXPLAIN QUERY PLAN (never BEGIN/COMMIT/PRAGMA/DDL)
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH|INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE)
+_SCANNED_TABLE = re.compile(r"^SCAN (?:TABLE )?(\w+)(?!.*\bUSING\b)")
+
+_settings = None # Set by enable()/disable(); None means "follow config.json"
+_settings_lock = threading.Lock()
+_stats = {} # normalized statement -> aggregate dict
+_stats_lock = threading.Lock()
+_slow_log = None
+_slow_log_path = None
+
+
+############################################################################
+# Public API
+############################################################################
+def is_enabled():
+    """True if new connections should be profiled."""
+    return _current_settings()["enabled"]
+
+
+def enable(slow_query_ms=DEFAULT_SLOW_QUERY_MS, log_path=DEFAULT_LOG_PATH):
+    """Profiles connections opened from now on, overriding config.json."""
+    global _settings
+    with _settings_lock:
+        _settings = {"enabled": True, "slow_query_ms": slow_query_ms, "log_path": log_path}
+
+
+def disable():
+    """Stops profiling new connections (overriding config.json)."""
+    global _settings
+    with _settings_lock:
+        _settings = {"enabled": False, "slow_query_ms": DEFAULT_SLOW_QUERY_MS, "log_path": DEFAULT_LOG_PATH}
+
+
+def connect(database, **kwargs):
+    """sqlite3.connect() with a profiling connection."""
+    return sqlite3.connect(database, factory=ProfilingConnection, **kwargs)
+
+
+def summary():
+    """
+    One dict per distinct statement profiled so far (whitespace-normalized): calls, total/max
+    duration in ms, rows returned and VM steps. Most total time first.
+    """
+    with _stats_lock:
+        rows = [dict(stat, statement=statement) for statement, stat in _stats.items()]
+    rows.sort(key=lambda row: row["total_ms"], reverse=True)
+    return rows
+
+
+def reset_summary():
+    with _stats_lock:
+        _stats.clear()
+
+
+############################################################################
+# Profiling connection / cursor
+############################################################################
+class ProfilingConnection(sqlite3.Connection):
+    """sqlite3 connection whose cursors (including conn.execute()'s) are ProfilingCursors."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.vm_steps = 0
+        self._cursors = weakref.WeakSet() # Open cursors, finished when the connection closes
+        self.set_progress_handler(self._count_steps, PROGRESS_STEP)
+
+    def _count_steps(self):
+        self.vm_steps += PROGRESS_STEP
+        return 0 # Never abort the query
+
+    def cursor(self, factory=None):
+        cursor = super().cursor(factory or ProfilingCursor)
+        if isinstance(cursor, ProfilingCursor):
+            self._cursors.add(cursor)
+        return cursor
+
+    # The C implementations of these don't go through self.cursor(), so route them explicitly
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def close(self):
+        for cursor in list(self._cursors):
+            cursor._finish()
+        super().close()
+
+
+class ProfilingCursor(sqlite3.Cursor):
+    """Times each statement from execute() until its results are used up."""
+
+    def __init__(self, connection):
+        super().__init__(connection)
+        self._record = None
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        self._begin(sql, _params_shape(parameters), parameters)
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        seq_of_parameters = list(seq_of_parameters) # Needed twice: for the shape and the query
+        shape = f"{len(seq_of_parameters)} x {_params_shape(seq_of_parameters[0]) if seq_of_parameters else '()'}"
+        self._begin(sql, shape, seq_of_parameters[0] if seq_of_parameters else ())
+        return self._timed(super().executemany, sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        self._finish()
+        self._begin(sql_script, "script", ())
+        try:
+            return self._timed(super().executescript, sql_script)
+        finally:
+            self._finish()
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is None:
+            self._finish()
+        elif self._record is not None:
+            self._record["rows"] += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(super().fetchmany, self.arraysize if size is None else size)
+        if self._record is not None:
+            self._record["rows"] += len(rows)
+        if not rows:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        if self._record is not None:
+            self._record["rows"] += len(rows)
+        self._finish()
+        return rows
+
+    def __next__(self):
+        try:
+            row = self._timed(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+        if self._record is not None:
+            self._record["rows"] += 1
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # e.g. conn.execute(...).fetchone(): the cursor is dropped before its results run out
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+    # --- Internals ---
+
+    def _begin(self, sql, params_shape, explain_params):
+        self._record = {
+            "sql": sql, "params_shape": params_shape, "explain_params": explain_params,
+            "seconds": 0.0, "rows": 0, "steps_start": self.connection.vm_steps,
+        }
+
+    def _timed(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            if self._record is not None:
+                self._record["seconds"] += time.perf_counter() - start
+
+    def _finish(self):
+        """Records the current statement (once) and logs it if it was slow."""
+        record, self._record = self._record, None
+        if record is None:
+            return
+        vm_steps = self.connection.vm_steps - record["steps_start"]
+        rows_changed = self.rowcount if self.rowcount > 0 else 0
+        duration_ms = record["seconds"] * 1000
+        _add_to_summary(record["sql"], duration_ms, record["rows"], vm_steps)
+
+        settings = _current_settings()
+        if duration_ms >= settings["slow_query_ms"]:
+            plan = _explain(self.connection, record["sql"], record["explain_params"])
+            _slow_query_logger(settings["log_path"]).warning(
+                "slow query: %.1f ms, %d rows returned, %d rows changed, ~%d VM steps, up to %s rows scanned (full scans)\n"
+                "  params: %s\n  sql: %s\n  plan:\n%s",
+                duration_ms, record["rows"], rows_changed, vm_steps,
+                _scanned_rows_estimate(self.connection, plan),
+                record["params_shape"], _normalize(record["sql"]),
+                "\n".join(f"    {line}" for line in plan) or "    (not available)",
+            )
+
+
+############################################################################
+# Helper Functions
+############################################################################
+def _current_settings():
+    if _settings is not None:
+        return _settings
+    configured = get_config().get("sql_profiler") or {}
+    return {
+        "enabled": bool(configured.get("enabled", False)),
+        "slow_query_ms": configured.get("slow_query_ms", DEFAULT_SLOW_QUERY_MS),
+        "log_path": configured.get("log_path", DEFAULT_LOG_PATH),
+    }
+
+
+def _params_shape(parameters):
+    """e.g. '(str, str)' or '{id: int, Notes: str}' - never the values themselves."""
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    try:
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    except TypeError:
+        return type(parameters).__name__
+
+
+def _normalize(sql):
+    return " ".join(sql.split())
+
+
+def _add_to_summary(sql, duration_ms, rows, vm_steps):
+    statement = _normalize(sql)
+    with _stats_lock:
+        stat = _stats.get(statement)
+        if stat is None:
+            stat = _stats[statement] = {"calls": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0, "vm_steps": 0}
+        stat["calls"] += 1
+        stat["total_ms"] += duration_ms
+        stat["max_ms"] = max(stat["max_ms"], duration_ms)
+        stat["rows"] += rows
+        stat["vm_steps"] += vm_steps
+
+
+def _explain(conn, sql, parameters):
+    """EXPLAIN QUERY PLAN lines for sql, or [] if it can't be explained."""
+    if not _EXPLAINABLE.match(sql):
+        return []
+    try:
+        # A plain sqlite3.Cursor, so the EXPLAIN itself isn't profiled
+        rows = sqlite3.Cursor(conn).execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+    except sqlite3.Error as e:
+        return [f"(EXPLAIN failed: {e})"]
+    # Rows are (id, parent, notused, detail); indent children under their parent
+    depth = {0: -1}
+    lines = []
+    for row in rows:
+        node_id, parent, detail = row[0], row[1], row[3]
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return lines
+
+
+def _scanned_rows_estimate(conn, plan):
+    """Sum of the row counts of the tables the plan fully scans ('?' if none/unknown)."""
+    total = None
+    for line in plan:
+        match = _SCANNED_TABLE.match(line.strip())
+        if match is None:
+            continue
+        try:
+            count = sqlite3.Cursor(conn).execute(f'SELECT COUNT(*) FROM "{match.group(1)}"').fetchone()[0]
+        except sqlite3.Error:
+            continue # e.g. a CTE or subquery name rather than a table
+        total = (total or 0) + count
+    return "?" if total is None else total
+
+
+def _slow_query_logger(log_path):
+    """The rotating slow-query logger, (re)pointed at log_path."""
+    global _slow_log, _slow_log_path
+    with _settings_lock:
+        if _slow_log is None or _slow_log_path != log_path:
+            path = log_path if os.path.isabs(log_path) else os.path.join(_PROJECT_ROOT, log_path)
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            logger = logging.getLogger("trades.slow_queries")
+            logger.propagate = False # Only in the slow-query log, not on the console
+            logger.setLevel(logging.INFO)
+            for handler in list(logger.handlers):
+                logger.removeHandler(handler)
+                handler.close()
+            handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(asctime)s %(threadName)s %(message)s"))
+            logger.addHandler(handler)
+            _slow_log, _slow_log_path = logger, log_path
+        return _slow_log
@@ -0,0 +1,166 @@
+# utils/rolling_stats.py - Vectorised rolling performance statistics
+#
+# Rolling win rate, expectancy, profit factor, average R-multiple (P&L / Risk ($)), P&L standard
+# deviation and a Sharpe-like ratio, over the last N trades or the last N trading days. Every
+# window sum comes from ONE cumulative sum per quantity (sum over (i-N, i] = csum[i] - csum[i-N]),
+# so a million trades cost a handful of numpy passes instead of a Python loop per window.
+#
+#   stats = rolling_stats.rolling_trade_stats(pnl, risk, window=50)
+#   stats["expectancy"]  # numpy array, one value per trade (NaN until min_periods trades)
+#
+#   daily = rolling_stats.rolling_daily_stats(entry_times, pnl, risk, window_days=20)
+#   daily["day"], daily["profit_factor"]  # one value per trading day
+#
+# Inputs are array-likes (numpy arrays, pandas Series, lists). Trades must be in chronological
+# order for rolling_trade_stats; rolling_daily_stats groups by day itself.
+
+from lazy_imports import lazy_module
+np = lazy_module("numpy")
+
+DEFAULT_TRADE_WINDOW = 50 # Trades per rolling window
+DEFAULT_DAY_WINDOW = 20 # Trading days per rolling window (about one month)
+
+# Keys of the dicts returned below (besides "day" for the daily stats)
+STAT_NAMES = ("trades", "win_rate", "expectancy", "profit_factor", "avg_r", "pnl_std", "sharpe")
+
+
+############################################################################
+# Public API
+############################################################################
+def rolling_trade_stats(pnl, risk=None, window=DEFAULT_TRADE_WINDOW, min_periods=None):
+    """
+    Rolling statistics over the last `window` trades, one value per trade.
+    pnl: realized P&L per trade, oldest first. risk: Risk ($) per trade (optional; trades
+    without a positive risk are left out of avg_r). Windows with fewer than min_periods
+    trades (default: window) are NaN. pnl_std/sharpe are per trade.
+    """
+    pnl = _as_float_array(pnl)
+    r_multiple = _r_multiples(pnl, risk)
+    min_periods = window if min_periods is None else min_periods
+    center = pnl.mean() if len(pnl) else 0.0 # Shifting by the mean keeps the sum of squares precise
+    return _stats_from_window_sums(_window_sums(_per_trade_quantities(pnl, r_multiple, pnl - center), window),
+                                   sample_center=center, min_periods=min_periods)
+
+
+def rolling_daily_stats(entry_times, pnl, risk=None, window_days=DEFAULT_DAY_WINDOW, min_periods=None):
+    """
+    Rolling statistics over the last `window_days` trading days (days with at least one trade),
+    one value per trading day. entry_times: datetime64 values / pandas datetimes per trade, in
+    any order (NaT trades are skipped). Win rate, expectancy, profit factor and avg_r pool all
+    trades in the window; pnl_std/sharpe are computed over DAILY net P&L. Windows with fewer
+    than min_periods days (default: window_days) are NaN. The result also has "day"
+    (datetime64[D]) and "net_pnl" (that day's net P&L).
+    """
+    days = np.asarray(entry_times, dtype='datetime64[ns]').astype('datetime64[D]')
+    pnl = _as_float_array(pnl)
+    r_multiple = _r_multiples(pnl, risk)
+    has_day = ~np.isnat(days)
+    days, pnl, r_multiple = days[has_day], pnl[has_day], r_multiple[has_day]
+    min_periods = window_days if min_periods is None else min_periods
+
+    unique_days, day_index = np.unique(days, return_inverse=True)
+    n_days = len(unique_days)
+    # Per-day totals of the trade-level quantities with one bincount each (day_index maps every
+    # trade to its sorted day); pnl_std/sharpe describe DAILY net P&L, so the sample rows are
+    # filled from the day totals instead
+    quantities = _per_trade_quantities(pnl, r_multiple, pnl)
+    daily = np.empty((len(quantities), n_days))
+    for row in range(_SAMPLE_COUNT):
+        daily[row] = np.bincount(day_index, weights=quantities[row], minlength=n_days)
+    daily_net = np.bincount(day_index, weights=pnl, minlength=n_days)
+    center = daily_net.mean() if n_days else 0.0
+    daily[_SAMPLE_COUNT] = 1.0
+    daily[_SAMPLE_SUM] = daily_net - center
+    daily[_SAMPLE_SUMSQ] = (daily_net - center) ** 2
+    stats = _stats_from_window_sums(_window_sums(daily, window_days), sample_center=center, min_periods=min_periods)
+    stats["day"] = unique_days
+    stats["net_pnl"] = daily_net
+    return stats
+
+
+############################################################################
+# Helper Functions
+############################################################################
+def _as_float_array(values):
+    """values as a float64 array; missing / non-numeric P&L counts as 0 (like the KPI code)."""
+    return np.nan_to_num(np.asarray(values, dtype=float), nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def _r_multiples(pnl, risk):
+    """P&L / Risk ($) per trade; NaN where the risk is missing, zero or negative."""
+    if risk is None:
+        return np.full(len(pnl), np.nan)
+    risk = np.asarray(risk, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(risk > 0, pnl / risk, np.nan)
+
+
+def _window_sums(values, window):
+    """
+    For every position i, the sum of values over the trailing window ending at i (shorter at the
+    start), from a single cumulative sum. values may be 2-D (one quantity per row), which sums
+    all rows in one pass.
+    """
+    sums = np.cumsum(np.asarray(values, dtype=float), axis=-1)
+    if window < sums.shape[-1]:
+        sums[..., window:] -= sums[..., :-window] # csum[i] - csum[i - window] (numpy buffers the overlap)
+    return sums
+
+
+# Rows of the quantity matrix built by _per_trade_quantities
+(_TRADES, _WINS, _GROSS_PROFIT, _GROSS_LOSS, _R_SUM, _R_COUNT,
+ _SAMPLE_COUNT, _SAMPLE_SUM, _SAMPLE_SUMSQ) = range(9)
+
+
+def _per_trade_quantities(pnl, r_multiple, sample):
+    """
+    One row per quantity the statistics are built from (see the row constants above), one column
+    per trade. sample holds the values pnl_std/sharpe describe, already shifted by their center.
+    """
+    has_r = ~np.isnan(r_multiple)
+    quantities = np.empty((9, len(pnl)))
+    quantities[_TRADES] = 1.0
+    quantities[_WINS] = pnl > 0
+    quantities[_GROSS_PROFIT] = np.where(pnl > 0, pnl, 0.0)
+    quantities[_GROSS_LOSS] = np.where(pnl < 0, -pnl, 0.0)
+    quantities[_R_SUM] = np.where(has_r, r_multiple, 0.0)
+    quantities[_R_COUNT] = has_r
+    quantities[_SAMPLE_COUNT] = 1.0
+    quantities[_SAMPLE_SUM] = sample
+    quantities[_SAMPLE_SUMSQ] = sample ** 2
+    return quantities
+
+
+def _stats_from_window_sums(sums, sample_center, min_periods):
+    """
+    Turns the window sums of the quantity rows into the STAT_NAMES arrays. The sample rows are
+    shifted by sample_center; windows with fewer than min_periods samples are NaN.
+    """
+    (trades, wins, gross_profit, gross_loss, r_sum, r_count,
+     sample_count, sample_sum, sample_sumsq) = sums
+    with np.errstate(divide='ignore', invalid='ignore'):
+        win_rate = np.where(trades > 0, wins / trades * 100, np.nan)
+        expectancy = np.where(trades > 0, (gross_profit - gross_loss) / trades, np.nan)
+        # No losing trade in the window -> undefined (NaN) rather than infinite, so charts stay readable
+        profit_factor = np.where(gross_loss > 0, gross_profit / gross_loss, np.nan)
+        avg_r = np.where(r_count > 0, r_sum / r_count, np.nan)
+
+        # Sample variance from the shifted sums: (sumsq - sum^2 / n) / (n - 1)
+        variance = (sample_sumsq - sample_sum ** 2 / sample_count) / (sample_count - 1)
+        pnl_std = np.where(sample_count > 1, np.sqrt(np.maximum(variance, 0.0)), np.nan)
+        sample_mean = sample_sum / sample_count + sample_center
+        sharpe = np.where(pnl_std > 0, sample_mean / pnl_std, np.nan)
+
+    stats = {
+        "trades": trades,
+        "win_rate": win_rate,
+        "expectancy": expectancy,
+        "profit_factor": profit_factor,
+        "avg_r": avg_r,
+        "pnl_std": pnl_std,
+        "sharpe": sharpe,
+    }
+    too_short = sample_count < min_periods # Not enough history yet
+    for name in STAT_NAMES[1:]:
+        stats[name][too_short] = np.nan
+    return stats
@@ -0,0 +1,296 @@
+# utils/trade_archive.py - Monthly archive partitions for closed months of trades
+#
+# trades_journal used to hold every trade forever, so every range query (a calendar month, a day's
+# table, the progress report's range) scanned the whole history. Closed months are now rolled out
+# of it into one table per month, in the same SQLite file:
+#
+# - trades_archive_YYYY_MM: the month's trades, same columns and ids as trades_journal.
+# - trade_archives: the catalog (month -> table, trade count, net P&L, when it was frozen).
+# - archive_daily_summary: the archived trades' per-day aggregates (trade count, wins, gross
+#   profit/loss, net P&L), frozen when the month is rolled. equity_series.py and cross_journal.py
+#   read archived days from here instead of re-aggregating the trades.
+# - trade_archive_ids: archived id -> month, so writes by id find the row.
+#
+# trades_journal keeps the hot period: the last config.json "archive" hot_months months (the
+# current one included). Readers in database.py add only the archive tables of the months a
+# query's date range touches (archive_tables()), so a month's calendar reads trades_journal plus
+# at most one small archive table; a full-history read goes through them all.
+#
+# Archived trades stay editable: updating, replacing or deleting one by id first moves it back
+# into trades_journal (thaw(), inside the same transaction) and refreezes its month's aggregates.
+# Trades written with an old Entry Time (imports, edits) also land in trades_journal. The next
+# roll moves them into their month's archive again.
+#
+# roll() moves every closed month (one write transaction per month, so readers and writers only
+# wait for one month at a time). Archiving is off unless config.json "archive" enabled is set
+# (Settings page): external readers of trades_journal (your own SQL, other tools) then only see the
+# hot period. While it is on, a background thread started at startup rolls the available journals
+# every check_interval_s (start_scheduler).
+#
+# Archives are tables rather than separate attached files: in WAL mode a transaction spanning
+# several attached files is not atomic, and a trade must never be in both places or neither.
+
+import os
+import re
+import threading
+import time
+from datetime import date
+
+import database as db
+from app_config import get_archive_config
+from instrumentation import timed
+from app_logging import get_logger
+
+CATALOG_TABLE = 'trade_archives'
+ID_TABLE = 'trade_archive_ids'
+FROZEN_SUMMARY_TABLE = 'archive_daily_summary'
+ARCHIVE_TABLE_PREFIX = 'trades_archive_'
+
+# Same expressions as equity_series.py: Entry Time is stored as '%Y-%m-%d %H:%M:%S'
+_DAY_SQL = 'substr("Entry Time", 1, 10)'
+_PNL_SQL = 'COALESCE(CAST("Realized P&L" AS REAL), 0)'
+_MONTH_RE = re.compile(r'^\d{4}-(0[1-9]|1[0-2])$') # Months with another Entry Time format stay hot
+
+log = get_logger(__name__)
+
+
+def archive_table(month):
+    """Name of the archive table of a 'YYYY-MM' month."""
+    return f"{ARCHIVE_TABLE_PREFIX}{month.replace('-', '_')}"
+
+
+def _month_bounds(month):
+    """('YYYY-MM-01', first day of the next month) of a 'YYYY-MM' month."""
+    year, month_number = int(month[:4]), int(month[5:7])
+    if month_number == 12:
+        return f"{month}-01", f"{year + 1:04d}-01-01"
+    return f"{month}-01", f"{year:04d}-{month_number + 1:02d}-01"
+
+
+def hot_period_start(today=None):
+    """First day ('YYYY-MM-DD') of the oldest month kept in trades_journal."""
+    today = today or date.today()
+    months_back = max(1, int(get_archive_config()['hot_months'])) - 1
+    month_index = today.year * 12 + today.month - 1 - months_back
+    return f"{month_index // 12:04d}-{month_index % 12 + 1:02d}-01"
+
+
+############################################################################
+# Schema (created by database.initialize_db, in its transaction)
+############################################################################
+def create_tables(cursor):
+    """Creates the catalog tables and adds columns new to trades_journal to every archive table."""
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {CATALOG_TABLE} (
+            month TEXT PRIMARY KEY,
+            table_name TEXT NOT NULL,
+            trade_count INTEGER NOT NULL,
+            net_pnl REAL NOT NULL,
+            frozen_at TEXT NOT NULL
+        )
+    """)
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {ID_TABLE} (id INTEGER PRIMARY KEY, month TEXT NOT NULL)")
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {FROZEN_SUMMARY_TABLE} (
+            day TEXT PRIMARY KEY,
+            trade_count INTEGER NOT NULL,
+            win_count INTEGER NOT NULL,
+            gross_profit REAL NOT NULL,
+            gross_loss REAL NOT NULL,
+            net_pnl REAL NOT NULL
+        )
+    """)
+    columns = _hot_columns(cursor)
+    for (table_name,) in cursor.execute(f"SELECT table_name FROM {CATALOG_TABLE}").fetchall():
+        existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table_name})").fetchall()}
+        for name, column_type in columns:
+            if name not in existing:
+                cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN \"{name}\" {column_type}")
+
+
+def _hot_columns(cursor):
+    """[(name, declared type)] of trades_journal's columns other than id."""
+    return [(row[1], row[2]) for row in cursor.execute(f"PRAGMA table_info({db.TABLE_NAME})").fetchall() if row[1] != 'id']
+
+
+def _ensure_archive_table(cursor, month):
+    table_name = archive_table(month)
+    column_definitions = ', '.join(f"\"{name}\" {column_type}" for name, column_type in _hot_columns(cursor))
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {table_name} (id INTEGER PRIMARY KEY, {column_definitions})")
+    return table_name
+
+
+############################################################################
+# Reads
+############################################################################
+def archive_tables(conn, start_day=None, end_exclusive_day=None):
+    """
+    Archive tables of the months overlapping [start_day, end_exclusive_day) ('YYYY-MM-DD'; None =
+    unbounded), oldest first.
+    """
+    sql = f"SELECT table_name FROM {CATALOG_TABLE} WHERE trade_count > 0"
+    params = []
+    if start_day:
+        sql += " AND month >= ?"
+        params.append(start_day[:7])
+    if end_exclusive_day:
+        sql += " AND month || '-01' < ?"
+        params.append(end_exclusive_day)
+    return [row[0] for row in conn.execute(sql + " ORDER BY month", params).fetchall()]
+
+
+def archive_tables_for_days(conn, days):
+    """Archive tables of the months of the given 'YYYY-MM-DD' days, oldest first."""
+    months = sorted({day[:7] for day in days if day})
+    tables = []
+    for start in range(0, len(months), db._MAX_SQL_PARAMS):
+        chunk = months[start:start + db._MAX_SQL_PARAMS]
+        tables += [row[0] for row in conn.execute(
+            f"SELECT table_name FROM {CATALOG_TABLE} WHERE trade_count > 0 AND month IN ({', '.join('?' * len(chunk))}) ORDER BY month",
+            chunk
+        ).fetchall()]
+    return tables
+
+
+############################################################################
+# Writes
+############################################################################
+def thaw(cursor, internal_db_ids):
+    """
+    Moves the archived trades among internal_db_ids back into trades_journal (inside the caller's
+    write transaction) and refreezes their months. Returns the number of trades moved.
+    """
+    ids = [i for i in dict.fromkeys(internal_db_ids) if i is not None]
+    by_month = {}
+    for start in range(0, len(ids), db._MAX_SQL_PARAMS):
+        chunk = ids[start:start + db._MAX_SQL_PARAMS]
+        for internal_db_id, month in cursor.execute(
+            f"SELECT id, month FROM {ID_TABLE} WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+        ).fetchall():
+            by_month.setdefault(month, []).append(internal_db_id)
+
+    columns = ', '.join(f'"{col}"' for col in db.COLUMNS_TO_STORE)
+    for month, month_ids in by_month.items():
+        table_name = archive_table(month)
+        for start in range(0, len(month_ids), db._MAX_SQL_PARAMS):
+            chunk = month_ids[start:start + db._MAX_SQL_PARAMS]
+            placeholders = ', '.join('?' * len(chunk))
+            cursor.execute(f"INSERT INTO {db.TABLE_NAME} (id, {columns}) SELECT id, {columns} FROM {table_name} WHERE id IN ({placeholders})", chunk)
+            cursor.execute(f"DELETE FROM {table_name} WHERE id IN ({placeholders})", chunk)
+            cursor.execute(f"DELETE FROM {ID_TABLE} WHERE id IN ({placeholders})", chunk)
+        _freeze(cursor, month)
+    return sum(len(month_ids) for month_ids in by_month.values())
+
+
+def _archive_month(cursor, month):
+    """Moves a closed month's trades from trades_journal into its archive table; returns how many."""
+    table_name = _ensure_archive_table(cursor, month)
+    start_day, end_exclusive_day = _month_bounds(month)
+    columns = ', '.join(f'"{col}"' for col in db.COLUMNS_TO_STORE)
+    in_month = '"Entry Time" >= ? AND "Entry Time" < ?'
+    cursor.execute(
+        f"INSERT INTO {table_name} (id, {columns}) SELECT id, {columns} FROM {db.TABLE_NAME} WHERE {in_month}",
+        (start_day, end_exclusive_day)
+    )
+    moved = cursor.rowcount
+    cursor.execute(
+        f"INSERT OR REPLACE INTO {ID_TABLE} (id, month) SELECT id, ? FROM {db.TABLE_NAME} WHERE {in_month}",
+        (month, start_day, end_exclusive_day)
+    )
+    cursor.execute(f"DELETE FROM {db.TABLE_NAME} WHERE {in_month}", (start_day, end_exclusive_day))
+    _freeze(cursor, month)
+    return moved
+
+
+def _freeze(cursor, month):
+    """Recomputes a month's frozen daily aggregates and catalog row from its archive table."""
+    table_name = archive_table(month)
+    start_day, end_exclusive_day = _month_bounds(month)
+    cursor.execute(f"DELETE FROM {FROZEN_SUMMARY_TABLE} WHERE day >= ? AND day < ?", (start_day, end_exclusive_day))
+    cursor.execute(f"""
+        INSERT INTO {FROZEN_SUMMARY_TABLE} (day, trade_count, win_count, gross_profit, gross_loss, net_pnl)
+        SELECT {_DAY_SQL},
+               COUNT(*),
+               SUM(CASE WHEN {_PNL_SQL} > 0 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN {_PNL_SQL} > 0 THEN {_PNL_SQL} ELSE 0 END),
+               SUM(CASE WHEN {_PNL_SQL} < 0 THEN {_PNL_SQL} ELSE 0 END),
+               SUM({_PNL_SQL})
+        FROM {table_name}
+        GROUP BY {_DAY_SQL}
+    """)
+    trade_count, net_pnl = cursor.execute(
+        f"SELECT COUNT(*), COALESCE(SUM({_PNL_SQL}), 0) FROM {table_name}"
+    ).fetchone()
+    if trade_count == 0: # Every trade thawed: drop the empty partition
+        cursor.execute(f"DROP TABLE {table_name}")
+        cursor.execute(f"DELETE FROM {CATALOG_TABLE} WHERE month = ?", (month,))
+        return
+    cursor.execute(
+        f"INSERT OR REPLACE INTO {CATALOG_TABLE} (month, table_name, trade_count, net_pnl, frozen_at) "
+        f"VALUES (?, ?, ?, ?, datetime('now'))",
+        (month, table_name, trade_count, net_pnl)
+    )
+
+
+@timed("db")
+def roll(today=None):
+    """
+    Moves every closed month (before hot_period_start()) out of the current database's
+    trades_journal into its archive table. Returns {month: trades moved}.
+    """
+    cutoff = hot_period_start(today)
+    months = [row[0] for row in db._fetch_rows(
+        f"SELECT DISTINCT substr(\"Entry Time\", 1, 7) FROM {db.TABLE_NAME} WHERE \"Entry Time\" >= '0000' AND \"Entry Time\" < ?",
+        (cutoff,)
+    )]
+    moved = {}
+    for month in sorted(month for month in months if _MONTH_RE.match(month)):
+        # One transaction per month: the write lock is held for one month's move at a time
+        moved[month] = db.run_write(lambda cursor, touched_days, month=month: _archive_month(cursor, month))
+    if moved:
+        log.info("Archived %d trades from %d closed month(s)", sum(moved.values()), len(moved))
+    return moved
+
+
+def archive_summary():
+    """The current database's catalog rows (month, table_name, trade_count, net_pnl, frozen_at), oldest first."""
+    return [dict(row) for row in db._fetch_rows(f"SELECT * FROM {CATALOG_TABLE} ORDER BY month")]
+
+
+############################################################################
+# Scheduling
+############################################################################
+# Rolls run on one daemon thread per server process, started by app.py's startup tasks, never
+# from a request. Archiving is opt-in (config.json "archive" enabled, or the Settings page): it
+# changes what other readers of the file see in trades_journal. The thread re-reads the setting
+# on every round, so switching it on takes effect within check_interval_s.
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def start_scheduler(journal_names):
+    """
+    Starts (once per process) the thread that rolls every journal in journal_names() (a callable,
+    e.g. journals.available_journals) every check_interval_s while archiving is enabled.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = threading.Thread(target=_run_scheduler, args=(journal_names,), name="trade-archive", daemon=True)
+            _scheduler.start()
+
+
+def _run_scheduler(journal_names):
+    while True:
+        settings = get_archive_config()
+        if settings['enabled']:
+            for db_name in journal_names():
+                if not os.path.exists(db_name): # Nobody has opened it yet: nothing to archive
+                    continue
+                try:
+                    with db.use_database(db_name):
+                        db.ensure_db_initialized() # The catalog tables
+                        roll()
+                except Exception:
+                    log.exception("Archiving closed months of '%s' failed", db_name)
+        time.sleep(max(1.0, float(settings['check_interval_s'])))
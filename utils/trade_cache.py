@@ -0,0 +1,123 @@
+# utils/trade_cache.py - Per-day LRU cache of trade rows for the Daily Helper
+#
+# Entries are keyed by (database name, 'YYYY-MM-DD') and hold the rows fetch_trades_by_date()
+# would return for that day. A miss loads the requested day AND the days around it with a
+# single range query, so flipping between recent sessions in the date picker stays in memory.
+# Every committed write (see database.add_write_listener) drops the entries for the days it touched.
+# Writes from OTHER processes (several server workers on one file) don't reach those listeners, so
+# the cache remembers the database's data version (database.get_data_version: this process's
+# write counter and the file's modification times) it has seen last. A lookup that finds another
+# version drops all of that database's days. The listener moves the remembered version past this
+# process's own write only if it was the version right before that write; if another process
+# wrote in between, it drops all of the database's days as well.
+# Each open journal has its own cache (journals.Journal.cache), closed along with the journal.
+
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+import database as db
+import journals
+
+
+class TradeDayCache:
+    """LRU cache of trades per (database, day), invalidated by database write events."""
+
+    def __init__(self, max_days=64, warm_days=3):
+        self.max_days = max_days # Max number of days kept in memory
+        self.warm_days = warm_days # Days before/after the requested day loaded on a miss
+        self._entries = OrderedDict() # (db_name, 'YYYY-MM-DD') -> list of trade dicts
+        self._lock = threading.Lock()
+        self._write_seq = 0 # Bumped on every invalidation; loads that raced a write are not stored
+        self._file_versions = {} # db_name -> get_data_version() seen last (this process's write count, file times)
+        self.hits = 0
+        self.misses = 0
+
+    def get_trades(self, target_date):
+        """
+        Returns the trades for target_date (a datetime.date), from memory if possible.
+        The returned list is a copy and can be modified freely.
+        """
+        key = (db.get_database_info()[0], target_date.strftime("%Y-%m-%d"))
+        data_version = db.get_data_version() # File times change with any process's commit
+        with self._lock:
+            if self._file_versions.get(key[0], data_version) != data_version:
+                self._drop_database(key[0]) # Changed since the last look and not by a write the listener accounted for
+            self._file_versions[key[0]] = data_version
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return [dict(row) for row in self._entries[key]]
+            self.misses += 1
+            seq_before_load = self._write_seq
+
+        # Warm the neighbourhood of the requested day with one query
+        start_date = target_date - timedelta(days=self.warm_days)
+        end_date = target_date + timedelta(days=self.warm_days)
+        rows_by_day = {}
+        for offset in range((end_date - start_date).days + 1):
+            rows_by_day[(start_date + timedelta(days=offset)).strftime("%Y-%m-%d")] = []
+        for row in db.fetch_trades_between(start_date, end_date):
+            rows_by_day.setdefault(str(row.get("Entry Time"))[:10], []).append(row)
+
+        with self._lock:
+            if self._write_seq == seq_before_load: # Otherwise a write landed mid-load; don't cache stale rows
+                for day, rows in rows_by_day.items():
+                    if day != key[1]:
+                        self._store((key[0], day), rows)
+                self._store(key, rows_by_day[key[1]]) # Requested day last = most recently used
+        return [dict(row) for row in rows_by_day[key[1]]]
+
+    def invalidate(self, database_name, days=None, version_before=None, version_after=None):
+        """
+        Drops cached days for database_name (all of them if days is None). Used as a write listener,
+        with the get_data_version() from just before and right after this process's write.
+        """
+        with self._lock:
+            if version_after is not None:
+                if self._file_versions.get(database_name) != version_before:
+                    days = None # Another process wrote since the last lookup: its days are unknown
+                self._file_versions[database_name] = version_after
+            if days is None:
+                self._drop_database(database_name)
+            else:
+                self._write_seq += 1
+                for day in days:
+                    self._entries.pop((database_name, day), None)
+
+    def clear(self):
+        """Drops every cached day."""
+        with self._lock:
+            self._write_seq += 1
+            self._entries.clear()
+
+    def _drop_database(self, database_name):
+        # Caller must hold self._lock
+        self._write_seq += 1
+        for key in [k for k in self._entries if k[0] == database_name]:
+            del self._entries[key]
+
+    def _store(self, key, rows):
+        # Caller must hold self._lock
+        self._entries[key] = rows
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_days:
+            self._entries.popitem(last=False) # Evict least recently used day
+
+
+# --- Per-journal instances ---
+def get_trade_cache():
+    """Returns the current journal's day cache."""
+    return journals.get_journal().cache("trade_days", TradeDayCache)
+
+
+def _invalidate(database_name, days, version_before):
+    # Write listener: only a journal that is open (and has a day cache) has anything to drop
+    journal = journals.get_registry().peek(database_name)
+    cache = journal.peek_cache("trade_days") if journal is not None else None
+    if cache is not None:
+        # Runs under the written database
+        cache.invalidate(database_name, days, version_before=version_before, version_after=db.get_data_version())
+
+
+db.add_write_listener(_invalidate)
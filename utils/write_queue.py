@@ -0,0 +1,242 @@
+# utils/write_queue.py - Write-behind queue for trade journal writes
+#
+# Callbacks hand their inserts/updates/deletes to a single writer thread instead of
+# opening a connection and committing on the request thread.
+# - Operations are applied strictly in the order they were submitted.
+# - Repeated edits to the same 'id' that are still waiting are merged into one UPDATE.
+# - Everything waiting when the writer wakes up is applied in ONE transaction (one commit),
+#   with consecutive updates/deletes sent as a single executemany.
+# - Every submit returns a concurrent.futures.Future that resolves once the write is committed
+#   (the durability acknowledgement). Inserts resolve to the new SQLite 'id', updates and
+#   deletes to True/False (whether the row existed).
+# - Pending writes are flushed on interpreter shutdown.
+# - Each write goes to the journal that was current when it was submitted (journals.py): a batch
+#   holding writes for several journals commits one transaction per journal, in submission order.
+
+import atexit
+import itertools
+import sqlite3
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+import database as db
+from instrumentation import timed
+from app_logging import get_logger, fields
+
+log = get_logger(__name__)
+
+
+class _WriteOp:
+    """A single queued write. 'kind' is one of 'insert', 'update' or 'delete'."""
+
+    __slots__ = ("kind", "trade_id", "data", "future", "database")
+
+    def __init__(self, kind, trade_id=None, data=None):
+        self.kind = kind
+        self.trade_id = trade_id
+        self.data = data
+        self.future = Future()
+        self.database = db.get_database_info()[0] # The submitter's journal
+
+    @property
+    def key(self):
+        return self.database, self.trade_id
+
+
+class WriteBehindQueue:
+    """
+    Ordered write-behind queue with a dedicated writer thread.
+    Use get_write_queue() to get the shared instance used by the pages.
+    """
+
+    def __init__(self, max_batch_size=500):
+        self.max_batch_size = max_batch_size
+        self._pending = deque()
+        self._pending_updates = {} # (database, id) -> queued update op that later edits can still merge into
+        self._cond = threading.Condition()
+        self._submitted = 0 # Number of ops ever queued (merged edits don't count)
+        self._completed = 0 # Number of ops committed (or failed)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="trade-write-behind", daemon=True)
+        self._thread.start()
+
+    # --- Public API ---
+
+    def insert(self, trade_data_row):
+        """Queues a new trade. The returned Future resolves to the new DB 'id'."""
+        return self._submit(_WriteOp("insert", data=dict(trade_data_row)))
+
+    def update(self, internal_db_id, new_data):
+        """
+        Queues an update for an existing trade. If an update for the same 'id' is still
+        waiting, the new values are merged into it and its Future is returned.
+        """
+        op = _WriteOp("update", trade_id=internal_db_id, data=dict(new_data))
+        with self._cond:
+            self._check_open()
+            queued_op = self._pending_updates.get(op.key)
+            if queued_op is not None:
+                queued_op.data.update(new_data) # Later values win
+                return queued_op.future
+            self._pending_updates[op.key] = op
+            return self._enqueue(op)
+
+    def delete(self, internal_db_id):
+        """Queues a delete by internal DB 'id'."""
+        op = _WriteOp("delete", trade_id=internal_db_id)
+        with self._cond:
+            # Edits queued after this point must not merge into an update that runs before the delete
+            self._pending_updates.pop(op.key, None)
+        return self._submit(op)
+
+    @timed("db") # A callback waiting here is waiting on the database
+    def flush(self, timeout=None):
+        """
+        Blocks until every write queued before this call has been committed.
+        Returns True if everything was flushed, False on timeout.
+        """
+        with self._cond:
+            target = self._submitted
+            return self._cond.wait_for(lambda: self._completed >= target, timeout=timeout)
+
+    def pending_count(self):
+        """Number of queued writes not yet committed."""
+        with self._cond:
+            return self._submitted - self._completed
+
+    def close(self, timeout=None):
+        """Flushes all pending writes and stops the writer thread."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    # --- Internals ---
+
+    def _check_open(self):
+        if self._closed:
+            raise RuntimeError("Write-behind queue is closed.")
+
+    def _submit(self, op):
+        with self._cond:
+            self._check_open()
+            return self._enqueue(op)
+
+    def _enqueue(self, op):
+        # Caller must hold self._cond
+        self._pending.append(op)
+        self._submitted += 1
+        self._cond.notify_all()
+        return op.future
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                if not self._pending: # Closed and fully drained
+                    return
+                batch = []
+                while self._pending and len(batch) < self.max_batch_size:
+                    op = self._pending.popleft()
+                    if op.kind == "update" and self._pending_updates.get(op.key) is op:
+                        del self._pending_updates[op.key] # No more merging once picked up
+                    batch.append(op)
+            self._apply_batch(batch)
+            with self._cond:
+                self._completed += len(batch)
+                self._cond.notify_all()
+
+    def _apply_batch(self, batch):
+        """Applies a batch of ops, one transaction per journal, and resolves their Futures."""
+        for database, ops in itertools.groupby(batch, key=lambda op: op.database): # Consecutive runs
+            with db.use_database(database):
+                self._apply_journal_batch(list(ops))
+
+    def _apply_journal_batch(self, batch):
+        """Applies ops for the same journal in a single transaction and resolves their Futures."""
+        def apply(cursor, touched_days):
+            results = []
+            for run in self._runs(batch):
+                results.extend(self._apply_run(cursor, run, touched_days))
+            return results
+
+        try:
+            # BEGIN IMMEDIATE, retried while other processes hold the lock. Write listeners are
+            # notified (caches invalidated) before anyone sees the acknowledgement.
+            results = db.run_write(apply)
+        except Exception as e:
+            log.exception("Error committing a batch of %d queued trade writes", len(batch))
+            results = [(op, None, e) for op in batch]
+
+        for op, result, error in results:
+            if error is not None:
+                op.future.set_exception(error)
+            else:
+                op.future.set_result(result)
+
+    @staticmethod
+    def _runs(batch):
+        """Splits a batch into consecutive runs of the same kind (inserts are always on their own)."""
+        run = []
+        for op in batch:
+            if run and (op.kind != run[0].kind or op.kind == "insert"):
+                yield run
+                run = []
+            run.append(op)
+        if run:
+            yield run
+
+    def _apply_run(self, cursor, run, touched_days):
+        """
+        Applies one run inside a savepoint. Updates/deletes go through the bulk executemany
+        helpers; if that fails the run is undone and retried op by op so that only the
+        offending op reports an error.
+        """
+        kind = run[0].kind
+        if kind == "insert" or len(run) == 1:
+            return [self._apply_single(cursor, op, touched_days) for op in run]
+
+        run_days = set()
+        cursor.execute("SAVEPOINT write_run")
+        try:
+            if kind == "update":
+                outcomes = db._update_trades(cursor, [(op.trade_id, op.data) for op in run], run_days)
+            else:
+                outcomes = db._delete_trades(cursor, [op.trade_id for op in run], run_days)
+            cursor.execute("RELEASE write_run")
+            touched_days.update(run_days)
+            return [(op, outcomes.get(op.trade_id, False), None) for op in run]
+        except sqlite3.Error:
+            cursor.execute("ROLLBACK TO write_run")
+            cursor.execute("RELEASE write_run")
+            return [self._apply_single(cursor, op, touched_days) for op in run]
+
+    @staticmethod
+    def _apply_single(cursor, op, touched_days):
+        try: # A failed statement only undoes itself, not the transaction
+            if op.kind == "insert":
+                return op, db._insert_trade(cursor, op.data, touched_days), None
+            if op.kind == "update":
+                return op, db._update_trades(cursor, [(op.trade_id, op.data)], touched_days).get(op.trade_id, False), None
+            return op, db._delete_trades(cursor, [op.trade_id], touched_days).get(op.trade_id, False), None
+        except sqlite3.Error as e:
+            log.error("Error applying queued %s: %s", op.kind, e, extra=fields(trade_id=op.trade_id))
+            return op, None, e
+
+
+# --- Shared instance ---
+_write_queue = None
+_write_queue_lock = threading.Lock()
+
+
+def get_write_queue():
+    """Returns the process-wide write-behind queue, starting it on first use."""
+    global _write_queue
+    with _write_queue_lock:
+        if _write_queue is None:
+            _write_queue = WriteBehindQueue()
+            atexit.register(_write_queue.close) # Flush pending writes on shutdown
+        return _write_queue
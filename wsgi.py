@@ -0,0 +1,23 @@
+# wsgi.py - Production WSGI entry point
+#
+#   gunicorn -c gunicorn.conf.py wsgi:server        (Linux/macOS, several worker processes)
+#   waitress-serve --threads 8 wsgi:server          (any OS, one process)
+#   python serve.py                                 (picks one of the above from config.json "server")
+#
+# Importing this module builds the Dash app (with response compression, see app.py) with debug
+# tooling off and runs the startup work (config, database schema, equity triggers) right away, so
+# a worker's first real request doesn't pay for it. Every worker process does this for itself; the schema
+# setup takes SQLite's write lock, so workers starting together against one file are safe.
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'utils'))
+from app import app # Builds the Dash app and registers the pages
+
+server = app.server
+
+# One internal request runs Dash's own first-request setup (it copies the pages' callbacks into
+# the app) followed by the app's startup hook, before any client connects
+with server.test_client() as client:
+    client.get('/_dash-layout')